@@ -1,8 +1,11 @@
+import asyncio
+import time
 from datetime import timedelta
 
 import aioredis
 import orjson as json
-from solbot_cache.constants import BLOCKHASH_CACHE_KEY
+from solana.rpc.commitment import Processed
+from solbot_cache.constants import BLOCKHASH_CACHE_KEY, BLOCKHASH_CHANNEL
 from solbot_common.log import logger
 from solbot_common.utils import get_async_client
 from solbot_db.redis import RedisClient
@@ -38,6 +41,16 @@ class BlockhashCache(BaseAutoUpdateCache):
         resp = await get_async_client().get_latest_blockhash()
         return resp.value.blockhash, resp.value.last_valid_block_height
 
+    async def _get_block_height(self) -> int:
+        """
+        获取当前区块高度，交易进程据此判断 blockhash 剩余的有效区块数
+
+        Returns:
+            processed 级别的区块高度
+        """
+        resp = await self.client.get_block_height(commitment=Processed)
+        return resp.value
+
     async def _gen_new_value(self) -> str:
         """
         生成新的缓存值
@@ -45,14 +58,23 @@ class BlockhashCache(BaseAutoUpdateCache):
         Returns:
             序列化后的区块哈希信息
         """
-        _hash, _last_valid_block_height = await self._get_latest_blockhash()
+        fetched_at = time.time()
+        (_hash, _last_valid_block_height), _block_height = await asyncio.gather(
+            self._get_latest_blockhash(), self._get_block_height()
+        )
         return json.dumps(
             {
                 "blockhash": str(_hash),
                 "last_valid_block_height": str(_last_valid_block_height),
+                "block_height": str(_block_height),
+                "fetched_at": fetched_at,
             }
         ).decode("utf-8")
 
+    async def _on_updated(self, value: str) -> None:
+        """推送最新的区块哈希，交易进程据此更新进程内的区块哈希"""
+        await self.redis.publish(BLOCKHASH_CHANNEL, value)
+
     @classmethod
     async def get(cls, redis: aioredis.Redis | None = None) -> tuple[Hash, int]:
         """
@@ -9,7 +9,7 @@ from solbot_common.constants import RAY_V4
 from solbot_common.layouts.amm_v4 import LIQUIDITY_STATE_LAYOUT_V4
 from solbot_common.log import logger
 from solbot_common.utils.pool import fetch_pool_data_from_rpc
-from solbot_common.utils.utils import get_async_client
+from solbot_common.utils.utils import get_async_client, get_websocket_url
 from solbot_db.redis import RedisClient
 from solders.rpc.responses import ProgramNotification  # type: ignore
 from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
@@ -25,7 +25,7 @@ class RaydiumPoolCache(AutoUpdateCacheProtocol):
         max_concurrent_tasks: int = 10,
     ):
         self.rpc_client = get_async_client()
-        self.websocket_url = rpc_endpoint.replace("https://", "wss://")
+        self.websocket_url = get_websocket_url(rpc_endpoint)
         self.storeage = RaydiumPoolStoreage(redis)
         # 添加信号量来限制并发任务数
         self._semaphore = asyncio.Semaphore(max_concurrent_tasks)
@@ -58,6 +58,7 @@ class BaseAutoUpdateCache(AutoUpdateCacheProtocol):
             try:
                 val = await self._gen_new_value()
                 await self.redis.set(self.key, val, ex=timedelta(seconds=self._update_interval))
+                await self._on_updated(val)
                 logger.info(f"已更新 {self.__class__.__name__} 缓存，值: {val}")
                 self._last_update = datetime.now()
                 await asyncio.sleep(self._update_interval - 1)
@@ -71,6 +72,9 @@ class BaseAutoUpdateCache(AutoUpdateCacheProtocol):
         """生成新的缓存值"""
         raise NotImplementedError
 
+    async def _on_updated(self, value: Any) -> None:
+        """缓存更新后的回调，子类可用于推送更新"""
+
     @property
     def last_update(self) -> datetime | None:
         """获取最后更新时间"""
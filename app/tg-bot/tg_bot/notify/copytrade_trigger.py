@@ -5,7 +5,10 @@ from aiogram import Bot
 from aiogram.types import LinkPreviewOptions
 from jinja2 import BaseLoader, Environment
 from solbot_cache.token_info import TokenInfoCache
+from solbot_common.config import settings
 from solbot_common.cp.copytrade_event import NotifyCopyTradeConsumer
+from solbot_common.cp.partition import partition_channels
+from solbot_common.cp.swap_event import SWAP_EVENT_CHANNEL
 from solbot_common.log import logger
 from solbot_common.types.swap import SwapEvent
 
@@ -54,15 +57,21 @@ class CopyTradeNotify:
     ):
         self.redis = redis
         self.bot = bot
-        self.consumer = NotifyCopyTradeConsumer(
-            redis_client=redis,
-            consumer_group="copytrade_notify",
-            consumer_name="copytrade_notify",
-            batch_size=batch_size,
-            poll_timeout_ms=poll_timeout_ms,
-        )
+        # 交易事件分区时，每个分区一个消费者
+        self.consumers = [
+            NotifyCopyTradeConsumer(
+                redis_client=redis,
+                consumer_group="copytrade_notify",
+                consumer_name="copytrade_notify",
+                batch_size=batch_size,
+                poll_timeout_ms=poll_timeout_ms,
+                channel=channel,
+            )
+            for channel in partition_channels(SWAP_EVENT_CHANNEL, settings.trading.partitions)
+        ]
         # Register the callback
-        self.consumer.register_callback(self._handle_event)
+        for consumer in self.consumers:
+            consumer.register_callback(self._handle_event)
         self.user_service = UserService()
         self.copytrade_service = CopyTradeService()
         self.token_info_cache = TokenInfoCache()
@@ -131,11 +140,12 @@ class CopyTradeNotify:
 
     async def start(self):
         """启动跟单通知"""
-        # 创建任务但不等待它完成
-        consumer_task = asyncio.create_task(self.consumer.start())
-        # 添加任务完成回调以处理可能的异常
-        consumer_task.add_done_callback(lambda t: t.exception() if t.exception() else None)
+        for consumer in self.consumers:
+            # 创建任务但不等待它完成
+            consumer_task = asyncio.create_task(consumer.start())
+            # 添加任务完成回调以处理可能的异常
+            consumer_task.add_done_callback(lambda t: t.exception() if t.exception() else None)
 
-    def stop(self):
+    async def stop(self):
         """停止跟单通知"""
-        self.consumer.stop()
+        await asyncio.gather(*(consumer.stop() for consumer in self.consumers))
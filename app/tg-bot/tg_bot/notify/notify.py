@@ -23,6 +23,8 @@ class Notify:
         await asyncio.gather(*tasks)
 
     async def stop(self):
-        self.smart_wallet_swap_notify.stop()
-        self.swap_result_notify.stop()
-        self.copytrade_notify.stop()
+        await asyncio.gather(
+            self.smart_wallet_swap_notify.stop(),
+            self.swap_result_notify.stop(),
+            self.copytrade_notify.stop(),
+        )
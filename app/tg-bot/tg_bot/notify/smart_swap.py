@@ -194,9 +194,10 @@ class SmartWalletSwapAlertNotify:
         # 使用 create_task 来启动消费者，避免阻塞
         self._consumer_task = asyncio.create_task(self.consumer.start())
 
-    def stop(self) -> None:
+    async def stop(self) -> None:
         """停止通知服务"""
         if hasattr(self, "_consumer_task"):
+            await self.consumer.stop()
             self._consumer_task.cancel()
 
 
@@ -175,7 +175,7 @@ class SwapResultNotify:
         logger.info("Starting swap result notify")
         self._consumer_task = asyncio.create_task(self.consumer.start())
 
-    def stop(self):
+    async def stop(self):
         """停止用户交易结果通知"""
         if hasattr(self, "_consumer_task"):
-            self.consumer.stop()
+            await self.consumer.stop()
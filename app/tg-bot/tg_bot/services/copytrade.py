@@ -19,6 +19,8 @@ def from_db_model(obj: CopyTradeModel) -> CopyTrade:
         is_fixed_buy=obj.is_fixed_buy,
         auto_follow=obj.auto_follow,
         stop_loss=obj.stop_loss,
+        take_profit_pct=obj.take_profit_pct,
+        stop_loss_pct=obj.stop_loss_pct,
         no_sell=obj.no_sell,
         priority=obj.priority,
         anti_sandwich=obj.anti_sandwich,
@@ -54,6 +56,8 @@ class CopyTradeService:
             fixed_buy_amount=copytrade.fixed_buy_amount,
             auto_follow=copytrade.auto_follow,
             stop_loss=copytrade.stop_loss,
+            take_profit_pct=copytrade.take_profit_pct,
+            stop_loss_pct=copytrade.stop_loss_pct,
             no_sell=copytrade.no_sell,
             priority=copytrade.priority,
             anti_sandwich=copytrade.anti_sandwich,
@@ -66,11 +70,14 @@ class CopyTradeService:
         await session.flush()
 
         assert model.id is not None, "model.id is None"
+        monitor_id, target_wallet, owner_id = model.id, model.target_wallet, int(model.chat_id)
+        # 先提交再通知，订阅方收到事件时即可读到最新数据
+        await session.commit()
         # 写入 redis
         await self.monitor_event_producer.resume_monitor(
-            monitor_id=model.id,
-            target_wallet=model.target_wallet,
-            owner_id=int(model.chat_id),
+            monitor_id=monitor_id,
+            target_wallet=target_wallet,
+            owner_id=owner_id,
         )
 
     @provide_session
@@ -92,6 +99,8 @@ class CopyTradeService:
         obj.fixed_buy_amount = copytrade.fixed_buy_amount
         obj.auto_follow = copytrade.auto_follow
         obj.stop_loss = copytrade.stop_loss
+        obj.take_profit_pct = copytrade.take_profit_pct
+        obj.stop_loss_pct = copytrade.stop_loss_pct
         obj.no_sell = copytrade.no_sell
         obj.priority = copytrade.priority
         obj.anti_sandwich = copytrade.anti_sandwich
@@ -101,19 +110,20 @@ class CopyTradeService:
         session.add(obj)
 
         assert obj.id is not None, "obj.id is None"
+        monitor_id, target_wallet, owner_id = obj.id, obj.target_wallet, obj.chat_id
+        await session.commit()
         if copytrade.active:
             await self.monitor_event_producer.resume_monitor(
-                monitor_id=obj.id,
-                target_wallet=obj.target_wallet,
-                owner_id=obj.chat_id,
+                monitor_id=monitor_id,
+                target_wallet=target_wallet,
+                owner_id=owner_id,
             )
         else:
             await self.monitor_event_producer.pause_monitor(
-                monitor_id=obj.id,
-                target_wallet=obj.target_wallet,
-                owner_id=obj.chat_id,
+                monitor_id=monitor_id,
+                target_wallet=target_wallet,
+                owner_id=owner_id,
             )
-        await session.commit()
 
     @provide_session
     async def delete(
@@ -128,13 +138,15 @@ class CopyTradeService:
         obj = result.scalar_one_or_none()
         if obj is None:
             return
+        assert obj.id is not None, "obj.id is None"
+        monitor_id, target_wallet, owner_id = obj.id, obj.target_wallet, obj.chat_id
         await session.delete(obj)
+        await session.commit()
 
-        assert obj.id is not None, "obj.id is None"
         await self.monitor_event_producer.pause_monitor(
-            monitor_id=obj.id,
-            target_wallet=obj.target_wallet,
-            owner_id=obj.chat_id,
+            monitor_id=monitor_id,
+            target_wallet=target_wallet,
+            owner_id=owner_id,
         )
 
     @provide_session
@@ -223,13 +235,18 @@ class CopyTradeService:
     ) -> None:
         stmt = select(CopyTradeModel).where(CopyTradeModel.chat_id == chat_id)
         results = await session.execute(stmt)
+        paused = []
         for obj in results.scalars():
             obj.active = False
             session.add(obj)
 
             assert obj.id is not None, "obj.id is None"
+            paused.append((obj.id, obj.target_wallet, obj.chat_id))
+        await session.commit()
+
+        for monitor_id, target_wallet, owner_id in paused:
             await self.monitor_event_producer.pause_monitor(
-                monitor_id=obj.id,
-                target_wallet=obj.target_wallet,
-                owner_id=obj.chat_id,
+                monitor_id=monitor_id,
+                target_wallet=target_wallet,
+                owner_id=owner_id,
             )
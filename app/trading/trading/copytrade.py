@@ -7,19 +7,19 @@ import asyncio
 from typing import Literal
 
 from solbot_common.constants import SOL_DECIMAL, WSOL
-from solbot_common.cp.copytrade_event import NotifyCopyTradeProducer
 from solbot_common.cp.swap_event import SwapEventProducer
 from solbot_common.cp.tx_event import TxEventConsumer
 from solbot_common.log import logger
 from solbot_common.models.tg_bot.copytrade import CopyTrade
+from solbot_common.types.bot_setting import BotSetting
 from solbot_common.types.swap import SwapEvent
 from solbot_common.types.tx import TxEvent, TxType
 from solbot_common.utils import calculate_auto_slippage
 from solbot_db.redis import RedisClient
-from solbot_services.bot_setting import BotSettingService as SettingService
-from solbot_services.copytrade import CopyTradeService
 from solbot_services.holding import HoldingService
 
+from trading.copytrade_index import CopyTradeIndex
+
 IGNORED_MINTS = {
     "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",  # USDC
     "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB",  # USDT
@@ -36,19 +36,21 @@ class CopyTradeProcessor:
             redis_client,
             "trading:tx_event",
             "trading:new_swap_event",
+            # 同一目标钱包的交易按顺序跟随
+            ordering_key=lambda tx_event: tx_event.who,
+            # 延迟的跟单没有意义，失败后不再重试
+            max_retries=0,
         )
         self.tx_event_consumer.register_callback(self._process_tx_event)
-        self.copytrade_service = CopyTradeService()
-        self.setting_service = SettingService()
+        self.copytrade_index = CopyTradeIndex()
         self.holding_service = HoldingService()
         self.swap_event_producer = SwapEventProducer(redis_client)
-        self.notify_copytrade_producer = NotifyCopyTradeProducer(redis_client)
 
     async def _process_tx_event(self, tx_event: TxEvent):
         """处理交易事件"""
         logger.info(f"Processing tx event: {tx_event}")
-        copytrade_items = await self.copytrade_service.get_by_target_wallet(tx_event.who)
-        logger.debug(f"Found copytrade items: {copytrade_items} ")
+        routes = self.copytrade_index.route(tx_event.who)
+        logger.debug(f"Found copytrade routes: {routes} ")
         swap_mode = "ExactIn" if tx_event.tx_direction == "buy" else "ExactOut"
         # buy_pct = 0
         sell_pct = 0
@@ -76,7 +78,7 @@ class CopyTradeProcessor:
         timestamp = tx_event.timestamp
 
         tasks = []
-        for copytrade in copytrade_items:
+        for copytrade, setting in routes:
             coro = self._process_copytrade(
                 swap_mode=swap_mode,
                 tx_event=tx_event,
@@ -86,10 +88,15 @@ class CopyTradeProcessor:
                 output_mint=output_mint,
                 timestamp=timestamp,
                 copytrade=copytrade,
+                setting=setting,
             )
             tasks.append(coro)
 
-        await asyncio.gather(*tasks)
+        swap_events = [event for event in await asyncio.gather(*tasks) if event is not None]
+        # 所有跟单者的交易事件在一次往返中写入，通知由 tg-bot 的消费组读取同一条 stream
+        await self.swap_event_producer.produce_many(swap_events)
+        for swap_event in swap_events:
+            logger.info(f"New Copy Trade: {swap_event}")
 
     async def _process_copytrade(
         self,
@@ -101,7 +108,8 @@ class CopyTradeProcessor:
         output_mint: str,
         timestamp: int,
         copytrade: CopyTrade,
-    ):
+        setting: BotSetting | None,
+    ) -> SwapEvent | None:
         if input_mint in IGNORED_MINTS or output_mint in IGNORED_MINTS:
             logger.info(f"Skipping swap due to ignored mint: {input_mint} {output_mint}")
             return
@@ -109,7 +117,6 @@ class CopyTradeProcessor:
         try:
             raise ValueError(f"stop copytrade {tx_event}")
             # 根据不同的根据设置，创建不同的 swap_event
-            setting = await self.setting_service.get(copytrade.chat_id, copytrade.owner)
             if setting is None:
                 raise ValueError(
                     f"Setting not found, chat_id: {copytrade.chat_id}, wallet: {copytrade.owner}"
@@ -180,19 +187,17 @@ class CopyTradeProcessor:
                 by="copytrade",
                 tx_event=tx_event,
             )
-            # PERF: 理论上,这两个 producer 是重复的
-            # 只需要在 consumer 处, 使用不同的消费组即可
-            await self.swap_event_producer.produce(swap_event=swap_event)
-            await self.notify_copytrade_producer.produce(data=swap_event)
-            logger.info(f"New Copy Trade: {swap_event}")
+            return swap_event
         except Exception as e:
             logger.exception(f"Failed to process copytrade: {e}")
             # TODO: 通知到用户，跟单交易失败
 
     async def start(self):
         """启动跟单交易"""
+        await self.copytrade_index.start()
         await self.tx_event_consumer.start()
 
-    def stop(self):
+    async def stop(self):
         """停止跟单交易"""
-        self.tx_event_consumer.stop()
+        await self.tx_event_consumer.stop()
+        await self.copytrade_index.stop()
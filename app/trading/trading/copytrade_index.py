@@ -0,0 +1,188 @@
+"""跟单路由索引
+
+进程内维护 目标钱包 -> 跟单配置及对应 bot 设置 的映射，收到交易事件时只需一次字典查找，
+构建交易前不再访问 MySQL 和 Redis。
+
+索引在启动时全量加载，之后由 tg-bot 发布的变更事件保持同步：
+1. 跟单增删改时发布的监听器事件（`monitor_events`），按 id 重新读取该跟单
+2. bot 设置修改时发布的设置（`setting`），直接替换
+
+订阅中断后重新订阅时会全量重新加载，避免遗漏中断期间的变更。
+"""
+
+import asyncio
+
+import orjson as json
+from solbot_common.cp.monitor_events import MonitorEvent
+from solbot_common.log import logger
+from solbot_common.models.tg_bot.copytrade import CopyTrade
+from solbot_common.types.bot_setting import BotSetting
+from solbot_db.redis import RedisClient
+from solbot_services.bot_setting import BotSettingService as SettingService
+from solbot_services.copytrade import CopyTradeService
+
+MONITOR_EVENTS_CHANNEL = "monitor_events"
+
+SettingKey = tuple[int, str]
+
+
+def setting_key_of(copytrade: CopyTrade) -> SettingKey:
+    return (copytrade.chat_id, copytrade.owner)
+
+
+class CopyTradeRoutes:
+    """目标钱包 -> 跟单配置的映射，不涉及 I/O"""
+
+    def __init__(self) -> None:
+        self._by_id: dict[int, CopyTrade] = {}
+        self._by_target: dict[str, list[CopyTrade]] = {}
+        self._settings: dict[SettingKey, BotSetting] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def replace_all(self, copytrades: list[CopyTrade], settings: dict[SettingKey, BotSetting]):
+        """全量替换索引"""
+        by_id: dict[int, CopyTrade] = {}
+        by_target: dict[str, list[CopyTrade]] = {}
+        for copytrade in copytrades:
+            if copytrade.id is None or not copytrade.active:
+                continue
+            by_id[copytrade.id] = copytrade
+            by_target.setdefault(copytrade.target_wallet, []).append(copytrade)
+        self._by_id = by_id
+        self._by_target = by_target
+        self._settings = settings
+
+    def upsert(self, copytrade: CopyTrade) -> None:
+        """新增或更新跟单，未激活的跟单会被移除"""
+        assert copytrade.id is not None, "copytrade.id is None"
+        self.remove(copytrade.id)
+        if not copytrade.active:
+            return
+        self._by_id[copytrade.id] = copytrade
+        self._by_target.setdefault(copytrade.target_wallet, []).append(copytrade)
+
+    def remove(self, pk: int) -> None:
+        copytrade = self._by_id.pop(pk, None)
+        if copytrade is None:
+            return
+        followers = self._by_target.get(copytrade.target_wallet, [])
+        followers = [item for item in followers if item.id != pk]
+        if followers:
+            self._by_target[copytrade.target_wallet] = followers
+        else:
+            self._by_target.pop(copytrade.target_wallet, None)
+
+    def get(self, pk: int) -> CopyTrade | None:
+        return self._by_id.get(pk)
+
+    def has_setting(self, key: SettingKey) -> bool:
+        return key in self._settings
+
+    def set_setting(self, setting: BotSetting) -> None:
+        self._settings[(setting.chat_id, setting.wallet_address)] = setting
+
+    def route(self, target_wallet: str) -> list[tuple[CopyTrade, BotSetting | None]]:
+        """获取目标钱包的所有跟单及其 bot 设置"""
+        return [
+            (copytrade, self._settings.get(setting_key_of(copytrade)))
+            for copytrade in self._by_target.get(target_wallet, [])
+        ]
+
+
+class CopyTradeIndex:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, retry_interval: float = 1) -> None:
+        """
+        Args:
+            retry_interval (float, optional): 订阅中断后重新订阅的间隔（秒）. Defaults to 1.
+        """
+        if self._initialized:
+            return
+        self._initialized = True
+        self.redis = RedisClient.get_instance()
+        self.setting_service = SettingService()
+        self.retry_interval = retry_interval
+        self.routes = CopyTradeRoutes()
+        self._task: asyncio.Task | None = None
+
+    def route(self, target_wallet: str) -> list[tuple[CopyTrade, BotSetting | None]]:
+        return self.routes.route(target_wallet)
+
+    async def load(self) -> None:
+        """从数据库和 Redis 全量加载"""
+        copytrades = await CopyTradeService.get_active()
+        settings: dict[SettingKey, BotSetting] = {}
+        for key in {setting_key_of(copytrade) for copytrade in copytrades}:
+            setting = await self.setting_service.get(*key)
+            if setting is not None:
+                settings[key] = setting
+        self.routes.replace_all(copytrades, settings)
+        logger.info(f"Loaded {len(self.routes)} copytrade routes")
+
+    async def reload(self, pk: int) -> None:
+        """重新读取单个跟单"""
+        copytrade = await CopyTradeService.get_by_id(pk)
+        if copytrade is None or not copytrade.active:
+            self.routes.remove(pk)
+            return
+        key = setting_key_of(copytrade)
+        if not self.routes.has_setting(key):
+            setting = await self.setting_service.get(*key)
+            if setting is not None:
+                self.routes.set_setting(setting)
+        self.routes.upsert(copytrade)
+
+    async def _on_message(self, channel: str, data: str) -> None:
+        if channel == self.setting_service.channel:
+            self.routes.set_setting(BotSetting.from_json(data))
+        elif channel == MONITOR_EVENTS_CHANNEL:
+            # 钱包监听与跟单共用该频道，事件类型不可信，以数据库中的状态为准
+            event = MonitorEvent(**json.loads(data))
+            await self.reload(event.monitor_id)
+
+    async def start(self) -> None:
+        """加载索引并开始订阅变更事件"""
+        await self.load()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        first = True
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(MONITOR_EVENTS_CHANNEL, self.setting_service.channel)
+                if not first:
+                    await self.load()
+                first = False
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+                    if message is None:
+                        continue
+                    try:
+                        await self._on_message(message["channel"], message["data"])
+                    except Exception as e:
+                        logger.warning(f"Failed to apply copytrade change {message}: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Copytrade index subscription error: {e}")
+            finally:
+                await pubsub.close()
+            await asyncio.sleep(self.retry_interval)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
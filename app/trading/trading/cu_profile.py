@@ -0,0 +1,136 @@
+"""计算单元（CU）画像
+
+按交易的指令结构（程序 + 指令类型）划分模板，例如 Pump 买入是否包含创建 ATA、
+卖出是否关闭 ATA，Raydium v4 买卖是否包含临时 WSOL 账户等。
+
+每个模板首次出现时在后台模拟一次，记录实际的 unitsConsumed，
+按最近几次采样的最大值加上安全余量作为 unit limit 缓存下来，并定期重新采样。
+构建交易时直接读取缓存，不会为每笔交易都发起模拟。
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from solana.rpc.async_api import AsyncClient
+from solbot_common.log import logger
+from solbot_common.utils.utils import get_async_client
+from solders.compute_budget import ID as COMPUTE_BUDGET_PROGRAM_ID  # type: ignore
+from solders.instruction import Instruction  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+MAX_COMPUTE_UNIT_LIMIT = 1_400_000
+
+TemplateKey = tuple[tuple[str, int], ...]
+
+
+@dataclass
+class ComputeUnitProfile:
+    samples: deque[int] = field(default_factory=lambda: deque(maxlen=5))
+    updated_at: float = 0.0
+
+    @property
+    def max_units(self) -> int | None:
+        if not self.samples:
+            return None
+        return max(self.samples)
+
+
+def template_of(instructions: list[Instruction]) -> TemplateKey:
+    """根据指令结构生成模板 key
+
+    使用每条指令的程序地址及 data 的首字节（原生程序的指令编号或 anchor discriminator 首字节），
+    compute budget 指令不参与计算。
+    """
+    return tuple(
+        (str(ix.program_id), bytes(ix.data)[0] if ix.data else -1)
+        for ix in instructions
+        if ix.program_id != COMPUTE_BUDGET_PROGRAM_ID
+    )
+
+
+class ComputeUnitProfiler:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(
+        self,
+        client: AsyncClient | None = None,
+        margin: float = 0.15,
+        min_extra_units: int = 5_000,
+        refresh_interval: float = 3600,
+    ) -> None:
+        """
+        Args:
+            client (AsyncClient | None, optional): RPC 客户端
+            margin (float, optional): 安全余量比例. Defaults to 0.15.
+            min_extra_units (int, optional): 最少预留的 CU. Defaults to 5_000.
+            refresh_interval (float, optional): 重新采样间隔（秒）. Defaults to 3600.
+        """
+        if self._initialized:
+            return
+        self._initialized = True
+        self.client = client or get_async_client()
+        self.margin = margin
+        self.min_extra_units = min_extra_units
+        self.refresh_interval = refresh_interval
+        self._profiles: dict[TemplateKey, ComputeUnitProfile] = {}
+        self._profiling: set[TemplateKey] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    def get_limit(self, template: TemplateKey) -> int | None:
+        """获取模板的 unit limit，尚未采样时返回 None"""
+        profile = self._profiles.get(template)
+        if profile is None or profile.max_units is None:
+            return None
+        units = profile.max_units
+        extra = max(math.ceil(units * self.margin), self.min_extra_units)
+        return min(units + extra, MAX_COMPUTE_UNIT_LIMIT)
+
+    def _needs_profile(self, template: TemplateKey) -> bool:
+        if template in self._profiling:
+            return False
+        profile = self._profiles.get(template)
+        if profile is None or profile.max_units is None:
+            return True
+        return time.time() - profile.updated_at > self.refresh_interval
+
+    def observe(self, template: TemplateKey, transaction: VersionedTransaction) -> None:
+        """模板需要采样时，在后台模拟该交易"""
+        if not self._needs_profile(template):
+            return
+        self._profiling.add(template)
+        task = asyncio.create_task(self._profile(template, transaction))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _profile(self, template: TemplateKey, transaction: VersionedTransaction) -> None:
+        try:
+            resp = await self.client.simulate_transaction(transaction, sig_verify=False)
+            value = resp.value
+            if value.err is not None and "ComputationalBudgetExceeded" in str(value.err):
+                # 缓存的 limit 偏小，丢弃后回退到默认值重新采样
+                logger.warning(f"CU limit too tight, reset profile for template {template}")
+                self._profiles.pop(template, None)
+                return
+            if value.err is not None or value.units_consumed is None:
+                logger.debug(f"Skip CU profile sample, simulate error: {value.err}")
+                return
+            profile = self._profiles.setdefault(template, ComputeUnitProfile())
+            profile.samples.append(value.units_consumed)
+            profile.updated_at = time.time()
+            logger.info(
+                f"CU profile updated: {value.units_consumed} units, "
+                f"limit {self.get_limit(template)}, template {template}"
+            )
+        except Exception as e:
+            logger.warning(f"Failed to profile compute units: {e}")
+        finally:
+            self._profiling.discard(template)
@@ -10,6 +10,7 @@ from solders.keypair import Keypair  # type: ignore
 from solders.signature import Signature  # type: ignore
 from sqlmodel import select
 
+from trading.exit_order import SELL_ALL_PCT, ExitOrderManager
 from trading.swap import SwapDirection, SwapInType
 from trading.transaction import TradingRoute, TradingService
 
@@ -22,47 +23,36 @@ class TradingExecutor:
         self._rpc_client = client
         self._launch_cache = LaunchCache()
         self._trading_service = TradingService(self._rpc_client)
+        self.exit_orders: ExitOrderManager | None = None
+        if settings.trading.exit_orders:
+            self.exit_orders = ExitOrderManager(self._rpc_client, self._trading_service)
+
+    async def start(self) -> None:
+        await self._trading_service.start()
+
+    async def stop(self) -> None:
+        await self._trading_service.stop()
 
     @provide_session
-    async def __get_keypair(self, pubkey: str, *, session=NEW_ASYNC_SESSION) -> Keypair:
+    async def get_keypair(self, pubkey: str, *, session=NEW_ASYNC_SESSION) -> Keypair:
         stmt = select(User.private_key).where(User.pubkey == pubkey).limit(1)
         private_key = (await session.execute(stmt)).scalar_one_or_none()
         if not private_key:
             raise ValueError("Wallet not found")
         return Keypair.from_bytes(private_key)
 
-    async def exec(self, swap_event: SwapEvent) -> Signature | None:
-        """执行交易
+    async def resolve_route(self, token_address: str, program_id: str | None) -> TradingRoute:
+        """选择交易路由
 
         Args:
-            swap_event (SwapEvent): 交易事件
+            token_address (str): 代币地址
+            program_id (str | None): 交易事件中的程序 ID
 
-        Raises:
-            ConnectTimeout: If connection to the RPC node times out
-            ConnectError: If connection to the RPC node fails
+        Returns:
+            TradingRoute: 交易路由
         """
-        if swap_event.slippage_bps is not None:
-            slippage_bps = swap_event.slippage_bps
-        else:
-            raise ValueError("slippage_bps must be specified")
-
-        if swap_event.swap_mode == "ExactIn":
-            swap_direction = SwapDirection.Buy
-            token_address = swap_event.output_mint
-        elif swap_event.swap_mode == "ExactOut":
-            swap_direction = SwapDirection.Sell
-            token_address = swap_event.input_mint
-        else:
-            raise ValueError("swap_mode must be ExactIn or ExactOut")
-
-        sig = None
-        keypair = await self.__get_keypair(swap_event.user_pubkey)
-        swap_in_type = SwapInType(swap_event.swap_in_type)
-
         # 检查是否需要使用 Pump 协议进行交易
         should_use_pump = False
-        program_id = swap_event.program_id
-
         try:
             is_pump_token_launched = await self._launch_cache.is_pump_token_launched(token_address)
             if program_id == PUMP_FUN_PROGRAM_ID or (
@@ -77,27 +67,76 @@ class TradingExecutor:
                     f"Token {token_address} is launched on Raydium, using Raydium protocol to trade"
                 )
                 # 如果 token 在 Raydium 上启动，则使用 Raydium 协议进行交易
-                swap_event.program_id = RAY_V4_PROGRAM_ID
+                program_id = RAY_V4_PROGRAM_ID
         except Exception as e:
             logger.exception(f"Failed to check launch status, cause: {e}")
 
         if should_use_pump:
             logger.info("Program ID is PUMP")
-            trade_route = TradingRoute.PUMP
+            return TradingRoute.PUMP
         # NOTE: 测试下来不是很理想，暂时使用备选方案
-        elif swap_event.program_id == RAY_V4_PROGRAM_ID:
+        elif program_id == RAY_V4_PROGRAM_ID:
             logger.info("Program ID is RayV4")
-            trade_route = TradingRoute.RAYDIUM_V4
+            return TradingRoute.RAYDIUM_V4
         elif program_id is None:
             logger.warning("Program ID is Unknown, So We use thrid party to trade")
-            trade_route = TradingRoute.DEX
+            return TradingRoute.DEX
+        else:
+            raise ValueError(f"Program ID is not supported, {program_id}")
+
+    async def exec(self, swap_event: SwapEvent) -> Signature | None:
+        """执行交易
+
+        Args:
+            swap_event (SwapEvent): 交易事件
+
+        Raises:
+            ConnectTimeout: If connection to the RPC node times out
+            ConnectError: If connection to the RPC node fails
+        """
+        if swap_event.slippage_bps is not None:
+            slippage_bps = swap_event.slippage_bps
         else:
-            raise ValueError(f"Program ID is not supported, {swap_event.program_id}")
+            raise ValueError("slippage_bps must be specified")
+
+        if swap_event.swap_mode == "ExactIn":
+            swap_direction = SwapDirection.Buy
+            token_address = swap_event.output_mint
+        elif swap_event.swap_mode == "ExactOut":
+            swap_direction = SwapDirection.Sell
+            token_address = swap_event.input_mint
+        else:
+            raise ValueError("swap_mode must be ExactIn or ExactOut")
+
+        swap_in_type = SwapInType(swap_event.swap_in_type)
+        sell_all = (
+            swap_direction == SwapDirection.Sell
+            and swap_in_type == SwapInType.Pct
+            and swap_event.amount_pct == 1
+        )
+
+        # 全部卖出时优先使用预签名的退出订单，未能成交时改用普通卖出
+        if self.exit_orders is not None and sell_all:
+            sig = await self.exit_orders.trigger(swap_event.user_pubkey, token_address)
+            if sig is not None:
+                return sig
+
+        sig = None
+        keypair = await self.get_keypair(swap_event.user_pubkey)
+
+        trade_route = await self.resolve_route(token_address, swap_event.program_id)
+        if trade_route == TradingRoute.RAYDIUM_V4:
+            swap_event.program_id = RAY_V4_PROGRAM_ID
+
+        ui_amount = swap_event.ui_amount
+        if sell_all and trade_route in SELL_ALL_PCT:
+            # 各路由百分比的取值范围不同，全部卖出时换算为该路由的 100%
+            ui_amount = SELL_ALL_PCT[trade_route]
 
         sig = await self._trading_service.use_route(trade_route).swap(
             keypair,
             token_address,
-            swap_event.ui_amount,
+            ui_amount,
             swap_direction,
             slippage_bps,
             swap_in_type,
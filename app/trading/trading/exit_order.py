@@ -0,0 +1,354 @@
+"""预签名退出订单
+
+买入上链后，为整个持仓预先构建并签名一笔卖出交易，存储时加密。
+止盈止损触发时直接发送这笔交易，只需一次网络请求，不再拉取账户、获取 blockhash 或构建交易。
+
+预签名交易使用 durable nonce 代替 recent blockhash，因此不会过期。每个钱包的每个持仓
+对应一个 nonce 账户（由钱包地址 + seed 派生，钱包为 nonce authority）。
+持仓数量变化时先推进 nonce 使旧交易失效，再重新构建；持仓清空时取回 nonce 账户的租金。
+
+预签名交易的最小输出按 `slippage_bps` 计算，需要覆盖止损时的价格回撤。
+"""
+
+import asyncio
+import base64
+import time
+from dataclasses import asdict, dataclass
+
+import orjson as json
+from cryptography.fernet import Fernet
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Confirmed
+from solana.rpc.core import RPCException
+from solana.rpc.types import TxOpts
+from solbot_common.config import settings
+from solbot_common.constants import SYSTEM_PROGRAM_ID
+from solbot_common.log import logger
+from solbot_common.utils.pda import to_pubkey
+from solbot_common.utils.pump import get_user_ata
+from solbot_db.redis import RedisClient
+from solders.hash import Hash  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+from solders.system_program import (
+    AdvanceNonceAccountParams,
+    WithdrawNonceAccountParams,
+    advance_nonce_account,
+    create_nonce_account_with_seed,
+    withdraw_nonce_account,
+)
+from solders.transaction_status import TransactionConfirmationStatus  # type: ignore
+
+from trading.swap import SwapDirection, SwapInType
+from trading.transaction import TradingRoute, TradingService
+from trading.tx import DurableNonce, build_transaction, new_signed_and_send_transaction
+
+EXIT_ORDERS_KEY = "trading:exit_orders"
+
+NONCE_ACCOUNT_SIZE = 80
+# nonce 账户布局: version(u32) + state(u32) + authority(32) + nonce(32) + fee_calculator(u64)
+_NONCE_STATE_OFFSET = 4
+_NONCE_HASH_OFFSET = 40
+_NONCE_INITIALIZED = 1
+# create_with_seed 的 seed 最长 32 字节
+_NONCE_SEED_PREFIX = "exit"
+_NONCE_SEED_MAX_LEN = 32
+# ATA 不存在时 getTokenAccountBalance 返回的错误信息
+_ACCOUNT_NOT_FOUND = "could not find account"
+# 等待退出交易确认的时间（秒），超时后由调用方改用普通卖出
+CONFIRM_TIMEOUT = 10
+CONFIRM_POLL_INTERVAL = 0.5
+
+# 各路由卖出全部持仓时的百分比参数：Pump 按 0-1 计算，Raydium 按 1-100 计算
+SELL_ALL_PCT: dict[TradingRoute, float] = {
+    TradingRoute.PUMP: 1,
+    TradingRoute.RAYDIUM_V4: 100,
+}
+SUPPORTED_ROUTES = tuple(SELL_ALL_PCT)
+
+
+def get_nonce_seed(mint: Pubkey) -> str:
+    return f"{_NONCE_SEED_PREFIX}{mint}"[:_NONCE_SEED_MAX_LEN]
+
+
+def get_nonce_account_address(owner: Pubkey, mint: Pubkey) -> Pubkey:
+    """钱包为某个持仓使用的 nonce 账户地址"""
+    return Pubkey.create_with_seed(owner, get_nonce_seed(mint), SYSTEM_PROGRAM_ID)
+
+
+def decode_nonce(data: bytes) -> Hash | None:
+    """解析 nonce 账户当前的 nonce 值，账户未初始化时返回 None"""
+    if len(data) < NONCE_ACCOUNT_SIZE:
+        return None
+    state = int.from_bytes(data[_NONCE_STATE_OFFSET : _NONCE_STATE_OFFSET + 4], "little")
+    if state != _NONCE_INITIALIZED:
+        return None
+    return Hash.from_bytes(data[_NONCE_HASH_OFFSET : _NONCE_HASH_OFFSET + 32])
+
+
+@dataclass
+class ExitOrder:
+    owner: str
+    mint: str
+    route: str
+    nonce_account: str
+    nonce: str
+    # 构建时的持仓数量（最小单位）
+    position_amount: int
+    signature: str
+    # base64 编码的已签名交易
+    transaction: str
+    created_at: int
+
+    def to_json(self) -> bytes:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, raw: bytes) -> "ExitOrder":
+        return cls(**json.loads(raw))
+
+
+class ExitOrderStore:
+    """加密存储退出订单
+
+    订单在 Redis 中以 Fernet 加密后的形式保存，进程内同时保留一份密文，
+    触发时无需访问 Redis。
+    """
+
+    def __init__(self, encryption_key: str | None = None) -> None:
+        key = encryption_key or settings.trading.exit_order_key
+        if not key:
+            raise ValueError("trading.exit_order_key is required to store exit orders")
+        self._fernet = Fernet(key)
+        self._orders: dict[str, bytes] = {}
+
+    @staticmethod
+    def _field(owner: str, mint: str) -> str:
+        return f"{owner}:{mint}"
+
+    async def save(self, order: ExitOrder) -> None:
+        field = self._field(order.owner, order.mint)
+        token = self._fernet.encrypt(order.to_json())
+        self._orders[field] = token
+        await RedisClient.get_instance().hset(EXIT_ORDERS_KEY, field, token.decode())
+
+    async def get(self, owner: str, mint: str) -> ExitOrder | None:
+        field = self._field(owner, mint)
+        token = self._orders.get(field)
+        if token is None:
+            raw = await RedisClient.get_instance().hget(EXIT_ORDERS_KEY, field)
+            if raw is None:
+                return None
+            token = raw.encode() if isinstance(raw, str) else raw
+            self._orders[field] = token
+        return ExitOrder.from_json(self._fernet.decrypt(token))
+
+    async def delete(self, owner: str, mint: str) -> None:
+        field = self._field(owner, mint)
+        self._orders.pop(field, None)
+        await RedisClient.get_instance().hdel(EXIT_ORDERS_KEY, field)
+
+
+class ExitOrderManager:
+    def __init__(
+        self,
+        rpc_client: AsyncClient,
+        trading_service: TradingService,
+        store: ExitOrderStore | None = None,
+        slippage_bps: int | None = None,
+    ) -> None:
+        """
+        Args:
+            rpc_client (AsyncClient): RPC 客户端
+            trading_service (TradingService): 用于选择交易构建器
+            store (ExitOrderStore | None, optional): 订单存储
+            slippage_bps (int | None, optional): 预签名卖出的滑点，默认读取配置
+        """
+        self.rpc_client = rpc_client
+        self.trading_service = trading_service
+        self.store = store or ExitOrderStore()
+        self.slippage_bps = slippage_bps or settings.trading.exit_order_slippage_bps
+
+    async def _send_and_confirm(self, keypair: Keypair, instructions: list) -> None:
+        sig = await new_signed_and_send_transaction(
+            self.rpc_client, keypair, instructions, use_jito=False
+        )
+        await self.rpc_client.confirm_transaction(sig, commitment=Confirmed)
+
+    async def _get_nonce(self, nonce_account: Pubkey) -> Hash | None:
+        resp = await self.rpc_client.get_account_info(nonce_account, commitment=Confirmed)
+        if resp.value is None:
+            return None
+        return decode_nonce(bytes(resp.value.data))
+
+    async def ensure_nonce_account(self, keypair: Keypair, mint: Pubkey) -> DurableNonce:
+        """获取持仓对应的 nonce，nonce 账户不存在时创建"""
+        owner = keypair.pubkey()
+        nonce_account = get_nonce_account_address(owner, mint)
+        nonce = await self._get_nonce(nonce_account)
+        if nonce is None:
+            rent = await self.rpc_client.get_minimum_balance_for_rent_exemption(NONCE_ACCOUNT_SIZE)
+            create_ix, initialize_ix = create_nonce_account_with_seed(
+                owner, nonce_account, owner, get_nonce_seed(mint), owner, rent.value
+            )
+            await self._send_and_confirm(keypair, [create_ix, initialize_ix])
+            logger.info(f"Created nonce account {nonce_account} for {owner}, mint {mint}")
+            nonce = await self._get_nonce(nonce_account)
+            if nonce is None:
+                raise ValueError(f"Nonce account {nonce_account} not initialized")
+        return DurableNonce(nonce_account=nonce_account, authority=owner, nonce=nonce)
+
+    async def _get_position_amount(self, owner: Pubkey, mint: Pubkey) -> int:
+        """持仓数量，ATA 不存在（已关闭）时为 0，其他 RPC 错误直接抛出"""
+        try:
+            resp = await self.rpc_client.get_token_account_balance(
+                get_user_ata(owner, mint), commitment=Confirmed
+            )
+        except RPCException as e:
+            if _ACCOUNT_NOT_FOUND in str(e):
+                return 0
+            raise
+        return int(resp.value.amount)
+
+    async def prepare(self, keypair: Keypair, mint: str, route: TradingRoute) -> ExitOrder | None:
+        """为整个持仓构建并保存预签名卖出交易
+
+        Args:
+            keypair (Keypair): 钱包
+            mint (str): 代币地址
+            route (TradingRoute): 交易路由
+
+        Returns:
+            ExitOrder | None: 退出订单，持仓为空时返回 None
+        """
+        if route not in SUPPORTED_ROUTES:
+            logger.info(f"Exit orders are not supported for route {route}")
+            return None
+
+        owner = keypair.pubkey()
+        mint_pubkey = to_pubkey(mint)
+        position_amount = await self._get_position_amount(owner, mint_pubkey)
+        if position_amount == 0:
+            await self.cancel(keypair, mint)
+            return None
+
+        durable_nonce = await self.ensure_nonce_account(keypair, mint_pubkey)
+        builder = self.trading_service.select_builder(route)
+        instructions = await builder.build_swap_instructions(
+            keypair=keypair,
+            token_address=mint,
+            ui_amount=SELL_ALL_PCT[route],
+            swap_direction=SwapDirection.Sell,
+            slippage_bps=self.slippage_bps,
+            in_type=SwapInType.Pct,
+        )
+        txn = await build_transaction(
+            keypair=keypair, instructions=instructions, durable_nonce=durable_nonce
+        )
+        order = ExitOrder(
+            owner=str(owner),
+            mint=mint,
+            route=route.value,
+            nonce_account=str(durable_nonce.nonce_account),
+            nonce=str(durable_nonce.nonce),
+            position_amount=position_amount,
+            signature=str(txn.signatures[0]),
+            transaction=base64.b64encode(bytes(txn)).decode(),
+            created_at=int(time.time()),
+        )
+        await self.store.save(order)
+        logger.info(f"Prepared exit order {order.signature} for {owner}, mint {mint}")
+        return order
+
+    async def refresh(self, keypair: Keypair, mint: str, route: TradingRoute) -> ExitOrder | None:
+        """持仓变化后重新构建退出订单
+
+        已存在的订单先推进 nonce 作废，避免旧交易按过期的数量成交。
+        """
+        owner = keypair.pubkey()
+        existing = await self.store.get(str(owner), mint)
+        if existing is not None:
+            position_amount = await self._get_position_amount(owner, to_pubkey(mint))
+            if position_amount == existing.position_amount:
+                return existing
+            await self.store.delete(str(owner), mint)
+            nonce_account = Pubkey.from_string(existing.nonce_account)
+            current = await self._get_nonce(nonce_account)
+            # nonce 已变化说明旧交易已上链或已作废
+            if current is not None and str(current) == existing.nonce:
+                advance_ix = advance_nonce_account(
+                    AdvanceNonceAccountParams(nonce_pubkey=nonce_account, authorized_pubkey=owner)
+                )
+                await self._send_and_confirm(keypair, [advance_ix])
+        return await self.prepare(keypair, mint, route)
+
+    async def _wait_for_confirmation(self, signature: Signature) -> bool | None:
+        """等待交易确认
+
+        Returns:
+            bool | None: 成功上链为 True，上链但执行失败为 False，超时为 None
+        """
+        deadline = time.monotonic() + CONFIRM_TIMEOUT
+        while time.monotonic() < deadline:
+            resp = await self.rpc_client.get_signature_statuses([signature])
+            status = resp.value[0]
+            if status is not None and status.confirmation_status in (
+                TransactionConfirmationStatus.Confirmed,
+                TransactionConfirmationStatus.Finalized,
+            ):
+                return status.err is None
+            await asyncio.sleep(CONFIRM_POLL_INTERVAL)
+        return None
+
+    async def trigger(self, owner: str, mint: str) -> Signature | None:
+        """发送预签名的退出交易并等待确认
+
+        订单在交易确认后才删除。发送失败或未能及时确认时保留订单并返回 None，由调用方改用普通卖出；
+        两笔卖出交易的数量都按各自构建时的持仓计算，先上链的一笔清空持仓后另一笔会失败，不会重复卖出。
+
+        Returns:
+            Signature | None: 已确认的交易签名，没有退出订单或未能成交时返回 None
+        """
+        order = await self.store.get(owner, mint)
+        if order is None:
+            return None
+        try:
+            resp = await self.rpc_client.send_raw_transaction(
+                base64.b64decode(order.transaction), opts=TxOpts(skip_preflight=True)
+            )
+            signature = resp.value
+            logger.info(f"Exit order triggered: {signature}, owner {owner}, mint {mint}")
+            confirmed = await self._wait_for_confirmation(signature)
+        except Exception as e:
+            logger.warning(f"Failed to send exit order for {owner}, mint {mint}: {e}")
+            return None
+
+        if confirmed is None:
+            logger.warning(f"Exit order {signature} not confirmed in {CONFIRM_TIMEOUT}s")
+            return None
+        # 执行失败的交易同样推进了 nonce，订单已失效
+        await self.store.delete(owner, mint)
+        if not confirmed:
+            logger.warning(f"Exit order {signature} failed on chain, owner {owner}, mint {mint}")
+            return None
+        return signature
+
+    async def cancel(self, keypair: Keypair, mint: str) -> None:
+        """删除退出订单并关闭 nonce 账户，取回租金"""
+        owner = keypair.pubkey()
+        await self.store.delete(str(owner), mint)
+        nonce_account = get_nonce_account_address(owner, to_pubkey(mint))
+        resp = await self.rpc_client.get_balance(nonce_account, commitment=Confirmed)
+        if resp.value == 0:
+            return
+        withdraw_ix = withdraw_nonce_account(
+            WithdrawNonceAccountParams(
+                nonce_pubkey=nonce_account,
+                authorized_pubkey=owner,
+                to_pubkey=owner,
+                lamports=resp.value,
+            )
+        )
+        await self._send_and_confirm(keypair, [withdraw_ix])
+        logger.info(f"Closed nonce account {nonce_account} for {owner}, mint {mint}")
@@ -0,0 +1,299 @@
+"""地址查找表（Address Lookup Table）
+
+由交易钱包自行创建并维护查找表，收录各 builder 固定使用的账户（程序相关账户、
+Raydium authority、OpenBook 程序等）以及反复出现的池子账户。
+
+查找表的地址列表缓存在进程内，`build_transaction` 编译 v0 消息时直接使用，
+无需额外的 RPC 请求。新出现的账户在后台写入查找表，写入确认后重新拉取链上内容，
+因此只有已生效的地址才会被用于编译交易。
+
+钱包拥有的查找表地址保存在 Redis 中，进程重启后重新加载。
+"""
+
+import asyncio
+import struct
+import time
+from collections import Counter
+from collections.abc import Iterable, Sequence
+
+import orjson as json
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Confirmed, Finalized
+from solbot_cache import get_latest_blockhash
+from solbot_common.constants import (
+    EVENT_AUTHORITY,
+    OPEN_BOOK_PROGRAM,
+    PUMP_GLOBAL_ACCOUNT,
+    RAY_AUTHORITY_V4,
+    RENT_PROGRAM_ID,
+    SYSTEM_PROGRAM_ID,
+    WSOL,
+)
+from solbot_common.log import logger
+from solbot_common.utils.utils import get_async_client
+from solbot_db.redis import RedisClient
+from solders.address_lookup_table_account import AddressLookupTableAccount  # type: ignore
+from solders.instruction import AccountMeta, Instruction  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+ADDRESS_LOOKUP_TABLE_PROGRAM = Pubkey.from_string("AddressLookupTab1e1111111111111111111111111")
+LOOKUP_TABLES_KEY = "trading:lookup_tables"
+
+# 查找表账户的元数据长度，地址列表从该偏移量开始
+LOOKUP_TABLE_META_SIZE = 56
+MAX_TABLE_ADDRESSES = 256
+# 单笔扩展交易写入的地址数量，受交易大小限制
+MAX_EXTEND_ADDRESSES = 20
+
+_CREATE_LOOKUP_TABLE = 0
+_EXTEND_LOOKUP_TABLE = 2
+_U64_MAX = 2**64 - 1
+
+# 各 builder 固定使用、且不会作为被调用程序出现的账户
+STATIC_ADDRESSES = (
+    WSOL,
+    SYSTEM_PROGRAM_ID,
+    RENT_PROGRAM_ID,
+    PUMP_GLOBAL_ACCOUNT,
+    EVENT_AUTHORITY,
+    RAY_AUTHORITY_V4,
+    OPEN_BOOK_PROGRAM,
+)
+
+
+def derive_lookup_table_address(authority: Pubkey, recent_slot: int) -> tuple[Pubkey, int]:
+    return Pubkey.find_program_address(
+        [bytes(authority), struct.pack("<Q", recent_slot)], ADDRESS_LOOKUP_TABLE_PROGRAM
+    )
+
+
+def make_create_lookup_table_instruction(
+    authority: Pubkey, payer: Pubkey, recent_slot: int
+) -> tuple[Instruction, Pubkey]:
+    """创建查找表
+
+    Args:
+        authority (Pubkey): 查找表的管理者
+        payer (Pubkey): 支付租金的账户
+        recent_slot (int): 最近的 slot，用于派生查找表地址
+
+    Returns:
+        tuple[Instruction, Pubkey]: 指令及查找表地址
+    """
+    table, bump = derive_lookup_table_address(authority, recent_slot)
+    data = struct.pack("<IQB", _CREATE_LOOKUP_TABLE, recent_slot, bump)
+    accounts = [
+        AccountMeta(table, is_signer=False, is_writable=True),
+        AccountMeta(authority, is_signer=True, is_writable=False),
+        AccountMeta(payer, is_signer=True, is_writable=True),
+        AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+    ]
+    return Instruction(ADDRESS_LOOKUP_TABLE_PROGRAM, data, accounts), table
+
+
+def make_extend_lookup_table_instruction(
+    table: Pubkey, authority: Pubkey, payer: Pubkey, addresses: Sequence[Pubkey]
+) -> Instruction:
+    """向查找表追加地址"""
+    data = struct.pack("<IQ", _EXTEND_LOOKUP_TABLE, len(addresses)) + b"".join(
+        bytes(address) for address in addresses
+    )
+    accounts = [
+        AccountMeta(table, is_signer=False, is_writable=True),
+        AccountMeta(authority, is_signer=True, is_writable=False),
+        AccountMeta(payer, is_signer=True, is_writable=True),
+        AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+    ]
+    return Instruction(ADDRESS_LOOKUP_TABLE_PROGRAM, data, accounts)
+
+
+def decode_lookup_table_addresses(data: bytes) -> list[Pubkey] | None:
+    """解析查找表账户中的地址列表，查找表已停用时返回 None"""
+    if len(data) < LOOKUP_TABLE_META_SIZE:
+        raise ValueError("Invalid lookup table account data")
+    deactivation_slot = struct.unpack_from("<Q", data, 4)[0]
+    if deactivation_slot != _U64_MAX:
+        return None
+    return [
+        Pubkey.from_bytes(data[offset : offset + 32])
+        for offset in range(LOOKUP_TABLE_META_SIZE, len(data) - 31, 32)
+    ]
+
+
+def lookup_candidates(instructions: Iterable[Instruction]) -> list[Pubkey]:
+    """可以放入查找表的账户：非签名者且不是被调用的程序"""
+    instructions = list(instructions)
+    programs = {ix.program_id for ix in instructions}
+    seen: dict[Pubkey, None] = {}
+    for ix in instructions:
+        for meta in ix.accounts:
+            if not meta.is_signer and meta.pubkey not in programs:
+                seen[meta.pubkey] = None
+    return list(seen)
+
+
+class LookupTableManager:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(
+        self,
+        client: AsyncClient | None = None,
+        min_occurrences: int = 2,
+        max_candidates: int = 4096,
+        retry_interval: float = 600,
+    ) -> None:
+        """
+        Args:
+            client (AsyncClient | None, optional): RPC 客户端
+            min_occurrences (int, optional): 账户出现多少次后写入查找表. Defaults to 2.
+            max_candidates (int, optional): 最多统计的候选账户数. Defaults to 4096.
+            retry_interval (float, optional): 扩展失败（如余额不足）后的重试间隔（秒）.
+                Defaults to 600.
+        """
+        if self._initialized:
+            return
+        self._initialized = True
+        self.client = client or get_async_client()
+        self.min_occurrences = min_occurrences
+        self.max_candidates = max_candidates
+        self.retry_interval = retry_interval
+
+        self._tables: dict[Pubkey, list[AddressLookupTableAccount]] = {}
+        # 已写入（包括正在写入）查找表的地址
+        self._known: dict[Pubkey, set[Pubkey]] = {}
+        self._occurrences: Counter[Pubkey] = Counter()
+        self._tasks: dict[Pubkey, asyncio.Task] = {}
+        self._failed_at: dict[Pubkey, float] = {}
+
+    def get_tables(self, authority: Pubkey) -> list[AddressLookupTableAccount]:
+        """返回钱包已生效的查找表，不发起 RPC 请求"""
+        return self._tables.get(authority, [])
+
+    def observe(self, keypair: Keypair, instructions: Sequence[Instruction]) -> None:
+        """统计交易中的账户，有需要写入查找表的地址时在后台扩展查找表"""
+        candidates = lookup_candidates(instructions)
+        self._occurrences.update(candidates)
+        if len(self._occurrences) > self.max_candidates:
+            # 只出现过一次的账户（临时 WSOL 账户等）大概率不会再出现
+            self._occurrences = Counter(
+                {k: v for k, v in self._occurrences.items() if v >= self.min_occurrences}
+            )
+
+        authority = keypair.pubkey()
+        task = self._tasks.get(authority)
+        if task is not None and not task.done():
+            return
+        if time.time() - self._failed_at.get(authority, 0) < self.retry_interval:
+            return
+        if authority in self._known and not self._missing(authority, candidates):
+            return
+        task = asyncio.create_task(self._sync(keypair, candidates))
+        self._tasks[authority] = task
+
+    def _missing(self, authority: Pubkey, candidates: Iterable[Pubkey]) -> list[Pubkey]:
+        known = self._known.get(authority, set())
+        wanted = dict.fromkeys(STATIC_ADDRESSES)
+        for pubkey in candidates:
+            if self._occurrences[pubkey] >= self.min_occurrences:
+                wanted[pubkey] = None
+        return [pubkey for pubkey in wanted if pubkey not in known]
+
+    async def load(self, authority: Pubkey) -> None:
+        """从 Redis 读取钱包拥有的查找表，并拉取链上的地址列表"""
+        redis = RedisClient.get_instance()
+        raw = await redis.hget(LOOKUP_TABLES_KEY, str(authority))
+        table_keys = [Pubkey.from_string(key) for key in json.loads(raw)] if raw else []
+
+        tables: list[AddressLookupTableAccount] = []
+        if table_keys:
+            resp = await self.client.get_multiple_accounts(table_keys, commitment=Confirmed)
+            for key, account in zip(table_keys, resp.value, strict=True):
+                if account is None:
+                    continue
+                addresses = decode_lookup_table_addresses(bytes(account.data))
+                if addresses is not None:
+                    tables.append(AddressLookupTableAccount(key, addresses))
+
+        self._tables[authority] = tables
+        known = self._known.setdefault(authority, set())
+        for table in tables:
+            known.update(table.addresses)
+
+    async def _save(self, authority: Pubkey, table: Pubkey) -> None:
+        redis = RedisClient.get_instance()
+        raw = await redis.hget(LOOKUP_TABLES_KEY, str(authority))
+        table_keys: list[str] = json.loads(raw) if raw else []
+        if str(table) not in table_keys:
+            table_keys.append(str(table))
+            await redis.hset(LOOKUP_TABLES_KEY, str(authority), json.dumps(table_keys))
+
+    async def _send(self, keypair: Keypair, instructions: list[Instruction]) -> None:
+        recent_blockhash, _ = await get_latest_blockhash()
+        message = MessageV0.try_compile(
+            payer=keypair.pubkey(),
+            instructions=instructions,
+            recent_blockhash=recent_blockhash,
+            address_lookup_table_accounts=[],
+        )
+        resp = await self.client.send_transaction(VersionedTransaction(message, [keypair]))
+        await self.client.confirm_transaction(resp.value, commitment=Confirmed)
+
+    async def _extend(self, keypair: Keypair, addresses: list[Pubkey]) -> None:
+        authority = keypair.pubkey()
+        tables = self._tables.get(authority, [])
+        table = next((t for t in reversed(tables) if len(t.addresses) < MAX_TABLE_ADDRESSES), None)
+        instructions: list[Instruction] = []
+        if table is None:
+            resp = await self.client.get_slot(commitment=Finalized)
+            create_ix, table_key = make_create_lookup_table_instruction(
+                authority, authority, resp.value
+            )
+            instructions.append(create_ix)
+            room = MAX_TABLE_ADDRESSES
+        else:
+            table_key = table.key
+            room = MAX_TABLE_ADDRESSES - len(table.addresses)
+
+        batch = addresses[: min(room, MAX_EXTEND_ADDRESSES)]
+        instructions.append(
+            make_extend_lookup_table_instruction(table_key, authority, authority, batch)
+        )
+        # 先标记，避免重复写入；失败时回滚
+        known = self._known.setdefault(authority, set())
+        known.update(batch)
+        try:
+            await self._send(keypair, instructions)
+        except Exception:
+            known.difference_update(batch)
+            raise
+        await self._save(authority, table_key)
+        logger.info(f"Extended lookup table {table_key} with {len(batch)} addresses")
+
+    async def _sync(self, keypair: Keypair, candidates: list[Pubkey]) -> None:
+        authority = keypair.pubkey()
+        try:
+            if authority not in self._known:
+                await self.load(authority)
+            while missing := self._missing(authority, candidates):
+                await self._extend(keypair, missing)
+                # 新表和新地址在下一个 slot 生效后才能使用，稍等再重新加载
+                await asyncio.sleep(1)
+                await self.load(authority)
+        except Exception as e:
+            self._failed_at[authority] = time.time()
+            logger.warning(f"Failed to sync lookup tables for {authority}: {e}")
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
@@ -3,9 +3,17 @@ import time
 
 import backoff
 import httpx
-from solbot_common.cp.swap_event import SwapEventConsumer
+from solbot_common.config import settings
+from solbot_common.cp.partition import PartitionedConsumer, partition_channel
+from solbot_common.cp.swap_event import (
+    SWAP_EVENT_CHANNEL,
+    TRADING_CONSUMER_GROUP,
+    TRADING_PARTITION_LEASE,
+    SwapEventConsumer,
+)
 from solbot_common.cp.swap_result import SwapResultProducer
 from solbot_common.log import logger
+from solbot_common.models.swap_record import TransactionStatus
 from solbot_common.prestart import pre_start
 from solbot_common.types.swap import SwapEvent, SwapResult
 from solbot_common.utils.utils import get_async_client
@@ -14,6 +22,7 @@ from solders.signature import Signature  # type: ignore
 
 from trading.copytrade import CopyTradeProcessor
 from trading.executor import TradingExecutor
+from trading.price_trigger import PriceTriggerService
 from trading.settlement import SwapSettlementProcessor
 
 
@@ -23,45 +32,60 @@ class Trading:
         self.rpc_client = get_async_client()
         self.trading_executor = TradingExecutor(self.rpc_client)
         self.swap_settlement_processor = SwapSettlementProcessor()
-        # 创建多个消费者实例
-        self.num_consumers = 3  # 可以根据需要调整消费者数量
-        self.swap_event_consumers = []
-        for i in range(self.num_consumers):
-            consumer = SwapEventConsumer(
-                self.redis,
-                "trading:swap_event",
-                f"trading:new_swap_event:{i}",  # 为每个消费者创建唯一的名称
-            )
-            consumer.register_callback(self._process_swap_event)
-            self.swap_event_consumers.append(consumer)
+        # 并发处理交易事件，同一用户的交易按顺序执行
+        self.max_concurrent_tasks = 10
+        # 交易事件按用户分区，多个 trading 节点通过租约分摊分区
+        self.partitions = settings.trading.partitions
+        # 止盈止损订单同样按用户分区，只在持有分区的节点上触发
+        self.price_trigger_service = PriceTriggerService(self.partitions)
+        self.swap_event_consumer = PartitionedConsumer(
+            self.redis,
+            TRADING_PARTITION_LEASE,
+            self.partitions,
+            self._create_swap_event_consumer,
+            lease_ttl=settings.trading.partition_lease_ttl,
+            on_assigned=self.price_trigger_service.assign,
+            on_revoked=self.price_trigger_service.revoke,
+        )
 
         self.copytrade_processor = CopyTradeProcessor()
 
         self.swap_result_producer = SwapResultProducer(self.redis)
-        # 添加任务池和信号量
+        # 后台任务（如重建退出订单）
         self.task_pool = set()
-        self.max_concurrent_tasks = 10
-        self.semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
+
+    def _create_swap_event_consumer(self, partition: int) -> SwapEventConsumer:
+        consumer = SwapEventConsumer(
+            self.redis,
+            TRADING_CONSUMER_GROUP,
+            f"trading:{self.swap_event_consumer.node_id}",
+            max_concurrent_tasks=self.max_concurrent_tasks,
+            ordering_key=lambda swap_event: swap_event.user_pubkey,
+            channel=partition_channel(SWAP_EVENT_CHANNEL, partition, self.partitions),
+            # 分区可能刚从其他节点转移过来，先处理其遗留的消息
+            claim_on_start=True,
+        )
+        consumer.register_callback(self._process_single_swap_event)
+        return consumer
 
     async def _process_single_swap_event(self, swap_event: SwapEvent):
         """处理单个交易事件的核心逻辑"""
-        async with self.semaphore:
-            logger.info(f"Processing swap event: {swap_event}")
-
-            try:
-                sig = await self._execute_swap(swap_event)
-                swap_result = await self._record_swap_result(sig, swap_event)
-                logger.info(f"Successfully processed swap event: {swap_event}")
-                return swap_result
-            except (httpx.ConnectTimeout, httpx.ConnectError):
-                logger.error("Connection error")
-                await self._record_failed_swap(swap_event)
-                return
-            except Exception as e:
-                logger.exception(f"Failed to process swap event: {swap_event}")
-                # 即使发生错误也要记录结果
-                await self._record_failed_swap(swap_event)
-                raise e
+        logger.info(f"Processing swap event: {swap_event}")
+
+        try:
+            sig = await self._execute_swap(swap_event)
+            swap_result = await self._record_swap_result(sig, swap_event)
+            logger.info(f"Successfully processed swap event: {swap_event}")
+            self._schedule_exit_order_refresh(swap_result)
+            await self.price_trigger_service.on_swap_result(swap_result)
+        except (httpx.ConnectTimeout, httpx.ConnectError):
+            logger.error("Connection error")
+            await self._record_failed_swap(swap_event)
+        except Exception as e:
+            logger.exception(f"Failed to process swap event: {swap_event}")
+            # 即使发生错误也要记录结果
+            await self._record_failed_swap(swap_event)
+            raise e
 
     @backoff.on_exception(
         backoff.expo,
@@ -115,32 +139,52 @@ class Trading:
         await self.swap_result_producer.produce(swap_result)
         return swap_result
 
-    async def _process_swap_event(self, swap_event: SwapEvent):
-        """创建新的任务来处理交易事件"""
-        task = asyncio.create_task(self._process_single_swap_event(swap_event))
+    def _schedule_exit_order_refresh(self, swap_result: SwapResult) -> None:
+        """交易上链后持仓发生变化，在后台重新构建预签名退出订单"""
+        if self.trading_executor.exit_orders is None:
+            return
+        swap_record = swap_result.swap_record
+        if swap_record is None or swap_record.status != TransactionStatus.SUCCESS:
+            return
+        task = asyncio.create_task(self._refresh_exit_order(swap_result.swap_event))
         self.task_pool.add(task)
         task.add_done_callback(self.task_pool.discard)
 
+    async def _refresh_exit_order(self, swap_event: SwapEvent) -> None:
+        exit_orders = self.trading_executor.exit_orders
+        if exit_orders is None:
+            return
+        if swap_event.swap_mode == "ExactIn":
+            mint = swap_event.output_mint
+        else:
+            mint = swap_event.input_mint
+        try:
+            keypair = await self.trading_executor.get_keypair(swap_event.user_pubkey)
+            route = await self.trading_executor.resolve_route(mint, swap_event.program_id)
+            await exit_orders.refresh(keypair, mint, route)
+        except Exception as e:
+            logger.exception(f"Failed to refresh exit order for {mint}: {e}")
+
     async def start(self):
+        await self.trading_executor.start()
         processor_task = asyncio.create_task(self.copytrade_processor.start())
         # 添加任务完成回调以处理可能的异常
         processor_task.add_done_callback(lambda t: t.exception() if t.exception() else None)
-        # 启动所有消费者
-        for consumer in self.swap_event_consumers:
-            await consumer.start()
+        await self.swap_event_consumer.start()
 
     async def stop(self):
         """优雅关闭所有消费者"""
         # 停止跟单交易
-        self.copytrade_processor.stop()
+        await self.copytrade_processor.stop()
+        await self.price_trigger_service.stop()
 
-        # 停止所有消费者
-        for consumer in self.swap_event_consumers:
-            consumer.stop()
+        # 停止消费者，等待处理中的交易完成
+        await self.swap_event_consumer.stop()
 
         if self.task_pool:
             logger.info("Waiting for remaining tasks to complete...")
             await asyncio.gather(*self.task_pool, return_exceptions=True)
+        await self.trading_executor.stop()
         logger.info("All consumers stopped")
 
 
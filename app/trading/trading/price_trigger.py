@@ -0,0 +1,529 @@
+"""价格触发（止盈止损）
+
+按 mint 维护所有持仓的止盈、止损价格，各自保存为有序数组：
+
+- 止盈：价格升序，价格上涨到阈值及以上时触发，触发的是数组前缀
+- 止损：价格升序，价格下跌到阈值及以下时触发，触发的是数组后缀
+
+每次价格更新先与最低的止盈价、最高的止损价比较，没有越过阈值时只需常数时间；
+越过时用二分查找定位边界，一次取出全部触发的订单。
+
+价格来源：
+- Pump 代币：bonding curve 账户的 websocket 订阅（`BondingCurvePriceFeed`），
+  bonding curve 完成后转为跟踪 Raydium 池子
+- Raydium AMM v4 代币：`AmmV4ReserveCache` 推送的池子储备量（`AmmV4PriceFeed`）
+
+其他价格源可以直接调用 `PriceTriggerEngine.on_price`。
+触发的订单以全部卖出的 `SwapEvent` 发出，与普通交易走同一条流程。
+
+订单与交易事件一样按用户分区，节点只加载、触发自己持有租约的分区内的订单，
+多个 trading 节点不会对同一持仓重复发出卖出。
+"""
+
+import asyncio
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, replace
+
+import orjson as json
+from solana.rpc.commitment import Processed
+from solana.rpc.websocket_api import connect
+from solbot_cache.amm_v4_reserves import AmmV4ReserveCache
+from solbot_cache.rayidum import get_preferred_pool
+from solbot_common.config import settings
+from solbot_common.constants import RAY_V4, WSOL
+from solbot_common.cp.partition import partition_of
+from solbot_common.cp.swap_event import SwapEventProducer
+from solbot_common.layouts.bonding_curve_account import BondingCurveAccount
+from solbot_common.log import logger
+from solbot_common.models.swap_record import TransactionStatus
+from solbot_common.types.raydium import AmmV4PoolKeys
+from solbot_common.types.swap import SwapEvent, SwapResult
+from solbot_common.utils.pda import to_pubkey
+from solbot_common.utils.pump import get_pump_mint_accounts
+from solbot_common.utils.quote import QuoteService
+from solbot_common.utils.utils import get_websocket_url
+from solbot_db.redis import RedisClient
+from solders.pubkey import Pubkey  # type: ignore
+from solders.rpc.responses import AccountNotification, SubscriptionResult  # type: ignore
+from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
+
+from trading.copytrade_index import CopyTradeIndex
+
+PRICE_TRIGGERS_KEY = "trading:price_triggers"
+RAY_V4_PROGRAM_ID = str(RAY_V4)
+
+
+@dataclass(slots=True)
+class TriggerOrder:
+    """一个持仓的止盈止损订单，价格单位为 lamports / 代币最小单位"""
+
+    user_pubkey: str
+    mint: str
+    token_amount: int
+    take_profit_price: float | None
+    stop_loss_price: float | None
+    slippage_bps: int
+    priority_fee: float | None = None
+    program_id: str | None = None
+    # 旧版本订单中没有该字段，按 Pump 代币的精度处理
+    token_decimals: int = 6
+
+    @property
+    def order_id(self) -> str:
+        return f"{self.user_pubkey}:{self.mint}"
+
+
+class ThresholdBook:
+    """单个 mint 的阈值索引"""
+
+    __slots__ = ("sl_ids", "sl_prices", "tp_ids", "tp_prices")
+
+    def __init__(self) -> None:
+        self.tp_prices: list[float] = []
+        self.tp_ids: list[str] = []
+        self.sl_prices: list[float] = []
+        self.sl_ids: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.tp_ids) + len(self.sl_ids)
+
+    @staticmethod
+    def _insert(prices: list[float], ids: list[str], price: float, order_id: str) -> None:
+        index = bisect_right(prices, price)
+        prices.insert(index, price)
+        ids.insert(index, order_id)
+
+    @staticmethod
+    def _remove(prices: list[float], ids: list[str], price: float, order_id: str) -> None:
+        index = bisect_left(prices, price)
+        while index < len(prices) and prices[index] == price:
+            if ids[index] == order_id:
+                del prices[index]
+                del ids[index]
+                return
+            index += 1
+
+    def add(self, order: TriggerOrder) -> None:
+        if order.take_profit_price is not None:
+            self._insert(self.tp_prices, self.tp_ids, order.take_profit_price, order.order_id)
+        if order.stop_loss_price is not None:
+            self._insert(self.sl_prices, self.sl_ids, order.stop_loss_price, order.order_id)
+
+    def remove(self, order: TriggerOrder) -> None:
+        if order.take_profit_price is not None:
+            self._remove(self.tp_prices, self.tp_ids, order.take_profit_price, order.order_id)
+        if order.stop_loss_price is not None:
+            self._remove(self.sl_prices, self.sl_ids, order.stop_loss_price, order.order_id)
+
+    def cross(self, price: float) -> list[str]:
+        """取出价格越过阈值的订单"""
+        crossed: list[str] = []
+        if self.tp_prices and price >= self.tp_prices[0]:
+            index = bisect_right(self.tp_prices, price)
+            crossed.extend(self.tp_ids[:index])
+            del self.tp_prices[:index]
+            del self.tp_ids[:index]
+        if self.sl_prices and price <= self.sl_prices[-1]:
+            index = bisect_left(self.sl_prices, price)
+            crossed.extend(self.sl_ids[index:])
+            del self.sl_prices[index:]
+            del self.sl_ids[index:]
+        return crossed
+
+
+class PriceTriggerEngine:
+    """跨用户的止盈止损阈值索引"""
+
+    def __init__(self) -> None:
+        self._orders: dict[str, TriggerOrder] = {}
+        self._books: dict[str, ThresholdBook] = {}
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def mints(self) -> list[str]:
+        return list(self._books)
+
+    def get(self, order_id: str) -> TriggerOrder | None:
+        return self._orders.get(order_id)
+
+    def orders(self) -> list[TriggerOrder]:
+        return list(self._orders.values())
+
+    def add(self, order: TriggerOrder) -> None:
+        """添加订单，同一持仓已有订单时替换"""
+        self.remove(order.order_id)
+        self._orders[order.order_id] = order
+        self._books.setdefault(order.mint, ThresholdBook()).add(order)
+
+    def remove(self, order_id: str) -> TriggerOrder | None:
+        order = self._orders.pop(order_id, None)
+        if order is None:
+            return None
+        book = self._books.get(order.mint)
+        if book is not None:
+            book.remove(order)
+            if not book:
+                del self._books[order.mint]
+        return order
+
+    def on_price(self, mint: str, price: float) -> list[TriggerOrder]:
+        """处理价格更新，返回触发的订单（已从索引中移除）"""
+        book = self._books.get(mint)
+        if book is None:
+            return []
+        triggered: list[TriggerOrder] = []
+        for order_id in book.cross(price):
+            order = self._orders.pop(order_id, None)
+            if order is None:
+                # 止盈止损同时越过时，订单已在另一侧取出
+                continue
+            # 移除另一侧的阈值
+            book.remove(order)
+            triggered.append(order)
+        if not book:
+            del self._books[mint]
+        return triggered
+
+
+def bonding_curve_price(account: BondingCurveAccount) -> float:
+    return account.virtual_sol_reserves / account.virtual_token_reserves
+
+
+class BondingCurvePriceFeed:
+    """订阅 bonding curve 账户，推送 Pump 代币的价格
+
+    最新的虚拟储备量同时作为 `QuoteService` 的本地储备量来源。
+    bonding curve 完成（迁移到 Raydium）后调用 `on_complete`。
+    """
+
+    def __init__(
+        self,
+        on_price: Callable[[str, float], None],
+        on_complete: Callable[[str], None] | None = None,
+        reconnect_delay: float = 3,
+    ) -> None:
+        self.on_price = on_price
+        self.on_complete = on_complete
+        self.websocket_url = get_websocket_url(settings.rpc.rpc_url)
+        self.reconnect_delay = reconnect_delay
+        # bonding curve -> mint
+        self._tracked: dict[Pubkey, str] = {}
+        self._pending_subscribe: asyncio.Queue[Pubkey] = asyncio.Queue()
+        self._subscription_ids: dict[int, Pubkey] = {}
+        # mint -> (虚拟 SOL 储备量, 虚拟代币储备量)
+        self._reserves: dict[str, tuple[int, int]] = {}
+        self._task: asyncio.Task | None = None
+        QuoteService().register_reserve_source(self.get_reserves)
+
+    def get_reserves(self, mint: str) -> tuple[int, int] | None:
+        return self._reserves.get(mint)
+
+    def track(self, mint: str) -> None:
+        bonding_curve = get_pump_mint_accounts(to_pubkey(mint)).bonding_curve
+        if bonding_curve in self._tracked:
+            return
+        self._tracked[bonding_curve] = mint
+        self._pending_subscribe.put_nowait(bonding_curve)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _apply(self, bonding_curve: Pubkey, data: bytes) -> None:
+        mint = self._tracked.get(bonding_curve)
+        if mint is None:
+            return
+        account = BondingCurveAccount.from_buffer(data)
+        if account.complete or account.virtual_token_reserves == 0:
+            if self._reserves.pop(mint, None) is not None and self.on_complete is not None:
+                self.on_complete(mint)
+            return
+        self._reserves[mint] = (account.virtual_sol_reserves, account.virtual_token_reserves)
+        self.on_price(mint, bonding_curve_price(account))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._subscribe_loop()
+            except asyncio.CancelledError:
+                raise
+            except (ConnectionClosedError, ConnectionClosedOK) as e:
+                logger.warning(f"BondingCurvePriceFeed websocket closed: {e}")
+            except Exception as e:
+                logger.exception(f"BondingCurvePriceFeed websocket error: {e}")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _subscribe_loop(self) -> None:
+        async with connect(self.websocket_url, ping_interval=20, ping_timeout=30) as websocket:
+            # 重连后需要重新订阅全部账户
+            self._subscription_ids.clear()
+            self._pending_subscribe = asyncio.Queue()
+            for pubkey in self._tracked:
+                self._pending_subscribe.put_nowait(pubkey)
+
+            waiting_response: deque[Pubkey] = deque()
+            recv_task = asyncio.create_task(websocket.recv())
+            queue_task = asyncio.create_task(self._pending_subscribe.get())
+            try:
+                while True:
+                    done, _ = await asyncio.wait(
+                        {recv_task, queue_task}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if queue_task in done:
+                        pubkey = queue_task.result()
+                        waiting_response.append(pubkey)
+                        await websocket.account_subscribe(
+                            pubkey, commitment=Processed, encoding="base64"
+                        )
+                        queue_task = asyncio.create_task(self._pending_subscribe.get())
+
+                    if recv_task in done:
+                        for message in recv_task.result():
+                            if isinstance(message, SubscriptionResult):
+                                if waiting_response:
+                                    self._subscription_ids[message.result] = (
+                                        waiting_response.popleft()
+                                    )
+                            elif isinstance(message, AccountNotification):
+                                pubkey = self._subscription_ids.get(message.subscription)
+                                if pubkey is not None:
+                                    self._apply(pubkey, bytes(message.result.value.data))
+                        recv_task = asyncio.create_task(websocket.recv())
+            finally:
+                recv_task.cancel()
+                queue_task.cancel()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class AmmV4PriceFeed:
+    """通过 `AmmV4ReserveCache` 推送 Raydium AMM v4 代币的价格
+
+    价格为 SOL 储备量 / 代币储备量（最小单位），与 bonding curve 价格的单位一致。
+    """
+
+    def __init__(
+        self, on_price: Callable[[str, float], None], cache: AmmV4ReserveCache | None = None
+    ) -> None:
+        self.on_price = on_price
+        self.cache = cache or AmmV4ReserveCache()
+        self.cache.add_listener(self._on_reserves)
+        self._mints: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    def track(self, mint: str) -> None:
+        if mint in self._mints:
+            return
+        self._mints.add(mint)
+        task = asyncio.create_task(self._track(mint))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _track(self, mint: str) -> None:
+        """查找代币的池子，首次拉取储备量并开始订阅"""
+        try:
+            pool_data = await get_preferred_pool(mint)
+            if pool_data is None:
+                logger.warning(f"No Raydium pool found for {mint}, price trigger disabled")
+                self._mints.discard(mint)
+                return
+            pool_keys = AmmV4PoolKeys.from_pool_data(
+                pool_id=pool_data["pool_id"],
+                amm_data=pool_data["amm_data"],
+                market_data=pool_data["market_data"],
+            )
+            reserves = await self.cache.get(pool_keys)
+        except Exception as e:
+            logger.exception(f"Failed to track Raydium pool of {mint}: {e}")
+            self._mints.discard(mint)
+            return
+        token_reserve, sol_reserve = reserves.reserves_for(reserves.token_mint)
+        self._on_reserves(mint, sol_reserve, token_reserve)
+
+    def _on_reserves(self, mint: str, sol_reserve: int, token_reserve: int) -> None:
+        if mint not in self._mints or token_reserve == 0:
+            return
+        self.on_price(mint, sol_reserve / token_reserve)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.cache.stop()
+
+
+class PriceTriggerService:
+    """根据成交结果登记止盈止损订单，价格触发后发出卖出事件
+
+    只为开启了止盈止损（`CopyTrade.stop_loss`）的跟单买入登记订单，
+    阈值按该跟单的 `take_profit_pct` / `stop_loss_pct` 相对成交价计算，两者都为空时不登记。
+
+    订单按用户所在的交易事件分区管理：获得分区时（`assign`）从 Redis 加载该分区的订单，
+    释放分区前（`revoke`）移除，同一订单只会在持有该分区的节点上触发。
+    """
+
+    def __init__(self, partitions: int | None = None) -> None:
+        """
+        Args:
+            partitions: 交易事件分区数，默认为 settings.trading.partitions
+        """
+        self.redis = RedisClient.get_instance()
+        self.engine = PriceTriggerEngine()
+        self.pump_feed = BondingCurvePriceFeed(self.on_price, on_complete=self._on_migrated)
+        self.amm_feed = AmmV4PriceFeed(self.on_price)
+        self.swap_event_producer = SwapEventProducer(self.redis)
+        self.copytrade_index = CopyTradeIndex()
+        self.partitions = partitions if partitions is not None else settings.trading.partitions
+        # 当前持有的交易事件分区
+        self._partitions: set[int] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    def _owns(self, user_pubkey: str) -> bool:
+        return partition_of(user_pubkey, self.partitions) in self._partitions
+
+    async def assign(self, partition: int) -> None:
+        """获得交易事件分区后，从 Redis 加载该分区内用户的订单"""
+        self._partitions.add(partition)
+        raw_orders = await self.redis.hgetall(PRICE_TRIGGERS_KEY)
+        loaded = 0
+        for raw in raw_orders.values():
+            order = TriggerOrder(**json.loads(raw))
+            if partition_of(order.user_pubkey, self.partitions) == partition:
+                self._add(order)
+                loaded += 1
+        logger.info(f"Loaded {loaded} price trigger orders of partition {partition}")
+
+    async def revoke(self, partition: int) -> None:
+        """释放交易事件分区前，移除该分区内用户的订单，之后由新的持有者加载"""
+        self._partitions.discard(partition)
+        for order in self.engine.orders():
+            if partition_of(order.user_pubkey, self.partitions) == partition:
+                self.engine.remove(order.order_id)
+
+    def _add(self, order: TriggerOrder) -> None:
+        self.engine.add(order)
+        if order.program_id == RAY_V4_PROGRAM_ID:
+            self.amm_feed.track(order.mint)
+        else:
+            self.pump_feed.track(order.mint)
+
+    def _on_migrated(self, mint: str) -> None:
+        """bonding curve 已完成，代币迁移到 Raydium 后改为跟踪池子价格
+
+        订单的 program_id 同时改为 Raydium，触发后的卖出不再按 Pump 路由构建。
+        """
+        logger.info(f"Bonding curve of {mint} completed, tracking Raydium pool instead")
+        migrated = [
+            replace(order, program_id=RAY_V4_PROGRAM_ID)
+            for order in self.engine.orders()
+            if order.mint == mint and order.program_id != RAY_V4_PROGRAM_ID
+        ]
+        for order in migrated:
+            self.engine.add(order)
+        self.amm_feed.track(mint)
+        if migrated:
+            task = asyncio.create_task(self._save_migrated(migrated))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _save_migrated(self, orders: list[TriggerOrder]) -> None:
+        for order in orders:
+            # 保存前已触发或被移除的订单不再写回
+            if self.engine.get(order.order_id) is not order:
+                continue
+            await self.redis.hset(PRICE_TRIGGERS_KEY, order.order_id, json.dumps(asdict(order)))
+
+    async def add(self, order: TriggerOrder) -> None:
+        if self._owns(order.user_pubkey):
+            self._add(order)
+        await self.redis.hset(PRICE_TRIGGERS_KEY, order.order_id, json.dumps(asdict(order)))
+
+    async def remove(self, order_id: str) -> None:
+        self.engine.remove(order_id)
+        await self.redis.hdel(PRICE_TRIGGERS_KEY, order_id)
+
+    def on_price(self, mint: str, price: float) -> None:
+        for order in self.engine.on_price(mint, price):
+            logger.info(f"Price trigger fired: {order.order_id} at price {price}")
+            task = asyncio.create_task(self._emit(order))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _emit(self, order: TriggerOrder) -> None:
+        swap_event = SwapEvent(
+            user_pubkey=order.user_pubkey,
+            swap_mode="ExactOut",
+            input_mint=order.mint,
+            output_mint=WSOL.__str__(),
+            amount=order.token_amount,
+            # 与跟单卖出一致，ui_amount 为代币数量，amount_pct 为卖出比例
+            ui_amount=order.token_amount / 10**order.token_decimals,
+            timestamp=int(time.time()),
+            amount_pct=1,
+            swap_in_type="pct",
+            priority_fee=order.priority_fee,
+            slippage_bps=order.slippage_bps,
+            by="copytrade",
+            program_id=order.program_id,
+        )
+        await self.swap_event_producer.produce(swap_event)
+        await self.redis.hdel(PRICE_TRIGGERS_KEY, order.order_id)
+
+    def _thresholds(self, swap_event: SwapEvent) -> tuple[float | None, float | None] | None:
+        """返回触发该买入的跟单设置的止盈、止损比例（%），未开启止盈止损时返回 None"""
+        if swap_event.by != "copytrade" or swap_event.tx_event is None:
+            return None
+        for copytrade, _ in self.copytrade_index.route(swap_event.tx_event.who):
+            if copytrade.owner != swap_event.user_pubkey or not copytrade.stop_loss:
+                continue
+            if copytrade.take_profit_pct is None and copytrade.stop_loss_pct is None:
+                continue
+            return copytrade.take_profit_pct, copytrade.stop_loss_pct
+        return None
+
+    async def on_swap_result(self, swap_result: SwapResult) -> None:
+        """成交后登记或移除订单"""
+        swap_event = swap_result.swap_event
+        swap_record = swap_result.swap_record
+        if swap_record is None or swap_record.status != TransactionStatus.SUCCESS:
+            return
+
+        if swap_event.swap_mode == "ExactOut":
+            if swap_event.swap_in_type == "pct" and swap_event.amount_pct == 1:
+                await self.remove(f"{swap_event.user_pubkey}:{swap_event.input_mint}")
+            return
+
+        if not swap_record.output_amount:
+            return
+        thresholds = self._thresholds(swap_event)
+        if thresholds is None:
+            return
+        take_profit_pct, stop_loss_pct = thresholds
+        entry_price = swap_record.input_amount / swap_record.output_amount
+        order = TriggerOrder(
+            user_pubkey=swap_event.user_pubkey,
+            mint=swap_event.output_mint,
+            token_amount=swap_record.output_amount,
+            take_profit_price=(
+                entry_price * (1 + take_profit_pct / 100) if take_profit_pct is not None else None
+            ),
+            stop_loss_price=(
+                entry_price * (1 - stop_loss_pct / 100) if stop_loss_pct is not None else None
+            ),
+            slippage_bps=swap_event.slippage_bps or 1000,
+            priority_fee=swap_event.priority_fee,
+            program_id=swap_event.program_id,
+            token_decimals=swap_record.output_token_decimals,
+        )
+        await self.add(order)
+
+    async def stop(self) -> None:
+        await self.pump_feed.stop()
+        await self.amm_feed.stop()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,201 @@
+"""优先费用估算
+
+后台定期为最近交易涉及的可写账户调用 getRecentPrioritizationFees，
+在内存中按账户集合以及按程序维护最近约 150 个 slot 的费用分布，
+构建交易时可以立即取得 p50/p75/p90，无需阻塞等待 RPC。
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from solana.rpc.async_api import AsyncClient
+from solbot_common.log import logger
+from solbot_common.utils.utils import get_async_client
+from solders.pubkey import Pubkey  # type: ignore
+
+# getRecentPrioritizationFees 最多接受 128 个账户
+MAX_ACCOUNTS_PER_REQUEST = 128
+# 每轮刷新同时进行的 getRecentPrioritizationFees 请求数
+MAX_CONCURRENT_REQUESTS = 8
+
+
+@dataclass(frozen=True)
+class FeePercentiles:
+    """优先费用分布，单位是 micro-lamports / CU"""
+
+    p50: int
+    p75: int
+    p90: int
+    samples: int
+    updated_at: float
+
+    def get(self, percentile: int) -> int:
+        if percentile == 50:
+            return self.p50
+        if percentile == 75:
+            return self.p75
+        if percentile == 90:
+            return self.p90
+        raise ValueError("percentile must be one of 50, 75, 90")
+
+
+def _percentile(sorted_values: list[int], pct: int) -> int:
+    index = max(0, -(-len(sorted_values) * pct // 100) - 1)
+    return sorted_values[index]
+
+
+def _summarize(fees_by_slot: dict[int, int]) -> FeePercentiles | None:
+    if not fees_by_slot:
+        return None
+    values = sorted(fees_by_slot.values())
+    return FeePercentiles(
+        p50=_percentile(values, 50),
+        p75=_percentile(values, 75),
+        p90=_percentile(values, 90),
+        samples=len(values),
+        updated_at=time.time(),
+    )
+
+
+@dataclass
+class _TrackedSet:
+    program: Pubkey
+    accounts: list[Pubkey]
+    last_used: float
+    fees_by_slot: dict[int, int]
+
+
+class PriorityFeeEstimator:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(
+        self,
+        client: AsyncClient | None = None,
+        refresh_interval: float = 2,
+        max_tracked_sets: int = 256,
+        idle_ttl: float = 300,
+        max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS,
+    ) -> None:
+        if self._initialized:
+            return
+        self._initialized = True
+        self.client = client or get_async_client()
+        self.refresh_interval = refresh_interval
+        self.max_tracked_sets = max_tracked_sets
+        self.idle_ttl = idle_ttl
+        # 不同账户集合的费用不能合并查询（结果反映同时锁定所有账户的费用），
+        # 限制并发避免账户集合较多时触发 RPC 限流，下一轮在本轮完成后才开始
+        self._requests = asyncio.Semaphore(max_concurrent_requests)
+
+        self._sets: OrderedDict[frozenset[Pubkey], _TrackedSet] = OrderedDict()
+        self._set_percentiles: dict[frozenset[Pubkey], FeePercentiles] = {}
+        self._program_percentiles: dict[Pubkey, FeePercentiles] = {}
+        self._task: asyncio.Task | None = None
+
+    def track(self, program: Pubkey, accounts: Sequence[Pubkey]) -> frozenset[Pubkey]:
+        """登记需要采样的账户集合
+
+        Args:
+            program (Pubkey): 账户集合所属的程序
+            accounts (Sequence[Pubkey]): 交易会写入的账户
+
+        Returns:
+            frozenset[Pubkey]: 账户集合的 key
+        """
+        key = frozenset(accounts[:MAX_ACCOUNTS_PER_REQUEST])
+        tracked = self._sets.get(key)
+        if tracked is None:
+            self._sets[key] = _TrackedSet(
+                program=program,
+                accounts=list(key),
+                last_used=time.time(),
+                fees_by_slot={},
+            )
+            while len(self._sets) > self.max_tracked_sets:
+                evicted, _ = self._sets.popitem(last=False)
+                self._set_percentiles.pop(evicted, None)
+        else:
+            tracked.last_used = time.time()
+            self._sets.move_to_end(key)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+        return key
+
+    def estimate(self, program: Pubkey, accounts: Sequence[Pubkey]) -> FeePercentiles | None:
+        """立即返回账户集合的费用分布，不发起 RPC 请求
+
+        账户集合尚无数据时退回到程序维度的分布；都没有时返回 None，
+        同时登记该账户集合，后台刷新后即可命中。
+
+        Args:
+            program (Pubkey): 账户集合所属的程序
+            accounts (Sequence[Pubkey]): 交易会写入的账户
+
+        Returns:
+            FeePercentiles | None: 费用分布
+        """
+        key = self.track(program, accounts)
+        percentiles = self._set_percentiles.get(key)
+        if percentiles is not None:
+            return percentiles
+        return self._program_percentiles.get(program)
+
+    async def _refresh_set(self, key: frozenset[Pubkey], tracked: _TrackedSet) -> None:
+        async with self._requests:
+            resp = await self.client.get_recent_prioritization_fees(tracked.accounts)
+        tracked.fees_by_slot = {fee.slot: fee.prioritization_fee for fee in resp.value}
+        percentiles = _summarize(tracked.fees_by_slot)
+        if percentiles is not None:
+            self._set_percentiles[key] = percentiles
+
+    async def refresh(self) -> None:
+        """刷新所有账户集合，并重新汇总程序维度的分布"""
+        now = time.time()
+        for key in [k for k, v in self._sets.items() if now - v.last_used > self.idle_ttl]:
+            del self._sets[key]
+            self._set_percentiles.pop(key, None)
+
+        items = list(self._sets.items())
+        results = await asyncio.gather(
+            *(self._refresh_set(key, tracked) for key, tracked in items),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to refresh prioritization fees: {result}")
+
+        # 同一程序下不同账户集合按 slot 取最大值，作为程序维度的分布
+        by_program: dict[Pubkey, dict[int, int]] = {}
+        for tracked in self._sets.values():
+            merged = by_program.setdefault(tracked.program, {})
+            for slot, fee in tracked.fees_by_slot.items():
+                merged[slot] = max(fee, merged.get(slot, 0))
+        self._program_percentiles = {
+            program: percentiles
+            for program, fees in by_program.items()
+            if (percentiles := _summarize(fees)) is not None
+        }
+
+    async def _refresh_loop(self) -> None:
+        while self._sets:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.exception(f"Prioritization fee refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
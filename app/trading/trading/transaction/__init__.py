@@ -1,11 +1,18 @@
 from trading.transaction.base import TransactionSender
+from trading.transaction.broadcast import BroadcastTransactionSender
 from trading.transaction.builders.base import TransactionBuilder
 from trading.transaction.factory import TradingService
 from trading.transaction.protocol import TradingRoute
-from trading.transaction.sender import DefaultTransactionSender, JitoTransactionSender
+from trading.transaction.sender import (
+    DefaultTransactionSender,
+    JitoBundleTransactionSender,
+    JitoTransactionSender,
+)
 
 __all__ = [
+    "BroadcastTransactionSender",
     "DefaultTransactionSender",
+    "JitoBundleTransactionSender",
     "JitoTransactionSender",
     "TradingRoute",
     "TradingService",
@@ -0,0 +1,332 @@
+import asyncio
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+
+from solana.rpc.async_api import AsyncClient
+from solbot_common.config import settings
+from solbot_common.log import logger
+from solbot_db.redis import RedisClient
+from solders.signature import Signature  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+from solders.transaction_status import TransactionConfirmationStatus  # type: ignore
+
+from .base import TransactionSender
+
+# blockhash 有效期约 150 个 slot，未提供 last_valid_block_height 时按时间兜底
+DEFAULT_MAX_RESEND_DURATION = 60
+# 各路径的上链统计，按路径名存放在 hash 中，多个 trading 节点累加
+PATH_STATS_KEY = "trading:broadcast:path_stats"
+# 结算的交易数少于该值的路径不参与默认路径选择
+MIN_PATH_SAMPLES = 20
+
+
+@dataclass
+class PathStats:
+    """单条广播路径的统计"""
+
+    # 参与广播的交易笔数
+    broadcasts: int = 0
+    # 发送次数（包含重发）
+    sent: int = 0
+    accepted: int = 0
+    errors: int = 0
+    # 该路径最先返回接受响应的交易笔数
+    first_accepted: int = 0
+    # 已结算（上链或过期）且经过该路径广播的交易笔数，持久化
+    settled: int = 0
+    # 归因到该路径上链的交易笔数，持久化
+    landed: int = 0
+    # 接受延迟的指数移动平均（秒）
+    accept_latency_ema: float | None = None
+
+    def record_accept(self, latency: float, alpha: float = 0.2) -> None:
+        self.accepted += 1
+        if self.accept_latency_ema is None:
+            self.accept_latency_ema = latency
+        else:
+            self.accept_latency_ema = alpha * latency + (1 - alpha) * self.accept_latency_ema
+
+    @property
+    def landing_rate(self) -> float:
+        if self.settled == 0:
+            return 0.0
+        return self.landed / self.settled
+
+
+@dataclass
+class BroadcastResult:
+    """一次广播的结果"""
+
+    signature: Signature
+    first_path: str | None = None
+    started_at: float = field(default_factory=time.time)
+    # 路径 -> 首次接受该交易的时间
+    accepted_at: dict[str, float] = field(default_factory=dict)
+    landed: bool = False
+    landed_at: float | None = None
+    # 归因的上链路径，无法确定时为 None
+    landed_path: str | None = None
+    resend_rounds: int = 0
+
+
+class BroadcastTransactionSender(TransactionSender):
+    """广播交易发送器
+
+    将同一笔已签名交易同时提交到多条路径（多个 RPC 节点、Jito、GMGN），
+    并按固定间隔重发，直到交易确认或 blockhash 过期。
+
+    交易上链后归因到具体路径：实现了 `landed_via` 的路径（Jito bundle）可以直接确认是否由其上链，
+    其余路径提交的是同一笔交易，链上无法区分，记为最先接受该交易的路径。
+    各路径的结算数和上链数写入 Redis，非广播模式通过 `best_path` 选择上链率最高的路径。
+    """
+
+    def __init__(
+        self,
+        rpc_client: AsyncClient,
+        paths: Mapping[str, TransactionSender],
+        resend_interval: float = 2,
+        max_resend_duration: float = DEFAULT_MAX_RESEND_DURATION,
+    ) -> None:
+        super().__init__(rpc_client)
+        if not paths:
+            raise ValueError("At least one broadcast path is required")
+        self.paths = dict(paths)
+        self.resend_interval = resend_interval
+        self.max_resend_duration = max_resend_duration
+        self.stats: dict[str, PathStats] = {name: PathStats() for name in self.paths}
+        self.results: dict[Signature, BroadcastResult] = {}
+        self.redis = RedisClient.get_instance()
+        self._resend_tasks: set[asyncio.Task] = set()
+
+    async def load_stats(self) -> None:
+        """从 Redis 读取各路径累计的上链统计"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for name in self.paths:
+                pipe.hgetall(f"{PATH_STATS_KEY}:{name}")
+            values = await pipe.execute()
+        for name, value in zip(self.paths, values, strict=True):
+            stats = self.stats[name]
+            stats.settled = int(value.get("settled", 0))
+            stats.landed = int(value.get("landed", 0))
+
+    async def _save_settlement(self, names: list[str], landed_path: str | None) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.hincrby(f"{PATH_STATS_KEY}:{name}", "settled", 1)
+            if landed_path is not None:
+                pipe.hincrby(f"{PATH_STATS_KEY}:{landed_path}", "landed", 1)
+            await pipe.execute()
+
+    def best_path(self, candidates: list[str], min_samples: int = MIN_PATH_SAMPLES) -> str | None:
+        """在候选路径中选择上链率最高的一条，样本都不足时返回 None"""
+        ranked = [
+            name
+            for name in candidates
+            if name in self.stats and self.stats[name].settled >= min_samples
+        ]
+        if not ranked:
+            return None
+        return max(ranked, key=lambda name: self.stats[name].landing_rate)
+
+    async def _send_via(
+        self, name: str, transaction: VersionedTransaction, result: BroadcastResult
+    ) -> tuple[str, Signature]:
+        stats = self.stats[name]
+        stats.sent += 1
+        start = time.perf_counter()
+        try:
+            sig = await self.paths[name].send_transaction(transaction)
+        except Exception as e:
+            stats.errors += 1
+            logger.warning(f"Broadcast path {name} failed: {e}")
+            raise
+        stats.record_accept(time.perf_counter() - start)
+        result.accepted_at.setdefault(name, time.time())
+        return name, sig
+
+    async def send_transaction(
+        self,
+        transaction: VersionedTransaction,
+        last_valid_block_height: int | None = None,
+        **kwargs,
+    ) -> Signature:
+        """广播交易，第一条路径接受后立即返回签名，后台继续重发直至确认或过期
+
+        Args:
+            transaction (VersionedTransaction): 已签名的交易
+            last_valid_block_height (int | None, optional): blockhash 的最后有效区块高度
+
+        Returns:
+            Signature: 交易签名
+
+        Raises:
+            Exception: 所有路径都失败时抛出
+        """
+        for stats in self.stats.values():
+            stats.broadcasts += 1
+        result = BroadcastResult(signature=transaction.signatures[0])
+        tasks = [
+            asyncio.create_task(self._send_via(name, transaction, result)) for name in self.paths
+        ]
+        first: tuple[str, Signature] | None = None
+        pending = set(tasks)
+        while pending and first is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    first = task.result()
+                    break
+
+        if first is None:
+            raise Exception("All broadcast paths failed")
+
+        # 其余路径在后台继续完成，不阻塞返回
+        for task in pending:
+            self._track(task)
+
+        first_path, signature = first
+        self.stats[first_path].first_accepted += 1
+        result.signature = signature
+        result.first_path = first_path
+        self.results[signature] = result
+        logger.info(f"Transaction {signature} first accepted by {first_path}")
+
+        resend = self._resend_until_landed(transaction, result, last_valid_block_height)
+        self._track(asyncio.create_task(resend))
+        return signature
+
+    def _track(self, task: asyncio.Task) -> None:
+        self._resend_tasks.add(task)
+        task.add_done_callback(self._resend_tasks.discard)
+        # 避免未处理的异常告警，失败已计入统计
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _is_landed(self, signature: Signature) -> bool:
+        resp = await self.rpc_client.get_signature_statuses([signature])
+        status = resp.value[0]
+        if status is None:
+            return False
+        return status.confirmation_status in (
+            TransactionConfirmationStatus.Confirmed,
+            TransactionConfirmationStatus.Finalized,
+        )
+
+    async def _is_expired(
+        self, result: BroadcastResult, last_valid_block_height: int | None
+    ) -> bool:
+        if time.time() - result.started_at > self.max_resend_duration:
+            return True
+        if last_valid_block_height is None:
+            return False
+        resp = await self.rpc_client.get_block_height()
+        return resp.value > last_valid_block_height
+
+    async def _attribute(self, result: BroadcastResult) -> str | None:
+        """确定已上链的交易由哪条路径提交"""
+        unverifiable: dict[str, float] = {}
+        for name, accepted_at in result.accepted_at.items():
+            landed_via = getattr(self.paths[name], "landed_via", None)
+            if landed_via is None:
+                unverifiable[name] = accepted_at
+                continue
+            try:
+                if await landed_via(result.signature):
+                    return name
+            except Exception as e:
+                logger.warning(f"Failed to check landing of {result.signature} via {name}: {e}")
+                return None
+        if not unverifiable:
+            return None
+        return min(unverifiable, key=unverifiable.__getitem__)
+
+    async def _settle(self, result: BroadcastResult) -> None:
+        """结算一笔广播：归因上链路径并累计各路径的统计"""
+        if result.landed:
+            result.landed_path = await self._attribute(result)
+            if result.landed_path is None:
+                # 无法归因的上链不计入统计，避免拉低所有路径的上链率
+                logger.info(f"Transaction {result.signature} landed via unknown path")
+                return
+        for stats in self.stats.values():
+            stats.settled += 1
+        if result.landed_path is not None:
+            self.stats[result.landed_path].landed += 1
+        try:
+            await self._save_settlement(list(self.paths), result.landed_path)
+        except Exception as e:
+            logger.warning(f"Failed to save broadcast path stats: {e}")
+
+    async def _resend_until_landed(
+        self,
+        transaction: VersionedTransaction,
+        result: BroadcastResult,
+        last_valid_block_height: int | None,
+    ) -> None:
+        while True:
+            await asyncio.sleep(self.resend_interval)
+            try:
+                if await self._is_landed(result.signature):
+                    result.landed = True
+                    result.landed_at = time.time()
+                    break
+                if await self._is_expired(result, last_valid_block_height):
+                    logger.warning(f"Transaction {result.signature} expired before landing")
+                    break
+            except Exception as e:
+                logger.warning(f"Failed to check status of {result.signature}: {e}")
+
+            result.resend_rounds += 1
+            await asyncio.gather(
+                *(self._send_via(name, transaction, result) for name in self.paths),
+                return_exceptions=True,
+            )
+
+        await self._settle(result)
+        if result.landed and result.landed_at is not None:
+            logger.info(
+                f"Transaction {result.signature} landed after "
+                f"{result.landed_at - result.started_at:.2f}s via {result.landed_path}, "
+                f"first accepted by {result.first_path}, resend rounds: {result.resend_rounds}"
+            )
+        self.results.pop(result.signature, None)
+
+    async def simulate_transaction(
+        self,
+        transaction: VersionedTransaction,
+    ) -> bool:
+        resp = await self.rpc_client.simulate_transaction(transaction)
+        return resp.value.err is None
+
+    async def stop(self) -> None:
+        for task in self._resend_tasks:
+            task.cancel()
+        await asyncio.gather(*self._resend_tasks, return_exceptions=True)
+        # 停止路径自带的 bundle 状态追踪
+        trackers = [getattr(sender, "tracker", None) for sender in self.paths.values()]
+        await asyncio.gather(
+            *(tracker.stop() for tracker in trackers if tracker is not None),
+            return_exceptions=True,
+        )
+        # 关闭广播路径自行创建的 RPC 客户端，共享的 rpc_client 由调用方负责
+        clients = {id(sender.rpc_client): sender.rpc_client for sender in self.paths.values()}
+        clients.pop(id(self.rpc_client), None)
+        await asyncio.gather(
+            *(client.close() for client in clients.values()), return_exceptions=True
+        )
+
+
+def build_default_paths(rpc_client: AsyncClient) -> dict[str, TransactionSender]:
+    """根据配置构建广播路径：所有 RPC 节点 + Jito + GMGN
+
+    Jito 通过 sendBundle 提交，bundle 状态可以确认交易是否由 Jito 上链。
+    """
+    from .sender import DefaultTransactionSender, GMGNTransactionSender, JitoBundleTransactionSender
+
+    paths: dict[str, TransactionSender] = {}
+    for i, endpoint in enumerate(settings.rpc.endpoints):
+        client = rpc_client if i == 0 else AsyncClient(endpoint)
+        paths[f"rpc:{i}"] = DefaultTransactionSender(client)
+    paths["jito"] = JitoBundleTransactionSender(rpc_client)
+    paths["gmgn"] = GMGNTransactionSender(rpc_client)
+    return paths
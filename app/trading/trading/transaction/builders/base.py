@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 
 from solana.rpc.async_api import AsyncClient
+from solders.instruction import Instruction  # type: ignore
 from solders.keypair import Keypair  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 
@@ -41,3 +42,21 @@ class TransactionBuilder(ABC):
             VersionedTransaction: 构建好的交易
         """
         pass
+
+    async def build_swap_instructions(
+        self,
+        keypair: Keypair,
+        token_address: str,
+        ui_amount: float,
+        swap_direction: SwapDirection,
+        slippage_bps: int,
+        in_type: SwapInType | None = None,
+    ) -> list[Instruction]:
+        """构建交易指令（不包含 compute budget 指令），用于自行组装交易
+
+        仅本地构建指令的 builder 支持，通过第三方 API 获取已序列化交易的 builder 不支持。
+
+        Raises:
+            NotImplementedError: builder 不支持单独构建指令
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not build instructions")
@@ -1,20 +1,27 @@
-from solbot_cache import AccountAmountCache, MintAccountCache
+from dataclasses import dataclass
+
+from solana.rpc.commitment import Confirmed
+from solbot_cache.account import GlobalAccountCache
 from solbot_common.constants import (
-    ASSOCIATED_TOKEN_PROGRAM,
-    PUMP_BUY_METHOD,
-    PUMP_FUN_ACCOUNT,
     PUMP_FUN_PROGRAM,
     PUMP_GLOBAL_ACCOUNT,
-    PUMP_SELL_METHOD,
-    RENT_PROGRAM_ID,
     SOL_DECIMAL,
-    SYSTEM_PROGRAM_ID,
     TOKEN_PROGRAM_ID,
     WSOL,
 )
-from solbot_common.IDL.pumpfun import PumpFunInterface
+from solbot_common.layouts.bonding_curve_account import BondingCurveAccount
+from solbot_common.layouts.global_account import GlobalAccount
+from solbot_common.layouts.mint_account import MintAccount
+from solbot_common.layouts.token_account import TokenAccount
 from solbot_common.log import logger
-from solbot_common.utils.utils import get_bonding_curve_account, get_global_account
+from solbot_common.utils.pda import to_pubkey
+from solbot_common.utils.pump import (
+    get_pump_mint_accounts,
+    get_user_ata,
+    make_pump_buy_instruction,
+    make_pump_sell_instruction,
+)
+from solders.instruction import Instruction  # type: ignore
 from solders.keypair import Keypair  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
@@ -22,19 +29,72 @@ from spl.token.instructions import (
     CloseAccountParams,
     close_account,
     create_associated_token_account,
-    get_associated_token_address,
 )
 
 from trading.exceptions import BondingCurveNotFound
 from trading.swap import SwapDirection, SwapInType
 from trading.tx import build_transaction
-from trading.utils import has_ata, max_amount_with_slippage, min_amount_with_slippage
+from trading.utils import max_amount_with_slippage, min_amount_with_slippage
 
 from .base import TransactionBuilder
 
 
+@dataclass
+class PumpPrefetchedAccounts:
+    bonding_curve: BondingCurveAccount
+    global_account: GlobalAccount
+    user_token_account: TokenAccount | None
+    mint: MintAccount | None
+
+
 # Reference: https://github.com/wisarmy/raytx/blob/main/src/pump.rs
 class PumpTransactionBuilder(TransactionBuilder):
+    async def _prefetch_accounts(self, mint: Pubkey, user_ata: Pubkey) -> PumpPrefetchedAccounts:
+        """一次 getMultipleAccounts 拉取构建交易所需的全部账户，并在本地解码
+
+        地址全部在本地推导：bonding curve、用户 ATA、mint，
+        global 账户只有在缓存未命中时才一并拉取。
+
+        Args:
+            mint (Pubkey): 代币 mint 地址
+            user_ata (Pubkey): 用户持有该代币的 ATA
+
+        Returns:
+            PumpPrefetchedAccounts: 解码后的账户
+        """
+        global_account_cache = GlobalAccountCache(self.rpc_client)
+        global_account = await global_account_cache.get_cached(PUMP_FUN_PROGRAM)
+
+        bonding_curve = get_pump_mint_accounts(mint).bonding_curve
+        pubkeys = [bonding_curve, user_ata, mint]
+        if global_account is None:
+            pubkeys.append(PUMP_GLOBAL_ACCOUNT)
+
+        resp = await self.rpc_client.get_multiple_accounts(pubkeys, commitment=Confirmed)
+        bonding_curve_info, user_ata_info, mint_info, *rest = resp.value
+
+        if bonding_curve_info is None:
+            raise BondingCurveNotFound("bonding curve account not found")
+
+        if global_account is None:
+            global_info = rest[0]
+            if global_info is None:
+                raise ValueError("global account not found")
+            global_data = bytes(global_info.data)
+            global_account = GlobalAccount.from_buffer(global_data)
+            await global_account_cache.set(PUMP_FUN_PROGRAM, global_data)
+
+        return PumpPrefetchedAccounts(
+            bonding_curve=BondingCurveAccount.from_buffer(bytes(bonding_curve_info.data)),
+            global_account=global_account,
+            user_token_account=(
+                TokenAccount.from_buffer(bytes(user_ata_info.data))
+                if user_ata_info is not None
+                else None
+            ),
+            mint=MintAccount.from_buffer(bytes(mint_info.data)) if mint_info is not None else None,
+        )
+
     async def build_swap_transaction(
         self,
         keypair: Keypair,
@@ -46,55 +106,68 @@ class PumpTransactionBuilder(TransactionBuilder):
         use_jito: bool = False,
         priority_fee: float | None = None,
     ) -> VersionedTransaction:
+        instructions = await self.build_swap_instructions(
+            keypair=keypair,
+            token_address=token_address,
+            ui_amount=ui_amount,
+            swap_direction=swap_direction,
+            slippage_bps=slippage_bps,
+            in_type=in_type,
+        )
+        return await build_transaction(
+            keypair=keypair,
+            instructions=instructions,
+            priority_fee=priority_fee,
+            use_jito=use_jito,
+        )
+
+    async def build_swap_instructions(
+        self,
+        keypair: Keypair,
+        token_address: str,
+        ui_amount: float,
+        swap_direction: SwapDirection,
+        slippage_bps: int,
+        in_type: SwapInType | None = None,
+    ) -> list[Instruction]:
         if swap_direction == "sell" and in_type is None:
             raise ValueError("in_type must be specified when selling")
 
         owner = keypair.pubkey()
-        mint = Pubkey.from_string(token_address)
+        mint = to_pubkey(token_address)
         program_id = TOKEN_PROGRAM_ID
         native_mint = WSOL
 
         if swap_direction == SwapDirection.Buy:
             token_in = native_mint
             token_out = mint
-            pump_method = PUMP_BUY_METHOD
         elif swap_direction == SwapDirection.Sell:
             token_in = mint
             token_out = native_mint
-            pump_method = PUMP_SELL_METHOD
         else:
             raise ValueError("swap_direction must be buy or sell")
 
-        pump_program = PUMP_FUN_PROGRAM
-        result = await get_bonding_curve_account(self.rpc_client, mint, pump_program)
-        if result is None:
-            raise BondingCurveNotFound("bonding curve account not found")
-        bonding_curve, associated_bonding_curve, bonding_curve_account = result
-
-        global_account = await get_global_account(self.rpc_client, pump_program)
-        if global_account is None:
-            raise ValueError("global account not found")
-
-        fee_recipient = global_account.fee_recipient
+        in_ata = get_user_ata(owner, token_in)
+        out_ata = get_user_ata(owner, token_out)
+        user_ata = out_ata if swap_direction == SwapDirection.Buy else in_ata
 
-        in_ata = get_associated_token_address(owner=owner, mint=token_in)
-        out_ata = get_associated_token_address(owner=owner, mint=token_out)
+        prefetched = await self._prefetch_accounts(mint, user_ata)
+        bonding_curve_account = prefetched.bonding_curve
+        fee_recipient = prefetched.global_account.fee_recipient
 
         create_instruction = None
         close_instruction = None
         if swap_direction == SwapDirection.Buy:
             # 如果 ata 账户不存在，需要创建
-            if not await has_ata(
-                self.rpc_client,
-                owner,
-                token_out,
-            ):
+            if prefetched.user_token_account is None:
                 create_instruction = create_associated_token_account(owner, owner, token_out)
 
             amount_specified = int(ui_amount * SOL_DECIMAL)
         elif swap_direction == SwapDirection.Sell:
-            in_amount = await AccountAmountCache().get_amount(in_ata)
-            in_mint = await MintAccountCache().get_mint_account(token_in)
+            if prefetched.user_token_account is None:
+                raise Exception("in_account not found")
+            in_amount = prefetched.user_token_account.amount
+            in_mint = prefetched.mint
             if in_mint is None:
                 raise Exception("in_mint not found")
 
@@ -139,21 +212,15 @@ class PumpTransactionBuilder(TransactionBuilder):
                 * bonding_curve_account.virtual_token_reserves
                 // bonding_curve_account.virtual_sol_reserves
             )
-            input_accounts = {
-                "fee_recipient": fee_recipient,
-                "mint": mint,
-                "bonding_curve": bonding_curve,
-                "associated_bonding_curve": associated_bonding_curve,
-                "associated_user": out_ata,
-                "user": owner,
-                "global": PUMP_GLOBAL_ACCOUNT,
-                "system_program": SYSTEM_PROGRAM_ID,
-                "token_program": TOKEN_PROGRAM_ID,
-                "rent": RENT_PROGRAM_ID,
-                "event_authority": PUMP_FUN_ACCOUNT,
-                "program": PUMP_FUN_PROGRAM,
-            }
-        elif swap_direction == SwapDirection.Sell:
+            swap_instruction = make_pump_buy_instruction(
+                user=owner,
+                mint=mint,
+                fee_recipient=fee_recipient,
+                token_amount=token_amount,
+                max_sol_cost=max_sol_cost,
+                associated_user=out_ata,
+            )
+        else:
             sol_output = (
                 amount_specified
                 * bonding_curve_account.virtual_sol_reserves
@@ -162,42 +229,26 @@ class PumpTransactionBuilder(TransactionBuilder):
             min_sol_cost = min_amount_with_slippage(sol_output, slippage_bps)
             sol_amount_threshold = min_sol_cost
             token_amount = amount_specified
-            input_accounts = {
-                "fee_recipient": fee_recipient,
-                "mint": mint,
-                "bonding_curve": bonding_curve,
-                "associated_bonding_curve": associated_bonding_curve,
-                "associated_user": in_ata,
-                "user": owner,
-                "global": PUMP_GLOBAL_ACCOUNT,
-                "system_program": SYSTEM_PROGRAM_ID,
-                "token_program": TOKEN_PROGRAM_ID,
-                "associated_token_program": ASSOCIATED_TOKEN_PROGRAM,
-                "rent": RENT_PROGRAM_ID,
-                "event_authority": PUMP_FUN_ACCOUNT,
-                "program": PUMP_FUN_PROGRAM,
-            }
+            swap_instruction = make_pump_sell_instruction(
+                user=owner,
+                mint=mint,
+                fee_recipient=fee_recipient,
+                token_amount=token_amount,
+                min_sol_output=min_sol_cost,
+                associated_user=in_ata,
+            )
 
         logger.info(
             f"token_amount: {token_amount}, sol_amount_threshold: {sol_amount_threshold}, unit_price: {unit_price}"
         )
 
         instructions = []
-        pumpfun = PumpFunInterface(keypair, self.rpc_client)
-        pump_method = pumpfun.program.methods[swap_direction]
-        build_swap_instruction = (
-            pump_method.args([token_amount, sol_amount_threshold])
-            .accounts(input_accounts)
-            .instruction()
-        )
-        logger.debug(f"Build swap input accounts: {input_accounts}")
-
         if create_instruction is not None:
             instructions.append(create_instruction)
             logger.debug(f"Create instruction: {create_instruction}")
         if amount_specified > 0:
-            instructions.append(build_swap_instruction)
-            logger.debug(f"Swap instruction: {build_swap_instruction}")
+            instructions.append(swap_instruction)
+            logger.debug(f"Swap instruction: {swap_instruction}")
         if close_instruction is not None:
             instructions.append(close_instruction)
             logger.debug(f"Close instruction: {close_instruction}")
@@ -206,10 +257,4 @@ class PumpTransactionBuilder(TransactionBuilder):
             raise Exception("instructions is empty")
 
         logger.debug(f"Swap instructions: {instructions}")
-
-        return await build_transaction(
-            keypair=keypair,
-            instructions=instructions,
-            priority_fee=priority_fee,
-            use_jito=use_jito,
-        )
+        return instructions
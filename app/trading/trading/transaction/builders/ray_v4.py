@@ -5,13 +5,10 @@ from loguru import logger
 from solana.rpc.commitment import Processed
 from solana.rpc.types import TokenAccountOpts
 from solbot_cache import get_min_balance_rent
+from solbot_cache.amm_v4_reserves import AmmV4ReserveCache
 from solbot_cache.rayidum import get_preferred_pool
 from solbot_common.constants import ACCOUNT_LAYOUT_LEN, SOL_DECIMAL, TOKEN_PROGRAM_ID, WSOL
-from solbot_common.utils.pool import (
-    AmmV4PoolKeys,
-    get_amm_v4_reserves,
-    make_amm_v4_swap_instruction,
-)
+from solbot_common.utils.pool import AmmV4PoolKeys, make_amm_v4_swap_instruction
 from solbot_common.utils.utils import get_associated_token_address, get_token_balance
 from solders.instruction import Instruction  # type: ignore[reportMissingModuleSource]
 from solders.keypair import Keypair  # type: ignore[reportMissingModuleSource]
@@ -31,6 +28,7 @@ from spl.token.instructions import (
 
 from trading.swap import SwapDirection, SwapInType
 from trading.tx import build_transaction
+from trading.utils import min_amount_with_slippage
 
 from .base import TransactionBuilder
 
@@ -74,20 +72,12 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
         # 计算交易金额
         amount_in = int(sol_in * SOL_DECIMAL)
 
-        # 获取池子储备量
-        base_reserve, quote_reserve, token_decimal = await get_amm_v4_reserves(pool_keys)
-
-        # 计算预期输出量
-        # 这里使用简化的计算方法，实际应用中可能需要更复杂的计算
-        constant_product = base_reserve * quote_reserve
-        effective_sol_in = sol_in * (1 - (0.25 / 100))  # 考虑0.25%的交易费用
-        new_quote_reserve = quote_reserve + effective_sol_in
-        new_base_reserve = constant_product / new_quote_reserve
-        amount_out = base_reserve - new_base_reserve
+        # 获取池子储备量，按链上整数公式计算预期输出量
+        reserves = await AmmV4ReserveCache(self.rpc_client).get(pool_keys)
+        amount_out = reserves.quote(WSOL, amount_in)
 
         # 应用滑点
-        slippage_adjustment = 1 - (slippage_bps / 10000)  # 转换bps为百分比
-        minimum_amount_out = int(amount_out * slippage_adjustment * (10**token_decimal))
+        minimum_amount_out = min_amount_with_slippage(amount_out, slippage_bps)
 
         logger.info(f"输入金额: {amount_in}, 最小输出金额: {minimum_amount_out}")
 
@@ -236,23 +226,13 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
             sell_amount = ui_amount
             logger.info(f"卖出数量: {sell_amount}")
 
-        # 获取池子储备量
-        base_reserve, quote_reserve, token_decimal = await get_amm_v4_reserves(pool_keys)
-
-        # 计算预期输出量
-        # 这里使用简化的计算方法，实际应用中可能需要更复杂的计算
-        constant_product = base_reserve * quote_reserve
-        effective_token_in = sell_amount * (1 - (0.25 / 100))  # 考虑0.25%的交易费用
-        new_base_reserve = base_reserve + effective_token_in
-        new_quote_reserve = constant_product / new_base_reserve
-        amount_out = quote_reserve - new_quote_reserve
+        # 获取池子储备量，按链上整数公式计算预期输出量
+        reserves = await AmmV4ReserveCache(self.rpc_client).get(pool_keys)
+        amount_in = int(sell_amount * (10**reserves.token_decimals))
+        amount_out = reserves.quote(token_mint, amount_in)
 
         # 应用滑点
-        slippage_adjustment = 1 - (slippage_bps / 10000)  # 转换bps为百分比
-        minimum_amount_out = int(amount_out * slippage_adjustment * SOL_DECIMAL)
-
-        # 计算输入金额
-        amount_in = int(sell_amount * (10**token_decimal))
+        minimum_amount_out = min_amount_with_slippage(amount_out, slippage_bps)
 
         logger.info(f"输入金额: {amount_in}, 最小输出金额: {minimum_amount_out}")
 
@@ -354,6 +334,30 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
         Returns:
             VersionedTransaction: 构建好的交易
         """
+        instructions = await self.build_swap_instructions(
+            keypair=keypair,
+            token_address=token_address,
+            ui_amount=ui_amount,
+            swap_direction=swap_direction,
+            slippage_bps=slippage_bps,
+            in_type=in_type,
+        )
+        return await build_transaction(
+            keypair=keypair,
+            instructions=instructions,
+            use_jito=use_jito,
+            priority_fee=priority_fee,
+        )
+
+    async def build_swap_instructions(
+        self,
+        keypair: Keypair,
+        token_address: str,
+        ui_amount: float,
+        swap_direction: SwapDirection,
+        slippage_bps: int,
+        in_type: SwapInType | None = None,
+    ) -> list[Instruction]:
         if swap_direction not in [SwapDirection.Buy, SwapDirection.Sell]:
             raise ValueError("swap_direction must be buy or sell")
 
@@ -376,9 +380,4 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
                 in_type=in_type,
             )
 
-        return await build_transaction(
-            keypair=keypair,
-            instructions=instructions,
-            use_jito=use_jito,
-            priority_fee=priority_fee,
-        )
+        return instructions
@@ -1,6 +1,10 @@
 import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
 
 from solana.rpc.async_api import AsyncClient
+from solbot_common.config import settings
 from solbot_common.log import logger
 from solders.keypair import Keypair  # type: ignore
 from solders.signature import Signature  # type: ignore
@@ -8,6 +12,7 @@ from solders.transaction import VersionedTransaction  # type: ignore
 
 from trading.swap import SwapDirection, SwapInType
 from trading.transaction.base import TransactionSender
+from trading.transaction.broadcast import BroadcastTransactionSender, build_default_paths
 from trading.transaction.builders.base import TransactionBuilder
 from trading.transaction.builders.gmgn import GMGNTransactionBuilder
 from trading.transaction.builders.jupiter import JupiterTransactionBuilder
@@ -17,8 +22,12 @@ from trading.transaction.protocol import TradingRoute
 from trading.transaction.sender import (
     DefaultTransactionSender,
     GMGNTransactionSender,
+    JitoBundleTransactionSender,
     JitoTransactionSender,
 )
+from trading.tx import get_last_valid_block_height
+
+LATENCY_WINDOW = 100
 
 
 class Swapper:
@@ -66,27 +75,155 @@ class Swapper:
             priority_fee=priority_fee,
         )
         logger.debug(f"Built swap transaction: {transaction}")
-        signature = await self.sender.send_transaction(transaction)
+        signature = await self.sender.send_transaction(
+            transaction, last_valid_block_height=get_last_valid_block_height(transaction)
+        )
         logger.info(f"Transaction sent successfully: {signature}")
         return signature
 
 
+@dataclass
+class BuilderStats:
+    """单个构建器的统计"""
+
+    name: str
+    attempts: int = 0
+    successes: int = 0
+    failures: int = 0
+    # 被更快的构建器抢先后取消的次数
+    cancelled: int = 0
+    consecutive_failures: int = 0
+    # 构建耗时的指数移动平均（秒）
+    latency_ema: float | None = None
+    # 最近若干次成功的构建耗时，用于计算对冲延迟
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    # 熔断到期时间（monotonic），None 表示未熔断
+    open_until: float | None = None
+
+    @property
+    def samples(self) -> int:
+        return self.successes + self.failures
+
+    @property
+    def success_rate(self) -> float:
+        if self.samples == 0:
+            return 1.0
+        return self.successes / self.samples
+
+    @property
+    def score(self) -> float:
+        """期望的成功耗时，越小越优先"""
+        if self.latency_ema is None or self.successes == 0:
+            return float("inf")
+        return self.latency_ema / self.success_rate
+
+    def latency_quantile(self, q: float) -> float | None:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def record_success(self, latency: float, alpha: float = 0.2) -> None:
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.open_until = None
+        self.latencies.append(latency)
+        if self.latency_ema is None:
+            self.latency_ema = latency
+        else:
+            self.latency_ema = alpha * latency + (1 - alpha) * self.latency_ema
+
+    def record_failure(self, threshold: int, cooldown: float) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= threshold:
+            self.open_until = time.monotonic() + cooldown
+            logger.warning(
+                f"Builder {self.name} failed {self.consecutive_failures} times in a row, "
+                f"disabled for {cooldown}s"
+            )
+
+
 class AggregateTransactionBuilder(TransactionBuilder):
-    """聚合多个交易构建器,返回最快成功的结果"""
+    """聚合多个交易构建器,返回最快成功的结果
 
-    def __init__(self, rpc_client: AsyncClient, builders: list[TransactionBuilder]):
+    按历史统计的期望耗时（耗时 EMA / 成功率）排序，先只启动最优的构建器，
+    超过其耗时的 `hedge_quantile` 分位数仍未返回（或已失败）时才启动下一个，
+    任一构建器成功后取消其余仍在进行的构建。
+
+    尝试次数不足 `min_samples` 时并行启动所有构建器以收集统计。
+    连续失败 `failure_threshold` 次的构建器熔断 `cooldown` 秒，到期后放行一次试探，
+    成功则恢复，失败则再次熔断。所有构建器都熔断时仍全部尝试。
+    """
+
+    def __init__(
+        self,
+        rpc_client: AsyncClient,
+        builders: list[TransactionBuilder],
+        hedge_quantile: float = 0.9,
+        min_hedge_delay: float = 0.05,
+        max_hedge_delay: float = 2,
+        min_samples: int = 5,
+        failure_threshold: int = 3,
+        cooldown: float = 30,
+    ):
         """初始化聚合构建器
 
         Args:
             rpc_client (AsyncClient): RPC客户端
             builders (List[TransactionBuilder]): 交易构建器列表
+            hedge_quantile (float, optional): 对冲延迟取构建耗时的分位数. Defaults to 0.9.
+            min_hedge_delay (float, optional): 对冲延迟下限（秒）. Defaults to 0.05.
+            max_hedge_delay (float, optional): 对冲延迟上限（秒）. Defaults to 2.
+            min_samples (int, optional): 每个构建器至少尝试多少次后才按统计对冲. Defaults to 5.
+            failure_threshold (int, optional): 连续失败多少次后熔断. Defaults to 3.
+            cooldown (float, optional): 熔断时长（秒）. Defaults to 30.
         """
         super().__init__(rpc_client)
         self.builders = builders
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.stats = [BuilderStats(builder.__class__.__name__) for builder in builders]
+
+    def hedge_delay(self, index: int) -> float:
+        """启动该构建器后，等待多久再启动下一个"""
+        latency = self.stats[index].latency_quantile(self.hedge_quantile)
+        if latency is None:
+            return self.min_hedge_delay
+        return min(max(latency, self.min_hedge_delay), self.max_hedge_delay)
+
+    def plan(self) -> list[tuple[int, float]]:
+        """本次构建的启动顺序
+
+        Returns:
+            list[tuple[int, float]]: (构建器下标, 启动后到下一个构建器启动的等待时间)
+        """
+        now = time.monotonic()
+        available = []
+        for index, stats in enumerate(self.stats):
+            if stats.open_until is None:
+                available.append(index)
+            elif now >= stats.open_until:
+                # 半开：放行一次试探，试探结束前其他请求仍视为熔断
+                stats.open_until = now + self.cooldown
+                available.append(index)
+        if not available:
+            logger.warning("All transaction builders are disabled, trying all of them")
+            available = list(range(len(self.builders)))
+
+        # 被抢先取消的尝试也计入，一直落后的构建器没有耗时样本，排在最后
+        if any(self.stats[index].attempts < self.min_samples for index in available):
+            return [(index, 0) for index in available]
+        available.sort(key=lambda index: self.stats[index].score)
+        return [(index, self.hedge_delay(index)) for index in available]
 
     async def _try_build_with_builder(
         self,
-        builder: TransactionBuilder,
+        index: int,
         keypair: Keypair,
         token_address: str,
         ui_amount: float,
@@ -101,6 +238,10 @@ class AggregateTransactionBuilder(TransactionBuilder):
         Returns:
             Tuple[TransactionBuilder, VersionedTransaction]: 返回构建器和构建的交易
         """
+        builder = self.builders[index]
+        stats = self.stats[index]
+        stats.attempts += 1
+        start = time.perf_counter()
         try:
             tx = await builder.build_swap_transaction(
                 keypair=keypair,
@@ -112,10 +253,15 @@ class AggregateTransactionBuilder(TransactionBuilder):
                 use_jito=use_jito,
                 priority_fee=priority_fee,
             )
-            return builder, tx
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            raise
         except Exception as e:
+            stats.record_failure(self.failure_threshold, self.cooldown)
             logger.warning(f"Builder {builder.__class__.__name__} failed: {e!s}")
             raise
+        stats.record_success(time.perf_counter() - start)
+        return builder, tx
 
     async def build_swap_transaction(
         self,
@@ -128,7 +274,7 @@ class AggregateTransactionBuilder(TransactionBuilder):
         use_jito: bool = False,
         priority_fee: float | None = None,
     ) -> VersionedTransaction:
-        """并行尝试所有构建器,返回最快成功的交易
+        """按统计依次启动构建器,返回最快成功的交易
 
         Raises:
             Exception: 当所有构建器都失败时抛出异常
@@ -139,40 +285,52 @@ class AggregateTransactionBuilder(TransactionBuilder):
         if not self.builders:
             raise ValueError("No transaction builders provided")
 
-        # 创建所有构建器的任务
-        tasks = [
-            self._try_build_with_builder(
-                builder,
-                keypair,
-                token_address,
-                ui_amount,
-                swap_direction,
-                slippage_bps,
-                in_type,
-                use_jito,
-                priority_fee,
-            )
-            for builder in self.builders
-        ]
-
-        # 等待第一个成功的结果
-        while tasks:
-            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
-
-            for task in done:
-                try:
-                    builder, tx = await task
-                    # 取消其他正在进行的任务
-                    for p in pending:
-                        p.cancel()
-                    logger.info(f"Successfully built transaction with {builder.__class__.__name__}")
-                    return tx
-                except Exception:
-                    # 如果这个任务失败了,继续等待其他任务
-                    pass
-
-            # 更新剩余的任务
-            tasks = list(pending)
+        plan = self.plan()
+        pending: set[asyncio.Task] = set()
+        launched = 0
+        try:
+            while launched < len(plan) or pending:
+                timeout = None
+                if launched < len(plan):
+                    index, delay = plan[launched]
+                    launched += 1
+                    pending.add(
+                        asyncio.create_task(
+                            self._try_build_with_builder(
+                                index,
+                                keypair,
+                                token_address,
+                                ui_amount,
+                                swap_direction,
+                                slippage_bps,
+                                in_type,
+                                use_jito,
+                                priority_fee,
+                            )
+                        )
+                    )
+                    if launched < len(plan):
+                        if delay <= 0:
+                            continue
+                        timeout = delay
+
+                # 等待第一个完成的结果，超过对冲延迟则启动下一个构建器
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        builder, tx = task.result()
+                        logger.info(
+                            f"Successfully built transaction with {builder.__class__.__name__}"
+                        )
+                        return tx
+        finally:
+            # 取消其他正在进行的任务，并等待其退出
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
 
         raise Exception("All transaction builders failed")
 
@@ -185,6 +343,7 @@ class TradingService:
         self._rpc_client = rpc_client
         self._aggreage_txn_builder = AggregateTransactionBuilder(
             self._rpc_client,
+            # 目前只启用了 Jupiter，竞速和熔断在接入第二个构建器后才会生效
             builders=[
                 # GMGNTransactionBuilder(self._rpc_client),
                 JupiterTransactionBuilder(self._rpc_client),
@@ -194,7 +353,13 @@ class TradingService:
         self._raydium_v4_txn_builder = RaydiumV4TransactionBuilder(self._rpc_client)
         self._gmgn_sender = GMGNTransactionSender(self._rpc_client)
         self._jito_sender = JitoTransactionSender(self._rpc_client)
+        self._jito_bundle_sender = JitoBundleTransactionSender(self._rpc_client)
         self.default_sender = DefaultTransactionSender(rpc_client)
+        self._broadcast_sender = BroadcastTransactionSender(
+            self._rpc_client,
+            paths=build_default_paths(self._rpc_client),
+            resend_interval=settings.trading.broadcast_resend_interval,
+        )
 
     def select_builder(self, route: TradingRoute) -> TransactionBuilder:
         if route == TradingRoute.PUMP:
@@ -211,13 +376,44 @@ class TradingService:
     ) -> TransactionSender:
         if isinstance(builder, GMGNTransactionBuilder):
             sender = self._gmgn_sender
+        elif settings.trading.broadcast:
+            sender = self._broadcast_sender
+        elif (ranked := self._ranked_sender(use_jito)) is not None:
+            sender = ranked
+        elif use_jito and settings.trading.jito_bundle:
+            sender = self._jito_bundle_sender
         elif use_jito:
             sender = self._jito_sender
         else:
             sender = self.default_sender
         return sender
 
+    def _ranked_sender(self, use_jito: bool) -> TransactionSender | None:
+        """按广播模式累计的各路径上链率选择发送器，样本不足时返回 None"""
+        candidates: dict[str, TransactionSender] = {
+            "rpc:0": self.default_sender,
+            "gmgn": self._gmgn_sender,
+        }
+        if use_jito:
+            # 交易包含 tip 时才能通过 Jito 提交
+            candidates["jito"] = (
+                self._jito_bundle_sender if settings.trading.jito_bundle else self._jito_sender
+            )
+        best = self._broadcast_sender.best_path(list(candidates))
+        return None if best is None else candidates[best]
+
     def use_route(self, route: TradingRoute, use_jito: bool = False) -> Swapper:
         builder = self.select_builder(route)
         sender = self.select_sender(builder, use_jito)
         return Swapper(builder, sender)
+
+    async def start(self) -> None:
+        """读取广播路径的上链统计，供非广播模式选择发送器"""
+        try:
+            await self._broadcast_sender.load_stats()
+        except Exception as e:
+            logger.warning(f"Failed to load broadcast path stats: {e}")
+
+    async def stop(self) -> None:
+        await self._broadcast_sender.stop()
+        await self._jito_bundle_sender.tracker.stop()
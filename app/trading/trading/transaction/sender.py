@@ -1,4 +1,8 @@
+import asyncio
 import base64
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
 
 from solana.rpc.async_api import AsyncClient
 from solana.rpc.types import TxOpts
@@ -64,7 +68,158 @@ class JitoTransactionSender(TransactionSender):
         self,
         transaction: VersionedTransaction,
     ) -> bool:
-        raise NotImplementedError("Jito is not implemented yet")
+        # Jito block engine 不提供单笔交易模拟，使用普通 RPC 节点模拟
+        resp = await self.rpc_client.simulate_transaction(transaction)
+        return resp.value.err is None
+
+
+# 视为已上链的 bundle 状态
+LANDED_BUNDLE_STATUSES = ("confirmed", "finalized")
+# 记录最近上链的 bundle 交易数，用于判断交易是否经由 bundle 上链
+MAX_LANDED_SIGNATURES = 1000
+
+
+@dataclass
+class InflightBundle:
+    bundle_id: str
+    signature: Signature
+    submitted_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class BundleStats:
+    landed: int = 0
+    dropped: int = 0
+    # 最近的上链延迟（秒）
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    @property
+    def landing_rate(self) -> float:
+        total = self.landed + self.dropped
+        if total == 0:
+            return 0.0
+        return self.landed / total
+
+
+class BundleStatusTracker:
+    """批量追踪在途 bundle 的状态
+
+    所有在途 bundle 共用一个轮询任务，每轮通过 getBundleStatuses 批量查询，
+    上链后记录上链延迟，超时未上链视为丢弃。
+    """
+
+    def __init__(
+        self,
+        jito_client: JitoClient,
+        poll_interval: float = 1,
+        timeout: float = 60,
+    ) -> None:
+        self.jito_client = jito_client
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.inflight: dict[str, InflightBundle] = {}
+        self.stats = BundleStats()
+        # 已上链的交易签名 -> bundle id
+        self.landed: OrderedDict[Signature, str] = OrderedDict()
+        self._task: asyncio.Task | None = None
+
+    def track(self, bundle: InflightBundle) -> None:
+        self.inflight[bundle.bundle_id] = bundle
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+
+    async def _poll(self) -> None:
+        while self.inflight:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                statuses = await self.jito_client.get_bundle_statuses(list(self.inflight))
+            except Exception as e:
+                logger.warning(f"Failed to get bundle statuses: {e}")
+                statuses = {}
+
+            now = time.time()
+            for bundle_id, bundle in list(self.inflight.items()):
+                status = statuses.get(bundle_id)
+                if status is not None and status["confirmation_status"] in LANDED_BUNDLE_STATUSES:
+                    latency = now - bundle.submitted_at
+                    self.stats.landed += 1
+                    self.stats.latencies.append(latency)
+                    del self.inflight[bundle_id]
+                    self._record_landed(bundle)
+                    logger.info(
+                        f"Bundle {bundle_id} landed in slot {status['slot']}, "
+                        f"latency: {latency:.2f}s, signature: {bundle.signature}"
+                    )
+                elif now - bundle.submitted_at > self.timeout:
+                    self.stats.dropped += 1
+                    del self.inflight[bundle_id]
+                    logger.warning(f"Bundle {bundle_id} not landed after {self.timeout}s")
+
+    def _record_landed(self, bundle: InflightBundle) -> None:
+        self.landed[bundle.signature] = bundle.bundle_id
+        if len(self.landed) > MAX_LANDED_SIGNATURES:
+            self.landed.popitem(last=False)
+
+    async def is_landed(self, signature: Signature) -> bool:
+        """交易是否经由本追踪器的 bundle 上链
+
+        同一笔交易只能上链一次，bundle 上链即说明交易由 Jito 打包，
+        未等到下一轮轮询时直接查询该交易的在途 bundle。
+        """
+        if signature in self.landed:
+            return True
+        bundles = [bundle for bundle in self.inflight.values() if bundle.signature == signature]
+        if not bundles:
+            return False
+        statuses = await self.jito_client.get_bundle_statuses(
+            [bundle.bundle_id for bundle in bundles]
+        )
+        for bundle in bundles:
+            status = statuses.get(bundle.bundle_id)
+            if status is not None and status["confirmation_status"] in LANDED_BUNDLE_STATUSES:
+                self._record_landed(bundle)
+                return True
+        return False
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class JitoBundleTransactionSender(TransactionSender):
+    """Jito bundle 发送器，通过 sendBundle 提交交易并追踪 bundle 状态
+
+    交易需要包含向 Jito tip 账户的转账（见 `trading.tx.build_transaction`）。
+    """
+
+    def __init__(self, rpc_client: AsyncClient):
+        super().__init__(rpc_client)
+        self.jito_client: JitoClient = JitoClient()
+        self.tracker = BundleStatusTracker(self.jito_client)
+
+    async def send_transaction(
+        self,
+        transaction: VersionedTransaction,
+        **kwargs,
+    ) -> Signature:
+        logger.info("Using Jito bundle for transaction")
+        bundle_id = await self.jito_client.send_bundle([transaction])
+        signature = transaction.signatures[0]
+        self.tracker.track(InflightBundle(bundle_id=bundle_id, signature=signature))
+        return signature
+
+    async def landed_via(self, signature: Signature) -> bool:
+        """交易是否经由本发送器提交的 bundle 上链，供广播发送器归因"""
+        return await self.tracker.is_landed(signature)
+
+    async def simulate_transaction(
+        self,
+        transaction: VersionedTransaction,
+    ) -> bool:
+        resp = await self.rpc_client.simulate_transaction(transaction)
+        return resp.value.err is None
 
 
 class GMGNTransactionSender(TransactionSender):
@@ -1,22 +1,62 @@
 import base64
 import time
+from collections import OrderedDict
+from dataclasses import dataclass
 
 from solana.rpc.async_api import AsyncClient
 from solbot_cache import get_latest_blockhash
 from solbot_common.config import settings
 from solbot_common.constants import SOL_DECIMAL
 from solbot_common.log import logger
+from solbot_common.utils.jito import JitoClient
 from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price  # type: ignore
+from solders.hash import Hash  # type: ignore
+from solders.instruction import Instruction  # type: ignore
 from solders.keypair import Keypair  # type: ignore
 from solders.message import MessageV0  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
 from solders.signature import Signature  # type: ignore
-from solders.system_program import TransferParams, transfer
+from solders.system_program import (
+    AdvanceNonceAccountParams,
+    TransferParams,
+    advance_nonce_account,
+    transfer,
+)
 from solders.transaction import VersionedTransaction  # type: ignore
 
+from trading.cu_profile import ComputeUnitProfiler, template_of
+from trading.lookup_table import LookupTableManager
+from trading.priority_fee import PriorityFeeEstimator
 from trading.utils import calc_tx_units, calc_tx_units_and_split_fees
 
 
+@dataclass(frozen=True)
+class DurableNonce:
+    """durable nonce 账户及其当前的 nonce 值"""
+
+    nonce_account: Pubkey
+    authority: Pubkey
+    nonce: Hash
+
+
+# 最近构建的交易所用 blockhash 的最后有效区块高度，按交易签名索引
+_last_valid_block_heights: OrderedDict[Signature, int] = OrderedDict()
+_MAX_TRACKED_TRANSACTIONS = 4096
+
+
+def _remember_last_valid_block_height(
+    transaction: VersionedTransaction, last_valid_block_height: int
+) -> None:
+    _last_valid_block_heights[transaction.signatures[0]] = last_valid_block_height
+    while len(_last_valid_block_heights) > _MAX_TRACKED_TRANSACTIONS:
+        _last_valid_block_heights.popitem(last=False)
+
+
+def get_last_valid_block_height(transaction: VersionedTransaction) -> int | None:
+    """返回由 `build_transaction` 构建的交易的最后有效区块高度，未知时返回 None"""
+    return _last_valid_block_heights.get(transaction.signatures[0])
+
+
 async def sign_transaction_from_raw(
     raw_tx: str,
     keypair: Keypair,
@@ -32,11 +72,40 @@ async def sign_transaction_from_raw(
     return txn
 
 
+def estimate_unit_price(instructions: list[Instruction], percentile: int, default: int) -> int:
+    """根据最近的费用市场估算 unit price，不发起 RPC 请求
+
+    以可写账户最多的指令（通常是 swap 指令）作为采样对象。
+
+    Args:
+        instructions (list[Instruction]): 交易指令
+        percentile (int): 分位数，50 / 75 / 90
+        default (int): 尚无采样数据时使用的 unit price
+
+    Returns:
+        int: unit price（micro-lamports）
+    """
+    if not instructions:
+        return default
+    main_ix = max(
+        instructions,
+        key=lambda ix: sum(1 for meta in ix.accounts if meta.is_writable and not meta.is_signer),
+    )
+    writable = [meta.pubkey for meta in main_ix.accounts if meta.is_writable and not meta.is_signer]
+    if not writable:
+        return default
+    percentiles = PriorityFeeEstimator().estimate(main_ix.program_id, writable)
+    if percentiles is None:
+        return default
+    return max(percentiles.get(percentile), 1)
+
+
 async def build_transaction(
     keypair: Keypair,
     instructions: list,
     use_jito: bool | None = None,
     priority_fee: float | None = None,
+    durable_nonce: DurableNonce | None = None,
 ) -> VersionedTransaction:
     """Build transaction with instructions.
 
@@ -45,52 +114,86 @@ async def build_transaction(
         instructions (list): List of instructions to include in the transaction
         use_jito (bool): Whether to use Jito or not
         priority_fee (float): Priority fee
+        durable_nonce (DurableNonce | None): Use the durable nonce instead of a recent
+            blockhash, the transaction stays valid until the nonce is advanced
 
     Returns:
         VersionedTransaction: The built transaction
     """
     if use_jito and priority_fee is not None:
-        unit_price, unit_limit, jito_fee = calc_tx_units_and_split_fees(priority_fee)
-        # 96gYZGLnJYVFmbjzopPSU6QiEV5fGqZNyN9nmNhvrZU5
+        _, _, jito_fee = calc_tx_units_and_split_fees(priority_fee)
+        # 轮换 tip 账户，避免写锁竞争
+        tip_account = await JitoClient().next_tip_account()
         instructions.append(
             transfer(
                 TransferParams(
                     from_pubkey=keypair.pubkey(),
-                    to_pubkey=Pubkey.from_string("96gYZGLnJYVFmbjzopPSU6QiEV5fGqZNyN9nmNhvrZU5"),
+                    to_pubkey=tip_account,
                     lamports=int(jito_fee * SOL_DECIMAL),
                 )
             )
         )
+
+    # 优先使用模拟得到的 unit limit，尚未采样时使用默认值
+    cu_profiler = ComputeUnitProfiler()
+    cu_template = template_of(instructions)
+    profiled_unit_limit = cu_profiler.get_limit(cu_template)
+
+    if use_jito and priority_fee is not None:
+        unit_price, unit_limit, _ = calc_tx_units_and_split_fees(
+            priority_fee, profiled_unit_limit or 200_000
+        )
     elif priority_fee is not None:
-        unit_price, unit_limit = calc_tx_units(priority_fee)
+        unit_price, unit_limit = calc_tx_units(priority_fee, profiled_unit_limit or 200_000)
         logger.info(
             f"Using custom priority fee, unit limit: {unit_limit}, unit price: {unit_price}"
         )
-        instructions.insert(0, set_compute_unit_limit(unit_limit))
-        instructions.insert(1, set_compute_unit_price(unit_price))
     else:
+        unit_price = settings.trading.unit_price
+        unit_limit = profiled_unit_limit or settings.trading.unit_limit
+        percentile = settings.trading.priority_fee_percentile
+        if percentile is not None:
+            unit_price = estimate_unit_price(instructions, percentile, default=unit_price)
         logger.info(
-            f"Using default priority fee, unit limit: {settings.trading.unit_limit}, unit price: {settings.trading.unit_price}"
-        )
-        unit_price, unit_limit = (
-            settings.trading.unit_price,
-            settings.trading.unit_limit,
+            f"Using default priority fee, unit limit: {unit_limit}, unit price: {unit_price}"
         )
 
     instructions.insert(0, set_compute_unit_limit(unit_limit))
     instructions.insert(1, set_compute_unit_price(unit_price))
 
     # init tx
-    recent_blockhash, _ = await get_latest_blockhash()
+    if durable_nonce is not None:
+        # nonce 交易的第一条指令必须是 advance nonce
+        instructions.insert(
+            0,
+            advance_nonce_account(
+                AdvanceNonceAccountParams(
+                    nonce_pubkey=durable_nonce.nonce_account,
+                    authorized_pubkey=durable_nonce.authority,
+                )
+            ),
+        )
+        recent_blockhash, last_valid_block_height = durable_nonce.nonce, None
+    else:
+        recent_blockhash, last_valid_block_height = await get_latest_blockhash()
+
+    lookup_tables = []
+    if settings.trading.lookup_table:
+        lookup_table_manager = LookupTableManager()
+        lookup_tables = lookup_table_manager.get_tables(keypair.pubkey())
+        lookup_table_manager.observe(keypair, instructions)
 
     message = MessageV0.try_compile(
         payer=keypair.pubkey(),
         instructions=instructions,
         recent_blockhash=recent_blockhash,
-        address_lookup_table_accounts=[],
+        address_lookup_table_accounts=lookup_tables,
     )
 
     txn = VersionedTransaction(message, [keypair])
+    if last_valid_block_height is not None:
+        _remember_last_valid_block_height(txn, last_valid_block_height)
+    cu_profiler.observe(cu_template, txn)
     return txn
 
 
@@ -1,6 +1,6 @@
 from solana.rpc.async_api import AsyncClient
+from solbot_common.utils.pda import get_associated_token_address
 from solders.pubkey import Pubkey  # type: ignore
-from spl.token.instructions import get_associated_token_address
 
 
 async def has_ata(client: AsyncClient, wallet: Pubkey, mint: Pubkey) -> bool:
@@ -25,20 +25,18 @@ def max_amount_with_slippage(input_amount: int, slippage_bps: int) -> int:
     return input_amount * (10000 + slippage_bps) // 10000
 
 
-def calc_tx_units(fee: float) -> tuple[int, int]:
+def calc_tx_units(fee: float, unit_limit: int = 200_000) -> tuple[int, int]:
     """根据期望的优先费用计算 unit price 和 unit limit
 
     Args:
         fee: 期望支付的优先费用，单位是 SOL
+        unit_limit: 交易的计算单位上限，默认 200_000
 
     Returns:
         tuple[int, int]: (unit_price, unit_limit)
         - unit_price: 每个计算单位的价格（以 micro-lamports 为单位）
         - unit_limit: 交易的计算单位上限
     """
-    # 设置固定的计算单位上限
-    unit_limit = 200_000
-
     # 将 SOL 转换为 lamports (1 SOL = 10^9 lamports)
     fee_in_lamports = int(fee * 1e9)
 
@@ -51,6 +49,7 @@ def calc_tx_units(fee: float) -> tuple[int, int]:
 
 def calc_tx_units_and_split_fees(
     fee: float,
+    unit_limit: int = 200_000,
 ) -> tuple[int, int, float]:
     """根据期望的优先费用计算 unit price 和 unit limit,同时计算 Jito 的小费
 
@@ -58,6 +57,7 @@ def calc_tx_units_and_split_fees(
 
     Args:
         fee (float): 总费用，单位是 SOL
+        unit_limit (int): 交易的计算单位上限，默认 200_000
 
     Returns:
         tuple[int, int, float]: (unit_price, unit_limit, jito_fee)
@@ -67,5 +67,5 @@ def calc_tx_units_and_split_fees(
     """
     priority_fee = fee * 0.7
     jito_fee = fee * 0.3
-    unit_price, unit_limit = calc_tx_units(priority_fee)
+    unit_price, unit_limit = calc_tx_units(priority_fee, unit_limit)
     return unit_price, unit_limit, jito_fee
@@ -14,6 +14,7 @@ from google.protobuf.message import Message
 from grpc.aio import AioRpcError
 from solbot_common.config import settings
 from solbot_common.log import logger
+from solbot_common.utils.pda import encode_pubkey
 from solbot_db.redis import RedisClient
 from solders.pubkey import Pubkey  # type: ignore
 from yellowstone_grpc.client import GeyserClient
@@ -42,6 +43,13 @@ def should_convert_to_base58(value) -> bool:
         return True
 
 
+def _b58encode(value: bytes) -> str:
+    # 账户地址（32 字节）在交易之间大量重复，编码结果走共享缓存；签名等其他字段直接编码
+    if len(value) == 32:
+        return encode_pubkey(value)
+    return base58.b58encode(value).decode("utf-8")
+
+
 class Base58Printer(_Printer):
     def __init__(self) -> None:
         super().__init__()
@@ -50,14 +58,14 @@ class Base58Printer(_Printer):
     def _RenderBytes(self, value):
         """Renders a bytes value as base58 or utf-8 string."""
         if should_convert_to_base58(value):
-            return base58.b58encode(value).decode("utf-8")
+            return _b58encode(value)
         return value.decode("utf-8")
 
     def _FieldToJsonObject(self, field, value):
         """Converts field value according to its type."""
         if field.cpp_type == field.CPPTYPE_BYTES and isinstance(value, bytes):
             if should_convert_to_base58(value):
-                return base58.b58encode(value).decode("utf-8")
+                return _b58encode(value)
             return value.decode("utf-8")
         return super()._FieldToJsonObject(field, value)
 
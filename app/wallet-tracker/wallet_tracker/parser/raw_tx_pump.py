@@ -1,11 +1,8 @@
 from functools import cache
 
-from solbot_common.log import logger
-
 import orjson as json
 from solbot_common.constants import SWAP_PROGRAMS, TOKEN_PROGRAM_ID, WSOL ,PUMP_FUN_PROGRAM_ID
 from solbot_common.types import SolAmountChange, TokenAmountChange, TxEvent, TxType
-from solbot_common.utils.utils import get_bonding_curve_account
 from wallet_tracker.exceptions import (
     NotSwapTransaction,
     UnknownTransactionType,
@@ -13,12 +10,8 @@ from wallet_tracker.exceptions import (
 )
 
 from .protocol import TransactionParserInterface
-from solbot_common.utils.utils import get_async_client
-from solbot_common.constants import (
-    PUMP_FUN_PROGRAM
-)
-from solbot_services.swaprecord import SwapRecordService
-from solders.pubkey import Pubkey  # type: ignore
+
+
 class PumpfunNewMintParser(TransactionParserInterface):
     def __init__(self, tx_detail: dict) -> None:
         self.tx_detail = tx_detail
@@ -128,36 +121,6 @@ class PumpfunNewMintParser(TransactionParserInterface):
         #         raise UnknownTransactionType()
         # else:
         #     raise ZeroChangeAmountError(pre_balance, post_balance)
-    async def get_mint_price(self, mint: str) -> float:
-        # 这里可以根据mint地址查询价格
-        # 这里假设mint地址为"mint_address"的价格为1.0
-        mint = Pubkey.from_string(mint)
-        result = await get_bonding_curve_account(get_async_client(), mint, PUMP_FUN_PROGRAM)
-        if result is None:
-            raise Exception("bonding curve account not found")
-        bonding_curve, associated_bonding_curve, bonding_curve_account = result
-        logger.info(f"get mint price {result}")
-        # 价格 = SOL / 代币
-        return (
-            bonding_curve_account.virtual_sol_reserves
-            / bonding_curve_account.virtual_token_reserves
-        )
-
-    def calculate_price_change(self,new_price: float, old_price: float) -> float:
-        return ((new_price - old_price) / old_price) * 100
-
-    async def needClosePotision(self) -> bool:
-        # 检查是否需要关闭仓位
-        # 这里假设需要关闭仓位的条件是价格变化超过10%
-        mint = self.get_mint()
-        new_price = await self.get_mint_price(mint) 
-        createMint = await SwapRecordService().get_mint(mint = mint)
-        if createMint is None:
-            return False
-        logger.info(f"get create mint: {createMint}")
-        oldPrice = createMint.input_amount / createMint.output_amount
-        price_change = self.calculate_price_change(new_price, oldPrice)
-        return abs(price_change) > 10
 
     @cache
     def get_swap_program_id(self) -> str | None:
@@ -195,8 +158,6 @@ class PumpfunNewMintParser(TransactionParserInterface):
             pre_token_balance = token_amount_change["pre_balance"]
             post_token_balance = token_amount_change["post_balance"]
         else:
-            if await self.needClosePotision() is False:
-                raise NotSwapTransaction()
             from_amount = abs(token_amount_change["change_amount"])
             from_decimals = token_amount_change["decimals"]
             to_amount = abs(sol_amount_change["change_amount"])
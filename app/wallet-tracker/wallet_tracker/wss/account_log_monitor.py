@@ -11,6 +11,7 @@ from _pickle import PicklingError
 from solana.rpc.websocket_api import connect
 from solbot_common.config import settings
 from solbot_common.log import logger
+from solbot_common.utils.utils import get_websocket_url
 from solders.errors import SerdeJSONError  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
 from solders.rpc.config import RpcTransactionLogsFilterMentions  # type: ignore
@@ -38,7 +39,7 @@ class AccountLogMonitor:
             redis_channel: Redis 发布订阅频道名
         """
         self.init_wallets = list(init_wallets)
-        self.websocket_url = rpc_endpoint.replace("https://", "wss://")
+        self.websocket_url = get_websocket_url(rpc_endpoint)
         self.redis_channel = redis_channel
         self.redis = redis_client
         self.is_running = False
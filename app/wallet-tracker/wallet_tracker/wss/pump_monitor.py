@@ -11,6 +11,7 @@ from solana.rpc.websocket_api import connect
 from solbot_common.config import settings
 from solbot_common.log import logger
 from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.utils.utils import get_websocket_url
 from solders.pubkey import Pubkey
 from solders.rpc.responses import SubscriptionResult, ProgramNotification
 from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
@@ -34,7 +35,7 @@ class PumpMonitor:
             redis_channel: Redis发布订阅频道名
         """
         logger.info(f"pump fun start...")
-        self.websocket_url = rpc_endpoint.replace("https://", "wss://")
+        self.websocket_url = get_websocket_url(rpc_endpoint)
         self.redis_channel = redis_channel
         self.redis = redis_client
         self.is_running = False
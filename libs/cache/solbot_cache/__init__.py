@@ -1,14 +1,19 @@
 from .account_amount import AccountAmountCache
-from .blockhash import get_latest_blockhash
-from .cached import cached
+from .blockhash import BlockhashHolder, StaleBlockhashError, get_latest_blockhash
+from .cached import cache_metrics, cached
 from .min_balance_rent import get_min_balance_rent
 from .mint_account import MintAccountCache
+from .tiered import TieredCache
 from .token_info import TokenInfoCache
 
 __all__ = [
     "AccountAmountCache",
+    "BlockhashHolder",
     "MintAccountCache",
+    "StaleBlockhashError",
+    "TieredCache",
     "TokenInfoCache",
+    "cache_metrics",
     "cached",
     "get_latest_blockhash",
     "get_min_balance_rent",
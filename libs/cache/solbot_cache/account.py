@@ -1,26 +1,61 @@
 import base64
 
-from asyncio.streams import logger
-
-import orjson as json
 from solana.rpc.async_api import AsyncClient
 from solbot_common.layouts.global_account import GlobalAccount
+from solbot_common.utils.pda import get_pda
 from solbot_db.redis import RedisClient
 from solders.pubkey import Pubkey  # type: ignore
+from typing_extensions import Self
+
+from solbot_cache.tiered import LoaderTier, RedisTier, TieredCache
+
+
+def _encode_global(data: bytes) -> dict:
+    return {"global": base64.b64encode(data).decode()}
+
+
+def _decode_global(payload: dict) -> bytes:
+    return base64.b64decode(payload["global"])
 
 
 class GlobalAccountCache:
+    """程序 global 账户缓存：内存 → Redis → RPC
+
+    缓存原始数据，Redis 中的格式为 `{"global": base64}`，不过期。
+    """
+
+    _instance = None
+
+    def __new__(cls, client: AsyncClient) -> Self:
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
     def __init__(self, client: AsyncClient) -> None:
+        if hasattr(self, "_initialized"):
+            return
         self.celient = client
         self.redis = RedisClient.get_instance()
         self.prefix = "global_account"
+        self.cache: TieredCache[Pubkey, bytes] = TieredCache(
+            "global_account",
+            [
+                RedisTier(self.redis, self.prefix, _encode_global, _decode_global),
+                LoaderTier("rpc", self._get),
+            ],
+            maxsize=16,
+            ttl=60,
+            stale_ttl=60 * 60,
+            negative_ttl=5,
+        )
+        self._initialized = True
 
     async def _get(self, program: Pubkey) -> bytes | None:
         # for seed in [b"global", b"state", b"config", b"pump"]:
         #     pda, bump = Pubkey.find_program_address([seed], program)
         #     response = await  self.celient.get_account_info_json_parsed(pda)
         #     logger.debug(f"got result:{seed}:{response}")
-        global_account_pda = Pubkey.find_program_address([b"global"], program)[0]
+        global_account_pda = get_pda([b"global"], program)
         token_account = await self.celient.get_account_info_json_parsed(global_account_pda,commitment="confirmed")
         if token_account is None:
             return None
@@ -29,15 +64,31 @@ class GlobalAccountCache:
             return None
         return bytes(value.data)
 
+    async def get_cached(self, program: Pubkey) -> GlobalAccount | None:
+        """只读取缓存，不发起 RPC 请求
+
+        Args:
+            program (Pubkey): 程序地址
+
+        Returns:
+            GlobalAccount | None: 未命中缓存时返回 None
+        """
+        data = await self.cache.get_cached(program)
+        if data is None:
+            return None
+        return GlobalAccount.from_buffer(data)
+
+    async def set(self, program: Pubkey, data: bytes) -> None:
+        """写入缓存
+
+        Args:
+            program (Pubkey): 程序地址
+            data (bytes): global 账户的原始数据
+        """
+        await self.cache.set(program, data)
+
     async def get(self, program: Pubkey) -> GlobalAccount | None:
-        val = await self.redis.get(f"{self.prefix}:{program}")
-        if val is None:
-            val = await self._get(program)
-            if val is None:
-                return None
-            data = {"global": base64.b64encode(val).decode()}
-            await self.redis.set(f"{self.prefix}:{program}", json.dumps(data))
-            return GlobalAccount.from_buffer(val)
-        json_data = json.loads(val)
-        global_account_bytes = base64.b64decode(json_data["global"])
-        return GlobalAccount.from_buffer(global_account_bytes)
+        data = await self.cache.get(program)
+        if data is None:
+            return None
+        return GlobalAccount.from_buffer(data)
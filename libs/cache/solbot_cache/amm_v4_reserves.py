@@ -0,0 +1,261 @@
+"""Raydium AMM v4 储备量缓存
+
+在进程内缓存池子的 AMM 状态与两个金库的余额，并通过 websocket accountSubscribe
+保持更新，报价时无需再请求 RPC。
+
+首次访问某个池子时，通过一次 getMultipleAccounts 拉取 AMM 账户及两个金库，
+随后订阅这三个账户。订阅连接断开期间，缓存视为不可信，会回退到 RPC 拉取。
+重连并重新订阅完成后，先通过 getMultipleAccounts 重新拉取全部账户，再恢复使用缓存，
+避免断线期间错过的更新导致缓存停留在旧值。
+
+缓存同时作为 `QuoteService` 的本地储备量来源，储备量变化时通知 `add_listener` 注册的回调。
+"""
+
+import asyncio
+import struct
+from collections import deque
+from collections.abc import Callable
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Processed
+from solana.rpc.websocket_api import connect
+from solbot_common.config import settings
+from solbot_common.constants import WSOL
+from solbot_common.log import logger
+from solbot_common.types.raydium import AmmV4PoolKeys
+from solbot_common.utils.amm_v4_quote import AmmV4PoolState, AmmV4Reserves
+from solbot_common.utils.quote import QuoteService
+from solbot_common.utils.utils import get_async_client, get_websocket_url
+from solders.pubkey import Pubkey  # type: ignore
+from solders.rpc.responses import AccountNotification, SubscriptionResult  # type: ignore
+from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
+
+# SPL token 账户中 amount 字段的偏移量：mint(32) + owner(32)
+_TOKEN_AMOUNT_OFFSET = 64
+# getMultipleAccounts 单次最多 100 个账户
+MAX_ACCOUNTS_PER_REQUEST = 100
+_U64 = struct.Struct("<Q")
+
+# 储备量变化的回调: (代币 mint, SOL 储备量, 代币储备量)
+ReserveListener = Callable[[str, int, int], None]
+
+
+def _decode_token_amount(data: bytes) -> int:
+    return _U64.unpack_from(data, _TOKEN_AMOUNT_OFFSET)[0]
+
+
+class AmmV4ReserveCache:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, client: AsyncClient | None = None, reconnect_delay: float = 3) -> None:
+        if self._initialized:
+            return
+        self._initialized = True
+        self.client = client or get_async_client()
+        self.websocket_url = get_websocket_url(settings.rpc.rpc_url)
+        self.reconnect_delay = reconnect_delay
+
+        self._pool_states: dict[Pubkey, AmmV4PoolState] = {}
+        self._balances: dict[Pubkey, int] = {}
+        # 需要保持订阅的账户，值表示账户类型: "amm" 或 "vault"
+        self._tracked: dict[Pubkey, str] = {}
+        # 账户 -> 所属池子
+        self._pools_by_account: dict[Pubkey, AmmV4PoolKeys] = {}
+        self._listeners: list[ReserveListener] = []
+        # 代币（非 WSOL 一侧）-> 池子
+        self._pools_by_mint: dict[str, AmmV4PoolKeys] = {}
+        self._pending_subscribe: asyncio.Queue[Pubkey] = asyncio.Queue()
+        self._subscription_ids: dict[int, Pubkey] = {}
+        self._live = False
+        self._task: asyncio.Task | None = None
+        QuoteService().register_reserve_source(self.get_cached_reserves)
+
+    async def get(self, pool_keys: AmmV4PoolKeys) -> AmmV4Reserves:
+        """获取池子的储备量
+
+        订阅在线且缓存命中时直接返回，否则通过一次 RPC 拉取并开始订阅。
+
+        Args:
+            pool_keys (AmmV4PoolKeys): 池子密钥
+
+        Returns:
+            AmmV4Reserves: 储备量
+        """
+        if self._live:
+            reserves = self._get_cached(pool_keys)
+            if reserves is not None:
+                return reserves
+
+        reserves = await self._fetch(pool_keys)
+        self._track(pool_keys)
+        return reserves
+
+    def add_listener(self, listener: ReserveListener) -> None:
+        """注册储备量变化的回调，订阅推送或重新拉取账户后调用"""
+        self._listeners.append(listener)
+
+    def get_cached_reserves(self, mint: str) -> tuple[int, int] | None:
+        """读取代币在缓存中的 (SOL 储备量, 代币储备量)，不发起请求"""
+        pool_keys = self._pools_by_mint.get(mint)
+        if not self._live or pool_keys is None:
+            return None
+        reserves = self._get_cached(pool_keys)
+        if reserves is None:
+            return None
+        token_reserve, sol_reserve = reserves.reserves_for(reserves.token_mint)
+        return sol_reserve, token_reserve
+
+    def _get_cached(self, pool_keys: AmmV4PoolKeys) -> AmmV4Reserves | None:
+        pool = self._pool_states.get(pool_keys.amm_id)
+        coin_amount = self._balances.get(pool_keys.base_vault)
+        pc_amount = self._balances.get(pool_keys.quote_vault)
+        if pool is None or coin_amount is None or pc_amount is None:
+            return None
+        return AmmV4Reserves(pool=pool, coin_vault_amount=coin_amount, pc_vault_amount=pc_amount)
+
+    async def _fetch(self, pool_keys: AmmV4PoolKeys) -> AmmV4Reserves:
+        resp = await self.client.get_multiple_accounts(
+            [pool_keys.amm_id, pool_keys.base_vault, pool_keys.quote_vault],
+            commitment=Processed,
+        )
+        amm_account, coin_vault, pc_vault = resp.value
+        if amm_account is None or coin_vault is None or pc_vault is None:
+            raise ValueError(f"Failed to fetch amm v4 accounts for pool {pool_keys.amm_id}")
+
+        pool = AmmV4PoolState.from_buffer(bytes(amm_account.data))
+        coin_amount = _decode_token_amount(bytes(coin_vault.data))
+        pc_amount = _decode_token_amount(bytes(pc_vault.data))
+
+        self._pool_states[pool_keys.amm_id] = pool
+        self._balances[pool_keys.base_vault] = coin_amount
+        self._balances[pool_keys.quote_vault] = pc_amount
+        return AmmV4Reserves(pool=pool, coin_vault_amount=coin_amount, pc_vault_amount=pc_amount)
+
+    def _track(self, pool_keys: AmmV4PoolKeys) -> None:
+        for mint in (pool_keys.base_mint, pool_keys.quote_mint):
+            if mint != WSOL:
+                self._pools_by_mint[str(mint)] = pool_keys
+        for pubkey, kind in (
+            (pool_keys.amm_id, "amm"),
+            (pool_keys.base_vault, "vault"),
+            (pool_keys.quote_vault, "vault"),
+        ):
+            self._pools_by_account[pubkey] = pool_keys
+            if pubkey in self._tracked:
+                continue
+            self._tracked[pubkey] = kind
+            self._pending_subscribe.put_nowait(pubkey)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _apply(self, pubkey: Pubkey, data: bytes) -> None:
+        kind = self._tracked.get(pubkey)
+        if kind == "amm":
+            self._pool_states[pubkey] = AmmV4PoolState.from_buffer(data)
+        elif kind == "vault":
+            self._balances[pubkey] = _decode_token_amount(data)
+        else:
+            return
+        self._notify(pubkey)
+
+    def _notify(self, pubkey: Pubkey) -> None:
+        pool_keys = self._pools_by_account.get(pubkey)
+        if not self._listeners or pool_keys is None:
+            return
+        reserves = self._get_cached(pool_keys)
+        if reserves is None:
+            return
+        token_reserve, sol_reserve = reserves.reserves_for(reserves.token_mint)
+        mint = str(reserves.token_mint)
+        for listener in self._listeners:
+            try:
+                listener(mint, sol_reserve, token_reserve)
+            except Exception as e:
+                logger.exception(f"AmmV4ReserveCache listener error: {e}")
+
+    async def _refresh_tracked(self) -> None:
+        """重新拉取所有已订阅账户，覆盖断线期间可能错过的更新"""
+        pubkeys = list(self._tracked)
+        for i in range(0, len(pubkeys), MAX_ACCOUNTS_PER_REQUEST):
+            batch = pubkeys[i : i + MAX_ACCOUNTS_PER_REQUEST]
+            resp = await self.client.get_multiple_accounts(batch, commitment=Processed)
+            for pubkey, account in zip(batch, resp.value, strict=True):
+                if account is not None:
+                    self._apply(pubkey, bytes(account.data))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._subscribe_loop()
+            except asyncio.CancelledError:
+                self._live = False
+                raise
+            except (ConnectionClosedError, ConnectionClosedOK) as e:
+                logger.warning(f"AmmV4ReserveCache websocket closed: {e}")
+            except Exception as e:
+                logger.exception(f"AmmV4ReserveCache websocket error: {e}")
+            self._live = False
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _subscribe_loop(self) -> None:
+        async with connect(self.websocket_url, ping_interval=20, ping_timeout=30) as websocket:
+            # 重连后需要重新订阅全部账户
+            self._subscription_ids.clear()
+            self._pending_subscribe = asyncio.Queue()
+            for pubkey in self._tracked:
+                self._pending_subscribe.put_nowait(pubkey)
+            # 重连时已有账户在缓存中，订阅全部确认后需要先重新拉取一次
+            needs_refresh = bool(self._tracked)
+
+            waiting_response: deque[Pubkey] = deque()
+            recv_task = asyncio.create_task(websocket.recv())
+            queue_task = asyncio.create_task(self._pending_subscribe.get())
+            try:
+                while True:
+                    done, _ = await asyncio.wait(
+                        {recv_task, queue_task}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if queue_task in done:
+                        pubkey = queue_task.result()
+                        waiting_response.append(pubkey)
+                        await websocket.account_subscribe(
+                            pubkey, commitment=Processed, encoding="base64"
+                        )
+                        queue_task = asyncio.create_task(self._pending_subscribe.get())
+
+                    if recv_task in done:
+                        for message in recv_task.result():
+                            if isinstance(message, SubscriptionResult):
+                                if waiting_response:
+                                    self._subscription_ids[message.result] = (
+                                        waiting_response.popleft()
+                                    )
+                            elif isinstance(message, AccountNotification):
+                                pubkey = self._subscription_ids.get(message.subscription)
+                                if pubkey is not None:
+                                    self._apply(pubkey, bytes(message.result.value.data))
+                        recv_task = asyncio.create_task(websocket.recv())
+
+                    # 所有账户都已确认订阅后，缓存才可信
+                    subscribed = not waiting_response and self._pending_subscribe.empty()
+                    if subscribed and needs_refresh:
+                        await self._refresh_tracked()
+                        needs_refresh = False
+                    self._live = subscribed
+            finally:
+                recv_task.cancel()
+                queue_task.cancel()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._live = False
@@ -1,9 +1,87 @@
+"""最新 blockhash
+
+进程内持有最新的 blockhash，构建交易时同步读取，不再访问 Redis 或 RPC。
+
+blockhash 的来源：
+1. cache-preloader 更新缓存后通过 Redis pub/sub 推送（`BLOCKHASH_CHANNEL`）
+2. 推送中断、blockhash 即将过期时，由本进程自行轮询 RPC
+
+blockhash 在 `last_valid_block_height` 之前有效。本进程定期通过 getBlockHeight 获取链上区块高度
+（推送中也携带获取 blockhash 时的区块高度），两次观测之间按出块间隔向前推算，
+剩余区块数不足 `min_remaining_blocks` 时视为过期，不会用于构建交易。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+
 import orjson as json
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Processed
+from solbot_common.log import logger
 from solbot_common.utils.utils import get_async_client
 from solbot_db.redis import RedisClient
 from solders.hash import Hash  # type: ignore
 
-from solbot_cache.constants import BLOCKHASH_CACHE_KEY
+from solbot_cache.constants import BLOCKHASH_CACHE_KEY, BLOCKHASH_CHANNEL
+
+# blockhash 的有效区块数
+MAX_PROCESSING_AGE = 150
+# 平均出块间隔（秒）
+SLOT_DURATION = 0.4
+
+
+class StaleBlockhashError(Exception):
+    """没有可用的 blockhash，或 blockhash 即将过期"""
+
+
+@dataclass(frozen=True)
+class BlockHeight:
+    """一次区块高度观测"""
+
+    height: int
+    # 观测时间（unix 时间戳）
+    observed_at: float
+
+    def estimate(self, now: float | None = None) -> float:
+        """按出块间隔推算当前区块高度，只会高估，不会低估"""
+        elapsed = max((now or time.time()) - self.observed_at, 0)
+        return self.height + elapsed / SLOT_DURATION
+
+
+@dataclass(frozen=True)
+class BlockhashSnapshot:
+    blockhash: Hash
+    last_valid_block_height: int
+    # 从 RPC 获取该 blockhash 的时间（unix 时间戳）
+    fetched_at: float
+    # 获取 blockhash 时链上的区块高度，旧版本推送中没有该字段
+    block_height: int | None = None
+
+    def remaining_blocks(self, block_height: float) -> float:
+        """blockhash 过期前剩余的区块数"""
+        return self.last_valid_block_height - block_height
+
+    def observed_block_height(self) -> BlockHeight:
+        """获取 blockhash 时的区块高度
+
+        未携带区块高度时，按最新 blockhash 的有效期反推，与获取时间一起作为观测值
+        """
+        if self.block_height is not None:
+            return BlockHeight(self.block_height, self.fetched_at)
+        return BlockHeight(self.last_valid_block_height - MAX_PROCESSING_AGE, self.fetched_at)
+
+    @classmethod
+    def from_json(cls, raw: str | bytes) -> "BlockhashSnapshot":
+        value = json.loads(raw)
+        block_height = value.get("block_height")
+        return cls(
+            blockhash=Hash.from_string(value["blockhash"]),
+            last_valid_block_height=int(value["last_valid_block_height"]),
+            # 旧版本缓存中没有 fetched_at，按即将过期处理
+            fetched_at=float(value.get("fetched_at", 0)),
+            block_height=int(block_height) if block_height is not None else None,
+        )
 
 
 async def get_latest_blockhash_from_rpc() -> tuple[Hash, int]:
@@ -11,11 +89,171 @@ async def get_latest_blockhash_from_rpc() -> tuple[Hash, int]:
     return resp.value.blockhash, resp.value.last_valid_block_height
 
 
+class BlockhashHolder:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(
+        self,
+        client: AsyncClient | None = None,
+        min_remaining_blocks: int = 30,
+        poll_interval: float = 2,
+    ) -> None:
+        """
+        Args:
+            client (AsyncClient | None, optional): RPC 客户端
+            min_remaining_blocks (int, optional): blockhash 至少需要剩余的区块数. Defaults to 30.
+            poll_interval (float, optional): 检查 blockhash 新鲜度的间隔（秒）. Defaults to 2.
+        """
+        if self._initialized:
+            return
+        self._initialized = True
+        self.client = client or get_async_client()
+        self.min_remaining_blocks = min_remaining_blocks
+        self.poll_interval = poll_interval
+        self._snapshot: BlockhashSnapshot | None = None
+        self._block_height: BlockHeight | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def snapshot(self) -> BlockhashSnapshot | None:
+        return self._snapshot
+
+    def update(self, snapshot: BlockhashSnapshot) -> None:
+        """更新 blockhash，只接受更新的 blockhash"""
+        current = self._snapshot
+        if current is None or snapshot.last_valid_block_height >= current.last_valid_block_height:
+            self._snapshot = snapshot
+        if snapshot.block_height is not None:
+            self.observe_block_height(BlockHeight(snapshot.block_height, snapshot.fetched_at))
+
+    def observe_block_height(self, block_height: BlockHeight) -> None:
+        """记录链上区块高度，只接受推算值更高的观测"""
+        current = self._block_height
+        if current is None or block_height.estimate() >= current.estimate():
+            self._block_height = block_height
+
+    def remaining_blocks(self, snapshot: BlockhashSnapshot, now: float | None = None) -> float:
+        """按观测到的区块高度计算 blockhash 剩余的区块数
+
+        尚未观测到区块高度时，以 blockhash 自身携带的观测值推算
+        """
+        observed = snapshot.observed_block_height()
+        if self._block_height is not None:
+            observed = max(observed, self._block_height, key=lambda b: b.estimate(now))
+        return snapshot.remaining_blocks(observed.estimate(now))
+
+    def get(self) -> tuple[Hash, int]:
+        """同步读取 blockhash
+
+        Returns:
+            tuple[Hash, int]: blockhash 及最后有效区块高度
+
+        Raises:
+            StaleBlockhashError: 没有可用的 blockhash，或剩余区块数不足
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise StaleBlockhashError("No blockhash available")
+        if self.remaining_blocks(snapshot) < self.min_remaining_blocks:
+            raise StaleBlockhashError(f"Blockhash {snapshot.blockhash} is about to expire")
+        return snapshot.blockhash, snapshot.last_valid_block_height
+
+    async def get_fresh(self) -> tuple[Hash, int]:
+        """读取 blockhash，过期时从 RPC 拉取"""
+        self.start()
+        try:
+            return self.get()
+        except StaleBlockhashError:
+            await self._fetch_from_redis()
+            try:
+                return self.get()
+            except StaleBlockhashError:
+                await self.refresh()
+                return self.get()
+
+    async def refresh(self) -> None:
+        """从 RPC 拉取最新的 blockhash 及当前区块高度"""
+        fetched_at = time.time()
+        (blockhash, last_valid_block_height), block_height = await asyncio.gather(
+            get_latest_blockhash_from_rpc(), self._get_block_height()
+        )
+        self.update(BlockhashSnapshot(blockhash, last_valid_block_height, fetched_at, block_height))
+
+    async def refresh_block_height(self) -> None:
+        """从 RPC 拉取当前区块高度"""
+        observed_at = time.time()
+        self.observe_block_height(BlockHeight(await self._get_block_height(), observed_at))
+
+    async def _get_block_height(self) -> int:
+        # 交易按出块节点的区块高度判断是否过期，使用 processed 避免低估
+        resp = await self.client.get_block_height(commitment=Processed)
+        return resp.value
+
+    async def _fetch_from_redis(self) -> None:
+        try:
+            raw = await RedisClient.get_instance().get(BLOCKHASH_CACHE_KEY)
+            if raw is not None:
+                self.update(BlockhashSnapshot.from_json(raw))
+        except Exception as e:
+            logger.warning(f"Failed to read blockhash from redis: {e}")
+
+    def start(self) -> None:
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._poll()),
+        ]
+
+    async def _listen(self) -> None:
+        """订阅 cache-preloader 推送的 blockhash"""
+        while True:
+            pubsub = RedisClient.get_instance().pubsub()
+            try:
+                await pubsub.subscribe(BLOCKHASH_CHANNEL)
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+                    if message is not None:
+                        self.update(BlockhashSnapshot.from_json(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Blockhash subscription error: {e}")
+            finally:
+                await pubsub.close()
+            await asyncio.sleep(self.poll_interval)
+
+    async def _poll(self) -> None:
+        """更新区块高度；推送不及时、blockhash 即将过期时自行拉取"""
+        while True:
+            try:
+                snapshot = self._snapshot
+                if (
+                    snapshot is None
+                    or self.remaining_blocks(snapshot) < 2 * self.min_remaining_blocks
+                ):
+                    await self.refresh()
+                else:
+                    await self.refresh_block_height()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to refresh blockhash: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
 async def get_latest_blockhash() -> tuple[Hash, int]:
-    """Get current blockhash and last valid block height from cache"""
-    redis = RedisClient.get_instance()
-    raw_cached_value = await redis.get(BLOCKHASH_CACHE_KEY)
-    if raw_cached_value is None:
-        return await get_latest_blockhash_from_rpc()
-    cached_value = json.loads(raw_cached_value)
-    return Hash.from_string(cached_value["blockhash"]), int(cached_value["last_valid_block_height"])
+    """Get current blockhash and last valid block height from the in-process holder"""
+    return await BlockhashHolder().get_fresh()
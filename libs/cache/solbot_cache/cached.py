@@ -1,14 +1,106 @@
-from typing import Literal
+"""`cached` 装饰器
 
+返回值缓存在 Redis 中（`default`），序列化使用 `OrjsonSerializer`。
+
+开启 `near_ttl` 后，Redis 之前加一层进程内的近端缓存，热点 key 不再访问 Redis。
+某个进程写入 Redis 后通过 pub/sub（`NEAR_CACHE_CHANNEL`）广播 key，其他进程删除近端缓存中的旧值；
+订阅建立之前或断开期间的广播会丢失，近端缓存的 TTL 是旧值存活时间的上限。
+"""
+
+import asyncio
+import importlib
+import pickle
+import time
+import uuid
+from collections.abc import Callable
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Literal
+
+import orjson as json
 from aiocache import Cache, caches
 from aiocache import cached as _cached
 from aiocache.base import SENTINEL
+from aiocache.serializers import BaseSerializer
+from pydantic import BaseModel
 from solbot_common.config import settings
+from solbot_common.log import logger
+from solbot_db.redis import RedisClient
+
+from solbot_cache.constants import NEAR_CACHE_CHANNEL
+from solbot_cache.tiered import MemoryTier
 
 endpoint = settings.db.redis.host
 port = settings.db.redis.port
 # cache = Cache(cache_class=Cache.REDIS, endpoint=endpoint, port=port, namespace="cache")
 
+MODEL_TAG = "__model__"
+# pickle 协议 2 及以上的第一个字节，JSON 文本不会以它开头
+PICKLE_PREFIX = b"\x80"
+
+
+def _is_plain(value: Any) -> bool:
+    """是否只包含 JSON 原生类型，反序列化后类型不变"""
+    if isinstance(value, Enum):
+        # 枚举反序列化后会变成 int/str
+        return False
+    # bool 是 int 的子类，orjson 会按 true/false 编码，读回后仍是 bool
+    if value is None or isinstance(value, bool | int | float | str):
+        return True
+    if isinstance(value, list):
+        return all(_is_plain(v) for v in value)
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and _is_plain(v) for k, v in value.items())
+    return False
+
+
+@lru_cache(maxsize=256)
+def _import_model(path: str) -> type[BaseModel]:
+    module_name, _, qualname = path.partition(":")
+    obj: Any = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    if not (isinstance(obj, type) and issubclass(obj, BaseModel)):
+        raise TypeError(f"{path} is not a pydantic model")
+    return obj
+
+
+class OrjsonSerializer(BaseSerializer):
+    """JSON 原生类型和 pydantic 模型使用 orjson，其余类型（dataclass、Pubkey 等）使用 pickle
+
+    模型保存为 `{"__model__": "模块:类名", "data": ...}`。
+    以 pickle 开头的数据按 pickle 读取，兼容 `PickleSerializer` 写入的旧数据。
+    """
+
+    DEFAULT_ENCODING = None
+
+    def dumps(self, value: Any) -> bytes:
+        if isinstance(value, BaseModel):
+            cls = type(value)
+            return json.dumps(
+                {
+                    MODEL_TAG: f"{cls.__module__}:{cls.__qualname__}",
+                    "data": value.model_dump(mode="json"),
+                }
+            )
+        if _is_plain(value):
+            try:
+                return json.dumps(value)
+            except json.JSONEncodeError:
+                # 超出 64 位的整数
+                pass
+        return pickle.dumps(value, protocol=pickle.DEFAULT_PROTOCOL)
+
+    def loads(self, value: bytes | None) -> Any:
+        if value is None:
+            return None
+        if value[:1] == PICKLE_PREFIX:
+            return pickle.loads(value)
+        data = json.loads(value)
+        if isinstance(data, dict) and MODEL_TAG in data:
+            return _import_model(data[MODEL_TAG]).model_validate(data["data"])
+        return data
+
 
 # You can use either classes or strings for referencing classes
 caches.set_config(
@@ -22,7 +114,7 @@ caches.set_config(
             "endpoint": endpoint,
             "port": port,
             "timeout": 1,
-            "serializer": {"class": "aiocache.serializers.PickleSerializer"},
+            "serializer": {"class": OrjsonSerializer},
             "plugins": [
                 {"class": "aiocache.plugins.HitMissRatioPlugin"},
                 {"class": "aiocache.plugins.TimingPlugin"},
@@ -62,7 +154,115 @@ def key_builder(f, *args, **kwargs):
     return f"{module_name}:{class_name}:{method_name}:{args_str}:{kwargs_str}"
 
 
+class NearCache:
+    """进程内近端缓存，只在事件循环所在线程中使用"""
+
+    def __init__(
+        self, name: str, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.name = name
+        self.clock = clock
+        self.memory: MemoryTier[str, Any] = MemoryTier(maxsize, ttl)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Any:
+        entry = self.memory.get(key, self.clock())
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value, self.clock())
+
+    def invalidate(self, key: str) -> None:
+        if self.memory.delete(key):
+            self.invalidations += 1
+
+    def metrics(self) -> dict[str, int | float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+class NearCacheInvalidator:
+    """通过 Redis pub/sub 广播写入的 key，删除其他进程近端缓存中的旧值"""
+
+    def __init__(self, retry_interval: float = 1) -> None:
+        self.node_id = uuid.uuid4().hex
+        self.retry_interval = retry_interval
+        self.caches: list[NearCache] = []
+        self._task: asyncio.Task | None = None
+
+    def register(self, cache: NearCache) -> None:
+        self.caches.append(cache)
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def invalidate(self, key: str) -> None:
+        for cache in self.caches:
+            cache.invalidate(key)
+
+    async def publish(self, key: str) -> None:
+        try:
+            payload = json.dumps({"node": self.node_id, "key": key})
+            await RedisClient.get_instance().publish(NEAR_CACHE_CHANNEL, payload)
+        except Exception as e:
+            logger.warning(f"Failed to publish cache invalidation: {key}, cause: {e}")
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = RedisClient.get_instance().pubsub()
+            try:
+                await pubsub.subscribe(NEAR_CACHE_CHANNEL)
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+                    if message is None:
+                        continue
+                    data = json.loads(message["data"])
+                    if data["node"] != self.node_id:
+                        self.invalidate(data["key"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation subscription error: {e}")
+            finally:
+                await pubsub.close()
+            # 断开期间可能错过广播，清空近端缓存
+            for cache in self.caches:
+                cache.memory.clear()
+            await asyncio.sleep(self.retry_interval)
+
+
+near_cache_invalidator = NearCacheInvalidator()
+
+
 class cached(_cached):
+    """aiocache `cached`，key 由 `key_builder` 生成
+
+    Args:
+        near_ttl (float | None, optional): 近端缓存的过期时间（秒），None 表示不使用近端缓存；
+            不超过 `ttl`
+        near_maxsize (int, optional): 近端缓存最多保存的条目数. Defaults to 1024.
+    """
+
     def __init__(
         self,
         ttl=SENTINEL,
@@ -75,6 +275,8 @@ class cached(_cached):
         plugins=None,
         alias: Literal["default", "temp"] = "default",
         noself=False,
+        near_ttl: float | None = None,
+        near_maxsize: int = 1024,
         **kwargs,
     ):
         self.ttl = ttl
@@ -90,3 +292,85 @@ class cached(_cached):
         self._namespace = namespace
         self._plugins = plugins
         self._kwargs = kwargs
+
+        if near_ttl is not None and isinstance(ttl, int | float) and ttl > 0:
+            near_ttl = min(near_ttl, ttl)
+        self.near_ttl = near_ttl
+        self.near_maxsize = near_maxsize
+        self.near_cache: NearCache | None = None
+        self._background_tasks: set[asyncio.Task] = set()
+
+    def __call__(self, f):
+        wrapper = super().__call__(f)
+        if self.near_ttl is not None:
+            self.near_cache = NearCache(
+                f"{f.__module__}:{f.__qualname__}", self.near_maxsize, self.near_ttl
+            )
+            near_cache_invalidator.register(self.near_cache)
+        wrapper.near_cache = self.near_cache
+        return wrapper
+
+    async def decorator(
+        self, f, *args, cache_read=True, cache_write=True, aiocache_wait_for_write=True, **kwargs
+    ):
+        if self.near_cache is None:
+            return await super().decorator(
+                f,
+                *args,
+                cache_read=cache_read,
+                cache_write=cache_write,
+                aiocache_wait_for_write=aiocache_wait_for_write,
+                **kwargs,
+            )
+
+        near_cache_invalidator.start()
+        key = self.get_cache_key(f, args, kwargs)
+        if cache_read:
+            value = self.near_cache.get(key)
+            if value is not None:
+                return value
+            value = await self.get_from_cache(key)
+            if value is not None:
+                self.near_cache.set(key, value)
+                return value
+
+        result = await f(*args, **kwargs)
+
+        if self.skip_cache_func(result):
+            return result
+
+        if cache_write:
+            self.near_cache.set(key, result)
+            if aiocache_wait_for_write:
+                await self.set_in_cache(key, result)
+            else:
+                task = asyncio.create_task(self.set_in_cache(key, result))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+
+        return result
+
+    async def set_in_cache(self, key, value):
+        await super().set_in_cache(key, value)
+        if self.near_cache is not None:
+            await near_cache_invalidator.publish(key)
+
+
+def cache_metrics() -> dict[str, Any]:
+    """各缓存的统计
+
+    Returns:
+        dict: `aliases` 为 `HitMissRatioPlugin`、`TimingPlugin` 记录的命中率和耗时，
+            `near` 为各函数近端缓存的命中率
+    """
+    aliases = {}
+    for alias in caches.get_config():
+        cache = caches.get(alias)
+        aliases[alias] = {
+            "hit_miss_ratio": dict(getattr(cache, "hit_miss_ratio", {})),
+            "profiling": dict(getattr(cache, "profiling", {})),
+        }
+    return {
+        "aliases": aliases,
+        "near": {cache.name: cache.metrics() for cache in near_cache_invalidator.caches},
+    }
@@ -1,2 +1,4 @@
 BLOCKHASH_CACHE_KEY = "cache_preloader:blockhash"
+BLOCKHASH_CHANNEL = "cache_preloader:blockhash:updates"
 MIN_BALANCE_RENT_CACHE_KEY = "cache_preloader:min_balance_rent"
+NEAR_CACHE_CHANNEL = "cache:invalidate"
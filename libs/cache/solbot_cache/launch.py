@@ -1,4 +1,5 @@
 from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.utils.pda import to_pubkey
 from solbot_common.utils.utils import get_async_client, get_bonding_curve_account
 from solders.pubkey import Pubkey  # type: ignore
 
@@ -19,7 +20,7 @@ class LaunchCache:
     def __repr__(self) -> str:
         return "LaunchCache()"
 
-    @cached(ttl=None, noself=True)
+    @cached(ttl=None, noself=True, near_ttl=60, near_maxsize=4096)
     async def is_pump_token_launched(self, mint: str | Pubkey) -> bool:
         """检查 pump 代币是否已被发射。
 
@@ -37,7 +38,7 @@ class LaunchCache:
         """
         result = await get_bonding_curve_account(
             self.client,
-            Pubkey.from_string(mint) if isinstance(mint, str) else mint,
+            to_pubkey(mint),
             PUMP_FUN_PROGRAM,
         )
         if result is None:
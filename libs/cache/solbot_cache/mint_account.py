@@ -1,20 +1,23 @@
-from asyncio import Queue
+import asyncio
 
 from solbot_common.layouts.mint_account import MintAccount
 from solbot_common.log import logger
 from solbot_common.models import MintAccount as ModelMintAccount
 from solbot_common.utils import get_async_client
+from solbot_common.utils.pda import to_pubkey
 from solbot_db.session import NEW_ASYNC_SESSION, provide_session, start_async_session
 from solders.pubkey import Pubkey  # type: ignore
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 from typing_extensions import Self
 
+from solbot_cache.tiered import LoaderTier, TieredCache
+
 
 class MintAccountBackgoundWriter:
     def __init__(self):
         super().__init__()
-        self.queue = Queue()
+        self.queue = asyncio.Queue()
 
     async def submit(self, mint: Pubkey, bin_: bytes):
         await self.queue.put((mint, bin_))
@@ -41,6 +44,11 @@ class MintAccountBackgoundWriter:
 
 
 class MintAccountCache:
+    """Mint 账户缓存：内存 → 数据库 → RPC
+
+    mint 账户中的 supply 会变化，但下单只用到 decimals 等不变的字段，内存中保留较长时间。
+    """
+
     _instance = None
 
     def __new__(cls) -> Self:
@@ -49,37 +57,53 @@ class MintAccountCache:
         return cls._instance
 
     def __init__(self) -> None:
+        if hasattr(self, "_initialized"):
+            return
         self.client = get_async_client()
         self._writer = MintAccountBackgoundWriter()
+        self._writer_task: asyncio.Task | None = None
+        self.cache: TieredCache[Pubkey, MintAccount] = TieredCache(
+            "mint_account",
+            [
+                LoaderTier("db", self._load_from_db),
+                LoaderTier("rpc", self._load_from_rpc),
+            ],
+            maxsize=8192,
+            ttl=60 * 10,
+            stale_ttl=60 * 60,
+            negative_ttl=5,
+        )
+        self._initialized = True
 
     @provide_session
-    async def get_mint_account(
-        self, mint: Pubkey | str, *, session: AsyncSession = NEW_ASYNC_SESSION
+    async def _load_from_db(
+        self, mint: Pubkey, *, session: AsyncSession = NEW_ASYNC_SESSION
     ) -> MintAccount | None:
-        if isinstance(mint, str):
-            mint = Pubkey.from_string(mint)
-        if not isinstance(mint, Pubkey):
-            raise ValueError("Mint must be a string")
-
-        mint_account = None
         smtm = select(ModelMintAccount).where(ModelMintAccount.mint == mint.__str__())
         record = (await session.execute(statement=smtm)).scalar_one_or_none()
-        if record is not None:
-            mint_account = record.to_mint_account()
-
-        if mint_account is not None:
-            return mint_account
+        if record is None:
+            return None
+        return record.to_mint_account()
 
+    async def _load_from_rpc(self, mint: Pubkey) -> MintAccount | None:
         logger.warning(f"Did not find mint account in cache: {mint}, fetching...")
-
         response = await self.client.get_account_info(mint)
         account = response.value
         if account is None:
             return None
         mint_account = MintAccount.from_buffer(account.data)
 
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._writer.run())
         await self._writer.submit(mint, account.data)
         return mint_account
 
+    async def get_mint_account(self, mint: Pubkey | str) -> MintAccount | None:
+        if isinstance(mint, str):
+            mint = to_pubkey(mint)
+        if not isinstance(mint, Pubkey):
+            raise ValueError("Mint must be a string")
+        return await self.cache.get(mint)
+
     def __del__(self):
         self._writer.stop()
@@ -0,0 +1,485 @@
+"""多级缓存
+
+查询顺序：进程内 LRU（带 TTL）→ Redis → 数据库 → 源（RPC、第三方 API）。
+在某一层命中后回填它之上的缓存层，所有层都未命中时写入负缓存，避免不存在的 key 反复打到源。
+
+- single-flight：同一个 key 的并发未命中只发起一次查询，其余调用方等待同一个结果
+- stale-while-revalidate：内存中的条目过期后的 `stale_ttl` 秒内仍直接返回，同时在后台刷新
+- 每一层分别统计命中、未命中、错误次数和耗时
+- `get_many` 批量查询，各层一次查询所有未命中的 key（Redis `MGET`、数据库 `IN`、批量 RPC）
+
+缓存层和数据库层的异常只记录日志并跳过，源的异常抛给调用方，不写入负缓存。
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+import orjson as json
+from solbot_common.log import logger
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# 表示未命中，`None` 表示命中了负缓存
+MISSING: Any = object()
+
+NEGATIVE_MARKER = "__negative__"
+
+
+@dataclass
+class TierStats:
+    hits: int = 0
+    misses: int = 0
+    errors: int = 0
+    latency_ema: float | None = None
+
+    def record(self, hit: bool, elapsed: float) -> None:
+        self.record_batch(int(hit), int(not hit), elapsed)
+
+    def record_batch(self, hits: int, misses: int, elapsed: float, alpha: float = 0.2) -> None:
+        self.hits += hits
+        self.misses += misses
+        if self.latency_ema is None:
+            self.latency_ema = elapsed
+        else:
+            self.latency_ema = alpha * elapsed + (1 - alpha) * self.latency_ema
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> dict[str, int | float | None]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hit_rate,
+            "latency_ema": self.latency_ema,
+        }
+
+
+class CacheTier(Generic[K, V]):
+    """缓存层
+
+    `get` 返回 `MISSING` 表示未命中，返回 `None` 表示命中负缓存。
+    `is_cache` 为 False 的层（数据库、源）只读，不参与回填和 `get_cached`。
+    """
+
+    name: str = "tier"
+    is_cache: bool = True
+
+    async def get(self, key: K) -> V | None:
+        raise NotImplementedError
+
+    async def get_many(self, keys: list[K]) -> list[V | None]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: K, value: V | None, ttl: float | None = None) -> None:
+        pass
+
+    async def set_many(self, values: dict[K, V | None], ttl: float | None = None) -> None:
+        for key, value in values.items():
+            await self.set(key, value, ttl)
+
+    async def delete(self, key: K) -> None:
+        pass
+
+
+class RedisTier(CacheTier[K, V]):
+    """Redis 缓存层，值以 JSON 字符串保存
+
+    Args:
+        redis: `RedisClient.get_instance()`，需要 `decode_responses=True`
+        prefix (str): key 前缀，key 为 `{prefix}:{key}`
+        encode (Callable[[V], Any]): 值转换为可 JSON 序列化的对象
+        decode (Callable[[Any], V]): `encode` 的逆操作
+        ttl (int | None, optional): 过期时间（秒），None 表示不过期
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        redis,
+        prefix: str,
+        encode: Callable[[V], Any],
+        decode: Callable[[Any], V],
+        ttl: int | None = None,
+    ) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.encode = encode
+        self.decode = decode
+        self.ttl = ttl
+
+    def _key(self, key: K) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _loads(self, raw: str | None) -> V | None:
+        if raw is None:
+            return MISSING
+        if raw == NEGATIVE_MARKER:
+            return None
+        return self.decode(json.loads(raw))
+
+    def _dumps(self, value: V | None) -> str:
+        return NEGATIVE_MARKER if value is None else json.dumps(self.encode(value)).decode()
+
+    async def get(self, key: K) -> V | None:
+        return self._loads(await self.redis.get(self._key(key)))
+
+    async def get_many(self, keys: list[K]) -> list[V | None]:
+        raws = await self.redis.mget([self._key(key) for key in keys])
+        return [self._loads(raw) for raw in raws]
+
+    async def set(self, key: K, value: V | None, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        await self.redis.set(self._key(key), self._dumps(value), ex=int(ttl) if ttl else None)
+
+    async def set_many(self, values: dict[K, V | None], ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(self._key(key), self._dumps(value), ex=int(ttl) if ttl else None)
+            await pipe.execute()
+
+    async def delete(self, key: K) -> None:
+        await self.redis.delete(self._key(key))
+
+
+class LoaderTier(CacheTier[K, V]):
+    """数据库或源，`load` 返回 None 表示没有数据
+
+    `load_many` 批量查询，返回查到的部分；未提供时逐个调用 `load`。
+    """
+
+    is_cache = False
+
+    def __init__(
+        self,
+        name: str,
+        load: Callable[[K], Awaitable[V | None]],
+        load_many: Callable[[list[K]], Awaitable[dict[K, V]]] | None = None,
+    ) -> None:
+        self.name = name
+        self.load = load
+        self.load_many = load_many
+
+    async def get(self, key: K) -> V | None:
+        value = await self.load(key)
+        return MISSING if value is None else value
+
+    async def get_many(self, keys: list[K]) -> list[V | None]:
+        if self.load_many is None:
+            return await super().get_many(keys)
+        values = await self.load_many(keys)
+        return [MISSING if values.get(key) is None else values[key] for key in keys]
+
+
+@dataclass(slots=True)
+class _Entry(Generic[V]):
+    value: V | None
+    fresh_until: float
+    stale_until: float
+
+
+class MemoryTier(Generic[K, V]):
+    """进程内 LRU，只在事件循环所在线程中使用"""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float = 0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data: OrderedDict[K, _Entry[V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K, now: float) -> _Entry[V] | None:
+        """返回未完全过期（新鲜或在 stale 窗口内）的条目"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if now >= entry.stale_until:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: K, value: V | None, now: float, ttl: float | None = None) -> None:
+        fresh_until = now + (self.ttl if ttl is None else ttl)
+        # 负缓存没有 stale 窗口，过期后立即重新查询
+        stale_until = fresh_until + (self.stale_ttl if value is not None else 0)
+        self._data[key] = _Entry(value, fresh_until, stale_until)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: K) -> bool:
+        return self._data.pop(key, None) is not None
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class TieredCache(Generic[K, V]):
+    def __init__(
+        self,
+        name: str,
+        tiers: list[CacheTier[K, V]],
+        maxsize: int = 4096,
+        ttl: float = 60,
+        stale_ttl: float = 0,
+        negative_ttl: float = 10,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            name (str): 缓存名称，用于日志和指标
+            tiers (list[CacheTier]): 内存之下的各层，按查询顺序排列
+            maxsize (int, optional): 内存层最多保存的条目数. Defaults to 4096.
+            ttl (float, optional): 内存层的新鲜时间（秒）. Defaults to 60.
+            stale_ttl (float, optional): 过期后仍可返回旧值并后台刷新的时间（秒）. Defaults to 0.
+            negative_ttl (float, optional): 负缓存的过期时间（秒），0 表示不缓存. Defaults to 10.
+        """
+        self.name = name
+        self.tiers = tiers
+        self.memory: MemoryTier[K, V] = MemoryTier(maxsize, ttl, stale_ttl)
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.stats: dict[str, TierStats] = {
+            tier.name: TierStats() for tier in [self.memory, *tiers]
+        }
+        self.coalesced = 0
+        self.stale_served = 0
+        self._inflight: dict[K, asyncio.Future] = {}
+        self._background_tasks: set[asyncio.Task] = set()
+
+    async def get(self, key: K) -> V | None:
+        """依次查询各层，都未命中时返回 None"""
+        started = time.perf_counter()
+        entry = self.memory.get(key, self.clock())
+        if entry is not None:
+            self.stats[self.memory.name].record(True, time.perf_counter() - started)
+            if self.clock() >= entry.fresh_until:
+                self.stale_served += 1
+                self._refresh(key)
+            return entry.value
+        self.stats[self.memory.name].record(False, time.perf_counter() - started)
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._load_once(key)
+        else:
+            self.coalesced += 1
+        # 单个调用方被取消时不影响其他等待同一个结果的调用方
+        return await asyncio.shield(task)
+
+    async def get_many(self, keys: list[K]) -> dict[K, V | None]:
+        """批量查询，与 `get` 共享 single-flight
+
+        Returns:
+            dict: key 到值的映射，都未命中的 key 对应 None
+        """
+        results: dict[K, V | None] = {}
+        waiting: dict[K, asyncio.Future] = {}
+        pending: list[K] = []
+        started = time.perf_counter()
+        hits = 0
+        for key in dict.fromkeys(keys):
+            entry = self.memory.get(key, self.clock())
+            if entry is not None:
+                hits += 1
+                if self.clock() >= entry.fresh_until:
+                    self.stale_served += 1
+                    self._refresh(key)
+                results[key] = entry.value
+            elif key in self._inflight:
+                self.coalesced += 1
+                waiting[key] = self._inflight[key]
+            else:
+                pending.append(key)
+        self.stats[self.memory.name].record_batch(
+            hits, len(waiting) + len(pending), time.perf_counter() - started
+        )
+
+        if pending:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in pending}
+            for key, future in futures.items():
+                self._inflight[key] = future
+                future.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+            task = asyncio.create_task(self._load_many(futures))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+            waiting.update(futures)
+
+        values = await asyncio.gather(
+            *(asyncio.shield(future) for future in waiting.values()), return_exceptions=True
+        )
+        for key, value in zip(waiting, values, strict=True):
+            if isinstance(value, BaseException):
+                raise value
+            results[key] = value
+        return results
+
+    async def get_cached(self, key: K) -> V | None:
+        """只查询内存和缓存层，不访问数据库和源"""
+        entry = self.memory.get(key, self.clock())
+        if entry is not None:
+            return entry.value
+        for tier in self.tiers:
+            if not tier.is_cache:
+                continue
+            value = await self._get_from(tier, key)
+            if value is not MISSING and value is not None:
+                self.memory.set(key, value, self.clock())
+                return value
+        return None
+
+    async def set(self, key: K, value: V) -> None:
+        """写入内存和所有缓存层"""
+        self.memory.set(key, value, self.clock())
+        for tier in self.tiers:
+            if tier.is_cache:
+                await tier.set(key, value)
+
+    async def invalidate(self, key: K) -> None:
+        self.memory.delete(key)
+        for tier in self.tiers:
+            if tier.is_cache:
+                await tier.delete(key)
+
+    def _load_once(self, key: K) -> asyncio.Task:
+        task = asyncio.create_task(self._load(key))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    def _refresh(self, key: K) -> None:
+        if key in self._inflight:
+            return
+
+        def _done(task: asyncio.Task) -> None:
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(f"[{self.name}] Failed to refresh {key}: {task.exception()}")
+
+        self._load_once(key).add_done_callback(_done)
+
+    async def _get_from(self, tier: CacheTier[K, V], key: K) -> V | None:
+        started = time.perf_counter()
+        try:
+            value = await tier.get(key)
+        except Exception:
+            self.stats[tier.name].errors += 1
+            raise
+        self.stats[tier.name].record(value is not MISSING, time.perf_counter() - started)
+        return value
+
+    async def _get_many_from(self, tier: CacheTier[K, V], keys: list[K]) -> list[V | None]:
+        started = time.perf_counter()
+        try:
+            values = await tier.get_many(keys)
+        except Exception:
+            self.stats[tier.name].errors += 1
+            raise
+        hits = sum(value is not MISSING for value in values)
+        self.stats[tier.name].record_batch(hits, len(keys) - hits, time.perf_counter() - started)
+        return values
+
+    async def _load_many(self, futures: dict[K, asyncio.Future]) -> None:
+        pending = list(futures)
+        last = len(self.tiers) - 1
+        try:
+            for i, tier in enumerate(self.tiers):
+                if not pending:
+                    return
+                try:
+                    values = await self._get_many_from(tier, pending)
+                except Exception as e:
+                    if i == last:
+                        raise
+                    logger.warning(f"[{self.name}] {tier.name} batch lookup failed: {e}")
+                    continue
+                found = {k: v for k, v in zip(pending, values, strict=True) if v is not MISSING}
+                await self._backfill_many(found, self.tiers[:i])
+                for key, value in found.items():
+                    futures[key].set_result(value)
+                pending = [key for key in pending if key not in found]
+
+            if self.negative_ttl > 0:
+                await self._backfill_many(dict.fromkeys(pending), self.tiers)
+            for key in pending:
+                futures[key].set_result(None)
+        except BaseException as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+
+    async def _load(self, key: K) -> V | None:
+        last = len(self.tiers) - 1
+        for i, tier in enumerate(self.tiers):
+            try:
+                value = await self._get_from(tier, key)
+            except Exception as e:
+                if i == last:
+                    raise
+                logger.warning(f"[{self.name}] {tier.name} lookup failed for {key}: {e}")
+                continue
+            if value is MISSING:
+                continue
+            ttl = self.negative_ttl if value is None else None
+            await self._backfill(key, value, self.tiers[:i], ttl)
+            return value
+
+        if self.negative_ttl > 0:
+            await self._backfill(key, None, self.tiers, ttl=self.negative_ttl)
+        return None
+
+    async def _backfill(
+        self, key: K, value: V | None, tiers: list[CacheTier[K, V]], ttl: float | None = None
+    ) -> None:
+        self.memory.set(key, value, self.clock(), ttl)
+        for tier in tiers:
+            if not tier.is_cache:
+                continue
+            try:
+                await tier.set(key, value, ttl)
+            except Exception as e:
+                self.stats[tier.name].errors += 1
+                logger.warning(f"[{self.name}] Failed to write {key} to {tier.name}: {e}")
+
+    async def _backfill_many(self, values: dict[K, V | None], tiers: list[CacheTier[K, V]]) -> None:
+        positive = {k: v for k, v in values.items() if v is not None}
+        negative = {k: v for k, v in values.items() if v is None}
+        for group, ttl in ((positive, None), (negative, self.negative_ttl)):
+            if not group:
+                continue
+            for key, value in group.items():
+                self.memory.set(key, value, self.clock(), ttl)
+            for tier in tiers:
+                if not tier.is_cache:
+                    continue
+                try:
+                    await tier.set_many(group, ttl)
+                except Exception as e:
+                    self.stats[tier.name].errors += 1
+                    logger.warning(f"[{self.name}] Failed to write batch to {tier.name}: {e}")
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "size": len(self.memory),
+            "inflight": len(self._inflight),
+            "coalesced": self.coalesced,
+            "stale_served": self.stale_served,
+            "tiers": {name: stats.to_dict() for name, stats in self.stats.items()},
+        }
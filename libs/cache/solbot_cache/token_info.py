@@ -1,18 +1,20 @@
-import asyncio
 from typing import TypedDict
 
 from solbot_common.config import settings
 from solbot_common.log import logger
 from solbot_common.models import TokenInfo
 from solbot_common.utils import get_async_client
+from solbot_common.utils.pda import to_pubkey
 from solbot_common.utils.shyft import ShyftAPI
-from solbot_db.session import NEW_ASYNC_SESSION, provide_session, start_async_session
+from solbot_db.redis import RedisClient
+from solbot_db.session import NEW_ASYNC_SESSION, provide_session
 from solders.pubkey import Pubkey  # type: ignore
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlmodel import col, select
 from typing_extensions import Self
 
-from solbot_cache.cached import cached
+from solbot_cache.tiered import LoaderTier, RedisTier, TieredCache
+from solbot_cache.token_metadata import TokenMetadataResolver
 
 
 # {
@@ -52,7 +54,22 @@ class TokenInfoDict(TypedDict):
     metadataToken: str
 
 
+def _encode_token_info(token_info: TokenInfo) -> dict:
+    return {
+        "mint": token_info.mint,
+        "token_name": token_info.token_name,
+        "symbol": token_info.symbol,
+        "decimals": token_info.decimals,
+    }
+
+
+def _decode_token_info(data: dict) -> TokenInfo:
+    return TokenInfo(**data)
+
+
 class TokenInfoCache:
+    """代币信息缓存：内存 → Redis → 数据库 → 链上元数据（Shyft 兜底）"""
+
     _instance = None
 
     def __new__(cls) -> Self:
@@ -61,74 +78,89 @@ class TokenInfoCache:
         return cls._instance
 
     def __init__(self) -> None:
+        if hasattr(self, "_initialized"):
+            return
         self.rpc_client = get_async_client()
         self.shyft_api = ShyftAPI(settings.api.shyft_api_key)
+        self.resolver = TokenMetadataResolver(self.rpc_client, self.shyft_api)
+        self.cache: TieredCache[Pubkey, TokenInfo] = TieredCache(
+            "token_info",
+            [
+                RedisTier(
+                    RedisClient.get_instance(),
+                    "token_info",
+                    _encode_token_info,
+                    _decode_token_info,
+                    ttl=60 * 60 * 24,
+                ),
+                LoaderTier("db", self._load_from_db, self._load_many_from_db),
+                LoaderTier("rpc", self.resolver.resolve_one, self.resolver.resolve),
+            ],
+            maxsize=8192,
+            ttl=60 * 10,
+            stale_ttl=60 * 60,
+            negative_ttl=60,
+        )
+        self._initialized = True
 
     def __repr__(self) -> str:
         return "TokenInfoCache()"
 
-    @cached(ttl=60 * 60 * 24)
     @provide_session
-    async def get(
-        self, mint: Pubkey | str, *, session: AsyncSession = NEW_ASYNC_SESSION
+    async def _load_from_db(
+        self, mint: Pubkey, *, session: AsyncSession = NEW_ASYNC_SESSION
     ) -> TokenInfo | None:
+        smtm = select(TokenInfo).where(TokenInfo.mint == mint.__str__())
+        token_info = (await session.execute(statement=smtm)).scalar_one_or_none()
+        if token_info is None:
+            return None
+        # 返回一个副本以避免 session 相关的问题
+        return token_info.model_copy()
+
+    @provide_session
+    async def _load_many_from_db(
+        self, mints: list[Pubkey], *, session: AsyncSession = NEW_ASYNC_SESSION
+    ) -> dict[Pubkey, TokenInfo]:
+        by_mint = {mint.__str__(): mint for mint in mints}
+        smtm = select(TokenInfo).where(col(TokenInfo.mint).in_(list(by_mint)))
+        records = (await session.execute(statement=smtm)).scalars().all()
+        return {by_mint[record.mint]: record.model_copy() for record in records}
+
+    @staticmethod
+    def _to_mint(mint: Pubkey | str) -> Pubkey:
         if isinstance(mint, str):
             try:
-                mint = Pubkey.from_string(mint)
+                mint = to_pubkey(mint)
             except ValueError:
                 raise ValueError(f"Invalid Base58 string: {mint}")
 
         if not isinstance(mint, Pubkey):
             raise ValueError("Mint must be a string")
+        return mint
 
-        smtm = select(TokenInfo).where(TokenInfo.mint == mint.__str__())
-        token_info = (await session.execute(statement=smtm)).scalar_one_or_none()
-        if token_info is not None:
-            # 返回一个副本以避免 session 相关的问题
-            return token_info.model_copy()
-
-        logger.info(f"Did not find token info in cache: {mint}, fetching...")
-
+    async def get(self, mint: Pubkey | str) -> TokenInfo | None:
+        mint = self._to_mint(mint)
         try:
-            data = await self.shyft_api.get_token_info(mint.__str__())
-            token_info = TokenInfo(
-                mint=data["address"],
-                token_name=data["name"],
-                symbol=data["symbol"],
-                decimals=data["decimals"],
-            )
-
-            async def _write_to_db():
-                _token_info = token_info.model_copy()
-                async with start_async_session() as session:
-                    existing = await session.execute(
-                        select(TokenInfo).where(TokenInfo.mint == _token_info.mint)
-                    )
-                    existing_token = existing.scalar_one_or_none()
-
-                    if existing_token:
-                        existing_token.token_name = _token_info.token_name
-                        existing_token.symbol = _token_info.symbol
-                        existing_token.decimals = _token_info.decimals
-                    else:
-                        session.add(_token_info)
-
-                    try:
-                        await session.commit()
-                        logger.info(
-                            f"{'Updated' if existing_token else 'Stored'} token info: {mint}"
-                        )
-                    except Exception as e:
-                        logger.error(
-                            f"Failed to {'update' if existing_token else 'store'} token info: {mint}, cause: {e}"
-                        )
-                        await session.rollback()
-
-            db_task = asyncio.create_task(_write_to_db())
-            # 添加任务完成回调以处理可能的异常
-            db_task.add_done_callback(lambda t: t.exception() if t.exception() else None)
+            token_info = await self.cache.get(mint)
         except Exception as e:
             logger.warning(f"Failed to fetch token info: {mint}, cause: {e}")
             return None
+        # 内存层中的对象被多个调用方共享，返回副本
+        return token_info.model_copy() if token_info is not None else None
 
-        return token_info.model_copy()
+    async def get_many(self, mints: list[Pubkey | str]) -> dict[str, TokenInfo | None]:
+        """批量查询代币信息，各层一次查询所有未命中的 mint
+
+        Returns:
+            dict[str, TokenInfo | None]: mint 地址到代币信息的映射，查询失败时为 None
+        """
+        keys = [self._to_mint(mint) for mint in mints]
+        try:
+            token_infos = await self.cache.get_many(keys)
+        except Exception as e:
+            logger.warning(f"Failed to fetch token info: {len(keys)} mints, cause: {e}")
+            return {mint.__str__(): None for mint in keys}
+        return {
+            mint.__str__(): token_info.model_copy() if token_info is not None else None
+            for mint, token_info in token_infos.items()
+        }
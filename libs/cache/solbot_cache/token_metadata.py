@@ -0,0 +1,141 @@
+"""批量解析代币信息
+
+一次 `getMultipleAccounts` 读取一批 mint 账户及其 Metaplex 元数据账户，在本地解码 name、symbol
+和 decimals。没有 Metaplex 元数据的代币（如使用 Token-2022 元数据扩展的代币）再通过 Shyft 查询。
+
+解析结果批量 upsert 到 `token_info` 表，写入在后台进行。
+RPC 或 Shyft 请求失败时抛出异常而不是当作 mint 不存在，避免缓存层为其写入负缓存。
+"""
+
+import asyncio
+import json
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Confirmed
+from solbot_common.layouts.mint_account import MintAccount
+from solbot_common.layouts.token_metadata import TokenMetadata
+from solbot_common.log import logger
+from solbot_common.models import TokenInfo
+from solbot_common.utils.pda import get_metadata_pda
+from solbot_common.utils.shyft import ShyftAPI
+from solbot_db.session import start_async_session
+from solders.pubkey import Pubkey  # type: ignore
+from sqlalchemy.dialects.mysql import insert
+
+# getMultipleAccounts 单次最多 100 个账户，每个 mint 占两个
+MAX_ACCOUNTS_PER_REQUEST = 100
+
+
+class TokenMetadataResolver:
+    def __init__(self, client: AsyncClient, shyft_api: ShyftAPI) -> None:
+        self.client = client
+        self.shyft_api = shyft_api
+        self._background_tasks: set[asyncio.Task] = set()
+
+    async def resolve_one(self, mint: Pubkey) -> TokenInfo | None:
+        return (await self.resolve([mint])).get(mint)
+
+    async def resolve(self, mints: list[Pubkey]) -> dict[Pubkey, TokenInfo]:
+        """批量解析代币信息
+
+        Args:
+            mints (list[Pubkey]): mint 地址
+
+        Returns:
+            dict[Pubkey, TokenInfo]: 查到的代币信息，不存在的 mint 不在结果中
+
+        Raises:
+            Exception: RPC 或 Shyft 请求失败
+        """
+        mints = list(dict.fromkeys(mints))
+        size = MAX_ACCOUNTS_PER_REQUEST // 2
+        batches = [mints[i : i + size] for i in range(0, len(mints), size)]
+
+        results: dict[Pubkey, TokenInfo] = {}
+        fallback: list[Pubkey] = []
+        for decoded, missing in await asyncio.gather(*(self._fetch(batch) for batch in batches)):
+            results.update(decoded)
+            fallback.extend(missing)
+
+        if fallback:
+            logger.info(f"Resolving {len(fallback)} token info from shyft")
+            token_infos = await asyncio.gather(*(self._fetch_from_shyft(mint) for mint in fallback))
+            for mint, token_info in zip(fallback, token_infos, strict=True):
+                if token_info is not None:
+                    results[mint] = token_info
+
+        if results:
+            self._store(list(results.values()))
+        return results
+
+    async def _fetch(self, mints: list[Pubkey]) -> tuple[dict[Pubkey, TokenInfo], list[Pubkey]]:
+        """Returns: (解码成功的代币信息, 需要通过 Shyft 查询的 mint)"""
+        pubkeys = [*mints, *(get_metadata_pda(mint) for mint in mints)]
+        resp = await self.client.get_multiple_accounts(pubkeys, commitment=Confirmed)
+
+        mint_infos, metadata_infos = resp.value[: len(mints)], resp.value[len(mints) :]
+        decoded: dict[Pubkey, TokenInfo] = {}
+        missing: list[Pubkey] = []
+        for mint, mint_info, metadata_info in zip(mints, mint_infos, metadata_infos, strict=True):
+            if mint_info is None:
+                # mint 不存在
+                continue
+            if metadata_info is None:
+                missing.append(mint)
+                continue
+            try:
+                decimals = MintAccount.from_buffer(bytes(mint_info.data)).decimals
+                metadata = TokenMetadata.from_buffer(bytes(metadata_info.data))
+            except Exception as e:
+                logger.warning(f"Failed to decode token metadata: {mint}, cause: {e}")
+                missing.append(mint)
+                continue
+            decoded[mint] = TokenInfo(
+                mint=mint.__str__(),
+                token_name=metadata.name,
+                symbol=metadata.symbol,
+                decimals=decimals,
+            )
+        return decoded, missing
+
+    async def _fetch_from_shyft(self, mint: Pubkey) -> TokenInfo | None:
+        """Shyft 返回查询失败（`success` 为 false）时视为没有代币信息，HTTP 和网络错误直接抛出"""
+        try:
+            data = await self.shyft_api.get_token_info(mint.__str__())
+        except json.JSONDecodeError:
+            # 响应无法解析，不能确定代币不存在
+            raise
+        except ValueError as e:
+            logger.warning(f"Token info not found: {mint}, cause: {e}")
+            return None
+        return TokenInfo(
+            mint=data["address"],
+            token_name=data["name"],
+            symbol=data["symbol"],
+            decimals=data["decimals"],
+        )
+
+    def _store(self, token_infos: list[TokenInfo]) -> None:
+        task = asyncio.create_task(upsert_token_infos(token_infos))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+
+async def upsert_token_infos(token_infos: list[TokenInfo]) -> None:
+    """批量写入代币信息，mint 已存在时更新"""
+    rows = [token_info.model_dump(exclude={"id"}) for token_info in token_infos]
+    stmt = insert(TokenInfo).values(rows)
+    stmt = stmt.on_duplicate_key_update(
+        token_name=stmt.inserted.token_name,
+        symbol=stmt.inserted.symbol,
+        decimals=stmt.inserted.decimals,
+        updated_at=stmt.inserted.updated_at,
+    )
+    async with start_async_session() as session:
+        try:
+            await session.execute(stmt)
+            await session.commit()
+            logger.info(f"Stored {len(rows)} token info")
+        except Exception as e:
+            logger.error(f"Failed to store token info, cause: {e}")
+            await session.rollback()
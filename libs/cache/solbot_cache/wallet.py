@@ -19,6 +19,6 @@ class WalletCache:
     def __repr__(self) -> str:
         return "WalletCache()"
 
-    @cached(ttl=60)  # 1 min
+    @cached(ttl=60, near_ttl=5)  # 1 min
     async def get_sol_balance(self, wallet: str | Pubkey) -> float:
         return await self.shyft_api.get_balance(str(wallet))
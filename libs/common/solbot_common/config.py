@@ -124,6 +124,8 @@ class GeyserConfig(BaseModel):
     enable: bool = False
     endpoint: str = ""
     api_key: str = ""
+    # 不使用 TLS 连接，用于本地替身（yellowstone_grpc.localnet）
+    insecure: bool = False
 
 
 class RPCConfig(BaseModel):
@@ -151,6 +153,27 @@ class TradingConfig(BaseModel):
     preflight_check: bool = False
     use_jito: bool = True
     jito_api: str = "https://mainnet.block-engine.jito.wtf"
+    # 使用 Jito 时通过 sendBundle 提交
+    jito_bundle: bool = False
+    # 未指定优先费用时，按最近费用市场的分位数（50 / 75 / 90）出价，为空则使用 unit_price
+    priority_fee_percentile: int | None = None
+    # 同时向所有 RPC 节点、Jito、GMGN 广播交易
+    broadcast: bool = False
+    # 广播模式下的重发间隔（秒）
+    broadcast_resend_interval: float = 2
+    # 使用交易钱包创建并维护地址查找表，压缩交易体积（需支付查找表租金）
+    lookup_table: bool = False
+    # 买入后为持仓预签名卖出交易（durable nonce），止盈止损触发时直接发送
+    exit_orders: bool = False
+    # 加密退出订单的 Fernet 密钥，启用 exit_orders 时必填
+    exit_order_key: str | None = None
+    # 退出订单的滑点，需覆盖止损时的价格回撤
+    exit_order_slippage_bps: int = 5000
+    # 交易事件的分区数，按用户钱包哈希分区，每个分区同一时刻只由一个 trading 节点消费
+    # 所有服务必须使用相同的值，修改后需要等旧分区中的消息处理完
+    partitions: int = 1
+    # 分区租约有效期（秒），trading 节点失联超过该时间后其分区由其他节点接管
+    partition_lease_ttl: float = 10
 
     @field_validator("jito_api", mode="before")
     def validate_jito_api(cls, value: str) -> str:
@@ -160,6 +183,18 @@ class TradingConfig(BaseModel):
             raise ValueError(f"Invalid Jito API URL: {value}")
         return value
 
+    @field_validator("partitions")
+    def validate_partitions(cls, value: int) -> int:
+        if value < 1:
+            raise ValueError(f"Invalid partitions: {value}")
+        return value
+
+    @field_validator("priority_fee_percentile")
+    def validate_priority_fee_percentile(cls, value: int | None) -> int | None:
+        if value is not None and value not in (50, 75, 90):
+            raise ValueError(f"Invalid priority fee percentile: {value}")
+        return value
+
 
 class APIConfig(BaseModel):
     helius_api_base_url: str
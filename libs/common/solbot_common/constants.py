@@ -19,6 +19,7 @@ SOL = "So11111111111111111111111111111111111111111"
 SOL_DECIMAL = 10**9
 
 ASSOCIATED_TOKEN_PROGRAM = Pubkey.from_string("ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL")
+TOKEN_METADATA_PROGRAM = Pubkey.from_string("metaqbxxUerdq28cj1RbAWkYQm3ybzjb6a8bt518x1s")
 
 PUMP_FUN_PROGRAM_ID="6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
 PUMP_FUN_PROGRAM = Pubkey.from_string(PUMP_FUN_PROGRAM_ID)
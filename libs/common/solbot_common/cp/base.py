@@ -1,6 +1,18 @@
+"""通用的 stream producer/consumer
+
+每种事件只写入一条 stream，不同的下游（交易、通知、统计等）各自使用独立的消费组读取，
+同一条消息在每个消费组中都会被投递一次。因此消费者不会从 stream 中删除消息，
+stream 的长度由写入时的 `maxlen` 控制。
+
+实现了 `to_bytes`/`from_bytes` 的事件以二进制编码（`solbot_common.cp.codec`）写入 `bin` 字段，
+Redis 客户端开启了 `decode_responses`，因此二进制内容以 base64 保存；
+其他事件以 JSON 写入 `data` 字段。消费者两种格式都能读取。
+"""
+
 import asyncio
+import base64
 import time
-from collections.abc import Callable, Coroutine
+from collections.abc import Callable, Coroutine, Sequence
 from typing import Any, Generic, Protocol, TypeVar
 
 import aioredis
@@ -17,27 +29,133 @@ class DataProtocol(Protocol):
 
 T = TypeVar("T", bound=DataProtocol)
 MAX_PROCESS_TIME = 15
+MAX_STREAM_LENGTH = 10000
+CLAIM_IDLE_MS = 30_000
+CLAIM_INTERVAL = 5
+RETRY_INTERVAL = 1
+
+
+def to_fields(data: DataProtocol) -> dict:
+    fields: dict = {"timestamp": int(time.time())}
+    to_bytes = getattr(data, "to_bytes", None)
+    if to_bytes is not None:
+        try:
+            fields["bin"] = base64.b64encode(to_bytes()).decode("ascii")
+            return fields
+        except ValueError as e:
+            # 二进制布局无法表示的值（例如超出范围的整数）退回 JSON
+            logger.warning(f"Failed to encode {type(data).__name__} as binary: {e}")
+    fields["data"] = data.to_json()
+    return fields
+
+
+def from_fields(data_class: type[T], fields: dict) -> T:
+    """从 stream 消息中解码事件，兼容二进制和 JSON 两种格式"""
+    if "bin" in fields:
+        return data_class.from_bytes(base64.b64decode(fields["bin"]))  # type: ignore[attr-defined]
+    return data_class.from_json(fields["data"])
+
+
+def parse_autoclaim(resp: list) -> tuple[str, list[tuple[str, dict | None]]]:
+    """解析 XAUTOCLAIM 的原始回复
+
+    回复格式为 `[next_id, [[id, [k1, v1, ...]], ...], [deleted_id, ...]]`，第三项仅 Redis 7.0 及以上返回。
+    Redis 6.2 中已被裁剪出 stream 的消息以 nil 出现在列表中；Redis 7.0 会将其从 pending
+    列表中移除，不需要再确认。
+
+    Returns:
+        tuple[str, list[tuple[str, dict | None]]]: (下一轮的游标, 接管的消息)，字段为 None
+            表示消息已不在 stream 中
+    """
+    next_id, entries = resp[0], resp[1]
+    messages: list[tuple[str, dict | None]] = []
+    for entry in entries:
+        if entry is None:
+            continue
+        message_id, values = entry[0], entry[1]
+        if values is None:
+            messages.append((message_id, None))
+            continue
+        messages.append((message_id, dict(zip(values[::2], values[1::2], strict=True))))
+    return next_id, messages
+
+
+async def produce_to_channels(
+    redis_client: aioredis.Redis,
+    data: DataProtocol,
+    channels: Sequence[str],
+    maxlen: int = MAX_STREAM_LENGTH,
+) -> None:
+    """将同一个事件写入多条 stream，只序列化一次，所有 XADD 在一次往返中完成
+
+    Args:
+        redis_client: Redis client instance
+        data: Event data
+        channels: Stream names
+        maxlen: Maximum length of each stream
+    """
+    fields = to_fields(data)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for channel in channels:
+            pipe.xadd(name=channel, fields=fields, maxlen=maxlen)
+        await pipe.execute()
 
 
 class Producer(Generic[T]):
-    def __init__(self, redis_client: aioredis.Redis, channel: str) -> None:
+    def __init__(
+        self, redis_client: aioredis.Redis, channel: str, maxlen: int = MAX_STREAM_LENGTH
+    ) -> None:
         self.redis = redis_client
         self.channel = channel
+        self.maxlen = maxlen
 
     async def produce(self, data: T) -> None:
-        """Produces a swap event to Redis Stream.
+        """Produces an event to Redis Stream.
 
         Args:
-            swap_event: Swap event data as string
+            data: Event data
         """
         await self.redis.xadd(
             name=self.channel,
-            fields={"data": data.to_json(), "timestamp": int(time.time())},
-            maxlen=10000,  # Keep last 10k events
+            fields=to_fields(data),
+            maxlen=self.maxlen,
         )
 
+    async def produce_many(self, items: Sequence[T]) -> None:
+        """Produces several events in one round trip.
+
+        Args:
+            items: Event data
+        """
+        if not items:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for data in items:
+                pipe.xadd(name=self.channel, fields=to_fields(data), maxlen=self.maxlen)
+            await pipe.execute()
+
 
 class Consumer(Generic[T]):
+    """Redis Stream 消费者
+
+    - 并发处理消息，同时处理的消息数不超过 `max_concurrency`，达到上限时暂停读取
+    - 指定 `ordering_key` 时，key 相同的消息按读取顺序依次处理，不同 key 之间并发；
+      处理失败的消息在该 key 的队列中原地重试，后续消息等它确认或进入死信队列后再处理
+    - 处理成功的消息批量确认，多个 XACK 通过 pipeline 一次发送
+    - `metrics` 返回消费组的积压（lag）、处理中的消息数等指标
+
+    崩溃恢复：
+
+    - 消费组已存在时从上次投递的位置（last-delivered-id）继续，重启时不会重读历史消息
+    - 启动时先处理本消费者名下未确认的消息
+    - 后台定期用 XAUTOCLAIM 接管空闲超过 `claim_idle_ms` 的未确认消息，
+      包括已退出的消费者遗留的消息和本消费者处理失败的消息
+    - 处理中的消息每隔 `claim_idle_ms` 的三分之一用 XCLAIM JUSTID 续期，重置空闲时间且不增加
+      投递次数，处理时间超过 `claim_idle_ms` 的消息不会被其他消费者接管后重复执行
+    - 重试次数取自 pending 列表中的投递次数，不会复制消息；
+      投递次数超过 `max_retries + 1` 的消息进入死信队列
+    """
+
     def __init__(
         self,
         channel: str,
@@ -49,17 +167,40 @@ class Consumer(Generic[T]):
         poll_timeout_ms: int = 5000,
         max_retries: int = 3,
         dead_letter_channel: str | None = None,
+        max_concurrency: int = 10,
+        ordering_key: Callable[[T], str | None] | None = None,
+        ack_batch_size: int = 50,
+        ack_interval: float = 0.05,
+        max_process_time: float | None = MAX_PROCESS_TIME,
+        claim_idle_ms: int | None = None,
+        claim_interval: float | None = None,
+        claim_on_start: bool = False,
+        retry_interval: float = RETRY_INTERVAL,
     ) -> None:
-        """Initialize the transaction event consumer.
+        """Initialize the stream consumer.
 
         Args:
+            channel: Stream name
+            data_class: Event data class
             redis_client: Redis client instance
             consumer_group: Name of the consumer group
             consumer_name: Unique name for this consumer instance
-            batch_size: Number of events to process in one batch
+            batch_size: Maximum number of events read in one batch
             poll_timeout_ms: Timeout in milliseconds for blocking read
             max_retries: Maximum number of retries for failed messages
             dead_letter_channel: Channel name for dead letter queue
+            max_concurrency: Maximum number of events processed at the same time
+            ordering_key: Events with the same key are processed in order
+            ack_batch_size: Flush acknowledgements once this many are buffered
+            ack_interval: Maximum seconds an acknowledgement stays buffered
+            max_process_time: Events older than this (seconds) are dead-lettered,
+                None disables the check
+            claim_idle_ms: Unacknowledged messages idle longer than this are claimed,
+                defaults to a value leaving room for all retries within `max_process_time`
+            claim_interval: Seconds between two claim rounds, defaults to half of `claim_idle_ms`
+            claim_on_start: Claim all pending messages of the group on start regardless of
+                idle time, used when taking over a stream whose previous owner is gone
+            retry_interval: Seconds between two attempts of a failed message with an ordering key
         """
         self.channel = channel
         self.data_class = data_class
@@ -70,9 +211,50 @@ class Consumer(Generic[T]):
         self.poll_timeout_ms = poll_timeout_ms
         self.max_retries = max_retries
         self.dead_letter_channel = dead_letter_channel or f"{channel}:dead"
+        self.max_concurrency = max_concurrency
+        self.ordering_key = ordering_key
+        self.ack_batch_size = ack_batch_size
+        self.ack_interval = ack_interval
+        self.max_process_time = max_process_time
+        if claim_idle_ms is None:
+            claim_idle_ms = CLAIM_IDLE_MS
+            if max_process_time is not None:
+                # 超时从写入时间算起，重试必须在 max_process_time 内完成，
+                # 否则接管回来的消息都会因超时进入死信队列
+                claim_idle_ms = min(claim_idle_ms, int(max_process_time * 1000 / (max_retries + 2)))
+        elif max_process_time is not None and claim_idle_ms >= max_process_time * 1000:
+            raise ValueError(
+                f"claim_idle_ms ({claim_idle_ms}) must be less than max_process_time "
+                f"({max_process_time}s), otherwise claimed messages always time out"
+            )
+        self.claim_idle_ms = claim_idle_ms
+        if claim_interval is None:
+            claim_interval = min(CLAIM_INTERVAL, claim_idle_ms / 1000 / 2)
+        self.claim_interval = claim_interval
+        self.heartbeat_interval = claim_idle_ms / 1000 / 3
+        self.claim_on_start = claim_on_start
+        self.retry_interval = retry_interval
         self.is_running = False
         self.callback: Callable[[T], Coroutine[Any, Any, None]] | None = None
 
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        # ordering key -> 该 key 最后一条消息的处理任务
+        self._key_tails: dict[str, asyncio.Task] = {}
+        self._ack_ids: list[str] = []
+        self._ack_ready = asyncio.Event()
+        self._ack_task: asyncio.Task | None = None
+        self._recover_task: asyncio.Task | None = None
+        self._heartbeat_task: asyncio.Task | None = None
+        # 正在处理的消息，避免被本消费者重复接管
+        self._in_flight_ids: set[str] = set()
+        self.processed_count = 0
+        self.failed_count = 0
+        self.acked_count = 0
+        self.claimed_count = 0
+        self.dead_letter_count = 0
+        self.skipped_count = 0
+
     async def setup(self) -> None:
         """Setup the consumer group if it doesn't exist."""
         try:
@@ -87,31 +269,10 @@ class Consumer(Generic[T]):
         except aioredis.ResponseError as e:
             if "BUSYGROUP" not in str(e):
                 raise
-            logger.info(f"Consumer group {self.consumer_group} already exists")
-
-            # 检查是否需要重置消费者组位置
-            stream_info = await self.redis.xinfo_stream(self.channel)
-            if stream_info["length"] > 0:  # 如果队列中有消息
-                group_info = await self.redis.xinfo_groups(self.channel)
-                for group in group_info:
-                    if group["name"] == self.consumer_group:
-                        if group["pending"] == 0:  # 如果没有待处理的消息
-                            try:
-                                # 删除旧的消费者组
-                                await self.redis.xgroup_destroy(self.channel, self.consumer_group)
-                                # 创建新的消费者组，从头开始消费
-                                await self.redis.xgroup_create(
-                                    name=self.channel,
-                                    groupname=self.consumer_group,
-                                    mkstream=True,
-                                    id="0",  # 从头开始
-                                )
-                                logger.info(
-                                    f"Reset consumer group {self.consumer_group} to start from beginning"
-                                )
-                            except Exception as e:
-                                logger.error(f"Failed to reset consumer group: {e}")
-                        break
+            # 已存在的消费组从上次投递的位置继续消费，未确认的消息由 recover 接管
+            logger.info(
+                f"Consumer group {self.consumer_group} already exists, resume from last delivered id"
+            )
 
     def register_callback(self, callback: Callable[[T], Coroutine[Any, Any, None]]) -> None:
         """Register a callback function to process events.
@@ -121,109 +282,325 @@ class Consumer(Generic[T]):
         """
         self.callback = callback
 
+    @property
+    def in_flight(self) -> int:
+        """正在处理（含等待同 key 前序消息）的消息数"""
+        return len(self._tasks)
+
+    async def get_lag(self) -> int | None:
+        """消费组尚未读取的消息数，需要 Redis 7.0 及以上"""
+        groups = await self.redis.xinfo_groups(self.channel)
+        for group in groups:
+            if group["name"] == self.consumer_group:
+                lag = group.get("lag")
+                return None if lag is None else int(lag)
+        return None
+
+    async def metrics(self) -> dict[str, int | None]:
+        try:
+            lag = await self.get_lag()
+        except Exception as e:
+            logger.warning(f"Failed to get lag of {self.consumer_group}: {e}")
+            lag = None
+        return {
+            "lag": lag,
+            "in_flight": self.in_flight,
+            "pending_acks": len(self._ack_ids),
+            "processed": self.processed_count,
+            "failed": self.failed_count,
+            "acked": self.acked_count,
+            "claimed": self.claimed_count,
+            "dead_letter": self.dead_letter_count,
+            "skipped": self.skipped_count,
+        }
+
+    async def _get_delivery_counts(
+        self, message_ids: Sequence[str], consumer_name: str | None = None
+    ) -> dict[str, int]:
+        """从 pending 列表读取消息的投递次数
+
+        消息 id 不一定连续，按 id 逐条查询，所有查询在一次往返中完成。
+        """
+        if not message_ids:
+            return {}
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for message_id in message_ids:
+                pipe.xpending_range(
+                    name=self.channel,
+                    groupname=self.consumer_group,
+                    min=message_id,
+                    max=message_id,
+                    count=1,
+                    consumername=consumer_name,
+                )
+            results = await pipe.execute()
+        return {
+            entry["message_id"]: int(entry["times_delivered"])
+            for entries in results
+            for entry in entries
+        }
+
     async def process_pending(self) -> None:
         """Process any pending messages for this consumer."""
         logger.info(f"Processing pending messages for {self.consumer_name}")
+        last_id = "0"
         try:
-            # 首先检查流中的所有消息
-            stream_info = await self.redis.xinfo_stream(self.channel)
-            logger.info(
-                f"Stream info - length: {stream_info['length']}, groups: {stream_info['groups']}, last_id: {stream_info['last-generated-id']}"
-            )
-
-            # 检查消费者组信息
-            group_info = await self.redis.xinfo_groups(self.channel)
-            for group in group_info:
-                logger.info(
-                    f"Group {group['name']} - pending: {group['pending']}, consumers: {group['consumers']}, last_delivered_id: {group['last-delivered-id']}"
+            while True:
+                pending = await self.redis.xreadgroup(
+                    groupname=self.consumer_group,
+                    consumername=self.consumer_name,
+                    streams={self.channel: last_id},  # 从 last_id 之后读取本消费者的待处理消息
+                    count=self.batch_size,
                 )
-
-            # 检查消费者信息
-            consumers_info = await self.redis.xinfo_consumers(self.channel, self.consumer_group)
-            for consumer in consumers_info:
-                logger.info(
-                    f"Consumer {consumer['name']} - pending: {consumer['pending']}, idle: {consumer['idle']}"
+                messages = pending[0][1] if pending else []
+                if not messages:
+                    break
+                logger.info(f"Processing {len(messages)} pending messages from {self.channel}")
+                counts = await self._get_delivery_counts(
+                    [message_id for message_id, _ in messages], self.consumer_name
                 )
+                await self._dispatch_claimed(messages, counts)
+                last_id = messages[-1][0]
+        except Exception as e:
+            logger.error(f"Error processing pending messages: {e}")
 
-            # 读取待处理的消息
-            pending = await self.redis.xreadgroup(
-                groupname=self.consumer_group,
-                consumername=self.consumer_name,
-                streams={self.channel: "0"},  # 0 means all pending messages
-                count=self.batch_size,
-            )
+    async def recover(self, min_idle_ms: int | None = None) -> int:
+        """接管空闲超过 `claim_idle_ms` 的未确认消息
+
+        Args:
+            min_idle_ms: 覆盖 `claim_idle_ms`，为 0 时接管所有未确认的消息
 
-            logger.info(f"Found pending messages: {pending is not None and len(pending) > 0}")
-            if pending:
-                for stream_name, messages in pending:
-                    logger.info(f"Processing {len(messages)} messages from stream {stream_name}")
-                    for message_id, fields in messages:
-                        logger.info(f"Processing pending message {message_id}")
-                        logger.debug(f"Message fields: {fields}")
-                        try:
-                            await self._process_message(message_id, fields)
-                        except Exception as e:
-                            logger.error(f"Error processing pending message {message_id}: {e}")
-            else:
-                # 如果没有待处理的消息，检查是否有新消息
-                new_messages = await self.redis.xread(
-                    streams={self.channel: "0-0"},
-                    count=1,  # 从头开始读取所有消息
+        Returns:
+            int: 接管的消息数
+        """
+        claimed = 0
+        start_id = "0-0"
+        while True:
+            # aioredis 没有封装 XAUTOCLAIM，直接发送命令
+            resp = await self.redis.execute_command(
+                "XAUTOCLAIM",
+                self.channel,
+                self.consumer_group,
+                self.consumer_name,
+                self.claim_idle_ms if min_idle_ms is None else min_idle_ms,
+                start_id,
+                "COUNT",
+                self.batch_size,
+            )
+            start_id, messages = parse_autoclaim(resp)
+            if messages:
+                claimed += len(messages)
+                counts = await self._get_delivery_counts(
+                    [message_id for message_id, _ in messages], self.consumer_name
                 )
-                if new_messages:
-                    logger.info("Found unassigned messages in the stream")
-                    for stream_name, messages in new_messages:
-                        logger.info(f"Stream {stream_name} has {len(messages)} unassigned messages")
-                else:
-                    logger.info("No messages found in the stream")
+                await self._dispatch_claimed(messages, counts)
+            # 游标回到 0-0 表示已扫描完整个 pending 列表
+            if start_id in ("0-0", b"0-0"):
+                break
+        if claimed:
+            self.claimed_count += claimed
+            logger.info(f"Claimed {claimed} idle messages from {self.channel}")
+        return claimed
+
+    async def _recover_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.claim_interval)
+            try:
+                await self.recover()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error claiming idle messages: {e}")
+
+    async def _heartbeat(self) -> None:
+        """续期处理中的消息，重置其空闲时间，避免被 recover 接管"""
+        ids = list(self._in_flight_ids)
+        if not ids:
+            return
+        await self.redis.xclaim(
+            self.channel,
+            self.consumer_group,
+            self.consumer_name,
+            min_idle_time=0,
+            message_ids=ids,
+            justid=True,
+        )
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self._heartbeat()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error renewing in-flight messages: {e}")
+
+    async def _dispatch_claimed(self, messages: list, counts: dict[str, int]) -> None:
+        for message_id, fields in messages:
+            if message_id in self._in_flight_ids:
+                # 续期与接管之间的竞争可能接管回本消费者正在处理的消息
+                continue
+            if fields is None:
+                # 消息已被裁剪出 stream，只需确认
+                self._ack(message_id)
+                continue
+            await self._dispatch(message_id, fields, counts.get(message_id, 1))
+
+    def accepts(self, fields: dict) -> bool:
+        """是否处理该消息，不处理的消息直接确认
+
+        在完整解码之前调用，子类可以只读取过滤所需的字段。
+        """
+        return True
 
+    async def _dispatch(self, message_id: str, fields: dict, delivery_count: int = 1) -> None:
+        """占用一个并发名额并创建处理任务，名额用完时等待"""
+        try:
+            if not self.accepts(fields):
+                self.skipped_count += 1
+                self._ack(message_id)
+                return
         except Exception as e:
-            logger.error(f"Error processing pending messages: {e}")
+            logger.error(f"Invalid message {message_id}: {e}")
+            await self._move_to_dead_letter(message_id, fields, f"invalid_message: {e}")
+            return
 
-    async def _process_message(self, message_id: str, fields: dict) -> None:
+        await self._slots.acquire()
+        try:
+            data = from_fields(self.data_class, fields)
+        except Exception as e:
+            self._slots.release()
+            logger.error(f"Invalid message {message_id}: {e}")
+            await self._move_to_dead_letter(message_id, fields, f"invalid_message: {e}")
+            return
+
+        key = self.ordering_key(data) if self.ordering_key is not None else None
+        previous = self._key_tails.get(key) if key is not None else None
+        task = asyncio.create_task(
+            self._run(message_id, fields, data, key, previous, delivery_count)
+        )
+        self._tasks.add(task)
+        self._in_flight_ids.add(message_id)
+        task.add_done_callback(lambda t: self._in_flight_ids.discard(message_id))
+        task.add_done_callback(self._on_task_done)
+        if key is not None:
+            self._key_tails[key] = task
+            task.add_done_callback(lambda t, key=key: self._release_key(key, t))
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._slots.release()
+
+    def _release_key(self, key: str, task: asyncio.Task) -> None:
+        if self._key_tails.get(key) is task:
+            del self._key_tails[key]
+
+    async def _run(
+        self,
+        message_id: str,
+        fields: dict,
+        data: T,
+        key: str | None,
+        previous: asyncio.Task | None,
+        delivery_count: int,
+    ) -> None:
+        if previous is not None:
+            # 同 key 的前一条消息确认或进入死信队列后再处理
+            await asyncio.wait([previous])
+        while not await self._process_message(message_id, fields, data, delivery_count):
+            if key is None:
+                return
+            # 留在 pending 列表中等待接管会让同 key 的后续消息先执行，
+            # 因此在本任务内重试，直到成功、超过重试次数或超时进入死信队列
+            delivery_count += 1
+            await asyncio.sleep(self.retry_interval)
+
+    async def _process_message(
+        self, message_id: str, fields: dict, data: T, delivery_count: int = 1
+    ) -> bool:
         """Process a single message and acknowledge it.
 
         Args:
             message_id: ID of the message in Redis Stream
             fields: Message fields containing the event data
+            data: Decoded event data
+            delivery_count: Times the message has been delivered, from the pending list
+
+        Returns:
+            bool: False if the message failed and should be retried, True if it was
+                acknowledged or moved to the dead letter queue
         """
         logger.debug(f"Processing message {message_id}: {fields}")
-        retry_count = int(fields.get("retry_count", 0))
+        if delivery_count > self.max_retries + 1:
+            # 之前的处理未能确认也未能记录失败（例如进程崩溃），不再重试
+            logger.error(
+                f"Message {message_id} delivered {delivery_count} times, moving to dead letter queue"
+            )
+            await self._move_to_dead_letter(message_id, fields, "max_deliveries_exceeded")
+            return True
         try:
-            timestamp = float(fields.get("timestamp", 0))
-            if time.time() - timestamp > MAX_PROCESS_TIME:
-                logger.warning(
-                    f"Message {message_id} is too old, moving to dead letter queue. Timestamp: {timestamp}"
-                )
-                await self._move_to_dead_letter(message_id, fields, "message_timeout")
-                return
+            if self.max_process_time is not None:
+                timestamp = float(fields.get("timestamp", 0))
+                if time.time() - timestamp > self.max_process_time:
+                    logger.warning(
+                        f"Message {message_id} is too old, moving to dead letter queue. Timestamp: {timestamp}"
+                    )
+                    await self._move_to_dead_letter(message_id, fields, "message_timeout")
+                    return True
 
             if self.callback is not None:
-                data = self.data_class.from_json(fields["data"])
                 await self.callback(data)
 
-            # Acknowledge the message on successful processing
-            await self.redis.xack(self.channel, self.consumer_group, message_id)
+            self.processed_count += 1
+            self._ack(message_id)
+            return True
 
         except Exception as e:
+            self.failed_count += 1
             logger.exception(f"Error processing message {message_id}: {e}")
 
-            if retry_count >= self.max_retries:
+            if delivery_count > self.max_retries:
                 logger.error(
                     f"Message {message_id} exceeded max retries, moving to dead letter queue"
                 )
                 await self._move_to_dead_letter(message_id, fields, str(e))
-                return
-
-            # Update retry count and add back to stream
-            fields["retry_count"] = str(retry_count + 1)
-            fields["last_error"] = str(e)
-            fields["last_retry_time"] = str(time.time())
+                return True
+
+            # 不确认消息，使其留在本消费组的 pending 列表中；没有 ordering key 的消息
+            # 空闲超过 claim_idle_ms 后由 recover 重新接管，投递次数随之增加。
+            # stream 由多个消费组共享，重新写入 stream 会使其他消费组重复收到该消息
+            return False
+
+    def _ack(self, message_id: str) -> None:
+        """缓存待确认的消息，攒够一批或超时后统一确认"""
+        self._ack_ids.append(message_id)
+        if len(self._ack_ids) >= self.ack_batch_size:
+            self._ack_ready.set()
+
+    async def _flush_acks(self) -> None:
+        ids, self._ack_ids = self._ack_ids, []
+        if not ids:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for i in range(0, len(ids), self.ack_batch_size):
+                    pipe.xack(self.channel, self.consumer_group, *ids[i : i + self.ack_batch_size])
+                await pipe.execute()
+            self.acked_count += len(ids)
+        except Exception as e:
+            logger.error(f"Error acknowledging {len(ids)} messages: {e}")
+            # 下次重试
+            self._ack_ids = ids + self._ack_ids
 
-            # Add back to stream for retry
-            await self.redis.xadd(self.channel, fields)
-            # Acknowledge the original message
-            await self.redis.xack(self.channel, self.consumer_group, message_id)
+    async def _ack_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._ack_ready.wait(), timeout=self.ack_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._ack_ready.clear()
+            await self._flush_acks()
 
     async def _move_to_dead_letter(self, message_id: str, fields: dict, error: str) -> None:
         """Move a message to the dead letter queue.
@@ -237,16 +614,15 @@ class Consumer(Generic[T]):
         fields["error"] = error
         fields["moved_to_dlq_at"] = str(time.time())
 
+        self.dead_letter_count += 1
         try:
-            # Add to dead letter queue
-            await self.redis.xadd(self.dead_letter_channel, fields)
-            # Acknowledge the original message
-            await self.redis.xack(self.channel, self.consumer_group, message_id)
-            # Delete the message from original stream
-            await self.redis.xdel(self.channel, message_id)
-            logger.info(
-                f"Message {message_id} moved to dead letter queue and deleted from original stream"
-            )
+            # 写入死信队列并确认原消息，两者在同一个事务中完成
+            # 其他消费组可能还未读取该消息，不能从 stream 中删除
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.xadd(self.dead_letter_channel, fields)
+                pipe.xack(self.channel, self.consumer_group, message_id)
+                await pipe.execute()
+            logger.info(f"Message {message_id} moved to dead letter queue")
         except Exception as e:
             logger.error(f"Error moving message {message_id} to dead letter queue: {e}")
             raise
@@ -258,38 +634,71 @@ class Consumer(Generic[T]):
 
         await self.setup()
         self.is_running = True
+        if self._ack_task is None or self._ack_task.done():
+            self._ack_task = asyncio.create_task(self._ack_loop())
+
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
 
         # First process any pending messages
         await self.process_pending()
+        if self.claim_on_start:
+            # 空闲时间为 0 的接管也会接管本消费者正在处理的消息，先等它们处理完并确认
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            await self._flush_acks()
+            # 先于新消息处理上一任持有者遗留的消息，尽量保持顺序
+            await self.recover(min_idle_ms=0)
+        if self._recover_task is None or self._recover_task.done():
+            self._recover_task = asyncio.create_task(self._recover_loop())
 
         # Then start processing new messages
         while self.is_running:
             try:
-                # Read new messages
+                # 只读取空闲名额能处理的数量，积压留在 stream 中
+                count = max(min(self.batch_size, self.max_concurrency - self.in_flight), 1)
                 messages = await self.redis.xreadgroup(
                     groupname=self.consumer_group,
                     consumername=self.consumer_name,
                     streams={self.channel: ">"},  # > means new messages only
-                    count=self.batch_size,
+                    count=count,
                     block=self.poll_timeout_ms,
                 )
 
                 if not messages:
                     continue
+                if not self.is_running:
+                    # 停止期间读到的消息留在 pending 列表中，由重启后的本消费者或接管者处理
+                    break
 
-                logger.info(f"Processing {len(messages)} messages from stream {messages[0][0]}")
-                for stream, stream_messages in messages:
+                for _, stream_messages in messages:
                     for message_id, fields in stream_messages:
-                        await self._process_message(message_id, fields)
+                        await self._dispatch(message_id, fields)
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error reading from stream: {e}")
                 await asyncio.sleep(1)  # Avoid tight loop on errors
 
-    def stop(self) -> None:
-        """Stop consuming messages."""
+    async def stop(self) -> None:
+        """Stop consuming messages, wait for in-flight messages and flush acknowledgements."""
         self.is_running = False
+        if self._recover_task is not None:
+            self._recover_task.cancel()
+            await asyncio.gather(self._recover_task, return_exceptions=True)
+            self._recover_task = None
+        if self._tasks:
+            logger.info(f"Waiting for {len(self._tasks)} tasks to complete...")
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        # 处理中的消息完成后再停止续期
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+        if self._ack_task is not None:
+            self._ack_task.cancel()
+            await asyncio.gather(self._ack_task, return_exceptions=True)
+            self._ack_task = None
+        await self._flush_acks()
 
 
 class ConsumerProducerBuilder(Generic[T]):
@@ -0,0 +1,267 @@
+"""事件的二进制编码
+
+`TxEvent` 与 `SwapEvent` 在 stream 上的紧凑编码，替代 JSON。
+
+编码格式：3 字节头（magic、版本号、事件类型）+ 固定布局的字段：
+
+- 地址、签名以原始字节保存（32 / 64 字节），而不是 base58 字符串
+- 枚举、Literal 保存为 1 字节的序号
+- 可选字段带 1 字节的存在标记
+- `SwapEvent.tx_event` 存在时，紧跟在 `SwapEvent` 字段之后
+
+每个字段的偏移量固定，`decode_fields` 可以只解码消费者需要的字段。
+
+stream 是内部的可信边界，解码时不做 pydantic 校验；外部输入仍在构造事件时校验。
+新增或修改字段时需要增加版本号并保留旧版本的布局，保证滚动升级期间仍能解码旧消息。
+"""
+
+import struct
+from collections.abc import Callable, Iterable
+from enum import IntEnum
+from typing import Any
+
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+
+from solbot_common.types.swap import SwapEvent
+from solbot_common.types.tx import TxEvent, TxType
+
+MAGIC = 0xB5
+CODEC_VERSION = 1
+
+_HEADER = struct.Struct("<BBB")
+
+
+class EventType(IntEnum):
+    TX_EVENT = 1
+    SWAP_EVENT = 2
+
+
+class CodecError(ValueError):
+    """事件无法编码或解码"""
+
+
+class _Field:
+    __slots__ = ("count", "decode", "encode", "name", "offset", "struct")
+
+    def __init__(
+        self,
+        name: str,
+        fmt: str,
+        encode: Callable[[Any], tuple],
+        decode: Callable[[tuple], Any],
+    ) -> None:
+        self.name = name
+        self.struct = struct.Struct("<" + fmt)
+        # 该字段占用的值个数，可选字段为 2 个
+        self.count = len(self.struct.unpack(bytes(self.struct.size)))
+        self.offset = 0
+        self.encode = encode
+        self.decode = decode
+
+
+class _Layout:
+    """固定布局，字段按顺序紧密排列"""
+
+    __slots__ = ("by_name", "fields", "size", "struct")
+
+    def __init__(self, fields: list[_Field]) -> None:
+        offset = 0
+        for field in fields:
+            field.offset = offset
+            offset += field.struct.size
+        self.fields = fields
+        self.by_name = {field.name: field for field in fields}
+        self.struct = struct.Struct("<" + "".join(f.struct.format[1:] for f in fields))
+        self.size = offset
+
+    def pack(self, obj: Any) -> bytes:
+        values: list = []
+        for field in self.fields:
+            values.extend(field.encode(getattr(obj, field.name)))
+        return self.struct.pack(*values)
+
+    def unpack(self, buf: bytes, offset: int = 0) -> dict[str, Any]:
+        values = self.struct.unpack_from(buf, offset)
+        result = {}
+        i = 0
+        for field in self.fields:
+            result[field.name] = field.decode(values[i : i + field.count])
+            i += field.count
+        return result
+
+    def unpack_fields(self, buf: bytes, names: Iterable[str], offset: int = 0) -> dict[str, Any]:
+        result = {}
+        for name in names:
+            field = self.by_name.get(name)
+            if field is None:
+                raise CodecError(f"Unknown field: {name}")
+            result[name] = field.decode(field.struct.unpack_from(buf, offset + field.offset))
+        return result
+
+
+_EMPTY_PUBKEY = bytes(32)
+
+
+def _pubkey(name: str) -> _Field:
+    return _Field(
+        name,
+        "32s",
+        lambda v: (bytes(Pubkey.from_string(v)),),
+        lambda t: str(Pubkey.from_bytes(t[0])),
+    )
+
+
+def _optional_pubkey(name: str) -> _Field:
+    return _Field(
+        name,
+        "?32s",
+        lambda v: (False, _EMPTY_PUBKEY) if v is None else (True, bytes(Pubkey.from_string(v))),
+        lambda t: str(Pubkey.from_bytes(t[1])) if t[0] else None,
+    )
+
+
+def _number(name: str, fmt: str) -> _Field:
+    return _Field(name, fmt, lambda v: (v,), lambda t: t[0])
+
+
+def _optional_number(name: str, fmt: str, empty: int | float = 0) -> _Field:
+    return _Field(
+        name,
+        "?" + fmt,
+        lambda v: (False, empty) if v is None else (True, v),
+        lambda t: t[1] if t[0] else None,
+    )
+
+
+def _choice(name: str, choices: tuple, coerce: Callable[[Any], Any] | None = None) -> _Field:
+    index = {choice: i for i, choice in enumerate(choices)}
+    if coerce is None:
+        return _Field(name, "B", lambda v: (index[v],), lambda t: choices[t[0]])
+    return _Field(name, "B", lambda v: (index[coerce(v)],), lambda t: choices[t[0]])
+
+
+TX_EVENT_LAYOUT_V1 = _Layout(
+    [
+        _Field(
+            "signature",
+            "64s",
+            lambda v: (bytes(Signature.from_string(v)),),
+            lambda t: str(Signature.from_bytes(t[0])),
+        ),
+        _number("from_amount", "Q"),
+        _number("from_decimals", "B"),
+        _number("to_amount", "Q"),
+        _number("to_decimals", "B"),
+        _pubkey("mint"),
+        _pubkey("who"),
+        _choice("tx_type", tuple(TxType), TxType),
+        _choice("tx_direction", ("buy", "sell")),
+        _number("timestamp", "q"),
+        _number("pre_token_amount", "Q"),
+        _number("post_token_amount", "Q"),
+        _optional_pubkey("program_id"),
+    ]
+)
+
+SWAP_EVENT_LAYOUT_V1 = _Layout(
+    [
+        _pubkey("user_pubkey"),
+        _choice("swap_mode", ("ExactIn", "ExactOut")),
+        _pubkey("input_mint"),
+        _pubkey("output_mint"),
+        _number("amount", "Q"),
+        _number("ui_amount", "d"),
+        _number("timestamp", "q"),
+        _optional_number("amount_pct", "d"),
+        _choice("swap_in_type", ("qty", "pct")),
+        _optional_number("priority_fee", "d"),
+        _optional_number("slippage_bps", "i"),
+        _choice("by", ("user", "copytrade")),
+        _number("dynamic_slippage", "?"),
+        _optional_number("min_slippage_bps", "i"),
+        _optional_number("max_slippage_bps", "i"),
+        _optional_pubkey("program_id"),
+        _Field("tx_event", "?", lambda v: (v is not None,), lambda t: t[0]),
+    ]
+)
+
+# (事件类型, 版本号) -> 布局，旧版本的布局需要保留
+_LAYOUTS: dict[tuple[EventType, int], _Layout] = {
+    (EventType.TX_EVENT, 1): TX_EVENT_LAYOUT_V1,
+    (EventType.SWAP_EVENT, 1): SWAP_EVENT_LAYOUT_V1,
+}
+
+
+def _read_header(buf: bytes) -> tuple[EventType, _Layout]:
+    if len(buf) < _HEADER.size:
+        raise CodecError("Buffer too short")
+    magic, version, event_type = _HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise CodecError(f"Invalid magic: {magic:#x}")
+    try:
+        layout = _LAYOUTS[(EventType(event_type), version)]
+    except (KeyError, ValueError) as e:
+        raise CodecError(f"Unsupported event type {event_type} version {version}") from e
+    if len(buf) < _HEADER.size + layout.size:
+        raise CodecError("Buffer too short")
+    return EventType(event_type), layout
+
+
+def _pack(event_type: EventType, obj: Any) -> bytes:
+    layout = _LAYOUTS[(event_type, CODEC_VERSION)]
+    try:
+        return _HEADER.pack(MAGIC, CODEC_VERSION, event_type) + layout.pack(obj)
+    except (struct.error, ValueError, KeyError, TypeError) as e:
+        raise CodecError(f"Failed to encode {type(obj).__name__}: {e}") from e
+
+
+def encode_tx_event(tx_event: TxEvent) -> bytes:
+    return _pack(EventType.TX_EVENT, tx_event)
+
+
+def decode_tx_event(buf: bytes) -> TxEvent:
+    event_type, layout = _read_header(buf)
+    if event_type != EventType.TX_EVENT:
+        raise CodecError(f"Expected tx event, got {event_type.name}")
+    return TxEvent(**layout.unpack(buf, _HEADER.size))
+
+
+def encode_swap_event(swap_event: SwapEvent) -> bytes:
+    buf = _pack(EventType.SWAP_EVENT, swap_event)
+    if swap_event.tx_event is not None:
+        # 嵌套的 tx_event 不带头部
+        buf += encode_tx_event(swap_event.tx_event)[_HEADER.size :]
+    return buf
+
+
+def decode_swap_event(buf: bytes) -> SwapEvent:
+    event_type, layout = _read_header(buf)
+    if event_type != EventType.SWAP_EVENT:
+        raise CodecError(f"Expected swap event, got {event_type.name}")
+    values = layout.unpack(buf, _HEADER.size)
+    if values["tx_event"]:
+        tx_event_offset = _HEADER.size + layout.size
+        if len(buf) < tx_event_offset + TX_EVENT_LAYOUT_V1.size:
+            raise CodecError("Buffer too short")
+        values["tx_event"] = TxEvent(**TX_EVENT_LAYOUT_V1.unpack(buf, tx_event_offset))
+    else:
+        values["tx_event"] = None
+    # stream 是可信边界，跳过校验
+    return SwapEvent.model_construct(**values)
+
+
+def decode_fields(buf: bytes, names: Iterable[str]) -> dict[str, Any]:
+    """只解码指定的字段
+
+    `SwapEvent` 的 `tx_event` 字段只返回是否存在。
+
+    Args:
+        buf (bytes): 编码后的事件
+        names (Iterable[str]): 字段名
+
+    Returns:
+        dict[str, Any]: 字段名 -> 字段值
+    """
+    _, layout = _read_header(buf)
+    return layout.unpack_fields(buf, names, _HEADER.size)
@@ -1,35 +1,48 @@
-"""跟单交易通知"""
+"""跟单交易通知
+
+跟单交易不再单独写入通知 stream，而是以独立的消费组读取交易事件 stream，
+只处理由跟单产生的交易事件。交易事件分区时，每个分区 stream 对应一个消费者。
+"""
+
+import base64
 
 import aioredis
+import orjson as json
 
 from solbot_common.types import SwapEvent
 
-from .base import Consumer, Producer
+from .base import Consumer
+from .codec import decode_fields
+from .swap_event import NOTIFY_COPYTRADE_CONSUMER_GROUP, SWAP_EVENT_CHANNEL
 
-NOTIFY_COPYTRADE_CHANNEL = "notify:copytrade"
 MAX_PROCESS_TIME = 15  # s
 
 
-class NotifyCopyTradeProducer(Producer[SwapEvent]):
-    def __init__(self, redis_client: aioredis.Redis) -> None:
-        super().__init__(redis_client=redis_client, channel=NOTIFY_COPYTRADE_CHANNEL)
-
-
 class NotifyCopyTradeConsumer(Consumer[SwapEvent]):
     def __init__(
         self,
         redis_client: aioredis.Redis,
-        consumer_group: str,
-        consumer_name: str,
+        consumer_group: str = NOTIFY_COPYTRADE_CONSUMER_GROUP,
+        consumer_name: str = NOTIFY_COPYTRADE_CONSUMER_GROUP,
         batch_size: int = 10,
         poll_timeout_ms: int = 5000,
+        channel: str = SWAP_EVENT_CHANNEL,
     ) -> None:
         super().__init__(
-            channel=NOTIFY_COPYTRADE_CHANNEL,
+            channel=channel,
             data_class=SwapEvent,
             redis_client=redis_client,
             consumer_group=consumer_group,
             consumer_name=consumer_name,
             batch_size=batch_size,
             poll_timeout_ms=poll_timeout_ms,
+            dead_letter_channel=f"{channel}:{consumer_group}:dead",
         )
+
+    def accepts(self, fields: dict) -> bool:
+        """只处理跟单产生的交易事件，只解码 `by` 字段"""
+        if "bin" in fields:
+            by = decode_fields(base64.b64decode(fields["bin"]), ["by"])["by"]
+        else:
+            by = json.loads(fields["data"]).get("by")
+        return by == "copytrade"
@@ -0,0 +1,345 @@
+"""stream 分区与分区租约
+
+同一种事件按 key（例如用户钱包）哈希写入多条分区 stream，同一个 key 总是落在同一个分区，
+每个分区同一时刻只由一个节点消费，因此同一个 key 的事件仍按顺序处理，吞吐随节点数线性扩展。
+
+分区归属通过 Redis 租约协调：
+
+- 每个节点定期在 `{name}:nodes` 中上报心跳，超过 `lease_ttl` 未上报的节点视为已离开
+- 存活节点按确定性的规则分配分区（每个节点算出的结果相同），每个节点最多分到 ceil(N / 节点数) 个
+- 节点用 `SET NX PX` 获取分配给自己的分区租约（`{name}:lease:{i}`），并在心跳时续期
+- 节点加入或离开后，多出的分区先停止消费、处理完正在处理的消息后再释放租约，
+  新的持有者在下一次心跳时获取
+- 续期失败（租约已过期并被他人获取）时立即停止消费该分区
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import socket
+from collections.abc import Callable, Coroutine, Iterable
+from typing import Any
+
+import aioredis
+from loguru import logger
+
+from .base import Consumer
+
+PartitionCallback = Callable[[int], Coroutine[Any, Any, None]]
+
+# 仍由自己持有时才续期 / 释放
+_RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "little")
+
+
+def partition_of(key: str, partitions: int) -> int:
+    """一致性哈希（jump consistent hash），分区数从 N 增加到 N+1 时只有约 1/(N+1) 的 key 移动"""
+    if partitions <= 1:
+        return 0
+    h = _hash64(key)
+    b, j = -1, 0
+    while j < partitions:
+        b = j
+        h = (h * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((h >> 33) + 1)))
+    return b
+
+
+def partition_channel(channel: str, partition: int, partitions: int) -> str:
+    """分区 stream 名，只有一个分区时沿用原 stream"""
+    if partitions <= 1:
+        return channel
+    return f"{channel}:{partition}"
+
+
+def partition_channels(channel: str, partitions: int) -> list[str]:
+    return [partition_channel(channel, i, partitions) for i in range(max(partitions, 1))]
+
+
+def assign_partitions(nodes: Iterable[str], partitions: int) -> dict[str, set[int]]:
+    """将分区分配给节点
+
+    每个分区优先分给 rendezvous 哈希得分最高、且未达到上限的节点。
+    结果只取决于节点集合，节点增减时大部分分区保持不动。
+
+    Returns:
+        dict[str, set[int]]: 节点 -> 分区
+    """
+    nodes = sorted(set(nodes))
+    assignment: dict[str, set[int]] = {node: set() for node in nodes}
+    if not nodes:
+        return assignment
+    capacity = math.ceil(partitions / len(nodes))
+    for partition in range(partitions):
+        ranked = sorted(nodes, key=lambda node: _hash64(f"{node}:{partition}"), reverse=True)
+        for node in ranked:
+            if len(assignment[node]) < capacity:
+                assignment[node].add(partition)
+                break
+    return assignment
+
+
+def default_node_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class PartitionLeaseManager:
+    """分区租约
+
+    `on_assigned(partition)` 在获得租约后调用，`on_revoked(partition)` 在释放租约前调用，
+    `on_revoked` 返回后不应再处理该分区的消息。
+    """
+
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        name: str,
+        partitions: int,
+        on_assigned: PartitionCallback,
+        on_revoked: PartitionCallback,
+        node_id: str | None = None,
+        lease_ttl: float = 10,
+        heartbeat_interval: float | None = None,
+    ) -> None:
+        """
+        Args:
+            redis_client: Redis client instance
+            name: 租约的 key 前缀，使用同一组分区的节点必须相同
+            partitions: 分区数
+            on_assigned: 获得分区后的回调
+            on_revoked: 释放分区前的回调
+            node_id: 节点 id，默认为 主机名:pid
+            lease_ttl: 租约有效期（秒），节点失联超过该时间后分区被其他节点接管
+            heartbeat_interval: 心跳间隔（秒），默认为 lease_ttl / 3
+        """
+        self.redis = redis_client
+        self.name = name
+        self.partitions = max(partitions, 1)
+        self.on_assigned = on_assigned
+        self.on_revoked = on_revoked
+        self.node_id = node_id or default_node_id()
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = heartbeat_interval or lease_ttl / 3
+        self.nodes_key = f"{name}:nodes"
+        # 正在消费的分区
+        self.owned: set[int] = set()
+        # 正在停止的分区 -> 停止任务
+        self._draining: dict[int, asyncio.Task] = {}
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    def lease_key(self, partition: int) -> str:
+        return f"{self.name}:lease:{partition}"
+
+    async def _now_ms(self) -> int:
+        # 以 Redis 的时间为准，避免节点之间的时钟偏差
+        seconds, microseconds = await self.redis.time()
+        return int(seconds) * 1000 + int(microseconds) // 1000
+
+    async def heartbeat(self) -> list[str]:
+        """上报心跳，返回存活的节点"""
+        now = await self._now_ms()
+        ttl_ms = int(self.lease_ttl * 1000)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.nodes_key, {self.node_id: now})
+            pipe.zremrangebyscore(self.nodes_key, "-inf", now - ttl_ms)
+            pipe.zrange(self.nodes_key, 0, -1)
+            pipe.pexpire(self.nodes_key, ttl_ms * 3)
+            results = await pipe.execute()
+        return list(results[2])
+
+    async def _renew(self, partitions: set[int]) -> set[int]:
+        """续期租约，返回续期失败的分区"""
+        if not partitions:
+            return set()
+        leased = sorted(partitions)
+        ttl_ms = int(self.lease_ttl * 1000)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for partition in leased:
+                pipe.eval(_RENEW_SCRIPT, 1, self.lease_key(partition), self.node_id, ttl_ms)
+            results = await pipe.execute()
+        return {partition for partition, ok in zip(leased, results, strict=True) if not ok}
+
+    async def _acquire(self, partition: int) -> bool:
+        return bool(
+            await self.redis.set(
+                self.lease_key(partition),
+                self.node_id,
+                nx=True,
+                px=int(self.lease_ttl * 1000),
+            )
+        )
+
+    async def _release(self, partition: int) -> None:
+        await self.redis.eval(_RELEASE_SCRIPT, 1, self.lease_key(partition), self.node_id)
+
+    def _start_revoke(self, partition: int, release: bool = True) -> None:
+        """在后台停止消费分区，停止期间租约继续续期，停止后才释放"""
+        self.owned.discard(partition)
+        if partition not in self._draining:
+            self._draining[partition] = asyncio.create_task(self._revoke(partition, release))
+
+    async def _revoke(self, partition: int, release: bool) -> None:
+        try:
+            await self.on_revoked(partition)
+        except Exception as e:
+            logger.exception(f"Failed to revoke partition {partition}: {e}")
+        try:
+            if release:
+                await self._release(partition)
+                logger.info(f"Released partition {partition} of {self.name}")
+        finally:
+            self._draining.pop(partition, None)
+
+    async def rebalance(self) -> None:
+        """上报心跳、续期租约并按当前存活的节点调整持有的分区"""
+        if self._stopping:
+            await self.redis.zrem(self.nodes_key, self.node_id)
+            desired: set[int] = set()
+        else:
+            nodes = await self.heartbeat()
+            if self.node_id not in nodes:
+                nodes.append(self.node_id)
+            desired = assign_partitions(nodes, self.partitions)[self.node_id]
+
+        for partition in await self._renew(self.owned | set(self._draining)):
+            if partition in self.owned:
+                logger.warning(f"Lost lease of partition {partition} on {self.name}")
+                self._start_revoke(partition, release=False)
+
+        for partition in sorted(self.owned - desired):
+            logger.info(f"Releasing partition {partition} of {self.name}")
+            self._start_revoke(partition)
+
+        for partition in sorted(desired - self.owned - set(self._draining)):
+            # 上一个持有者尚未释放时获取失败，下一次心跳重试
+            if not await self._acquire(partition):
+                continue
+            self.owned.add(partition)
+            logger.info(f"Acquired partition {partition} of {self.name}")
+            try:
+                await self.on_assigned(partition)
+            except Exception as e:
+                logger.exception(f"Failed to start partition {partition}: {e}")
+                self._start_revoke(partition)
+
+    async def start(self) -> None:
+        self._stopping = False
+        await self.rebalance()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.rebalance()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to rebalance partitions of {self.name}: {e}")
+
+    async def stop(self) -> None:
+        """停止消费并释放所有分区，其他节点在下一次心跳时接管"""
+        self._stopping = True
+        await self.rebalance()
+        # 等待期间心跳任务继续为停止中的分区续期
+        while self._draining:
+            await asyncio.gather(*self._draining.values(), return_exceptions=True)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class PartitionedConsumer:
+    """按租约消费分区 stream，每个持有的分区运行一个 `Consumer`"""
+
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        name: str,
+        partitions: int,
+        consumer_factory: Callable[[int], Consumer],
+        node_id: str | None = None,
+        lease_ttl: float = 10,
+        on_assigned: PartitionCallback | None = None,
+        on_revoked: PartitionCallback | None = None,
+    ) -> None:
+        """
+        Args:
+            redis_client: Redis client instance
+            name: 租约的 key 前缀
+            partitions: 分区数
+            consumer_factory: 根据分区号创建已注册 callback 的消费者
+            node_id: 节点 id，默认为 主机名:pid
+            lease_ttl: 租约有效期（秒）
+            on_assigned: 开始消费分区前的回调，用于加载按分区管理的其他状态
+            on_revoked: 停止消费分区后、释放租约前的回调
+        """
+        self.consumer_factory = consumer_factory
+        self.on_assigned = on_assigned
+        self.on_revoked = on_revoked
+        self.leases = PartitionLeaseManager(
+            redis_client,
+            name,
+            partitions,
+            on_assigned=self._on_assigned,
+            on_revoked=self._on_revoked,
+            node_id=node_id,
+            lease_ttl=lease_ttl,
+        )
+        self.consumers: dict[int, tuple[Consumer, asyncio.Task]] = {}
+        self._stopped = asyncio.Event()
+
+    @property
+    def node_id(self) -> str:
+        return self.leases.node_id
+
+    async def _on_assigned(self, partition: int) -> None:
+        if self.on_assigned is not None:
+            await self.on_assigned(partition)
+        consumer = self.consumer_factory(partition)
+        task = asyncio.create_task(consumer.start())
+        self.consumers[partition] = (consumer, task)
+
+    async def _on_revoked(self, partition: int) -> None:
+        item = self.consumers.pop(partition, None)
+        if item is not None:
+            consumer, task = item
+            # 等待处理中的消息完成，并等待读取循环退出，之后才释放租约
+            await consumer.stop()
+            await asyncio.gather(task, return_exceptions=True)
+        if self.on_revoked is not None:
+            await self.on_revoked(partition)
+
+    async def metrics(self) -> dict[int, dict[str, int | None]]:
+        return {
+            partition: await consumer.metrics()
+            for partition, (consumer, _) in sorted(self.consumers.items())
+        }
+
+    async def start(self) -> None:
+        """获取分区并开始消费，直到调用 stop"""
+        self._stopped.clear()
+        await self.leases.start()
+        await self._stopped.wait()
+
+    async def stop(self) -> None:
+        await self.leases.stop()
+        self._stopped.set()
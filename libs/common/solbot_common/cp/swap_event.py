@@ -1,21 +1,48 @@
-import asyncio
-import time
-from collections.abc import Callable, Coroutine
-from typing import Any
+"""交易事件
+
+交易事件按 `user_pubkey` 一致性哈希写入 `settings.trading.partitions` 条分区 stream
+（只有一个分区时即 `SWAP_EVENT_CHANNEL`），同一个用户的交易总在同一个分区。
+各下游使用独立的消费组读取：
+
+- `TRADING_CONSUMER_GROUP`: trading 执行交易，每个分区由一个 trading 节点消费
+- `NOTIFY_COPYTRADE_CONSUMER_GROUP`: tg-bot 发送跟单通知，读取所有分区
+"""
+
+from collections.abc import Callable, Sequence
 
 import aioredis
 
+from solbot_common.config import settings
 from solbot_common.log import logger
 from solbot_common.types import SwapEvent
 
+from .base import MAX_STREAM_LENGTH, Consumer, to_fields
+from .partition import partition_channel, partition_of
+
 SWAP_EVENT_CHANNEL = "swap_event:new"
 DEAD_LETTER_CHANNEL = "swap_event:dlq"
 MAX_PROCESS_TIME = 15  # s
 
+TRADING_CONSUMER_GROUP = "trading:swap_event"
+NOTIFY_COPYTRADE_CONSUMER_GROUP = "copytrade_notify"
+# 分区租约的 key 前缀
+TRADING_PARTITION_LEASE = "trading:swap_event:partition"
+
+
+def swap_event_channel(user_pubkey: str, partitions: int) -> str:
+    """用户的交易事件所在的分区 stream"""
+    return partition_channel(SWAP_EVENT_CHANNEL, partition_of(user_pubkey, partitions), partitions)
+
 
 class SwapEventProducer:
-    def __init__(self, redis_client: aioredis.Redis) -> None:
+    def __init__(self, redis_client: aioredis.Redis, partitions: int | None = None) -> None:
+        """
+        Args:
+            redis_client: Redis client instance
+            partitions: 分区数，默认为 settings.trading.partitions，生产者与消费者必须一致
+        """
         self.redis = redis_client
+        self.partitions = partitions if partitions is not None else settings.trading.partitions
 
     async def produce(self, swap_event: SwapEvent) -> None:
         """Produces a swap event to Redis Stream.
@@ -25,9 +52,9 @@ class SwapEventProducer:
         """
         try:
             await self.redis.xadd(
-                name=SWAP_EVENT_CHANNEL,
-                fields={"data": swap_event.to_json(), "timestamp": int(time.time())},
-                maxlen=10000,  # Keep last 10k events
+                name=swap_event_channel(swap_event.user_pubkey, self.partitions),
+                fields=to_fields(swap_event),
+                maxlen=MAX_STREAM_LENGTH,
             )
         except Exception as e:
             # Log error but don't re-raise to avoid disrupting the producer
@@ -35,8 +62,28 @@ class SwapEventProducer:
 
         return
 
+    async def produce_many(self, swap_events: Sequence[SwapEvent]) -> None:
+        """Produces several swap events in one round trip.
 
-class SwapEventConsumer:
+        Args:
+            swap_events: Swap events
+        """
+        if not swap_events:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for swap_event in swap_events:
+                    pipe.xadd(
+                        name=swap_event_channel(swap_event.user_pubkey, self.partitions),
+                        fields=to_fields(swap_event),
+                        maxlen=MAX_STREAM_LENGTH,
+                    )
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error producing {len(swap_events)} swap events to Redis Stream: {e}")
+
+
+class SwapEventConsumer(Consumer[SwapEvent]):
     def __init__(
         self,
         redis_client: aioredis.Redis,
@@ -45,8 +92,11 @@ class SwapEventConsumer:
         batch_size: int = 10,
         poll_timeout_ms: int = 5000,
         max_concurrent_tasks: int = 10,
+        ordering_key: Callable[[SwapEvent], str | None] | None = None,
+        channel: str = SWAP_EVENT_CHANNEL,
+        claim_on_start: bool = False,
     ) -> None:
-        """Initialize the transaction event consumer.
+        """Initialize the swap event consumer.
 
         Args:
             redis_client: Redis client instance
@@ -55,159 +105,23 @@ class SwapEventConsumer:
             batch_size: Number of events to process in one batch
             poll_timeout_ms: Timeout in milliseconds for blocking read
             max_concurrent_tasks: Maximum number of concurrent tasks
+            ordering_key: Events with the same key are processed in order
+            channel: Partition stream to read
+            claim_on_start: Claim pending messages left by the previous partition owner
         """
-        self.redis = redis_client
-        self.consumer_group = consumer_group
-        self.consumer_name = consumer_name
-        self.batch_size = batch_size
-        self.poll_timeout_ms = poll_timeout_ms
-        self.is_running = False
-        self.callback: Callable[[SwapEvent], Coroutine[Any, Any, None]] | None = None
-        self.task_pool = set()
-        self.semaphore = asyncio.Semaphore(max_concurrent_tasks)
-
-    async def setup(self) -> None:
-        """Setup the consumer group if it doesn't exist."""
-        try:
-            # Create consumer group if not exists
-            # Use $ as start ID to only process new messages
-            await self.redis.xgroup_create(
-                name=SWAP_EVENT_CHANNEL,
-                groupname=self.consumer_group,
-                mkstream=True,
-                id="$",
-            )
-        except aioredis.ResponseError as e:
-            if "BUSYGROUP" not in str(e):
-                raise
-            logger.info(f"Consumer group {self.consumer_group} already exists")
-
-    def register_callback(self, callback: Callable[[SwapEvent], Coroutine[Any, Any, None]]) -> None:
-        """Register a callback function to process events.
-
-        Args:
-            callback: Function that takes a dictionary of event data and processes it
-        """
-        self.callback = callback
-
-    async def process_pending(self) -> None:
-        """Process any pending messages for this consumer."""
-        try:
-            # Read pending messages from > start
-            pending = await self.redis.xreadgroup(
-                groupname=self.consumer_group,
-                consumername=self.consumer_name,
-                streams={SWAP_EVENT_CHANNEL: "0"},  # 0 means all pending messages
-                count=self.batch_size,
-            )
-
-            if pending and self.callback:
-                for _, messages in pending:
-                    for message_id, fields in messages:
-                        try:
-                            logger.info(f"Processing pending message {message_id}")
-                            await self._process_message(message_id, fields)
-                        except Exception as e:
-                            logger.error(f"Error processing pending message {message_id}: {e}")
-        except Exception as e:
-            logger.error(f"Error processing pending messages: {e}")
-
-    async def _process_message(self, message_id: str, fields: dict) -> None:
-        """Process a single message and acknowledge it.
-
-        Args:
-            message_id: ID of the message in Redis Stream
-            fields: Message fields containing the event data
-        """
-        async with self.semaphore:
-            try:
-                timestamp = float(fields.get("timestamp", 0))
-                if time.time() - timestamp > MAX_PROCESS_TIME:
-                    logger.warning(
-                        f"Message {message_id} is too old, discard it. Timestamp: {timestamp}"
-                    )
-                elif self.callback is not None:
-                    swap_event = SwapEvent.from_json(fields["data"])
-                    await self.callback(swap_event)
-
-                # Acknowledge the message
-                await self.redis.xack(SWAP_EVENT_CHANNEL, self.consumer_group, message_id)
-            except Exception as e:
-                logger.exception(f"Error processing message {message_id}: {e}")
-                await self._move_to_dead_letter(message_id, fields, str(e))
-
-    async def _move_to_dead_letter(self, message_id: str, fields: dict, error: str) -> None:
-        """Move a message to the dead letter queue.
-
-        Args:
-            message_id: Original message ID
-            fields: Message fields
-            error: Error message
-        """
-        fields["original_id"] = message_id
-        fields["error"] = error
-        fields["moved_to_dlq_at"] = str(time.time())
-
-        try:
-            # Add to dead letter queue
-            await self.redis.xadd(DEAD_LETTER_CHANNEL, fields)
-            # Acknowledge the original message
-            await self.redis.xack(SWAP_EVENT_CHANNEL, self.consumer_group, message_id)
-            # Delete the message from original stream
-            await self.redis.xdel(SWAP_EVENT_CHANNEL, message_id)
-            logger.info(
-                f"Message {message_id} moved to dead letter queue and deleted from original stream"
-            )
-        except Exception as e:
-            logger.error(f"Error moving message {message_id} to dead letter queue: {e}")
-            raise
-
-    def _create_task(self, message_id: str, fields: dict) -> None:
-        """创建新的异步任务来处理消息"""
-        logger.info(f"Creating task for message {message_id}")
-        task = asyncio.create_task(self._process_message(message_id, fields))
-        self.task_pool.add(task)
-        task.add_done_callback(self.task_pool.discard)
-
-    async def start(self) -> None:
-        """Start consuming messages from the stream."""
-        if not self.callback:
-            raise ValueError("No callback registered. Call register_callback first.")
-
-        await self.setup()
-        self.is_running = True
-
-        # First process any pending messages
-        await self.process_pending()
-
-        # Then start processing new messages
-        while self.is_running:
-            try:
-                # Read new messages
-                messages = await self.redis.xreadgroup(
-                    groupname=self.consumer_group,
-                    consumername=self.consumer_name,
-                    streams={SWAP_EVENT_CHANNEL: ">"},  # > means new messages only
-                    count=self.batch_size,
-                    block=self.poll_timeout_ms,
-                )
-
-                if messages is None:
-                    continue
-
-                for stream, stream_messages in messages:
-                    for message_id, fields in stream_messages:
-                        self._create_task(message_id, fields)
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error reading from stream: {e}")
-                await asyncio.sleep(1)
-
-    async def stop(self) -> None:
-        """Stop consuming messages and wait for all tasks to complete."""
-        self.is_running = False
-        if self.task_pool:
-            logger.info(f"Waiting for {len(self.task_pool)} tasks to complete...")
-            await asyncio.gather(*self.task_pool, return_exceptions=True)
-            logger.info("All tasks completed")
+        super().__init__(
+            channel=channel,
+            data_class=SwapEvent,
+            redis_client=redis_client,
+            consumer_group=consumer_group,
+            consumer_name=consumer_name,
+            batch_size=batch_size,
+            poll_timeout_ms=poll_timeout_ms,
+            dead_letter_channel=DEAD_LETTER_CHANNEL,
+            # 交易失败后不重试，直接进入死信队列
+            max_retries=0,
+            max_concurrency=max_concurrent_tasks,
+            ordering_key=ordering_key,
+            max_process_time=MAX_PROCESS_TIME,
+            claim_on_start=claim_on_start,
+        )
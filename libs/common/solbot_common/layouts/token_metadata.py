@@ -0,0 +1,52 @@
+import struct
+from dataclasses import dataclass
+
+from solders.pubkey import Pubkey  # type: ignore
+
+# key(1) + update_authority(32) + mint(32)
+_HEADER_SIZE = 1 + 32 + 32
+
+
+def _read_string(buffer: bytes, offset: int) -> tuple[str, int]:
+    """borsh 字符串：u32 长度 + 内容，Metaplex 以 \\0 填充到固定长度"""
+    (length,) = struct.unpack_from("<I", buffer, offset)
+    offset += 4
+    raw = buffer[offset : offset + length]
+    if len(raw) < length:
+        raise ValueError("Metadata buffer too short")
+    return raw.decode("utf-8", errors="ignore").rstrip("\x00").strip(), offset + length
+
+
+@dataclass
+class TokenMetadata:
+    """Metaplex Token Metadata 账户，只解析到 uri"""
+
+    key: int
+    update_authority: str
+    mint: str
+    name: str
+    symbol: str
+    uri: str
+
+    @classmethod
+    def from_buffer(cls, buffer: bytes) -> "TokenMetadata":
+        """
+        从字节缓冲区解析账户数据
+        格式: u8 32s 32s string string string ...
+        """
+        if len(buffer) < _HEADER_SIZE:
+            raise ValueError("Metadata buffer too short")
+        key = buffer[0]
+        update_authority = Pubkey.from_bytes(buffer[1:33])
+        mint = Pubkey.from_bytes(buffer[33:65])
+        name, offset = _read_string(buffer, _HEADER_SIZE)
+        symbol, offset = _read_string(buffer, offset)
+        uri, _ = _read_string(buffer, offset)
+        return cls(
+            key=key,
+            update_authority=update_authority.__str__(),
+            mint=mint.__str__(),
+            name=name,
+            symbol=symbol,
+            uri=uri,
+        )
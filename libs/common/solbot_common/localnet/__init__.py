@@ -0,0 +1,27 @@
+"""本地 Solana 节点替身
+
+用于离线压测和端到端测试，不依赖真实的 RPC：
+
+- `LocalChain`: slot、blockhash、账户、交易等链上状态，按脚本推送交易和账户变更
+- `LocalRpcServer`: JSON-RPC 与 websocket（`logsSubscribe`、`programSubscribe` 等）
+- `FaultInjector`: 按方法配置延迟、抖动和错误率
+- Yellowstone gRPC 替身见 `yellowstone_grpc.localnet`
+
+命令行启动见 `scripts/localnet.py`。
+"""
+
+from .chain import LocalChain, ScriptEntry, load_script
+from .faults import Fault, FaultInjector
+from .fixtures import AccountFixture, Fixtures
+from .rpc import LocalRpcServer
+
+__all__ = [
+    "AccountFixture",
+    "Fault",
+    "FaultInjector",
+    "Fixtures",
+    "LocalChain",
+    "LocalRpcServer",
+    "ScriptEntry",
+    "load_script",
+]
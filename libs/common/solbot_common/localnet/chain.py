@@ -0,0 +1,269 @@
+"""本地链状态
+
+RPC 替身和 gRPC 替身共享的状态：slot 按固定间隔推进，blockhash 由 slot 推导，
+账户和交易来自 fixture，通过 `sendTransaction` 提交的交易在下一个 slot 落地。
+
+交易和账户变更会推送给订阅者（`logsSubscribe`、`programSubscribe`、geyser `Subscribe`）。
+"""
+
+import asyncio
+import base64
+import hashlib
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+import base58
+import orjson as json
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from .fixtures import AccountFixture, Fixtures, unwrap_transaction
+
+# (slot, 交易)
+TransactionListener = Callable[[int, dict], None]
+# (slot, pubkey, 账户)
+AccountListener = Callable[[int, str, AccountFixture], None]
+
+# 与主网一致，blockhash 在 150 个区块内有效
+BLOCKHASH_VALID_BLOCKS = 150
+FINALIZED_SLOTS = 32
+
+
+@dataclass(slots=True)
+class ScriptEntry:
+    """脚本中的一步：等待 `delay` 秒后推送一笔交易或一次账户变更"""
+
+    delay: float = 0
+    transaction: dict | None = None
+    # 引用 fixture 中的交易
+    signature: str | None = None
+    pubkey: str | None = None
+    account: AccountFixture | None = None
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "ScriptEntry":
+        account = d.get("account")
+        return cls(
+            delay=float(d.get("delay", 0)),
+            transaction=d.get("transaction"),
+            signature=d.get("signature"),
+            pubkey=d.get("pubkey"),
+            account=AccountFixture.from_rpc(account) if account is not None else None,
+        )
+
+
+def load_script(path: str) -> list[ScriptEntry]:
+    """从 JSON Lines 文件读取脚本"""
+    with open(path, "rb") as f:
+        return [ScriptEntry.from_dict(json.loads(line)) for line in f if line.strip()]
+
+
+class LocalChain:
+    def __init__(
+        self,
+        fixtures: Fixtures | None = None,
+        slot_time: float = 0.4,
+        start_slot: int = 300_000_000,
+        confirm_slots: int = 1,
+        simulate_units: int = 50_000,
+        logs: list[str] | None = None,
+    ) -> None:
+        """
+        Args:
+            fixtures (Fixtures | None, optional): 账户与交易
+            slot_time (float, optional): 每个 slot 的时长（秒）. Defaults to 0.4.
+            start_slot (int, optional): 初始 slot
+            confirm_slots (int, optional): 落地后经过多少个 slot 变为 confirmed. Defaults to 1.
+            simulate_units (int, optional): 模拟交易返回的 CU 消耗
+            logs (list[str] | None, optional): 提交的交易落地后的日志
+        """
+        self.fixtures = fixtures or Fixtures()
+        self.slot_time = slot_time
+        self.start_slot = start_slot
+        self.confirm_slots = confirm_slots
+        self.simulate_units = simulate_units
+        self.logs = logs if logs is not None else ["Program log: localnet"]
+        self._started_at = time.monotonic()
+        # 签名 -> 落地的 slot
+        self._landed_at: dict[str, int] = {}
+        self._tx_listeners: list[TransactionListener] = []
+        self._account_listeners: list[AccountListener] = []
+        self.sent_count = 0
+
+    @property
+    def slot(self) -> int:
+        return self.start_slot + int((time.monotonic() - self._started_at) / self.slot_time)
+
+    def block_height(self, slot: int | None = None) -> int:
+        # 简化为与 slot 保持固定差值
+        return (self.slot if slot is None else slot) - 20_000_000
+
+    @staticmethod
+    def blockhash_of(slot: int) -> str:
+        return base58.b58encode(hashlib.sha256(f"localnet:{slot}".encode()).digest()).decode()
+
+    def latest_blockhash(self) -> tuple[str, int]:
+        """Returns: (blockhash, last_valid_block_height)"""
+        slot = self.slot
+        return self.blockhash_of(slot), self.block_height(slot) + BLOCKHASH_VALID_BLOCKS
+
+    def is_blockhash_valid(self, blockhash: str) -> bool:
+        slot = self.slot
+        return any(
+            self.blockhash_of(s) == blockhash
+            for s in range(max(slot - BLOCKHASH_VALID_BLOCKS, self.start_slot), slot + 1)
+        )
+
+    # --- 订阅 ---
+
+    def on_transaction(self, listener: TransactionListener) -> Callable[[], None]:
+        """注册交易订阅，返回取消订阅的函数"""
+        self._tx_listeners.append(listener)
+        return lambda: self._tx_listeners.remove(listener)
+
+    def on_account(self, listener: AccountListener) -> Callable[[], None]:
+        self._account_listeners.append(listener)
+        return lambda: self._account_listeners.remove(listener)
+
+    # --- 交易 ---
+
+    def publish_transaction(self, tx: dict, slot: int | None = None) -> str:
+        """交易落地并推送给订阅者"""
+        tx = unwrap_transaction(tx)
+        slot = self.slot if slot is None else slot
+        tx = {**tx, "slot": slot, "blockTime": int(time.time())}
+        signature = self.fixtures.add_transaction(tx)
+        self._landed_at[signature] = slot
+        for listener in list(self._tx_listeners):
+            listener(slot, tx)
+        return signature
+
+    def update_account(self, pubkey: str, account: AccountFixture) -> None:
+        self.fixtures.add_account(pubkey, account)
+        slot = self.slot
+        for listener in list(self._account_listeners):
+            listener(slot, pubkey, account)
+
+    def send_transaction(self, raw: bytes) -> str:
+        """提交交易，下一个 slot 落地"""
+        tx = VersionedTransaction.from_bytes(raw)
+        self.sent_count += 1
+        return self.publish_transaction(self._to_rpc_transaction(tx), self.slot + 1)
+
+    def _to_rpc_transaction(self, tx: VersionedTransaction) -> dict:
+        message = tx.message
+        header = message.header
+        account_keys = [str(key) for key in message.account_keys]
+        return {
+            "transaction": {
+                "signatures": [str(sig) for sig in tx.signatures],
+                "message": {
+                    "header": {
+                        "numRequiredSignatures": header.num_required_signatures,
+                        "numReadonlySignedAccounts": header.num_readonly_signed_accounts,
+                        "numReadonlyUnsignedAccounts": header.num_readonly_unsigned_accounts,
+                    },
+                    "accountKeys": account_keys,
+                    "recentBlockhash": str(message.recent_blockhash),
+                    "instructions": [
+                        {
+                            "programIdIndex": ix.program_id_index,
+                            "accounts": list(ix.accounts),
+                            "data": base58.b58encode(bytes(ix.data)).decode(),
+                            "stackHeight": None,
+                        }
+                        for ix in message.instructions
+                    ],
+                },
+            },
+            "meta": {
+                "err": None,
+                "status": {"Ok": None},
+                "fee": 5000,
+                "preBalances": [0] * len(account_keys),
+                "postBalances": [0] * len(account_keys),
+                "innerInstructions": [],
+                "logMessages": list(self.logs),
+                "preTokenBalances": [],
+                "postTokenBalances": [],
+                "rewards": [],
+                "loadedAddresses": {"writable": [], "readonly": []},
+                "computeUnitsConsumed": self.simulate_units,
+            },
+            "version": 0,
+        }
+
+    def get_transaction(self, signature: str) -> dict | None:
+        landed_at = self._landed_at.get(signature)
+        if landed_at is not None and landed_at > self.slot:
+            return None
+        return self.fixtures.transactions.get(signature)
+
+    def signature_status(self, signature: str) -> dict | None:
+        tx = self.fixtures.transactions.get(signature)
+        if tx is None:
+            return None
+        slot = self.slot
+        landed_at = self._landed_at.get(signature)
+        if landed_at is None:
+            # fixture 中的交易视为早已 finalized
+            landed_at = slot - FINALIZED_SLOTS
+        elif landed_at > slot:
+            return None
+        confirmations = slot - landed_at
+        if confirmations >= FINALIZED_SLOTS:
+            status, confirmations = "finalized", None
+        elif confirmations >= self.confirm_slots:
+            status = "confirmed"
+        else:
+            status = "processed"
+        err = (tx.get("meta") or {}).get("err")
+        return {
+            "slot": landed_at,
+            "confirmations": confirmations,
+            "err": err,
+            "status": {"Ok": None} if err is None else {"Err": err},
+            "confirmationStatus": status,
+        }
+
+    def simulate(self, raw: bytes) -> dict:
+        VersionedTransaction.from_bytes(raw)
+        return {
+            "err": None,
+            "logs": list(self.logs),
+            "accounts": None,
+            "unitsConsumed": self.simulate_units,
+            "returnData": None,
+        }
+
+    # --- 脚本 ---
+
+    async def play(self, script: Iterable[ScriptEntry], speed: float = 1, loop: bool = False):
+        """按脚本推送交易和账户变更
+
+        Args:
+            script (Iterable[ScriptEntry]): 脚本
+            speed (float, optional): 回放速度倍数. Defaults to 1.
+            loop (bool, optional): 是否循环回放. Defaults to False.
+        """
+        entries = list(script)
+        while True:
+            for entry in entries:
+                if entry.delay > 0:
+                    await asyncio.sleep(entry.delay / speed)
+                if entry.transaction is not None:
+                    self.publish_transaction(entry.transaction)
+                elif entry.signature is not None:
+                    tx = self.fixtures.transactions.get(entry.signature)
+                    if tx is not None:
+                        self.publish_transaction(tx)
+                if entry.pubkey is not None and entry.account is not None:
+                    self.update_account(entry.pubkey, entry.account)
+            if not loop:
+                return
+
+
+def decode_transaction(data: str, encoding: str = "base58") -> bytes:
+    if encoding == "base64":
+        return base64.b64decode(data)
+    return base58.b58decode(data)
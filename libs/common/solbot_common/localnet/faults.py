@@ -0,0 +1,54 @@
+"""延迟与错误注入"""
+
+import asyncio
+import random
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Fault:
+    # 固定延迟（秒）
+    latency: float = 0
+    # 在固定延迟上增加 0 ~ jitter 秒的随机延迟
+    jitter: float = 0
+    # 0~1，返回错误的概率
+    error_rate: float = 0
+    # JSON-RPC 错误码，429 时返回 HTTP 429
+    error_code: int = -32005
+    error_message: str = "Node is behind"
+
+
+class FaultInjector:
+    def __init__(
+        self,
+        default: Fault | None = None,
+        methods: dict[str, Fault] | None = None,
+        seed: int | None = None,
+    ) -> None:
+        """
+        Args:
+            default (Fault | None, optional): 所有方法的默认设置
+            methods (dict[str, Fault] | None, optional): 按方法覆盖默认设置
+            seed (int | None, optional): 随机种子，指定后延迟和错误可复现
+        """
+        self.default = default or Fault()
+        self.methods = methods or {}
+        self._random = random.Random(seed)
+
+    def fault_of(self, method: str) -> Fault:
+        return self.methods.get(method, self.default)
+
+    async def delay(self, method: str) -> None:
+        fault = self.fault_of(method)
+        latency = fault.latency
+        if fault.jitter > 0:
+            latency += self._random.uniform(0, fault.jitter)
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+    def error(self, method: str) -> Fault | None:
+        """本次调用需要返回错误时返回对应的设置"""
+        fault = self.fault_of(method)
+        if fault.error_rate > 0 and self._random.random() < fault.error_rate:
+            return fault
+        return None
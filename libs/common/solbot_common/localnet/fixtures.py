@@ -0,0 +1,104 @@
+"""账户与交易 fixture
+
+目录结构：
+
+    fixtures/
+        accounts.json         # {pubkey: 账户}，账户与 getAccountInfo 返回的 value 格式相同
+        transactions/*.json   # 与 getTransaction 返回的 result 格式相同，也可以是完整的 RPC 响应
+
+账户的 `data` 可以是 `[base64, "base64"]`，也可以是 base64 字符串。
+"""
+
+import base64
+from dataclasses import dataclass
+from pathlib import Path
+
+import base58
+import orjson as json
+
+
+@dataclass(slots=True)
+class AccountFixture:
+    lamports: int
+    owner: str
+    data: bytes = b""
+    executable: bool = False
+    rent_epoch: int = 0
+
+    @classmethod
+    def from_rpc(cls, value: dict) -> "AccountFixture":
+        data = value.get("data", "")
+        if isinstance(data, list):
+            raw, encoding = data
+            data = base58.b58decode(raw) if encoding == "base58" else base64.b64decode(raw)
+        else:
+            data = base64.b64decode(data)
+        return cls(
+            lamports=int(value["lamports"]),
+            owner=value["owner"],
+            data=data,
+            executable=bool(value.get("executable", False)),
+            rent_epoch=int(value.get("rentEpoch", 0)),
+        )
+
+    def to_rpc(self, encoding: str = "base64") -> dict:
+        if encoding == "base58":
+            data = [base58.b58encode(self.data).decode(), "base58"]
+        else:
+            # jsonParsed 等其他编码与真实节点无法解析时一样，退回 base64
+            data = [base64.b64encode(self.data).decode(), "base64"]
+        return {
+            "data": data,
+            "executable": self.executable,
+            "lamports": self.lamports,
+            "owner": self.owner,
+            "rentEpoch": self.rent_epoch,
+            "space": len(self.data),
+        }
+
+
+def unwrap_transaction(tx: dict) -> dict:
+    """兼容完整的 RPC 响应"""
+    if "result" in tx and "transaction" not in tx:
+        return tx["result"]
+    return tx
+
+
+def signature_of(tx: dict) -> str:
+    return tx["transaction"]["signatures"][0]
+
+
+def account_keys_of(tx: dict) -> list[str]:
+    """交易涉及的所有账户，包括地址查找表加载的账户"""
+    keys = list(tx["transaction"]["message"]["accountKeys"])
+    loaded = (tx.get("meta") or {}).get("loadedAddresses") or {}
+    keys.extend(loaded.get("writable", []))
+    keys.extend(loaded.get("readonly", []))
+    return keys
+
+
+class Fixtures:
+    def __init__(self) -> None:
+        self.accounts: dict[str, AccountFixture] = {}
+        self.transactions: dict[str, dict] = {}
+
+    def add_account(self, pubkey: str, account: AccountFixture) -> None:
+        self.accounts[pubkey] = account
+
+    def add_transaction(self, tx: dict) -> str:
+        tx = unwrap_transaction(tx)
+        signature = signature_of(tx)
+        self.transactions[signature] = tx
+        return signature
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Fixtures":
+        path = Path(path)
+        fixtures = cls()
+        accounts_file = path / "accounts.json"
+        if accounts_file.exists():
+            for pubkey, value in json.loads(accounts_file.read_bytes()).items():
+                fixtures.add_account(pubkey, AccountFixture.from_rpc(value))
+        for tx_file in sorted((path / "transactions").glob("*.json")):
+            fixtures.add_transaction(json.loads(tx_file.read_bytes()))
+        return fixtures
@@ -0,0 +1,335 @@
+"""本地 JSON-RPC / websocket 服务
+
+实现项目用到的 RPC 方法，HTTP 与 websocket 使用同一个端口（`http://host:port`、`ws://host:port`）。
+每次调用先按 `FaultInjector` 的设置等待，再按概率返回错误。
+"""
+
+import asyncio
+import itertools
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import orjson as json
+from aiohttp import WSMsgType, web
+from loguru import logger
+
+from .chain import LocalChain, decode_transaction
+from .faults import FaultInjector
+from .fixtures import AccountFixture, account_keys_of
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _config(params: list, index: int) -> dict:
+    if len(params) > index and isinstance(params[index], dict):
+        return params[index]
+    return {}
+
+
+class LocalRpcServer:
+    def __init__(
+        self,
+        chain: LocalChain,
+        faults: FaultInjector | None = None,
+        host: str = "127.0.0.1",
+        port: int = 8899,
+    ) -> None:
+        self.chain = chain
+        self.faults = faults or FaultInjector()
+        self.host = host
+        self.port = port
+        self.methods: dict[str, Callable[[list], Awaitable[Any]]] = {
+            "getAccountInfo": self.get_account_info,
+            "getMultipleAccounts": self.get_multiple_accounts,
+            "getBalance": self.get_balance,
+            "getTransaction": self.get_transaction,
+            "getSignatureStatuses": self.get_signature_statuses,
+            "getLatestBlockhash": self.get_latest_blockhash,
+            "isBlockhashValid": self.is_blockhash_valid,
+            "getSlot": self.get_slot,
+            "getBlockHeight": self.get_block_height,
+            "getHealth": self.get_health,
+            "getVersion": self.get_version,
+            "sendTransaction": self.send_transaction,
+            "simulateTransaction": self.simulate_transaction,
+        }
+        self.call_counts: dict[str, int] = {}
+        self._runner: web.AppRunner | None = None
+        self._subscription_ids = itertools.count(1)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def _context(self) -> dict:
+        return {"slot": self.chain.slot}
+
+    # --- 方法 ---
+
+    async def get_account_info(self, params: list) -> dict:
+        encoding = _config(params, 1).get("encoding", "base58")
+        account = self.chain.fixtures.accounts.get(params[0])
+        return {
+            "context": self._context(),
+            "value": account.to_rpc(encoding) if account is not None else None,
+        }
+
+    async def get_multiple_accounts(self, params: list) -> dict:
+        encoding = _config(params, 1).get("encoding", "base58")
+        accounts = self.chain.fixtures.accounts
+        return {
+            "context": self._context(),
+            "value": [
+                accounts[pubkey].to_rpc(encoding) if pubkey in accounts else None
+                for pubkey in params[0]
+            ],
+        }
+
+    async def get_balance(self, params: list) -> dict:
+        account = self.chain.fixtures.accounts.get(params[0])
+        return {"context": self._context(), "value": account.lamports if account else 0}
+
+    async def get_transaction(self, params: list) -> dict | None:
+        return self.chain.get_transaction(params[0])
+
+    async def get_signature_statuses(self, params: list) -> dict:
+        return {
+            "context": self._context(),
+            "value": [self.chain.signature_status(signature) for signature in params[0]],
+        }
+
+    async def get_latest_blockhash(self, params: list) -> dict:
+        blockhash, last_valid_block_height = self.chain.latest_blockhash()
+        return {
+            "context": self._context(),
+            "value": {"blockhash": blockhash, "lastValidBlockHeight": last_valid_block_height},
+        }
+
+    async def is_blockhash_valid(self, params: list) -> dict:
+        return {"context": self._context(), "value": self.chain.is_blockhash_valid(params[0])}
+
+    async def get_slot(self, params: list) -> int:
+        return self.chain.slot
+
+    async def get_block_height(self, params: list) -> int:
+        return self.chain.block_height()
+
+    async def get_health(self, params: list) -> str:
+        return "ok"
+
+    async def get_version(self, params: list) -> dict:
+        return {"solana-core": "localnet", "feature-set": 0}
+
+    async def send_transaction(self, params: list) -> str:
+        encoding = _config(params, 1).get("encoding", "base58")
+        try:
+            raw = decode_transaction(params[0], encoding)
+            return self.chain.send_transaction(raw)
+        except Exception as e:
+            raise RpcError(-32602, f"invalid transaction: {e}") from e
+
+    async def simulate_transaction(self, params: list) -> dict:
+        encoding = _config(params, 1).get("encoding", "base58")
+        try:
+            raw = decode_transaction(params[0], encoding)
+            return {"context": self._context(), "value": self.chain.simulate(raw)}
+        except Exception as e:
+            raise RpcError(-32602, f"invalid transaction: {e}") from e
+
+    # --- JSON-RPC ---
+
+    async def call(self, request: dict) -> dict:
+        """处理一个 JSON-RPC 请求，注入的 429 错误以 `RpcError` 抛出"""
+        request_id = request.get("id")
+        method = request.get("method", "")
+        self.call_counts[method] = self.call_counts.get(method, 0) + 1
+        await self.faults.delay(method)
+        fault = self.faults.error(method)
+        if fault is not None:
+            if fault.error_code == 429:
+                raise RpcError(429, fault.error_message)
+            return _error(request_id, fault.error_code, fault.error_message)
+
+        handler = self.methods.get(method)
+        if handler is None:
+            return _error(request_id, -32601, "Method not found")
+        try:
+            result = await handler(request.get("params") or [])
+        except RpcError as e:
+            return _error(request_id, e.code, e.message)
+        except (IndexError, KeyError, TypeError, ValueError) as e:
+            return _error(request_id, -32602, f"Invalid params: {e}")
+        return {"jsonrpc": "2.0", "result": result, "id": request_id}
+
+    async def _handle_http(self, request: web.Request) -> web.StreamResponse:
+        try:
+            body = json.loads(await request.read())
+        except json.JSONDecodeError:
+            return web.Response(body=json.dumps(_error(None, -32700, "Parse error")))
+        try:
+            if isinstance(body, list):
+                resp = await asyncio.gather(*(self.call(item) for item in body))
+            else:
+                resp = await self.call(body)
+        except RpcError as e:
+            return web.Response(status=e.code, text=e.message)
+        return web.Response(body=json.dumps(resp), content_type="application/json")
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        if request.headers.get("Upgrade", "").lower() == "websocket":
+            return await self._handle_ws(request)
+        if request.method == "GET":
+            return web.Response(text="ok")
+        return await self._handle_http(request)
+
+    # --- websocket ---
+
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        outgoing: asyncio.Queue[dict] = asyncio.Queue()
+        # subscription id -> 取消订阅的函数
+        subscriptions: dict[int, Callable[[], None]] = {}
+
+        async def _writer() -> None:
+            while True:
+                await ws.send_bytes(json.dumps(await outgoing.get()))
+
+        writer = asyncio.create_task(_writer())
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT and msg.type != WSMsgType.BINARY:
+                    continue
+                body = json.loads(msg.data)
+                for item in body if isinstance(body, list) else [body]:
+                    outgoing.put_nowait(self._ws_call(item, subscriptions, outgoing))
+        finally:
+            writer.cancel()
+            for unsubscribe in subscriptions.values():
+                unsubscribe()
+        return ws
+
+    def _ws_call(
+        self,
+        request: dict,
+        subscriptions: dict[int, Callable[[], None]],
+        outgoing: asyncio.Queue[dict],
+    ) -> dict:
+        request_id = request.get("id")
+        method = request.get("method", "")
+        params = request.get("params") or []
+        self.call_counts[method] = self.call_counts.get(method, 0) + 1
+
+        if method.endswith("Unsubscribe"):
+            unsubscribe = subscriptions.pop(params[0], None)
+            if unsubscribe is not None:
+                unsubscribe()
+            return {"jsonrpc": "2.0", "result": unsubscribe is not None, "id": request_id}
+
+        subscription_id = next(self._subscription_ids)
+        if method == "logsSubscribe":
+            listener = self._logs_listener(params, subscription_id, outgoing)
+            subscriptions[subscription_id] = self.chain.on_transaction(listener)
+        elif method == "programSubscribe":
+            listener = self._program_listener(params, subscription_id, outgoing)
+            subscriptions[subscription_id] = self.chain.on_account(listener)
+        elif method == "accountSubscribe":
+            listener = self._account_listener(params, subscription_id, outgoing)
+            subscriptions[subscription_id] = self.chain.on_account(listener)
+        else:
+            return _error(request_id, -32601, "Method not found")
+        return {"jsonrpc": "2.0", "result": subscription_id, "id": request_id}
+
+    def _logs_listener(
+        self, params: list, subscription_id: int, outgoing: asyncio.Queue[dict]
+    ) -> Callable[[int, dict], None]:
+        mentions: set[str] | None = None
+        if params and isinstance(params[0], dict):
+            mentions = set(params[0].get("mentions", []))
+
+        def _on_transaction(slot: int, tx: dict) -> None:
+            if mentions is not None and not mentions.intersection(account_keys_of(tx)):
+                return
+            meta = tx.get("meta") or {}
+            value = {
+                "signature": tx["transaction"]["signatures"][0],
+                "err": meta.get("err"),
+                "logs": meta.get("logMessages") or [],
+            }
+            outgoing.put_nowait(_notification("logsNotification", subscription_id, slot, value))
+
+        return _on_transaction
+
+    def _program_listener(
+        self, params: list, subscription_id: int, outgoing: asyncio.Queue[dict]
+    ) -> Callable[[int, str, AccountFixture], None]:
+        program_id = params[0]
+        encoding = _config(params, 1).get("encoding", "base64")
+
+        def _on_account(slot: int, pubkey: str, account: AccountFixture) -> None:
+            if account.owner != program_id:
+                return
+            value = {"pubkey": pubkey, "account": account.to_rpc(encoding)}
+            outgoing.put_nowait(_notification("programNotification", subscription_id, slot, value))
+
+        return _on_account
+
+    def _account_listener(
+        self, params: list, subscription_id: int, outgoing: asyncio.Queue[dict]
+    ) -> Callable[[int, str, AccountFixture], None]:
+        target = params[0]
+        encoding = _config(params, 1).get("encoding", "base64")
+
+        def _on_account(slot: int, pubkey: str, account: AccountFixture) -> None:
+            if pubkey != target:
+                return
+            outgoing.put_nowait(
+                _notification(
+                    "accountNotification", subscription_id, slot, account.to_rpc(encoding)
+                )
+            )
+
+        return _on_account
+
+    # --- 生命周期 ---
+
+    def make_app(self) -> web.Application:
+        app = web.Application(client_max_size=16 * 1024**2)
+        app.router.add_route("*", "/", self._handle)
+        return app
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info(f"Local RPC listening on {self.url}")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def _error(request_id: Any, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": request_id}
+
+
+def _notification(method: str, subscription_id: int, slot: int, value: Any) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "method": method,
+        "params": {
+            "result": {"context": {"slot": slot}, "value": value},
+            "subscription": subscription_id,
+        },
+    }
@@ -14,6 +14,8 @@ class CopyTrade(Base, table=True):
     fixed_buy_amount: float | None = Field(nullable=True, description="固定买入金额")
     auto_follow: bool = Field(nullable=False, description="是否跟随自动买入卖出")
     stop_loss: bool = Field(nullable=False, description="是否设置止盈止损")
+    take_profit_pct: float | None = Field(nullable=True, description="相对成交价的止盈比例(%)")
+    stop_loss_pct: float | None = Field(nullable=True, description="相对成交价的止损比例(%)")
     no_sell: bool = Field(nullable=False, description="只跟买")
     priority: float = Field(nullable=False, description="优先费用(单位 SOL)")
     anti_sandwich: bool = Field(nullable=False, description="是否开启防夹")
@@ -12,6 +12,8 @@ class CopyTrade:
     fixed_buy_amount: float = 0.05
     auto_follow: bool = True
     stop_loss: bool = False
+    take_profit_pct: float | None = None  # 0-100%，为空则不止盈
+    stop_loss_pct: float | None = None  # 0-100%，为空则不止损
     no_sell: bool = False
     priority: float = 0.002
     anti_sandwich: bool = False
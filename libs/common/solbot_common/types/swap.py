@@ -42,6 +42,17 @@ class SwapEvent(BaseModel):
     def from_json(cls, json_str: str) -> "Self":
         return cls.model_validate_json(json_str)
 
+    def to_bytes(self) -> bytes:
+        from solbot_common.cp.codec import encode_swap_event
+
+        return encode_swap_event(self)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Self":
+        from solbot_common.cp.codec import decode_swap_event
+
+        return decode_swap_event(data)  # type: ignore[return-value]
+
 
 class SwapResult(BaseModel):
     swap_event: SwapEvent
@@ -12,7 +12,7 @@ class TxType(Enum):
     CLOSE_POSITION = "close_position"  # 清仓
 
 
-@dataclass
+@dataclass(slots=True)
 class TxEvent:
     signature: str
     from_amount: int
@@ -37,6 +37,17 @@ class TxEvent:
         obj.tx_type = TxType(obj.tx_type)
         return obj
 
+    def to_bytes(self) -> bytes:
+        from solbot_common.cp.codec import encode_tx_event
+
+        return encode_tx_event(self)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TxEvent":
+        from solbot_common.cp.codec import decode_tx_event
+
+        return decode_tx_event(data)
+
 
 class TokenAmountChange(TypedDict):
     change_amount: int
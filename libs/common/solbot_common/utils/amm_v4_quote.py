@@ -0,0 +1,201 @@
+"""Raydium AMM v4 报价
+
+使用池子自身的手续费参数与整数运算，复现链上 `swap_base_in` 的计算结果：
+
+    swap_fee = ceil(amount_in * swap_fee_numerator / swap_fee_denominator)
+    amount_in_after_fee = amount_in - swap_fee
+    amount_out = reserve_out * amount_in_after_fee // (reserve_in + amount_in_after_fee)
+
+其中储备量为金库余额减去待提取的 pnl（need_take_pnl）。
+
+批量报价（`quote_base_in_batch`）依赖 numpy，numpy 为可选依赖。
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from solders.pubkey import Pubkey  # type: ignore
+
+from solbot_common.constants import WSOL
+from solbot_common.layouts.amm_v4 import LIQUIDITY_STATE_LAYOUT_V4
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass
+class AmmV4Fees:
+    """池子的手续费参数"""
+
+    trade_fee_numerator: int
+    trade_fee_denominator: int
+    swap_fee_numerator: int
+    swap_fee_denominator: int
+
+
+@dataclass
+class AmmV4PoolState:
+    """AMM 账户中与报价相关的状态"""
+
+    coin_mint: Pubkey
+    pc_mint: Pubkey
+    coin_decimals: int
+    pc_decimals: int
+    fees: AmmV4Fees
+    need_take_pnl_coin: int
+    need_take_pnl_pc: int
+
+    @classmethod
+    def from_buffer(cls, buffer: bytes) -> "AmmV4PoolState":
+        decoded = LIQUIDITY_STATE_LAYOUT_V4.parse(buffer)
+        return cls(
+            coin_mint=Pubkey.from_bytes(decoded.coinMintAddress),
+            pc_mint=Pubkey.from_bytes(decoded.pcMintAddress),
+            coin_decimals=decoded.coinDecimals,
+            pc_decimals=decoded.pcDecimals,
+            fees=AmmV4Fees(
+                trade_fee_numerator=decoded.tradeFeeNumerator,
+                trade_fee_denominator=decoded.tradeFeeDenominator,
+                swap_fee_numerator=decoded.swapFeeNumerator,
+                swap_fee_denominator=decoded.swapFeeDenominator,
+            ),
+            need_take_pnl_coin=decoded.needTakePnlCoin,
+            need_take_pnl_pc=decoded.needTakePnlPc,
+        )
+
+
+@dataclass
+class AmmV4Reserves:
+    """可用于报价的储备量（最小单位）"""
+
+    pool: AmmV4PoolState
+    coin_vault_amount: int
+    pc_vault_amount: int
+
+    @property
+    def coin_reserve(self) -> int:
+        return max(self.coin_vault_amount - self.pool.need_take_pnl_coin, 0)
+
+    @property
+    def pc_reserve(self) -> int:
+        return max(self.pc_vault_amount - self.pool.need_take_pnl_pc, 0)
+
+    def reserves_for(self, input_mint: Pubkey) -> tuple[int, int]:
+        """按输入代币返回 (reserve_in, reserve_out)"""
+        if input_mint == self.pool.coin_mint:
+            return self.coin_reserve, self.pc_reserve
+        if input_mint == self.pool.pc_mint:
+            return self.pc_reserve, self.coin_reserve
+        raise ValueError(f"{input_mint} is not a mint of this pool")
+
+    @property
+    def token_mint(self) -> Pubkey:
+        """池子中非 WSOL 的一侧"""
+        return self.pool.pc_mint if self.pool.coin_mint == WSOL else self.pool.coin_mint
+
+    @property
+    def token_decimals(self) -> int:
+        if self.pool.coin_mint == WSOL:
+            return self.pool.pc_decimals
+        return self.pool.coin_decimals
+
+    def quote(self, input_mint: Pubkey, amount_in: int) -> int:
+        """计算精确输入 amount_in 时的输出数量"""
+        reserve_in, reserve_out = self.reserves_for(input_mint)
+        return swap_base_in(
+            amount_in,
+            reserve_in,
+            reserve_out,
+            self.pool.fees.swap_fee_numerator,
+            self.pool.fees.swap_fee_denominator,
+        )
+
+
+def _ceil_div(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+def swap_base_in(
+    amount_in: int,
+    reserve_in: int,
+    reserve_out: int,
+    fee_numerator: int,
+    fee_denominator: int,
+) -> int:
+    """精确输入报价，整数运算与链上结果一致
+
+    Args:
+        amount_in (int): 输入数量（最小单位）
+        reserve_in (int): 输入代币储备量
+        reserve_out (int): 输出代币储备量
+        fee_numerator (int): 手续费分子
+        fee_denominator (int): 手续费分母
+
+    Returns:
+        int: 输出数量（最小单位）
+    """
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return 0
+    fee = _ceil_div(amount_in * fee_numerator, fee_denominator)
+    amount_in_after_fee = amount_in - fee
+    return reserve_out * amount_in_after_fee // (reserve_in + amount_in_after_fee)
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError("numpy is required for batch quoting: pip install numpy") from e
+    return np
+
+
+def quote_base_in_batch(
+    amounts_in: "np.typing.ArrayLike",
+    reserves_in: "np.typing.ArrayLike",
+    reserves_out: "np.typing.ArrayLike",
+    fee_numerators: "np.typing.ArrayLike",
+    fee_denominators: "np.typing.ArrayLike",
+    exact: bool = True,
+) -> "np.ndarray":
+    """批量报价，参数按 numpy 规则广播
+
+    可以一次为同一个池子报多个金额，也可以一次为多个池子报价。
+
+    u64 相乘会超出 int64 的范围，因此 `exact=True` 时使用 object 数组（Python 整数）
+    逐元素计算，结果与 `swap_base_in` 完全一致；`exact=False` 时使用 float64，
+    速度更快但存在舍入误差，适合用于排序或粗筛。
+
+    Args:
+        amounts_in: 输入数量
+        reserves_in: 输入代币储备量
+        reserves_out: 输出代币储备量
+        fee_numerators: 手续费分子
+        fee_denominators: 手续费分母
+        exact (bool, optional): 是否使用精确整数运算. Defaults to True.
+
+    Returns:
+        np.ndarray: 输出数量
+    """
+    np = _import_numpy()
+    dtype = object if exact else np.float64
+    amount_in, reserve_in, reserve_out, fee_num, fee_den = np.broadcast_arrays(
+        *(
+            np.asarray(x, dtype=dtype)
+            for x in (amounts_in, reserves_in, reserves_out, fee_numerators, fee_denominators)
+        )
+    )
+
+    if exact:
+        fee = -((-(amount_in * fee_num)) // fee_den)
+        after_fee = amount_in - fee
+        denominator = reserve_in + after_fee
+        valid = (amount_in > 0) & (reserve_in > 0) & (reserve_out > 0)
+        safe_denominator = np.where(valid, denominator, 1)
+        out = np.where(valid, reserve_out * after_fee // safe_denominator, 0)
+        return out.astype(object)
+
+    after_fee = amount_in - np.ceil(amount_in * fee_num / fee_den)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.floor(reserve_out * after_fee / (reserve_in + after_fee))
+    valid = (amount_in > 0) & (reserve_in > 0) & (reserve_out > 0)
+    return np.where(valid, out, 0.0)
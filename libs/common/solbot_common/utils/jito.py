@@ -1,21 +1,154 @@
+import asyncio
 import base64
-from typing import Literal
+import itertools
+import time
+from typing import Literal, TypedDict
 
 import base58
 import httpx
 from loguru import logger
 from solana.rpc.types import TxOpts
+from solders.pubkey import Pubkey  # type: ignore
 from solders.signature import Signature  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 
 from solbot_common.config import settings
 
+# getBundleStatuses 单次最多查询 5 个 bundle
+MAX_BUNDLE_STATUS_BATCH = 5
+# 获取 tip 账户列表失败时使用的 tip 账户
+DEFAULT_TIP_ACCOUNT = Pubkey.from_string("96gYZGLnJYVFmbjzopPSU6QiEV5fGqZNyN9nmNhvrZU5")
+
+
+class BundleStatus(TypedDict):
+    bundle_id: str
+    transactions: list[str]
+    slot: int
+    confirmation_status: str
+    err: dict
+
 
 class JitoClient:
-    def __init__(self) -> None:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, tip_accounts_ttl: float = 3600) -> None:
+        if self._initialized:
+            return
+        self._initialized = True
         self.client = httpx.AsyncClient(
             base_url=settings.trading.jito_api,
         )
+        self.tip_accounts_ttl = tip_accounts_ttl
+        self._tip_accounts: list[Pubkey] = []
+        self._tip_accounts_fetched_at = 0.0
+        self._tip_account_cycle: itertools.cycle | None = None
+        self._tip_accounts_lock = asyncio.Lock()
+
+    async def _rpc(self, path: str, method: str, params: list) -> dict:
+        resp = await self.client.post(
+            path,
+            json={"id": 1, "jsonrpc": "2.0", "method": method, "params": params},
+        )
+        resp.raise_for_status()
+        js = resp.json()
+        if "error" in js:
+            raise ValueError(f"Jito {method} failed: {js['error']}")
+        return js
+
+    async def get_tip_accounts(self, refresh: bool = False) -> list[Pubkey]:
+        """获取 tip 账户列表（带缓存）
+
+        Args:
+            refresh (bool, optional): 是否强制刷新. Defaults to False.
+
+        Returns:
+            list[Pubkey]: tip 账户列表
+        """
+        expired = time.time() - self._tip_accounts_fetched_at > self.tip_accounts_ttl
+        if self._tip_accounts and not expired and not refresh:
+            return self._tip_accounts
+
+        async with self._tip_accounts_lock:
+            expired = time.time() - self._tip_accounts_fetched_at > self.tip_accounts_ttl
+            if self._tip_accounts and not expired and not refresh:
+                return self._tip_accounts
+            js = await self._rpc("/api/v1/bundles", "getTipAccounts", [])
+            self._tip_accounts = [Pubkey.from_string(account) for account in js["result"]]
+            self._tip_accounts_fetched_at = time.time()
+            self._tip_account_cycle = itertools.cycle(self._tip_accounts)
+            logger.debug(f"Fetched {len(self._tip_accounts)} Jito tip accounts")
+        return self._tip_accounts
+
+    async def next_tip_account(self) -> Pubkey:
+        """轮换获取 tip 账户
+
+        所有交易都向同一个 tip 账户转账会产生写锁竞争，轮换使用可以降低竞争。
+
+        Returns:
+            Pubkey: tip 账户
+        """
+        try:
+            await self.get_tip_accounts()
+        except Exception as e:
+            logger.warning(f"Failed to fetch Jito tip accounts: {e}")
+        if self._tip_account_cycle is None:
+            return DEFAULT_TIP_ACCOUNT
+        return next(self._tip_account_cycle)
+
+    async def send_bundle(
+        self,
+        transactions: list[VersionedTransaction],
+        encoding: Literal["base64", "base58"] = "base64",
+    ) -> str:
+        """提交 bundle
+
+        Args:
+            transactions (list[VersionedTransaction]): 已签名的交易，最多 5 笔
+            encoding (Literal["base64", "base58"], optional): 编码方式. Defaults to "base64".
+
+        Returns:
+            str: bundle id
+        """
+        if encoding == "base64":
+            encoded = [base64.b64encode(bytes(txn)).decode("utf-8") for txn in transactions]
+        elif encoding == "base58":
+            encoded = [base58.b58encode(bytes(txn)).decode("utf-8") for txn in transactions]
+        else:
+            raise ValueError("encoding must be either 'base64' or 'base58'")
+
+        js = await self._rpc("/api/v1/bundles", "sendBundle", [encoded, {"encoding": encoding}])
+        bundle_id = js["result"]
+        logger.info(f"Bundle sent: {bundle_id}")
+        return bundle_id
+
+    async def get_bundle_statuses(self, bundle_ids: list[str]) -> dict[str, BundleStatus]:
+        """批量查询 bundle 状态
+
+        Args:
+            bundle_ids (list[str]): bundle id 列表，超过 5 个时自动分批
+
+        Returns:
+            dict[str, BundleStatus]: 已查询到的 bundle 状态，未上链的 bundle 不在结果中
+        """
+        batches = [
+            bundle_ids[i : i + MAX_BUNDLE_STATUS_BATCH]
+            for i in range(0, len(bundle_ids), MAX_BUNDLE_STATUS_BATCH)
+        ]
+        responses = await asyncio.gather(
+            *(self._rpc("/api/v1/bundles", "getBundleStatuses", [batch]) for batch in batches)
+        )
+        statuses: dict[str, BundleStatus] = {}
+        for js in responses:
+            for status in js["result"]["value"]:
+                if status is not None:
+                    statuses[status["bundle_id"]] = status
+        return statuses
 
     async def send_transaction(
         self,
@@ -0,0 +1,148 @@
+"""派生地址与 Pubkey 缓存
+
+`find_program_address` 从 bump 255 开始逐个计算 SHA-256，直到结果不在 ed25519 曲线上，
+每次派生都要做若干次哈希；ATA 也是一次 `find_program_address`。
+同一个 mint 的 bonding curve、同一个用户的 ATA 在交易构建、解析和缓存查询中会被反复派生，
+这里以原始字节（程序地址 + seeds）为 key 缓存派生结果，所有调用方共享同一个有界 LRU。
+
+热门的 mint、钱包在各处以字符串出现，`to_pubkey` 复用已解析过的 `Pubkey` 对象，
+`encode_pubkey` 缓存 32 字节地址的 base58 编码。
+
+`derivation_metrics` 返回各缓存的大小和命中率。
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Sequence
+from typing import Generic, TypeVar
+
+import base58
+from solders.pubkey import Pubkey  # type: ignore
+
+from solbot_common.constants import (
+    ASSOCIATED_TOKEN_PROGRAM,
+    TOKEN_METADATA_PROGRAM,
+    TOKEN_PROGRAM_ID,
+)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+PDA_CACHE_SIZE = 16384
+PUBKEY_CACHE_SIZE = 16384
+
+
+class DerivationCache(Generic[K, V]):
+    """有界 LRU 缓存，记录命中率
+
+    只在事件循环所在线程中使用，不加锁。
+    """
+
+    def __init__(self, name: str, maxsize: int) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K, factory: Callable[[], V]) -> V:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            value = factory()
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return value
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def metrics(self) -> dict[str, int | float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+_pda_cache: DerivationCache[tuple[bytes, ...], tuple[Pubkey, int]] = DerivationCache(
+    "pda", PDA_CACHE_SIZE
+)
+_pubkey_cache: DerivationCache[str | bytes, Pubkey] = DerivationCache("pubkey", PUBKEY_CACHE_SIZE)
+_address_cache: DerivationCache[bytes, str] = DerivationCache("address", PUBKEY_CACHE_SIZE)
+
+
+def find_program_address(seeds: Sequence[bytes], program_id: Pubkey) -> tuple[Pubkey, int]:
+    """带缓存的 `Pubkey.find_program_address`
+
+    Args:
+        seeds (Sequence[bytes]): seeds
+        program_id (Pubkey): 程序地址
+
+    Returns:
+        tuple[Pubkey, int]: (地址, bump)
+    """
+    key = (bytes(program_id), *seeds)
+    return _pda_cache.get(key, lambda: Pubkey.find_program_address(list(seeds), program_id))
+
+
+def get_pda(seeds: Sequence[bytes], program_id: Pubkey) -> Pubkey:
+    return find_program_address(seeds, program_id)[0]
+
+
+def get_associated_token_address(
+    owner: Pubkey, mint: Pubkey, token_program_id: Pubkey = TOKEN_PROGRAM_ID
+) -> Pubkey:
+    """带缓存的 ATA 地址，与 `spl.token.instructions.get_associated_token_address` 结果相同
+
+    Args:
+        owner (Pubkey): 钱包地址
+        mint (Pubkey): 代币 mint 地址
+        token_program_id (Pubkey, optional): Token 程序. Defaults to TOKEN_PROGRAM_ID.
+
+    Returns:
+        Pubkey: ATA 地址
+    """
+    return get_pda([bytes(owner), bytes(token_program_id), bytes(mint)], ASSOCIATED_TOKEN_PROGRAM)
+
+
+def get_metadata_pda(mint: Pubkey) -> Pubkey:
+    """Metaplex 代币元数据账户地址"""
+    return get_pda(
+        [b"metadata", bytes(TOKEN_METADATA_PROGRAM), bytes(mint)], TOKEN_METADATA_PROGRAM
+    )
+
+
+def to_pubkey(value: str | bytes | Pubkey) -> Pubkey:
+    """字符串或 32 字节转换为 `Pubkey`，相同的输入返回同一个对象"""
+    if isinstance(value, Pubkey):
+        return value
+    if isinstance(value, str):
+        return _pubkey_cache.get(value, lambda: Pubkey.from_string(value))
+    return _pubkey_cache.get(bytes(value), lambda: Pubkey.from_bytes(value))
+
+
+def encode_pubkey(raw: bytes) -> str:
+    """32 字节地址的 base58 编码"""
+    return _address_cache.get(raw, lambda: base58.b58encode(raw).decode("utf-8"))
+
+
+def derivation_metrics() -> dict[str, dict[str, int | float]]:
+    return {cache.name: cache.metrics() for cache in (_pda_cache, _pubkey_cache, _address_cache)}
+
+
+def clear_derivation_caches() -> None:
+    for cache in (_pda_cache, _pubkey_cache, _address_cache):
+        cache.clear()
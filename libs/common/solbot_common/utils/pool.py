@@ -57,7 +57,7 @@ async def fetch_pool_data_from_rpc(pool_id: Pubkey, rpc_client: AsyncClient) ->
     }
 
 
-@cached(ttl=60)
+@cached(ttl=60, near_ttl=60)
 async def fetch_amm_v4_pool_keys(pool_id: str) -> AmmV4PoolKeys | None:
     def bytes_of(value):
         if not (0 <= value < 2**64):
@@ -387,11 +387,6 @@ async def get_amm_v4_reserves(pool_keys: AmmV4PoolKeys) -> tuple:
     )
     balances = balances_response.value
 
-    balances_response = await client.get_multiple_accounts_json_parsed(
-        [quote_vault, base_vault], Processed
-    )
-    balances = balances_response.value
-
     try:
         quote_account = balances[0]
         base_account = balances[1]
@@ -0,0 +1,162 @@
+"""Pump.fun 指令编码
+
+Pump.fun 的 buy / sell 指令结构是固定的：8 字节的 anchor discriminator，
+后面跟两个 u64 参数，账户顺序也固定。
+与其每笔交易都通过 anchorpy 解析 IDL 并编码，不如直接预计算 discriminator、
+用 struct 打包参数、按 IDL 中的顺序拼装 AccountMeta。
+
+每个 mint 对应的派生账户（bonding curve、associated bonding curve）以及用户的 ATA
+通过 `solbot_common.utils.pda` 的共享缓存派生，避免重复执行 find_program_address。
+"""
+
+import struct
+from typing import NamedTuple
+
+from solders.instruction import AccountMeta, Instruction  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+
+from solbot_common.constants import (
+    ASSOCIATED_TOKEN_PROGRAM,
+    PUMP_BUY_METHOD,
+    PUMP_FUN_ACCOUNT,
+    PUMP_FUN_PROGRAM,
+    PUMP_GLOBAL_ACCOUNT,
+    PUMP_SELL_METHOD,
+    RENT_PROGRAM_ID,
+    SYSTEM_PROGRAM_ID,
+    TOKEN_PROGRAM_ID,
+)
+from solbot_common.utils.pda import get_associated_token_address, get_pda
+
+# anchor discriminator: sha256("global:<method>")[:8]
+PUMP_BUY_DISCRIMINATOR = struct.pack("<Q", PUMP_BUY_METHOD)
+PUMP_SELL_DISCRIMINATOR = struct.pack("<Q", PUMP_SELL_METHOD)
+
+# discriminator + amount(u64) + sol_amount_threshold(u64)
+_SWAP_ARGS = struct.Struct("<8sQQ")
+
+_GLOBAL_META = AccountMeta(PUMP_GLOBAL_ACCOUNT, is_signer=False, is_writable=False)
+_BUY_TAIL_METAS = (
+    AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+    AccountMeta(TOKEN_PROGRAM_ID, is_signer=False, is_writable=False),
+    AccountMeta(RENT_PROGRAM_ID, is_signer=False, is_writable=False),
+    AccountMeta(PUMP_FUN_ACCOUNT, is_signer=False, is_writable=False),
+    AccountMeta(PUMP_FUN_PROGRAM, is_signer=False, is_writable=False),
+)
+_SELL_TAIL_METAS = (
+    AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+    AccountMeta(ASSOCIATED_TOKEN_PROGRAM, is_signer=False, is_writable=False),
+    AccountMeta(TOKEN_PROGRAM_ID, is_signer=False, is_writable=False),
+    AccountMeta(PUMP_FUN_ACCOUNT, is_signer=False, is_writable=False),
+    AccountMeta(PUMP_FUN_PROGRAM, is_signer=False, is_writable=False),
+)
+
+
+class PumpMintAccounts(NamedTuple):
+    """mint 在 Pump.fun 上的派生账户"""
+
+    bonding_curve: Pubkey
+    associated_bonding_curve: Pubkey
+
+
+def get_pump_mint_accounts(mint: Pubkey) -> PumpMintAccounts:
+    """获取 mint 对应的 bonding curve 及 associated bonding curve（带缓存）
+
+    Args:
+        mint (Pubkey): 代币 mint 地址
+
+    Returns:
+        PumpMintAccounts: 派生账户
+    """
+    bonding_curve = get_pda([b"bonding-curve", bytes(mint)], PUMP_FUN_PROGRAM)
+    associated_bonding_curve = get_associated_token_address(bonding_curve, mint)
+    return PumpMintAccounts(bonding_curve, associated_bonding_curve)
+
+
+def get_user_ata(owner: Pubkey, mint: Pubkey) -> Pubkey:
+    """获取用户的 ATA 地址（带缓存）
+
+    Args:
+        owner (Pubkey): 钱包地址
+        mint (Pubkey): 代币 mint 地址
+
+    Returns:
+        Pubkey: ATA 地址
+    """
+    return get_associated_token_address(owner, mint)
+
+
+def _swap_metas(
+    user: Pubkey,
+    mint: Pubkey,
+    fee_recipient: Pubkey,
+    associated_user: Pubkey,
+) -> list[AccountMeta]:
+    bonding_curve, associated_bonding_curve = get_pump_mint_accounts(mint)
+    return [
+        _GLOBAL_META,
+        AccountMeta(fee_recipient, is_signer=False, is_writable=True),
+        AccountMeta(mint, is_signer=False, is_writable=False),
+        AccountMeta(bonding_curve, is_signer=False, is_writable=True),
+        AccountMeta(associated_bonding_curve, is_signer=False, is_writable=True),
+        AccountMeta(associated_user, is_signer=False, is_writable=True),
+        AccountMeta(user, is_signer=True, is_writable=True),
+    ]
+
+
+def make_pump_buy_instruction(
+    user: Pubkey,
+    mint: Pubkey,
+    fee_recipient: Pubkey,
+    token_amount: int,
+    max_sol_cost: int,
+    associated_user: Pubkey | None = None,
+) -> Instruction:
+    """构建 Pump.fun buy 指令
+
+    Args:
+        user (Pubkey): 买方钱包
+        mint (Pubkey): 代币 mint 地址
+        fee_recipient (Pubkey): 手续费接收地址（来自 global account）
+        token_amount (int): 买入的代币数量
+        max_sol_cost (int): 最多花费的 SOL（lamports）
+        associated_user (Pubkey | None): 买方 ATA，默认按 user + mint 推导
+
+    Returns:
+        Instruction: buy 指令
+    """
+    if associated_user is None:
+        associated_user = get_user_ata(user, mint)
+    metas = _swap_metas(user, mint, fee_recipient, associated_user)
+    metas.extend(_BUY_TAIL_METAS)
+    data = _SWAP_ARGS.pack(PUMP_BUY_DISCRIMINATOR, token_amount, max_sol_cost)
+    return Instruction(PUMP_FUN_PROGRAM, data, metas)
+
+
+def make_pump_sell_instruction(
+    user: Pubkey,
+    mint: Pubkey,
+    fee_recipient: Pubkey,
+    token_amount: int,
+    min_sol_output: int,
+    associated_user: Pubkey | None = None,
+) -> Instruction:
+    """构建 Pump.fun sell 指令
+
+    Args:
+        user (Pubkey): 卖方钱包
+        mint (Pubkey): 代币 mint 地址
+        fee_recipient (Pubkey): 手续费接收地址（来自 global account）
+        token_amount (int): 卖出的代币数量
+        min_sol_output (int): 最少获得的 SOL（lamports）
+        associated_user (Pubkey | None): 卖方 ATA，默认按 user + mint 推导
+
+    Returns:
+        Instruction: sell 指令
+    """
+    if associated_user is None:
+        associated_user = get_user_ata(user, mint)
+    metas = _swap_metas(user, mint, fee_recipient, associated_user)
+    metas.extend(_SELL_TAIL_METAS)
+    data = _SWAP_ARGS.pack(PUMP_SELL_DISCRIMINATOR, token_amount, min_sol_output)
+    return Instruction(PUMP_FUN_PROGRAM, data, metas)
@@ -0,0 +1,222 @@
+"""报价服务
+
+为自动滑点提供 price impact，避免每个跟单者、每笔交易都同步请求一次 Jupiter 报价：
+
+1. 令牌桶限流，不超过 Jupiter 报价 API 的请求频率（默认每秒 1 次）
+2. 报价按 (input_mint, output_mint, swap_mode, 金额档位) 缓存数秒，金额按对数分档
+3. 同一个 key 的并发请求合并为一次上游请求
+4. 令牌耗尽或上游请求失败时，使用进程内缓存的储备量（bonding curve、池子）按恒定乘积估算
+
+50 个跟单者同时跟随同一笔交易时，最多只会产生一次上游报价。
+"""
+
+import asyncio
+import math
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Literal
+
+from loguru import logger
+
+from solbot_common.constants import WSOL
+
+# 根据代币地址返回 (SOL 储备量, 代币储备量)，均为最小单位；没有缓存时返回 None
+ReserveSource = Callable[[str], tuple[int, int] | None]
+
+QuoteKey = tuple[str, str, str, int]
+
+
+@dataclass(frozen=True)
+class Quote:
+    # 0~1 的小数
+    price_impact: float
+    source: Literal["jupiter", "local"]
+
+
+class TokenBucket:
+    """令牌桶，不阻塞调用方"""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Args:
+            rate (float): 每秒补充的令牌数
+            capacity (float): 桶容量
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        if self._tokens < tokens:
+            return False
+        self._tokens -= tokens
+        return True
+
+
+def amount_bucket(amount: int, buckets_per_octave: int = 4) -> int:
+    """金额档位，金额每翻一倍分为 `buckets_per_octave` 档"""
+    if amount <= 0:
+        return 0
+    return int(math.log2(amount) * buckets_per_octave)
+
+
+def estimate_price_impact(
+    reserve_in: int, reserve_out: int, amount: int, swap_mode: str = "ExactIn"
+) -> float:
+    """按恒定乘积估算 price impact（不含手续费）
+
+    ExactIn 时 amount 为输入数量，ExactOut 时 amount 为输出数量。
+    """
+    if reserve_in <= 0 or reserve_out <= 0 or amount <= 0:
+        return 0.0
+    if swap_mode == "ExactIn":
+        return amount / (reserve_in + amount)
+    if amount >= reserve_out:
+        return 1.0
+    return amount / reserve_out
+
+
+class QuoteService:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(
+        self,
+        rate: float = 1,
+        burst: float = 1,
+        ttl: float = 5,
+        max_entries: int = 1024,
+    ) -> None:
+        """
+        Args:
+            rate (float, optional): 每秒最多的上游报价次数. Defaults to 1.
+            burst (float, optional): 允许的突发请求数. Defaults to 1.
+            ttl (float, optional): 报价缓存时间（秒）. Defaults to 5.
+            max_entries (int, optional): 最多缓存的报价数. Defaults to 1024.
+        """
+        if self._initialized:
+            return
+        self._initialized = True
+        self.bucket = TokenBucket(rate, burst)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache: dict[QuoteKey, tuple[float, Quote]] = {}
+        self._inflight: dict[QuoteKey, asyncio.Task] = {}
+        self._reserve_sources: list[ReserveSource] = []
+        self._jupiter = None
+
+    def register_reserve_source(self, source: ReserveSource) -> None:
+        """注册本地储备量来源，用于上游不可用时估算 price impact"""
+        if source not in self._reserve_sources:
+            self._reserve_sources.append(source)
+
+    def _get_cached(self, key: QuoteKey) -> Quote | None:
+        item = self._cache.get(key)
+        if item is None:
+            return None
+        expires_at, quote = item
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        return quote
+
+    def _set_cached(self, key: QuoteKey, quote: Quote) -> None:
+        now = time.monotonic()
+        if len(self._cache) >= self.max_entries:
+            for k in [k for k, (expires_at, _) in self._cache.items() if expires_at < now]:
+                del self._cache[k]
+            while len(self._cache) >= self.max_entries:
+                del self._cache[next(iter(self._cache))]
+        self._cache[key] = (now + self.ttl, quote)
+
+    async def get_quote(
+        self, input_mint: str, output_mint: str, amount: int, swap_mode: str = "ExactIn"
+    ) -> Quote | None:
+        """获取报价
+
+        Returns:
+            Quote | None: 报价，上游不可用且没有本地储备量时返回 None
+        """
+        key = (input_mint, output_mint, swap_mode, amount_bucket(amount))
+        quote = self._get_cached(key)
+        if quote is not None:
+            return quote
+
+        task = self._inflight.get(key)
+        if task is None:
+            if not self.bucket.try_acquire():
+                logger.debug(f"Quote rate limited, estimate locally: {input_mint} -> {output_mint}")
+                return self._estimate_locally(input_mint, output_mint, amount)
+            task = asyncio.create_task(self._fetch(input_mint, output_mint, amount, swap_mode))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # 某个等待方被取消时不影响其他等待方
+        quote = await asyncio.shield(task)
+        if quote is None:
+            return self._estimate_locally(input_mint, output_mint, amount)
+        self._set_cached(key, quote)
+        return quote
+
+    async def _fetch(
+        self, input_mint: str, output_mint: str, amount: int, swap_mode: str
+    ) -> Quote | None:
+        from solbot_common.utils.utils import get_jupiter_client
+
+        if self._jupiter is None:
+            self._jupiter = get_jupiter_client()
+        try:
+            resp = await self._jupiter.quote(
+                input_mint=input_mint,
+                output_mint=output_mint,
+                amount=amount,
+                swap_mode=swap_mode,
+            )  # type: ignore[reportArgumentType]
+            return Quote(price_impact=float(Decimal(resp["priceImpactPct"])), source="jupiter")
+        except Exception as e:
+            logger.warning(f"Failed to get quote from jupiter: {e}")
+            return None
+
+    def _get_reserves(self, mint: str) -> tuple[int, int] | None:
+        for source in self._reserve_sources:
+            try:
+                reserves = source(mint)
+            except Exception as e:
+                logger.warning(f"Reserve source {source} failed: {e}")
+                continue
+            if reserves is not None:
+                return reserves
+        return None
+
+    def _estimate_locally(self, input_mint: str, output_mint: str, amount: int) -> Quote | None:
+        """按本地储备量估算
+
+        交易方向由输入、输出 mint 决定。跟单卖出时 swap_mode 为 ExactOut，但 amount
+        仍是卖出的代币数量，因此这里始终把 amount 视为输入数量。
+        """
+        wsol = str(WSOL)
+        if input_mint == wsol:
+            reserves = self._get_reserves(output_mint)
+            if reserves is None:
+                return None
+            reserve_in, reserve_out = reserves
+        elif output_mint == wsol:
+            reserves = self._get_reserves(input_mint)
+            if reserves is None:
+                return None
+            reserve_out, reserve_in = reserves
+        else:
+            return None
+        price_impact = estimate_price_impact(reserve_in, reserve_out, amount)
+        return Quote(price_impact=price_impact, source="local")
@@ -1,4 +1,3 @@
-from decimal import Decimal
 from functools import cache
 
 from jupiter_python_sdk.jupiter import Jupiter
@@ -9,15 +8,15 @@ from solders.keypair import Keypair  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
 from solders.signature import Signature  # type: ignore
 from solders.transaction_status import TransactionConfirmationStatus  # type: ignore
-from spl.token.instructions import get_associated_token_address
 
 from solbot_common.layouts.bonding_curve_account import BondingCurveAccount
 from solbot_common.layouts.global_account import GlobalAccount
 from solbot_common.layouts.mint_account import MintAccount
+from solbot_common.utils.pda import get_associated_token_address, get_pda
 
 
 def get_bonding_curve_pda(mint: Pubkey, program: Pubkey) -> Pubkey:
-    return Pubkey.find_program_address([b"bonding-curve", bytes(mint)], program)[0]
+    return get_pda([b"bonding-curve", bytes(mint)], program)
 
 
 async def get_bonding_curve_account(
@@ -71,6 +70,11 @@ def get_async_client() -> AsyncClient:
     return AsyncClient(settings.rpc.rpc_url)
 
 
+def get_websocket_url(rpc_url: str) -> str:
+    """RPC 地址对应的 websocket 地址，兼容本地的 http 节点"""
+    return rpc_url.replace("https://", "wss://").replace("http://", "ws://")
+
+
 def get_jupiter_client() -> Jupiter:
     rpc_client = get_async_client()
     jupiter = Jupiter(async_client=rpc_client, keypair=Keypair())
@@ -168,10 +172,6 @@ async def get_token_balance(token_account: Pubkey, client: AsyncClient) -> float
     return resp.value.ui_amount
 
 
-# FIXME: jupiter 的报价 API 有请求频率的限制
-#  后续需要重构该函数为独立的模块，并使用令牌桶来限制请求频率
-#  每秒最多 1 次，每分钟最多 60 次，每小时最多 3600 次
-#  否则会报错：429 Too Many Requests
 async def calculate_auto_slippage(
     input_mint: str,
     output_mint: str,
@@ -189,6 +189,9 @@ async def calculate_auto_slippage(
     2. 基础滑点为 price impact * 100 的 1.5 倍（百分比）
     3. 最小滑点为 250bps， 最大滑点为 3000bps
 
+    报价来自 `QuoteService`，已限流、缓存并合并并发请求，
+    上游不可用时按本地缓存的储备量估算。
+
     Args:
         input_mint (str): 输入代币的 mint 地址
         output_mint (str): 输出代币的 mint 地址
@@ -219,19 +222,21 @@ async def calculate_auto_slippage(
         f"mode: {swap_mode}, min: {min_slippage_bps} bps, max: {max_slippage_bps} bps"
     )
 
-    jupiter = get_jupiter_client()
+    from solbot_common.utils.quote import QuoteService
+
     try:
-        quote = await jupiter.quote(
+        quote = await QuoteService().get_quote(
             input_mint=input_mint,
             output_mint=output_mint,
             amount=amount,
             swap_mode=swap_mode,
-        )  # type: ignore[reportArgumentType]
+        )
+        if quote is None:
+            logger.warning(f"No quote available, use default slippage: {default_slippage_bps}")
+            return default_slippage_bps
 
-        # price_impact 是 0~1 的小数
-        price_impact = Decimal(quote["priceImpactPct"])
-        # 转换为百分比
-        price_impact_pct = float(price_impact * 100)
+        # price_impact 是 0~1 的小数，转换为百分比
+        price_impact_pct = quote.price_impact * 100
 
         # 基础滑点为 price impact 的倍数
         slippage = price_impact_pct * price_impact_multiplier
@@ -239,7 +244,7 @@ async def calculate_auto_slippage(
         slippage = min(slippage, max_slippage_bps / 100)
 
         logger.info(
-            f"Slippage calculation: price_impact={price_impact_pct}%, "
+            f"Slippage calculation: price_impact={price_impact_pct}% ({quote.source}), "
             f"multiplier={price_impact_multiplier}, final_slippage={slippage}%"
         )
         return int(slippage * 100)  # 转换为 bps
@@ -27,7 +27,10 @@ class BotSettingService:
 
     async def set(self, setting: BotSetting):
         key = f"setting:{setting.chat_id}:{setting.wallet_address}"
-        await self.redis.set(key, setting.to_json())
+        data = setting.to_json()
+        await self.redis.set(key, data)
+        # 通知其他进程（如 trading 的跟单路由索引）设置已变更
+        await self.redis.publish(self.channel, data)
 
     async def create_default(self, chat_id: int, wallet_address: str):
         setting = BotSetting(
@@ -20,6 +20,27 @@ class CopyTradeService:
         results = await session.execute(stmt)
         return [row.model_copy() for row in results.scalars().all()]
 
+    @classmethod
+    @provide_session
+    async def get_by_id(
+        cls, pk: int, *, session: AsyncSession = NEW_ASYNC_SESSION
+    ) -> CopyTrade | None:
+        """获取指定 id 的跟单"""
+        stmt = select(CopyTrade).where(CopyTrade.id == pk).limit(1)
+        result = await session.execute(stmt)
+        obj = result.scalar_one_or_none()
+        if obj is None:
+            return None
+        return obj.model_copy()
+
+    @classmethod
+    @provide_session
+    async def get_active(cls, *, session: AsyncSession = NEW_ASYNC_SESSION) -> list[CopyTrade]:
+        """获取所有活跃跟单"""
+        stmt = select(CopyTrade).where(CopyTrade.active == 1)
+        results = await session.execute(stmt)
+        return [row.model_copy() for row in results.scalars().all()]
+
     @classmethod
     @provide_session
     async def get_active_wallet_addresses(
@@ -80,6 +80,7 @@ class GeyserClient:
         endpoint: str,
         x_token: str | None = None,
         x_request_snapshot: bool = False,
+        insecure: bool = False,
         **kwargs,
     ) -> "GeyserClient":
         interceptor = InterceptorXToken(x_token=x_token, x_request_snapshot=x_request_snapshot)
@@ -88,6 +89,10 @@ class GeyserClient:
         else:
             kwargs["interceptors"] = [interceptor]
 
+        if insecure:
+            # 本地替身（yellowstone_grpc.localnet）不使用 TLS
+            channel = grpc.aio.insecure_channel(endpoint, **kwargs)
+            return cls(channel)
         credentials = grpc.ssl_channel_credentials()
         channel = grpc.aio.secure_channel(endpoint, credentials, **kwargs)
         return cls(channel)
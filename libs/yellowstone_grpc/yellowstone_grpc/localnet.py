@@ -0,0 +1,259 @@
+"""本地 Yellowstone gRPC 替身
+
+与 `solbot_common.localnet` 的 RPC 替身共享 `LocalChain`，`Subscribe` 按订阅的交易、账户过滤条件推送
+`LocalChain` 中落地的交易和账户变更。交易由 RPC 的 JSON 格式转换为 protobuf。
+
+使用不加密的端口，客户端通过 `GeyserClient.connect(endpoint, insecure=True)` 连接。
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import base58
+import grpc
+from loguru import logger
+from solbot_common.localnet.chain import LocalChain
+from solbot_common.localnet.fixtures import AccountFixture, account_keys_of
+
+from .grpc import geyser_pb2, geyser_pb2_grpc, solana_storage_pb2
+
+
+def _token_balance(balance: dict) -> solana_storage_pb2.TokenBalance:
+    ui = balance.get("uiTokenAmount") or {}
+    return solana_storage_pb2.TokenBalance(
+        account_index=balance["accountIndex"],
+        mint=balance["mint"],
+        owner=balance.get("owner", ""),
+        program_id=balance.get("programId", ""),
+        ui_token_amount=solana_storage_pb2.UiTokenAmount(
+            ui_amount=ui.get("uiAmount") or 0,
+            decimals=ui.get("decimals", 0),
+            amount=ui.get("amount", "0"),
+            ui_amount_string=ui.get("uiAmountString", ""),
+        ),
+    )
+
+
+def _instruction(ix: dict) -> dict:
+    return {
+        "program_id_index": ix["programIdIndex"],
+        "accounts": bytes(ix["accounts"]),
+        "data": base58.b58decode(ix["data"]),
+    }
+
+
+def transaction_to_proto(tx: dict) -> geyser_pb2.SubscribeUpdateTransactionInfo:
+    """RPC 的 getTransaction（json 编码）结果转换为 protobuf"""
+    transaction = tx["transaction"]
+    message = transaction["message"]
+    header = message["header"]
+    meta = tx.get("meta") or {}
+    loaded = meta.get("loadedAddresses") or {}
+    signatures = [base58.b58decode(sig) for sig in transaction["signatures"]]
+    err = meta.get("err")
+
+    pb_meta = solana_storage_pb2.TransactionStatusMeta(
+        fee=meta.get("fee", 0),
+        pre_balances=meta.get("preBalances", []),
+        post_balances=meta.get("postBalances", []),
+        inner_instructions=[
+            solana_storage_pb2.InnerInstructions(
+                index=inner["index"],
+                instructions=[
+                    solana_storage_pb2.InnerInstruction(
+                        **_instruction(ix), stack_height=ix.get("stackHeight") or 0
+                    )
+                    for ix in inner["instructions"]
+                ],
+            )
+            for inner in meta.get("innerInstructions") or []
+        ],
+        log_messages=meta.get("logMessages") or [],
+        pre_token_balances=[_token_balance(b) for b in meta.get("preTokenBalances") or []],
+        post_token_balances=[_token_balance(b) for b in meta.get("postTokenBalances") or []],
+        loaded_writable_addresses=[base58.b58decode(k) for k in loaded.get("writable", [])],
+        loaded_readonly_addresses=[base58.b58decode(k) for k in loaded.get("readonly", [])],
+        compute_units_consumed=meta.get("computeUnitsConsumed") or 0,
+    )
+    if err is not None:
+        pb_meta.err.err = str(err).encode()
+
+    return geyser_pb2.SubscribeUpdateTransactionInfo(
+        signature=signatures[0],
+        is_vote=False,
+        transaction=solana_storage_pb2.Transaction(
+            signatures=signatures,
+            message=solana_storage_pb2.Message(
+                header=solana_storage_pb2.MessageHeader(
+                    num_required_signatures=header["numRequiredSignatures"],
+                    num_readonly_signed_accounts=header["numReadonlySignedAccounts"],
+                    num_readonly_unsigned_accounts=header["numReadonlyUnsignedAccounts"],
+                ),
+                account_keys=[base58.b58decode(k) for k in message["accountKeys"]],
+                recent_blockhash=base58.b58decode(message["recentBlockhash"]),
+                instructions=[
+                    solana_storage_pb2.CompiledInstruction(**_instruction(ix))
+                    for ix in message["instructions"]
+                ],
+                versioned=tx.get("version") not in (None, "legacy"),
+                address_table_lookups=[
+                    solana_storage_pb2.MessageAddressTableLookup(
+                        account_key=base58.b58decode(lookup["accountKey"]),
+                        writable_indexes=bytes(lookup["writableIndexes"]),
+                        readonly_indexes=bytes(lookup["readonlyIndexes"]),
+                    )
+                    for lookup in message.get("addressTableLookups") or []
+                ],
+            ),
+        ),
+        meta=pb_meta,
+    )
+
+
+def transaction_filters(request: geyser_pb2.SubscribeRequest, tx: dict) -> list[str]:
+    """交易匹配的过滤条件名"""
+    keys = set(account_keys_of(tx))
+    failed = (tx.get("meta") or {}).get("err") is not None
+    signature = tx["transaction"]["signatures"][0]
+    matched = []
+    for name, f in request.transactions.items():
+        if f.HasField("failed") and f.failed != failed:
+            continue
+        if f.HasField("signature") and f.signature != signature:
+            continue
+        if f.account_include and not keys.intersection(f.account_include):
+            continue
+        if f.account_exclude and keys.intersection(f.account_exclude):
+            continue
+        if f.account_required and not keys.issuperset(f.account_required):
+            continue
+        matched.append(name)
+    return matched
+
+
+def account_filters(
+    request: geyser_pb2.SubscribeRequest, pubkey: str, account: AccountFixture
+) -> list[str]:
+    matched = []
+    for name, f in request.accounts.items():
+        if f.account and pubkey not in f.account:
+            continue
+        if f.owner and account.owner not in f.owner:
+            continue
+        matched.append(name)
+    return matched
+
+
+class LocalGeyserServicer(geyser_pb2_grpc.GeyserServicer):
+    def __init__(self, chain: LocalChain) -> None:
+        self.chain = chain
+
+    async def Subscribe(
+        self, request_iterator: AsyncIterator[geyser_pb2.SubscribeRequest], context
+    ) -> AsyncIterator[geyser_pb2.SubscribeUpdate]:
+        updates: asyncio.Queue[geyser_pb2.SubscribeUpdate] = asyncio.Queue()
+        # 与 Yellowstone 一致，新的订阅请求整体替换旧的过滤条件
+        state = {"request": geyser_pb2.SubscribeRequest()}
+
+        def _on_transaction(slot: int, tx: dict) -> None:
+            filters = transaction_filters(state["request"], tx)
+            if not filters:
+                return
+            update = geyser_pb2.SubscribeUpdate(
+                filters=filters,
+                transaction=geyser_pb2.SubscribeUpdateTransaction(
+                    transaction=transaction_to_proto(tx), slot=slot
+                ),
+            )
+            updates.put_nowait(update)
+
+        def _on_account(slot: int, pubkey: str, account: AccountFixture) -> None:
+            filters = account_filters(state["request"], pubkey, account)
+            if not filters:
+                return
+            update = geyser_pb2.SubscribeUpdate(
+                filters=filters,
+                account=geyser_pb2.SubscribeUpdateAccount(
+                    slot=slot,
+                    account=geyser_pb2.SubscribeUpdateAccountInfo(
+                        pubkey=base58.b58decode(pubkey),
+                        lamports=account.lamports,
+                        owner=base58.b58decode(account.owner),
+                        executable=account.executable,
+                        rent_epoch=account.rent_epoch,
+                        data=account.data,
+                    ),
+                ),
+            )
+            updates.put_nowait(update)
+
+        async def _read_requests() -> None:
+            async for request in request_iterator:
+                if request.HasField("ping"):
+                    updates.put_nowait(
+                        geyser_pb2.SubscribeUpdate(
+                            pong=geyser_pb2.SubscribeUpdatePong(id=request.ping.id)
+                        )
+                    )
+                if request.transactions or request.accounts:
+                    state["request"] = request
+
+        unsubscribe_tx = self.chain.on_transaction(_on_transaction)
+        unsubscribe_account = self.chain.on_account(_on_account)
+        reader = asyncio.create_task(_read_requests())
+        try:
+            while True:
+                yield await updates.get()
+        finally:
+            reader.cancel()
+            unsubscribe_tx()
+            unsubscribe_account()
+
+    async def Ping(self, request, context):
+        return geyser_pb2.PongResponse(count=request.count)
+
+    async def GetLatestBlockhash(self, request, context):
+        blockhash, last_valid_block_height = self.chain.latest_blockhash()
+        return geyser_pb2.GetLatestBlockhashResponse(
+            slot=self.chain.slot,
+            blockhash=blockhash,
+            last_valid_block_height=last_valid_block_height,
+        )
+
+    async def GetBlockHeight(self, request, context):
+        return geyser_pb2.GetBlockHeightResponse(block_height=self.chain.block_height())
+
+    async def GetSlot(self, request, context):
+        return geyser_pb2.GetSlotResponse(slot=self.chain.slot)
+
+    async def IsBlockhashValid(self, request, context):
+        return geyser_pb2.IsBlockhashValidResponse(
+            slot=self.chain.slot, valid=self.chain.is_blockhash_valid(request.blockhash)
+        )
+
+    async def GetVersion(self, request, context):
+        return geyser_pb2.GetVersionResponse(version="localnet")
+
+
+class LocalGeyserServer:
+    def __init__(self, chain: LocalChain, host: str = "127.0.0.1", port: int = 10000) -> None:
+        self.chain = chain
+        self.host = host
+        self.port = port
+        self._server: grpc.aio.Server | None = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        self._server = grpc.aio.server()
+        geyser_pb2_grpc.add_GeyserServicer_to_server(LocalGeyserServicer(self.chain), self._server)
+        self._server.add_insecure_port(self.endpoint)
+        await self._server.start()
+        logger.info(f"Local geyser listening on {self.endpoint}")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            await self._server.stop(grace=1)
+            self._server = None
@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+"""跟单链路端到端压测
+
+按给定速率合成目标钱包的交易，在同一进程中运行 wallet-tracker 的 `TransactionWorker`、
+trading 的 `CopyTradeProcessor` 和交易事件消费者，连接本地 Redis 和本地 RPC 替身
+（`solbot_common.localnet`），统计各阶段的吞吐、队列积压和延迟分位数，结果以 JSON 输出。
+
+注入位置（--entry）：
+
+- tx_detail: 以模板交易替换签名者后写入 `tx_detail:new`，经过解析、跟单、交易全部阶段
+- tx_event: 直接写入 `TxEvent`，从跟单阶段开始
+- swap_event: 为每个跟单者直接写入 `SwapEvent`，只测交易阶段
+
+各阶段的完成时间取自输出 stream 的消息 id（Redis 写入时间，毫秒精度），注入时间取计划发送时间，
+因此注入端被阻塞时的排队时间也计入延迟。
+
+注意：
+
+- 跟单配置在内存中合成，不读取数据库；交易阶段仍需从数据库读取跟单者私钥，
+  数据库中没有对应钱包时交易记为失败，但失败结果同样写入 `swap_event:result` 并计入延迟
+- `CopyTradeProcessor._process_copytrade` 目前暂停了跟单（直接抛出异常），
+  从 tx_detail / tx_event 注入时不会产生 `SwapEvent`，报告中 copytrade 之后的阶段为空，
+  测量交易阶段请使用 --entry swap_event
+- 会在配置的 Redis 中创建消费组并写入 stream，只应对本地 Redis 运行；--reset 会先删除相关 stream
+
+用法:
+    python scripts/bench_copytrade.py [--entry tx_detail] [--rate 50] [--duration 30]
+        [--wallets 100] [--wallet-dist zipf] [--followers 5] [--follower-dist poisson]
+        [--rpc-latency 0.02] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import bisect
+import math
+import random
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+
+import orjson as json
+from loguru import logger
+from solbot_common.config import settings
+from solbot_common.constants import PUMP_FUN_PROGRAM_ID, WSOL
+from solbot_common.cp.base import from_fields
+from solbot_common.cp.partition import partition_channels
+from solbot_common.cp.swap_event import SWAP_EVENT_CHANNEL, TRADING_CONSUMER_GROUP
+from solbot_common.cp.swap_result import SWAP_EVENT_CHANNEL as SWAP_RESULT_CHANNEL
+from solbot_common.cp.tx_event import NEW_TX_EVENT_CHANNEL
+from solbot_common.localnet import Fault, FaultInjector, LocalChain, LocalRpcServer
+from solbot_common.localnet.fixtures import unwrap_transaction
+from solbot_common.types.swap import SwapEvent, SwapResult
+from solbot_common.types.tx import TxEvent, TxType
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_TEMPLATES = [
+    ROOT / "tests" / "wallet_tracker" / "tx_examples" / "raw" / name
+    for name in ("open.json", "open1.json", "open2.json")
+]
+NEW_TX_DETAIL_CHANNEL = "tx_detail:new"
+TX_EVENT_CONSUMER_GROUP = "trading:tx_event"
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+# --- 分布 ---
+
+
+class WalletPicker:
+    """按分布选择产生交易的目标钱包"""
+
+    def __init__(self, wallets: Sequence[str], dist: str, zipf_s: float, rng: random.Random):
+        self.wallets = list(wallets)
+        self.rng = rng
+        self._cum_weights: list[float] | None = None
+        if dist == "zipf":
+            total = 0.0
+            self._cum_weights = []
+            for rank in range(1, len(self.wallets) + 1):
+                total += 1 / rank**zipf_s
+                self._cum_weights.append(total)
+
+    def pick(self) -> str:
+        if self._cum_weights is None:
+            return self.wallets[self.rng.randrange(len(self.wallets))]
+        x = self.rng.random() * self._cum_weights[-1]
+        return self.wallets[bisect.bisect_left(self._cum_weights, x)]
+
+
+def _poisson(mean: float, rng: random.Random) -> int:
+    # Knuth，均值不大时足够快
+    limit, k, p = math.exp(-mean), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def follower_counts(wallets: int, mean: float, dist: str, zipf_s: float, rng: random.Random):
+    """每个目标钱包的跟单者数量
+
+    - fixed: 每个钱包都是 mean 个
+    - poisson: 泊松分布
+    - zipf: 与钱包的交易频率同序，排名越靠前的钱包跟单者越多，总数约为 wallets * mean
+    """
+    if dist == "fixed":
+        return [round(mean)] * wallets
+    if dist == "poisson":
+        return [_poisson(mean, rng) for _ in range(wallets)]
+    weights = [1 / rank**zipf_s for rank in range(1, wallets + 1)]
+    total = sum(weights)
+    return [round(mean * wallets * weight / total) for weight in weights]
+
+
+# --- 合成数据 ---
+
+
+def make_followers(wallets: Sequence[str], counts: Sequence[int]):
+    """在内存中合成跟单配置及其 bot 设置"""
+    from solbot_common.models.tg_bot.copytrade import CopyTrade
+    from solbot_common.types.bot_setting import BotSetting
+
+    copytrades, bot_settings = [], {}
+    pk = 0
+    for wallet, count in zip(wallets, counts, strict=True):
+        for _ in range(count):
+            pk += 1
+            owner = str(Pubkey.new_unique())
+            copytrades.append(
+                CopyTrade(
+                    id=pk,
+                    owner=owner,
+                    chat_id=pk,
+                    target_wallet=wallet,
+                    is_fixed_buy=True,
+                    fixed_buy_amount=0.01,
+                    auto_follow=False,
+                    stop_loss=False,
+                    no_sell=False,
+                    priority=0.0001,
+                    anti_sandwich=False,
+                    auto_slippage=False,
+                    custom_slippage_bps=250,
+                    active=True,
+                )
+            )
+            bot_settings[(pk, owner)] = BotSetting(wallet_address=owner, chat_id=pk)
+    return copytrades, bot_settings
+
+
+class TxSynthesizer:
+    """以模板交易为基础，替换签名者、签名和区块时间"""
+
+    def __init__(self, templates: Sequence[Path], rng: random.Random) -> None:
+        self.templates = [
+            json.dumps(unwrap_transaction(json.loads(path.read_bytes()))) for path in templates
+        ]
+        self.rng = rng
+
+    def make(self, wallet: str) -> dict:
+        tx = json.loads(self.templates[self.rng.randrange(len(self.templates))])
+        account_keys = tx["transaction"]["message"]["accountKeys"]
+        signer = account_keys[0]
+        if isinstance(signer, dict):
+            old, signer["pubkey"] = signer["pubkey"], wallet
+        else:
+            old, account_keys[0] = signer, wallet
+        meta = tx["meta"]
+        for key in ("preTokenBalances", "postTokenBalances"):
+            for balance in meta.get(key) or []:
+                if balance.get("owner") == old:
+                    balance["owner"] = wallet
+        tx["transaction"]["signatures"][0] = str(Signature.new_unique())
+        tx["blockTime"] = int(time.time())
+        return tx
+
+
+def make_tx_event(wallet: str, mint: str) -> TxEvent:
+    return TxEvent(
+        signature=str(Signature.new_unique()),
+        from_amount=500_000_000,
+        from_decimals=9,
+        to_amount=17_000_000_000,
+        to_decimals=6,
+        mint=mint,
+        who=wallet,
+        tx_type=TxType.OPEN_POSITION,
+        tx_direction="buy",
+        timestamp=int(time.time()),
+        pre_token_amount=0,
+        post_token_amount=17_000_000_000,
+        program_id=PUMP_FUN_PROGRAM_ID,
+    )
+
+
+def make_swap_event(user_pubkey: str, tx_event: TxEvent) -> SwapEvent:
+    return SwapEvent(
+        user_pubkey=user_pubkey,
+        swap_mode="ExactIn",
+        input_mint=str(WSOL),
+        output_mint=tx_event.mint,
+        amount=10_000_000,
+        ui_amount=0.01,
+        timestamp=tx_event.timestamp,
+        priority_fee=0.0001,
+        slippage_bps=250,
+        program_id=tx_event.program_id,
+        by="copytrade",
+        tx_event=tx_event,
+    )
+
+
+# --- 统计 ---
+
+
+def summarize(values: Sequence[float]) -> dict:
+    """延迟（毫秒）的分位数，nearest-rank"""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    summary: dict = {"count": len(ordered), "mean": sum(ordered) / len(ordered)}
+    for p in PERCENTILES:
+        index = max(math.ceil(p / 100 * len(ordered)) - 1, 0)
+        summary[f"p{p:g}"] = ordered[index]
+    summary["max"] = ordered[-1]
+    return {k: round(v, 3) if isinstance(v, float) else v for k, v in summary.items()}
+
+
+def summarize_samples(values: Sequence[int]) -> dict:
+    if not values:
+        return {}
+    return {"max": max(values), "mean": round(sum(values) / len(values), 3), "last": values[-1]}
+
+
+class StageCollector:
+    """读取各阶段输出的 stream，记录每个事件首次出现的时间
+
+    不加入消费组，不影响被测的消费者。
+    """
+
+    def __init__(self, redis, streams: Sequence[str], clock_offset: float, start_id: str) -> None:
+        self.redis = redis
+        self.clock_offset = clock_offset
+        self.last_ids = {stream: start_id for stream in streams}
+        # 签名 -> 注入时间
+        self.injected: dict[str, float] = {}
+        self.tx_events: dict[str, float] = {}
+        # (签名, 跟单者) -> 时间
+        self.swap_events: dict[tuple[str, str], float] = {}
+        self.swap_results: dict[tuple[str, str], float] = {}
+        self.swap_failed = 0
+        self.last_output_at = time.time()
+        self._task: asyncio.Task | None = None
+
+    def _time_of(self, message_id: str) -> float:
+        # stream id 为 Redis 的毫秒时间戳，换算为本地时钟
+        return int(message_id.split("-", 1)[0]) / 1000 - self.clock_offset
+
+    def _on_message(self, stream: str, message_id: str, fields: dict) -> None:
+        ts = self._time_of(message_id)
+        if stream == NEW_TX_EVENT_CHANNEL:
+            tx_event = from_fields(TxEvent, fields)
+            self.tx_events.setdefault(tx_event.signature, ts)
+        elif stream == SWAP_RESULT_CHANNEL:
+            swap_result = from_fields(SwapResult, fields)
+            tx_event = swap_result.swap_event.tx_event
+            if tx_event is None:
+                return
+            key = (tx_event.signature, swap_result.user_pubkey)
+            if key not in self.swap_results:
+                self.swap_results[key] = ts
+                if swap_result.transaction_hash is None:
+                    self.swap_failed += 1
+        else:
+            swap_event = from_fields(SwapEvent, fields)
+            if swap_event.tx_event is None:
+                return
+            self.swap_events.setdefault((swap_event.tx_event.signature, swap_event.user_pubkey), ts)
+        self.last_output_at = time.time()
+
+    async def _loop(self) -> None:
+        while True:
+            resp = await self.redis.xread(self.last_ids, count=1000, block=100)
+            for stream, messages in resp or []:
+                for message_id, fields in messages:
+                    self.last_ids[stream] = message_id
+                    try:
+                        self._on_message(stream, message_id, fields)
+                    except Exception as e:
+                        logger.warning(f"Failed to decode {stream} {message_id}: {e}")
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def stages(self, entry: str, started_at: float) -> dict:
+        injected, tx_events = self.injected, self.tx_events
+        stages: dict[str, list[float]] = {"copytrade": [], "trading": [], "end_to_end": []}
+        if entry == "tx_detail":
+            stages["parse"] = [
+                (ts - injected[sig]) * 1000 for sig, ts in tx_events.items() if sig in injected
+            ]
+        for (sig, _), ts in self.swap_events.items():
+            if sig in tx_events and entry != "swap_event":
+                stages["copytrade"].append((ts - tx_events[sig]) * 1000)
+        for key, ts in self.swap_results.items():
+            if key in self.swap_events:
+                stages["trading"].append((ts - self.swap_events[key]) * 1000)
+            if key[0] in injected:
+                stages["end_to_end"].append((ts - injected[key[0]]) * 1000)
+
+        outputs = {
+            "parse": tx_events.values(),
+            "copytrade": self.swap_events.values(),
+            "trading": self.swap_results.values(),
+            "end_to_end": self.swap_results.values(),
+        }
+        report = {}
+        for name, latencies in stages.items():
+            if not latencies:
+                continue
+            last = max(outputs[name])
+            elapsed = max(last - started_at, 1e-9)
+            report[name] = {
+                "completed": len(latencies),
+                "throughput": round(len(latencies) / elapsed, 3),
+                "latency_ms": summarize(latencies),
+            }
+        return report
+
+
+# --- 运行 ---
+
+
+async def _wait_for_groups(redis, groups: Sequence[tuple[str, str]], timeout: float) -> None:
+    """等待消费者创建消费组，消费组以 `$` 创建，之前写入的消息不会被消费"""
+    deadline = time.monotonic() + timeout
+    pending = list(groups)
+    while pending:
+        stream, group = pending[0]
+        try:
+            names = {item["name"] for item in await redis.xinfo_groups(stream)}
+        except Exception:
+            names = set()
+        if group in names:
+            pending.pop(0)
+            continue
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"consumer group {group} of {stream} not ready")
+        await asyncio.sleep(0.1)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+
+    fault = Fault(latency=args.rpc_latency, jitter=args.rpc_jitter, error_rate=args.rpc_error_rate)
+    rpc = LocalRpcServer(
+        LocalChain(slot_time=args.slot_time),
+        FaultInjector(fault, seed=args.seed),
+        port=args.rpc_port,
+    )
+    await rpc.start()
+    # 各服务创建 RPC client 时读取配置，需在创建前指向本地替身
+    settings.rpc.endpoints = [rpc.url]
+
+    from solbot_db.redis import RedisClient
+    from trading.main import Trading
+    from wallet_tracker.tx_worker import TransactionWorker
+
+    redis = RedisClient.get_instance()
+    partitions = settings.trading.partitions
+    swap_event_channels = partition_channels(SWAP_EVENT_CHANNEL, partitions)
+    if args.reset:
+        await redis.delete(
+            NEW_TX_DETAIL_CHANNEL, NEW_TX_EVENT_CHANNEL, SWAP_RESULT_CHANNEL, *swap_event_channels
+        )
+
+    wallets = [str(Pubkey.new_unique()) for _ in range(args.wallets)]
+    counts = follower_counts(args.wallets, args.followers, args.follower_dist, args.zipf_s, rng)
+    copytrades, bot_settings = make_followers(wallets, counts)
+    followers: dict[str, list[str]] = {}
+    for copytrade in copytrades:
+        followers.setdefault(copytrade.target_wallet, []).append(copytrade.owner)
+    picker = WalletPicker(wallets, args.wallet_dist, args.zipf_s, rng)
+    mints = [str(Pubkey.new_unique()) for _ in range(args.mints)]
+
+    trading = Trading()
+    processor = trading.copytrade_processor
+    # 跳过从数据库加载索引，直接使用合成的跟单配置
+    processor.copytrade_index.routes.replace_all(copytrades, bot_settings)
+
+    tasks: list[asyncio.Task] = []
+    groups: list[tuple[str, str]] = []
+    worker = None
+    if args.entry == "tx_detail":
+        worker = TransactionWorker(redis)
+        tasks.append(asyncio.create_task(worker.start(args.workers)))
+    if args.entry in ("tx_detail", "tx_event"):
+        tasks.append(asyncio.create_task(processor.tx_event_consumer.start()))
+        groups.append((NEW_TX_EVENT_CHANNEL, TX_EVENT_CONSUMER_GROUP))
+    tasks.append(asyncio.create_task(trading.swap_event_consumer.start()))
+    groups.extend((channel, TRADING_CONSUMER_GROUP) for channel in swap_event_channels)
+    await _wait_for_groups(redis, groups, timeout=settings.trading.partition_lease_ttl * 3)
+
+    seconds, microseconds = await redis.time()
+    redis_now = int(seconds) + int(microseconds) / 1e6
+    clock_offset = redis_now - time.time()
+    streams = [NEW_TX_EVENT_CHANNEL, *swap_event_channels, SWAP_RESULT_CHANNEL]
+    collector = StageCollector(redis, streams, clock_offset, f"{int(redis_now * 1000)}-0")
+    collector.start()
+
+    from solbot_common.cp.swap_event import SwapEventProducer
+    from solbot_common.cp.tx_event import TxEventProducer
+
+    synthesizer = TxSynthesizer(args.template or DEFAULT_TEMPLATES, rng)
+    tx_event_producer = TxEventProducer(redis)
+    swap_event_producer = SwapEventProducer(redis, partitions)
+
+    async def _inject(scheduled_at: float) -> None:
+        wallet = picker.pick()
+        if args.entry == "tx_detail":
+            tx = synthesizer.make(wallet)
+            collector.injected[tx["transaction"]["signatures"][0]] = scheduled_at
+            await redis.lpush(NEW_TX_DETAIL_CHANNEL, json.dumps(tx).decode())
+            return
+        tx_event = make_tx_event(wallet, mints[rng.randrange(len(mints))])
+        collector.injected[tx_event.signature] = scheduled_at
+        if args.entry == "tx_event":
+            await tx_event_producer.produce(tx_event)
+        else:
+            await swap_event_producer.produce_many(
+                [make_swap_event(owner, tx_event) for owner in followers.get(wallet, [])]
+            )
+
+    # 开环注入：按计划时间发送，不等待上一次注入完成
+    samples: dict[str, list[int]] = {"tx_detail": [], "tx_event": [], "swap_event": []}
+    injections: set[asyncio.Task] = set()
+    started_at = time.time()
+    next_at = started_at
+    next_sample = started_at
+    injected = 0
+    while next_at < started_at + args.duration:
+        now = time.time()
+        if now < next_at:
+            await asyncio.sleep(next_at - now)
+        task = asyncio.create_task(_inject(next_at))
+        injections.add(task)
+        task.add_done_callback(injections.discard)
+        injected += 1
+        if args.arrival == "poisson":
+            next_at += rng.expovariate(args.rate)
+        else:
+            next_at += 1 / args.rate
+        if time.time() >= next_sample:
+            await _sample(redis, processor, trading, samples)
+            next_sample += args.sample_interval
+    injection_elapsed = time.time() - started_at
+    await asyncio.gather(*injections, return_exceptions=True)
+
+    # 等待积压处理完，一段时间内没有新的输出即结束
+    deadline = time.time() + args.drain_timeout
+    drained = False
+    while time.time() < deadline:
+        await asyncio.sleep(args.sample_interval)
+        queued = await _sample(redis, processor, trading, samples)
+        if queued == 0 and time.time() - collector.last_output_at > args.idle:
+            drained = True
+            break
+
+    await collector.stop()
+    if worker is not None:
+        await worker.stop()
+    await processor.tx_event_consumer.stop()
+    await trading.swap_event_consumer.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await rpc.stop()
+
+    return {
+        "config": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        "started_at": started_at,
+        "duration": round(injection_elapsed, 3),
+        "injected": injected,
+        "injection_rate": round(injected / injection_elapsed, 3),
+        "wallets": args.wallets,
+        "followers": len(copytrades),
+        "partitions": partitions,
+        "outputs": {
+            "tx_events": len(collector.tx_events),
+            "swap_events": len(collector.swap_events),
+            "swap_results": len(collector.swap_results),
+            "swap_failed": collector.swap_failed,
+        },
+        "stages": collector.stages(args.entry, started_at),
+        "queues": {name: summarize_samples(values) for name, values in samples.items()},
+        "rpc": {"calls": dict(rpc.call_counts), "sent_transactions": rpc.chain.sent_count},
+        "drained": drained,
+    }
+
+
+async def _sample(redis, processor, trading, samples: dict[str, list[int]]) -> int:
+    """记录各队列的积压，返回积压总数"""
+    tx_detail = await redis.llen(NEW_TX_DETAIL_CHANNEL)
+    consumer = processor.tx_event_consumer
+    tx_event = ((await consumer.get_lag()) or 0) + consumer.in_flight if consumer.is_running else 0
+    swap_event = sum(
+        (metrics["lag"] or 0) + (metrics["in_flight"] or 0)
+        for metrics in (await trading.swap_event_consumer.metrics()).values()
+    )
+    samples["tx_detail"].append(tx_detail)
+    samples["tx_event"].append(tx_event)
+    samples["swap_event"].append(swap_event)
+    return tx_detail + tx_event + swap_event
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--entry", choices=["tx_detail", "tx_event", "swap_event"], default="tx_detail"
+    )
+    parser.add_argument("--rate", type=float, default=50, help="target wallet trades per second")
+    parser.add_argument("--duration", type=float, default=30, help="injection seconds")
+    parser.add_argument("--arrival", choices=["uniform", "poisson"], default="poisson")
+    parser.add_argument("--wallets", type=int, default=100, help="number of target wallets")
+    parser.add_argument("--wallet-dist", choices=["uniform", "zipf"], default="zipf")
+    parser.add_argument("--followers", type=float, default=5, help="mean followers per wallet")
+    parser.add_argument("--follower-dist", choices=["fixed", "poisson", "zipf"], default="poisson")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="zipf exponent")
+    parser.add_argument("--mints", type=int, default=50, help="tokens traded (tx_event/swap_event)")
+    parser.add_argument("--template", type=Path, action="append", help="raw transaction template")
+    parser.add_argument("--workers", type=int, default=2, help="wallet-tracker workers")
+    parser.add_argument("--rpc-port", type=int, default=8899)
+    parser.add_argument("--rpc-latency", type=float, default=0, help="seconds per RPC call")
+    parser.add_argument("--rpc-jitter", type=float, default=0)
+    parser.add_argument("--rpc-error-rate", type=float, default=0)
+    parser.add_argument("--slot-time", type=float, default=0.4)
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="queue sampling seconds")
+    parser.add_argument("--idle", type=float, default=2, help="stop draining after idle seconds")
+    parser.add_argument("--drain-timeout", type=float, default=60)
+    parser.add_argument("--reset", action="store_true", help="delete benchmark streams first")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", type=Path, help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    # 每个事件的 INFO 日志会显著影响吞吐
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    report = asyncio.run(run(args))
+    body = json.dumps(report, option=json.OPT_INDENT_2)
+    if args.output:
+        args.output.write_bytes(body)
+    sys.stdout.write(body.decode() + "\n")
+
+
+if __name__ == "__main__":
+    main()
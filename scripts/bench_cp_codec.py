@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""stream 事件编码基准
+
+对比 JSON 与二进制编码（solbot_common.cp.codec）的编码、解码耗时和消息大小。
+消费者读取的是完整的 stream 字段，因此同时测量 `to_fields`/`from_fields`（含 base64）。
+
+用法:
+    python scripts/bench_cp_codec.py [-n 20000]
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+from solbot_common.constants import WSOL
+from solbot_common.cp.base import from_fields, to_fields
+from solbot_common.cp.codec import decode_fields
+from solbot_common.types.swap import SwapEvent
+from solbot_common.types.tx import TxEvent, TxType
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+
+
+def make_swap_event() -> SwapEvent:
+    mint = str(Pubkey.new_unique())
+    tx_event = TxEvent(
+        signature=str(Signature.new_unique()),
+        from_amount=1_500_000_000,
+        from_decimals=9,
+        to_amount=35_000_000_000,
+        to_decimals=6,
+        mint=mint,
+        who=str(Pubkey.new_unique()),
+        tx_type=TxType.OPEN_POSITION,
+        tx_direction="buy",
+        timestamp=int(time.time()),
+        pre_token_amount=0,
+        post_token_amount=35_000_000_000,
+        program_id=str(Pubkey.new_unique()),
+    )
+    return SwapEvent(
+        user_pubkey=str(Pubkey.new_unique()),
+        swap_mode="ExactIn",
+        input_mint=str(WSOL),
+        output_mint=mint,
+        amount=100_000_000,
+        ui_amount=0.1,
+        timestamp=int(time.time()),
+        priority_fee=0.0001,
+        slippage_bps=250,
+        by="copytrade",
+        tx_event=tx_event,
+    )
+
+
+def _bench(name: str, n: int, func: Callable[[], object]) -> None:
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<32} {elapsed / n * 1e6:>8.2f} us/op  ({n / elapsed:>10.0f} ops/s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=20000, help="iterations")
+    args = parser.parse_args()
+    n = args.n
+
+    swap_event = make_swap_event()
+    tx_event = swap_event.tx_event
+    assert tx_event is not None
+
+    json_str = swap_event.to_json()
+    buf = swap_event.to_bytes()
+    fields = to_fields(swap_event)
+    json_fields = {"data": json_str}
+    assert SwapEvent.from_bytes(buf) == swap_event, "swap event round trip mismatch"
+    assert TxEvent.from_bytes(tx_event.to_bytes()) == tx_event, "tx event round trip mismatch"
+
+    print(
+        f"{'SwapEvent size':<32} json {len(json_str.encode())} B, binary {len(buf)} B, "
+        f"base64 {len(fields['bin'])} B"
+    )
+    print(
+        f"{'TxEvent size':<32} json {len(tx_event.to_json().encode())} B, "
+        f"binary {len(tx_event.to_bytes())} B"
+    )
+    print()
+
+    _bench("SwapEvent encode json", n, swap_event.to_json)
+    _bench("SwapEvent encode binary", n, swap_event.to_bytes)
+    _bench("SwapEvent decode json", n, lambda: SwapEvent.from_json(json_str))
+    _bench("SwapEvent decode binary", n, lambda: SwapEvent.from_bytes(buf))
+    _bench("SwapEvent partial decode (by)", n, lambda: decode_fields(buf, ["by"]))
+    _bench("stream fields encode", n, lambda: to_fields(swap_event))
+    _bench("stream fields decode json", n, lambda: from_fields(SwapEvent, json_fields))
+    _bench("stream fields decode binary", n, lambda: from_fields(SwapEvent, fields))
+    print()
+
+    tx_json = tx_event.to_json()
+    tx_buf = tx_event.to_bytes()
+    _bench("TxEvent encode json", n, tx_event.to_json)
+    _bench("TxEvent encode binary", n, tx_event.to_bytes)
+    _bench("TxEvent decode json", n, lambda: TxEvent.from_json(tx_json))
+    _bench("TxEvent decode binary", n, lambda: TxEvent.from_bytes(tx_buf))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Pump.fun swap 指令构建耗时基准
+
+对比旧的 anchorpy (PumpFunInterface) 编码方式与手工编码方式每笔交易的构建耗时。
+只测量本地 CPU 开销，不发起任何 RPC 请求。
+
+用法:
+    python scripts/bench_pump_ix.py [-n 2000]
+"""
+
+import argparse
+import time
+
+from solana.rpc.async_api import AsyncClient
+from solbot_common.constants import (
+    PUMP_FUN_ACCOUNT,
+    PUMP_FUN_PROGRAM,
+    PUMP_GLOBAL_ACCOUNT,
+    RENT_PROGRAM_ID,
+    SYSTEM_PROGRAM_ID,
+    TOKEN_PROGRAM_ID,
+)
+from solbot_common.IDL.pumpfun import PumpFunInterface
+from solbot_common.utils.pda import clear_derivation_caches
+from solbot_common.utils.pump import (
+    get_user_ata,
+    make_pump_buy_instruction,
+)
+from solders.keypair import Keypair  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from spl.token.instructions import get_associated_token_address
+
+
+def build_with_anchorpy(keypair: Keypair, client: AsyncClient, mint: Pubkey, fee_recipient: Pubkey):
+    """旧实现：每笔交易都重新派生账户并通过 anchorpy 编码"""
+    owner = keypair.pubkey()
+    bonding_curve = Pubkey.find_program_address([b"bonding-curve", bytes(mint)], PUMP_FUN_PROGRAM)[
+        0
+    ]
+    associated_bonding_curve = get_associated_token_address(bonding_curve, mint)
+    ata = get_associated_token_address(owner, mint)
+    pumpfun = PumpFunInterface(keypair, client)
+    return (
+        pumpfun.program.methods["buy"]
+        .args([1_000_000, 2_000_000])
+        .accounts(
+            {
+                "fee_recipient": fee_recipient,
+                "mint": mint,
+                "bonding_curve": bonding_curve,
+                "associated_bonding_curve": associated_bonding_curve,
+                "associated_user": ata,
+                "user": owner,
+                "global": PUMP_GLOBAL_ACCOUNT,
+                "system_program": SYSTEM_PROGRAM_ID,
+                "token_program": TOKEN_PROGRAM_ID,
+                "rent": RENT_PROGRAM_ID,
+                "event_authority": PUMP_FUN_ACCOUNT,
+                "program": PUMP_FUN_PROGRAM,
+            }
+        )
+        .instruction()
+    )
+
+
+def build_hand_encoded(keypair: Keypair, mint: Pubkey, fee_recipient: Pubkey):
+    """新实现：缓存派生账户 + 预计算 discriminator"""
+    owner = keypair.pubkey()
+    return make_pump_buy_instruction(
+        user=owner,
+        mint=mint,
+        fee_recipient=fee_recipient,
+        token_amount=1_000_000,
+        max_sol_cost=2_000_000,
+        associated_user=get_user_ata(owner, mint),
+    )
+
+
+def _report(name: str, n: int, elapsed: float) -> None:
+    print(f"{name:<28} {elapsed / n * 1e6:>10.1f} us/tx  ({n} iterations)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=2000, help="iterations")
+    args = parser.parse_args()
+    n = args.n
+
+    keypair = Keypair()
+    client = AsyncClient("http://127.0.0.1:8899")
+    mint = Pubkey.new_unique()
+    fee_recipient = Pubkey.new_unique()
+
+    old = build_with_anchorpy(keypair, client, mint, fee_recipient)
+    new = build_hand_encoded(keypair, mint, fee_recipient)
+    assert bytes(old.data) == bytes(new.data), "instruction data mismatch"
+    assert old.accounts == new.accounts, "account metas mismatch"
+
+    start = time.perf_counter()
+    for _ in range(n):
+        build_with_anchorpy(keypair, client, mint, fee_recipient)
+    _report("anchorpy (before)", n, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        clear_derivation_caches()
+        build_hand_encoded(keypair, mint, fee_recipient)
+    _report("hand-encoded, cold cache", n, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        build_hand_encoded(keypair, mint, fee_recipient)
+    _report("hand-encoded, warm cache", n, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""启动本地 Solana 节点替身
+
+提供 JSON-RPC / websocket（同一端口）和 Yellowstone gRPC 替身，账户与交易来自 fixture 目录，
+可注入延迟和错误，并按脚本推送交易。将配置中的 rpc.endpoints 指向 http://127.0.0.1:8899，
+rpc.geyser.endpoint 指向 127.0.0.1:10000 并设置 rpc.geyser.insecure = true 即可离线运行。
+
+用法:
+    python scripts/localnet.py [--fixtures DIR] [--script FILE.jsonl] [--latency 0.05]
+        [--jitter 0.02] [--error-rate 0.01] [--method-latency sendTransaction=0.2]
+"""
+
+import argparse
+import asyncio
+
+from solbot_common.localnet import (
+    Fault,
+    FaultInjector,
+    Fixtures,
+    LocalChain,
+    LocalRpcServer,
+    load_script,
+)
+from yellowstone_grpc.localnet import LocalGeyserServer
+
+
+def _method_latency(value: str) -> tuple[str, float]:
+    method, _, latency = value.partition("=")
+    return method, float(latency)
+
+
+async def run(args: argparse.Namespace) -> None:
+    fixtures = Fixtures.load(args.fixtures) if args.fixtures else Fixtures()
+    chain = LocalChain(fixtures, slot_time=args.slot_time)
+    default = Fault(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    methods = {
+        method: Fault(latency=latency, jitter=args.jitter, error_rate=args.error_rate)
+        for method, latency in args.method_latency
+    }
+    faults = FaultInjector(default, methods, seed=args.seed)
+
+    rpc = LocalRpcServer(chain, faults, host=args.host, port=args.port)
+    geyser = LocalGeyserServer(chain, host=args.host, port=args.grpc_port)
+    await rpc.start()
+    await geyser.start()
+    print(f"rpc: {rpc.url}  ws: {rpc.ws_url}  grpc: {geyser.endpoint}")
+    print(f"{len(fixtures.accounts)} accounts, {len(fixtures.transactions)} transactions")
+
+    try:
+        if args.script:
+            await chain.play(load_script(args.script), speed=args.speed, loop=args.loop)
+        await asyncio.Event().wait()
+    finally:
+        await geyser.stop()
+        await rpc.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899, help="JSON-RPC / websocket port")
+    parser.add_argument("--grpc-port", type=int, default=10000)
+    parser.add_argument("--fixtures", help="fixture directory")
+    parser.add_argument("--script", help="JSON Lines script of transactions/account updates")
+    parser.add_argument("--speed", type=float, default=1, help="script playback speed")
+    parser.add_argument("--loop", action="store_true", help="replay the script forever")
+    parser.add_argument("--slot-time", type=float, default=0.4, help="seconds per slot")
+    parser.add_argument("--latency", type=float, default=0, help="seconds added to every call")
+    parser.add_argument("--jitter", type=float, default=0, help="random extra latency")
+    parser.add_argument("--error-rate", type=float, default=0, help="0~1")
+    parser.add_argument(
+        "--method-latency",
+        type=_method_latency,
+        action="append",
+        default=[],
+        help="per-method latency, e.g. sendTransaction=0.2",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
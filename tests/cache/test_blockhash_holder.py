@@ -0,0 +1,87 @@
+import time
+
+import orjson as json
+import pytest
+from solbot_cache.blockhash import (
+    MAX_PROCESSING_AGE,
+    SLOT_DURATION,
+    BlockhashHolder,
+    BlockhashSnapshot,
+    BlockHeight,
+    StaleBlockhashError,
+)
+from solders.hash import Hash
+
+
+@pytest.fixture
+def holder():
+    holder = BlockhashHolder()
+    holder._snapshot = None
+    holder._block_height = None
+    yield holder
+    holder._snapshot = None
+    holder._block_height = None
+
+
+def test_remaining_blocks_without_block_height(holder):
+    snapshot = BlockhashSnapshot(Hash.default(), 1000, fetched_at=100.0)
+    assert holder.remaining_blocks(snapshot, now=100.0) == MAX_PROCESSING_AGE
+    assert holder.remaining_blocks(snapshot, now=100.0 + 10 * SLOT_DURATION) == (
+        MAX_PROCESSING_AGE - 10
+    )
+
+
+def test_remaining_blocks_uses_observed_block_height(holder):
+    # 获取的 blockhash 落后于链上区块高度时，按实际区块高度计算
+    snapshot = BlockhashSnapshot(Hash.default(), 1000, fetched_at=100.0, block_height=900)
+    assert holder.remaining_blocks(snapshot, now=100.0) == 100
+
+    holder.observe_block_height(BlockHeight(960, observed_at=100.0))
+    assert holder.remaining_blocks(snapshot, now=100.0) == 40
+    assert holder.remaining_blocks(snapshot, now=100.0 + 10 * SLOT_DURATION) == 30
+
+    # 更旧的观测不会覆盖
+    holder.observe_block_height(BlockHeight(950, observed_at=100.0))
+    assert holder.remaining_blocks(snapshot, now=100.0) == 40
+
+
+def test_from_json():
+    raw = json.dumps(
+        {
+            "blockhash": str(Hash.default()),
+            "last_valid_block_height": "200",
+            "block_height": "120",
+            "fetched_at": 1.5,
+        }
+    )
+    snapshot = BlockhashSnapshot.from_json(raw)
+    assert snapshot.last_valid_block_height == 200
+    assert snapshot.block_height == 120
+    assert snapshot.fetched_at == 1.5
+
+    legacy = json.dumps({"blockhash": str(Hash.default()), "last_valid_block_height": "200"})
+    assert BlockhashSnapshot.from_json(legacy).block_height is None
+
+
+def test_get_rejects_expiring_blockhash(holder):
+    with pytest.raises(StaleBlockhashError):
+        holder.get()
+
+    holder.update(BlockhashSnapshot(Hash.default(), 1000, fetched_at=0))
+    with pytest.raises(StaleBlockhashError):
+        holder.get()
+
+    holder.update(BlockhashSnapshot(Hash.default(), 1100, fetched_at=time.time()))
+    assert holder.get() == (Hash.default(), 1100)
+
+    # 链上区块高度接近 last_valid_block_height 时视为过期
+    holder.observe_block_height(BlockHeight(1090, observed_at=time.time()))
+    with pytest.raises(StaleBlockhashError):
+        holder.get()
+
+
+def test_update_keeps_newest(holder):
+    now = time.time()
+    holder.update(BlockhashSnapshot(Hash.default(), 1100, fetched_at=now))
+    holder.update(BlockhashSnapshot(Hash.default(), 1000, fetched_at=now))
+    assert holder.snapshot.last_valid_block_height == 1100
@@ -0,0 +1,81 @@
+import pickle
+from dataclasses import dataclass
+from enum import Enum
+
+from solbot_cache.cached import NearCache, OrjsonSerializer
+from solbot_common.models import TokenInfo
+from solders.pubkey import Pubkey
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+class Color(str, Enum):
+    RED = "red"
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_serializer_plain_values_use_json():
+    serializer = OrjsonSerializer()
+    for value in [1.5, True, "abc", [1, 2], {"a": {"b": None}}]:
+        raw = serializer.dumps(value)
+        assert raw[:1] != b"\x80"
+        assert serializer.loads(raw) == value
+
+
+def test_serializer_model_roundtrip():
+    serializer = OrjsonSerializer()
+    token_info = TokenInfo(mint="mint", token_name="name", symbol="SYM", decimals=6)
+    loaded = serializer.loads(serializer.dumps(token_info))
+    assert isinstance(loaded, TokenInfo)
+    assert loaded.symbol == "SYM"
+    assert loaded.decimals == 6
+
+
+def test_serializer_falls_back_to_pickle():
+    serializer = OrjsonSerializer()
+    for value in [Point(1, 2), (1, 2), Pubkey.default(), [Point(1, 2)], 2**70, Color.RED]:
+        assert serializer.loads(serializer.dumps(value)) == value
+    assert type(serializer.loads(serializer.dumps({"color": Color.RED}))["color"]) is Color
+
+
+def test_serializer_reads_legacy_pickle():
+    serializer = OrjsonSerializer()
+    assert serializer.loads(pickle.dumps({"a": 1})) == {"a": 1}
+    assert serializer.loads(None) is None
+
+
+def test_near_cache_ttl_and_invalidate():
+    clock = Clock()
+    near = NearCache("test", maxsize=2, ttl=5, clock=clock)
+    near.set("a", 1)
+    assert near.get("a") == 1
+
+    clock.now = 6
+    assert near.get("a") is None
+
+    near.set("a", 1)
+    near.invalidate("a")
+    assert near.get("a") is None
+    assert near.metrics()["invalidations"] == 1
+
+
+def test_near_cache_is_bounded():
+    near = NearCache("test", maxsize=2, ttl=5, clock=Clock())
+    near.set("a", 1)
+    near.set("b", 2)
+    near.get("a")
+    near.set("c", 3)
+    assert near.get("b") is None
+    assert near.get("a") == 1
+    assert near.get("c") == 3
@@ -0,0 +1,195 @@
+import asyncio
+
+import pytest
+from solbot_cache.tiered import MISSING, CacheTier, LoaderTier, TieredCache
+
+
+class DictTier(CacheTier[str, str]):
+    name = "dict"
+
+    def __init__(self) -> None:
+        self.data: dict[str, str | None] = {}
+
+    async def get(self, key: str) -> str | None:
+        return self.data.get(key, MISSING)
+
+    async def set(self, key: str, value: str | None, ttl: float | None = None) -> None:
+        self.data[key] = value
+
+    async def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+
+class Origin:
+    def __init__(self, values: dict[str, str], delay: float = 0) -> None:
+        self.values = values
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, key: str) -> str | None:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.values.get(key)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_cache(origin: Origin, clock: Clock | None = None, **kwargs):
+    redis = DictTier()
+    cache = TieredCache(
+        "test",
+        [redis, LoaderTier("origin", origin)],
+        clock=clock or Clock(),
+        **kwargs,
+    )
+    return cache, redis
+
+
+@pytest.mark.asyncio
+async def test_backfills_upper_tiers():
+    origin = Origin({"a": "1"})
+    cache, redis = make_cache(origin)
+
+    assert await cache.get("a") == "1"
+    assert redis.data["a"] == "1"
+    assert await cache.get("a") == "1"
+    assert origin.calls == 1
+
+    tiers = cache.metrics()["tiers"]
+    assert tiers["memory"]["hits"] == 1
+    assert tiers["dict"]["misses"] == 1
+    assert tiers["origin"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    origin = Origin({"a": "1"}, delay=0.05)
+    cache, _ = make_cache(origin)
+
+    results = await asyncio.gather(*(cache.get("a") for _ in range(10)))
+    assert results == ["1"] * 10
+    assert origin.calls == 1
+    assert cache.coalesced == 9
+
+
+@pytest.mark.asyncio
+async def test_negative_cache():
+    clock = Clock()
+    origin = Origin({})
+    cache, redis = make_cache(origin, clock, negative_ttl=10)
+
+    assert await cache.get("missing") is None
+    assert await cache.get("missing") is None
+    assert origin.calls == 1
+    assert redis.data["missing"] is None
+
+    # 负缓存过期后，Redis 层的负缓存同样生效
+    clock.now = 11
+    assert await cache.get("missing") is None
+    assert origin.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate():
+    clock = Clock()
+    origin = Origin({"a": "1"})
+    cache, redis = make_cache(origin, clock, ttl=10, stale_ttl=100)
+    await cache.get("a")
+
+    redis.data["a"] = "2"
+    clock.now = 20
+    # 返回旧值，后台刷新
+    assert await cache.get("a") == "1"
+    assert cache.stale_served == 1
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert await cache.get("a") == "2"
+
+    # 超过 stale 窗口后同步查询
+    redis.data["a"] = "3"
+    clock.now = 200
+    assert await cache.get("a") == "3"
+
+
+@pytest.mark.asyncio
+async def test_origin_error_is_not_cached():
+    calls = 0
+
+    async def failing(key: str) -> str | None:
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("boom")
+
+    cache = TieredCache("test", [LoaderTier("origin", failing)], clock=Clock())
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await cache.get("a")
+    assert calls == 2
+    assert cache.metrics()["tiers"]["origin"]["errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_cached_skips_loaders():
+    origin = Origin({"a": "1"})
+    cache, redis = make_cache(origin)
+
+    assert await cache.get_cached("a") is None
+    redis.data["a"] = "1"
+    assert await cache.get_cached("a") == "1"
+    assert origin.calls == 0
+
+    await cache.invalidate("a")
+    assert "a" not in redis.data
+    assert await cache.get_cached("a") is None
+
+
+class BatchOrigin(Origin):
+    def __init__(self, values: dict[str, str], delay: float = 0) -> None:
+        super().__init__(values, delay)
+        self.batches: list[list[str]] = []
+
+    async def load_many(self, keys: list[str]) -> dict[str, str]:
+        self.batches.append(list(keys))
+        await asyncio.sleep(self.delay)
+        return {key: self.values[key] for key in keys if key in self.values}
+
+
+@pytest.mark.asyncio
+async def test_get_many_batches_misses():
+    origin = BatchOrigin({"a": "1", "b": "2"})
+    redis = DictTier()
+    cache = TieredCache(
+        "test", [redis, LoaderTier("origin", origin, origin.load_many)], clock=Clock()
+    )
+    redis.data["c"] = "3"
+
+    assert await cache.get_many(["a", "b", "c", "d", "a"]) == {
+        "a": "1",
+        "b": "2",
+        "c": "3",
+        "d": None,
+    }
+    assert origin.batches == [["a", "b", "d"]]
+    assert redis.data["a"] == "1"
+    assert redis.data["d"] is None
+
+    assert await cache.get_many(["a", "d"]) == {"a": "1", "d": None}
+    assert len(origin.batches) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_many_shares_inflight_with_get():
+    origin = BatchOrigin({"a": "1", "b": "2"}, delay=0.05)
+    cache = TieredCache("test", [LoaderTier("origin", origin, origin.load_many)], clock=Clock())
+
+    single, many = await asyncio.gather(cache.get("a"), cache.get_many(["a", "b"]))
+    assert single == "1"
+    assert many == {"a": "1", "b": "2"}
+    assert origin.calls == 1
+    assert origin.batches == [["b"]]
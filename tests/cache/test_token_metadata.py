@@ -0,0 +1,102 @@
+import struct
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from solbot_cache.token_metadata import TokenMetadataResolver
+from solbot_common.layouts.token_metadata import TokenMetadata
+from solders.pubkey import Pubkey
+
+
+def _borsh_string(value: str, size: int) -> bytes:
+    raw = value.encode().ljust(size, b"\x00")
+    return struct.pack("<I", len(raw)) + raw
+
+
+def _metadata(mint: Pubkey, name: str, symbol: str) -> bytes:
+    return (
+        bytes([4])
+        + bytes(Pubkey.default())
+        + bytes(mint)
+        + _borsh_string(name, 32)
+        + _borsh_string(symbol, 10)
+        + _borsh_string("https://example.com", 200)
+    )
+
+
+def _mint(decimals: int) -> bytes:
+    # mint_authority_option, mint_authority, supply, decimals, is_initialized, freeze
+    return struct.pack("<I32sQBBI32s", 1, bytes(32), 10**15, decimals, 1, 0, bytes(32))
+
+
+def _account(data: bytes):
+    account = MagicMock()
+    account.data = data
+    return account
+
+
+def test_decode_metadata():
+    mint = Pubkey.new_unique()
+    metadata = TokenMetadata.from_buffer(_metadata(mint, "Test Token", "TEST"))
+    assert metadata.mint == str(mint)
+    assert metadata.name == "Test Token"
+    assert metadata.symbol == "TEST"
+    assert metadata.uri == "https://example.com"
+
+
+@pytest.mark.asyncio
+async def test_resolve_batch_with_shyft_fallback():
+    local, fallback, missing = Pubkey.new_unique(), Pubkey.new_unique(), Pubkey.new_unique()
+    client = AsyncMock()
+    client.get_multiple_accounts.return_value = MagicMock(
+        value=[
+            _account(_mint(6)),
+            _account(_mint(9)),
+            None,
+            _account(_metadata(local, "Local", "LOC")),
+            None,
+            None,
+        ]
+    )
+    shyft = AsyncMock()
+    shyft.get_token_info.return_value = {
+        "address": str(fallback),
+        "name": "Fallback",
+        "symbol": "FB",
+        "decimals": 9,
+    }
+    resolver = TokenMetadataResolver(client, shyft)
+    resolver._store = MagicMock()
+
+    results = await resolver.resolve([local, fallback, missing])
+    assert client.get_multiple_accounts.await_count == 1
+    assert results[local].symbol == "LOC"
+    assert results[local].decimals == 6
+    assert results[fallback].symbol == "FB"
+    assert missing not in results
+    shyft.get_token_info.assert_awaited_once_with(str(fallback))
+    resolver._store.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_resolve_raises_on_fetch_failure():
+    mint = Pubkey.new_unique()
+    client = AsyncMock()
+    client.get_multiple_accounts.side_effect = RuntimeError("rpc down")
+    resolver = TokenMetadataResolver(client, AsyncMock())
+    resolver._store = MagicMock()
+
+    # 查询失败不能当作 mint 不存在，否则会被负缓存
+    with pytest.raises(RuntimeError):
+        await resolver.resolve([mint])
+
+    client.get_multiple_accounts.side_effect = None
+    client.get_multiple_accounts.return_value = MagicMock(value=[_account(_mint(6)), None])
+    shyft = AsyncMock()
+    resolver.shyft_api = shyft
+    shyft.get_token_info.side_effect = ValueError("Token not found")
+    assert await resolver.resolve([mint]) == {}
+
+    shyft.get_token_info.side_effect = RuntimeError("shyft down")
+    with pytest.raises(RuntimeError):
+        await resolver.resolve([mint])
+    resolver._store.assert_not_called()
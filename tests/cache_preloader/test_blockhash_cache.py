@@ -18,6 +18,9 @@ def mock_client():
     mock_response.value.blockhash = Hash.default()  # 使用默认的 Hash 对象
     mock_response.value.last_valid_block_height = 100
     client.get_latest_blockhash.return_value = mock_response
+    block_height_response = MagicMock()
+    block_height_response.value = 50
+    client.get_block_height.return_value = block_height_response
     return client
 
 
@@ -57,6 +60,7 @@ async def test_gen_new_value(mock_redis, mock_client):
         assert "blockhash" in data
         assert "last_valid_block_height" in data
         assert data["last_valid_block_height"] == "100"
+        assert data["block_height"] == "50"
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,107 @@
+import base64
+import time
+
+import pytest
+from solbot_common.cp.base import from_fields, to_fields
+from solbot_common.cp.codec import CodecError, decode_fields
+from solbot_common.types.swap import SwapEvent
+from solbot_common.types.tx import TxEvent, TxType
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+
+
+def _tx_event(program_id: str | None = None) -> TxEvent:
+    return TxEvent(
+        signature=str(Signature.new_unique()),
+        from_amount=1_500_000_000,
+        from_decimals=9,
+        to_amount=35_000_000_000,
+        to_decimals=6,
+        mint=str(Pubkey.new_unique()),
+        who=str(Pubkey.new_unique()),
+        tx_type=TxType.ADD_POSITION,
+        tx_direction="buy",
+        timestamp=int(time.time()),
+        pre_token_amount=10,
+        post_token_amount=35_000_000_010,
+        program_id=program_id,
+    )
+
+
+def _swap_event(**kwargs) -> SwapEvent:
+    values = dict(
+        user_pubkey=str(Pubkey.new_unique()),
+        swap_mode="ExactIn",
+        input_mint=str(Pubkey.new_unique()),
+        output_mint=str(Pubkey.new_unique()),
+        amount=100_000_000,
+        ui_amount=0.1,
+        timestamp=int(time.time()),
+    )
+    values.update(kwargs)
+    return SwapEvent(**values)
+
+
+@pytest.mark.parametrize("program_id", [None, str(Pubkey.new_unique())])
+def test_tx_event_round_trip(program_id):
+    tx_event = _tx_event(program_id)
+    assert TxEvent.from_bytes(tx_event.to_bytes()) == tx_event
+
+
+def test_swap_event_round_trip():
+    swap_event = _swap_event(
+        amount_pct=0.5,
+        swap_in_type="pct",
+        priority_fee=0.0001,
+        slippage_bps=250,
+        by="copytrade",
+        dynamic_slippage=True,
+        max_slippage_bps=1000,
+        tx_event=_tx_event(str(Pubkey.new_unique())),
+    )
+    assert SwapEvent.from_bytes(swap_event.to_bytes()) == swap_event
+
+
+def test_swap_event_round_trip_defaults():
+    swap_event = _swap_event()
+    decoded = SwapEvent.from_bytes(swap_event.to_bytes())
+    assert decoded == swap_event
+    assert decoded.tx_event is None
+
+
+def test_partial_decode():
+    buf = _swap_event(by="copytrade", slippage_bps=300).to_bytes()
+    assert decode_fields(buf, ["by", "slippage_bps", "priority_fee"]) == {
+        "by": "copytrade",
+        "slippage_bps": 300,
+        "priority_fee": None,
+    }
+    with pytest.raises(CodecError):
+        decode_fields(buf, ["unknown"])
+
+
+def test_rejects_invalid_buffer():
+    buf = _swap_event().to_bytes()
+    with pytest.raises(CodecError):
+        SwapEvent.from_bytes(buf[:10])
+    with pytest.raises(CodecError):
+        SwapEvent.from_bytes(b"\x00" + buf[1:])
+    with pytest.raises(CodecError):
+        TxEvent.from_bytes(buf)
+
+
+def test_stream_fields_fall_back_to_json():
+    swap_event = _swap_event()
+    fields = to_fields(swap_event)
+    assert "data" not in fields
+    assert from_fields(SwapEvent, fields) == swap_event
+
+    # 超出布局范围的值退回 JSON
+    too_large = _swap_event(amount=2**64)
+    fields = to_fields(too_large)
+    assert "bin" not in fields
+    assert from_fields(SwapEvent, fields) == too_large
+
+    legacy = {"data": swap_event.to_json()}
+    assert from_fields(SwapEvent, legacy) == swap_event
+    assert base64.b64decode(to_fields(swap_event)["bin"]) == swap_event.to_bytes()
@@ -0,0 +1,309 @@
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+
+import orjson as json
+import pytest
+from solbot_common.cp.base import Consumer
+
+
+@dataclass
+class Event:
+    key: str
+    seq: int
+    delay: float = 0
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self)).decode()
+
+    @classmethod
+    def from_json(cls, json_str: str) -> "Event":
+        return cls(**json.loads(json_str))
+
+
+def _consumer(**kwargs) -> Consumer[Event]:
+    return Consumer(
+        channel="test",
+        data_class=Event,
+        redis_client=None,  # type: ignore[arg-type]
+        consumer_group="group",
+        consumer_name="consumer",
+        **kwargs,
+    )
+
+
+def _fields(event: Event) -> dict:
+    return {"data": event.to_json(), "timestamp": int(time.time())}
+
+
+@pytest.mark.asyncio
+async def test_same_key_is_processed_in_order():
+    consumer = _consumer(max_concurrency=10, ordering_key=lambda event: event.key)
+    handled: list[tuple[str, int]] = []
+
+    async def callback(event: Event) -> None:
+        await asyncio.sleep(event.delay)
+        handled.append((event.key, event.seq))
+
+    consumer.register_callback(callback)
+    # a 的第一条消息最慢，b 的消息不受影响，a 的后续消息必须等待
+    events = [Event("a", 0, 0.05), Event("b", 0), Event("a", 1), Event("b", 1), Event("a", 2)]
+    for i, event in enumerate(events):
+        await consumer._dispatch(f"{i}-0", _fields(event))
+    await asyncio.gather(*consumer._tasks)
+
+    assert [seq for key, seq in handled if key == "a"] == [0, 1, 2]
+    assert handled.index(("b", 1)) < handled.index(("a", 0))
+    assert consumer._ack_ids == ["1-0", "3-0", "0-0", "2-0", "4-0"]
+    assert consumer._key_tails == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    consumer = _consumer(max_concurrency=2)
+    running = 0
+    max_running = 0
+
+    async def callback(event: Event) -> None:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    consumer.register_callback(callback)
+    for i in range(6):
+        await consumer._dispatch(f"{i}-0", _fields(Event(str(i), i)))
+        assert consumer.in_flight <= 2
+    await asyncio.gather(*consumer._tasks)
+
+    assert max_running == 2
+    assert consumer.processed_count == 6
+
+
+@pytest.mark.asyncio
+async def test_failed_message_is_not_acknowledged():
+    consumer = _consumer()
+
+    async def callback(event: Event) -> None:
+        raise RuntimeError("boom")
+
+    consumer.register_callback(callback)
+    await consumer._dispatch("0-0", _fields(Event("a", 0)))
+    await asyncio.gather(*consumer._tasks)
+
+    assert consumer._ack_ids == []
+    assert consumer.failed_count == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_follow_delivery_count():
+    consumer = _consumer(max_retries=1)
+    dead_letters: list[tuple[str, str]] = []
+    calls = 0
+
+    async def move_to_dead_letter(message_id: str, fields: dict, error: str) -> None:
+        dead_letters.append((message_id, error))
+
+    async def callback(event: Event) -> None:
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("boom")
+
+    consumer._move_to_dead_letter = move_to_dead_letter  # type: ignore[method-assign]
+    consumer.register_callback(callback)
+
+    # 第一次投递失败，留在 pending 列表中等待重试
+    await consumer._dispatch("0-0", _fields(Event("a", 0)), delivery_count=1)
+    await asyncio.gather(*consumer._tasks)
+    assert dead_letters == []
+
+    # 重试仍失败，超过重试次数
+    await consumer._dispatch("0-0", _fields(Event("a", 0)), delivery_count=2)
+    await asyncio.gather(*consumer._tasks)
+    assert dead_letters == [("0-0", "boom")]
+
+    # 处理过程中崩溃导致的重复投递，不再调用 callback
+    await consumer._dispatch("1-0", _fields(Event("a", 1)), delivery_count=3)
+    await asyncio.gather(*consumer._tasks)
+    assert dead_letters[-1] == ("1-0", "max_deliveries_exceeded")
+    assert calls == 2
+    assert consumer._in_flight_ids == set()
+
+
+@pytest.mark.asyncio
+async def test_failed_keyed_message_blocks_its_key():
+    consumer = _consumer(max_retries=2, ordering_key=lambda event: event.key, retry_interval=0)
+    dead_letters: list[tuple[str, str]] = []
+    handled: list[tuple[str, int]] = []
+    attempts = 0
+
+    async def move_to_dead_letter(message_id: str, fields: dict, error: str) -> None:
+        dead_letters.append((message_id, error))
+
+    async def callback(event: Event) -> None:
+        nonlocal attempts
+        if event == Event("a", 0):
+            attempts += 1
+            if attempts < 3:
+                raise RuntimeError("boom")
+        handled.append((event.key, event.seq))
+
+    consumer._move_to_dead_letter = move_to_dead_letter  # type: ignore[method-assign]
+    consumer.register_callback(callback)
+    events = [Event("a", 0), Event("a", 1), Event("b", 0)]
+    for i, event in enumerate(events):
+        await consumer._dispatch(f"{i}-0", _fields(event))
+    await asyncio.gather(*consumer._tasks)
+
+    # a 的第一条消息重试成功后，a 的后续消息才处理
+    assert [seq for key, seq in handled if key == "a"] == [0, 1]
+    assert attempts == 3
+    assert dead_letters == []
+    assert consumer._ack_ids.index("0-0") < consumer._ack_ids.index("1-0")
+
+    # 重试用尽后进入死信队列，再放行同 key 的后续消息
+    attempts = -10
+    await consumer._dispatch("3-0", _fields(Event("a", 0)))
+    await consumer._dispatch("4-0", _fields(Event("a", 1)))
+    await asyncio.gather(*consumer._tasks)
+    assert dead_letters == [("3-0", "boom")]
+    assert handled[-1] == ("a", 1)
+    assert consumer._key_tails == {}
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.ranges: list[tuple[str, str, int]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+    def xpending_range(self, name, groupname, min, max, count, consumername=None) -> None:
+        self.ranges.append((min, max, count))
+
+    async def execute(self) -> list:
+        results = []
+        for min_id, max_id, count in self.ranges:
+            # stream id 按字符串比较即可满足测试中的 id
+            ids = sorted(i for i in self.redis.pending if min_id <= i <= max_id)[:count]
+            results.append(
+                [{"message_id": i, "times_delivered": self.redis.pending[i]} for i in ids]
+            )
+        return results
+
+
+class FakeRedis:
+    """只实现 recover 用到的命令，没有 xautoclaim 方法，与 aioredis 2.0 一致"""
+
+    def __init__(self, replies: list, pending: dict[str, int] | None = None) -> None:
+        self.replies = replies
+        self.pending = pending if pending is not None else {"1-0": 2}
+        self.commands: list[tuple] = []
+
+    async def execute_command(self, *args):
+        self.commands.append(args)
+        return self.replies.pop(0)
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def xclaim(self, name, groupname, consumername, min_idle_time, message_ids, justid):
+        self.commands.append(("XCLAIM", min_idle_time, sorted(message_ids), justid))
+        return message_ids
+
+
+@pytest.mark.asyncio
+async def test_recover_parses_raw_xautoclaim_reply():
+    first = Event("a", 0)
+    redis = FakeRedis(
+        [
+            ["2-0", [["1-0", ["data", first.to_json(), "timestamp", str(int(time.time()))]]], []],
+            ["0-0", [["2-0", None], None], ["3-0"]],
+        ]
+    )
+    consumer = Consumer(
+        channel="test",
+        data_class=Event,
+        redis_client=redis,  # type: ignore[arg-type]
+        consumer_group="group",
+        consumer_name="consumer",
+        batch_size=5,
+    )
+    handled: list[Event] = []
+
+    async def callback(event: Event) -> None:
+        handled.append(event)
+
+    consumer.register_callback(callback)
+    assert await consumer.recover(min_idle_ms=0) == 2
+    await asyncio.gather(*consumer._tasks)
+
+    assert redis.commands == [
+        ("XAUTOCLAIM", "test", "group", "consumer", 0, "0-0", "COUNT", 5),
+        ("XAUTOCLAIM", "test", "group", "consumer", 0, "2-0", "COUNT", 5),
+    ]
+    assert handled == [first]
+    # 已被裁剪出 stream 的消息只需确认
+    assert consumer._ack_ids == ["2-0", "1-0"]
+    assert consumer.claimed_count == 2
+
+
+def test_claim_idle_is_shorter_than_process_deadline():
+    consumer = _consumer(max_process_time=15, max_retries=0)
+    assert consumer.claim_idle_ms < 15_000
+    assert consumer.claim_idle_ms / 1000 + consumer.claim_interval < 15
+
+    assert _consumer(max_process_time=None).claim_idle_ms == 30_000
+    with pytest.raises(ValueError):
+        _consumer(max_process_time=15, claim_idle_ms=30_000)
+
+
+@pytest.mark.asyncio
+async def test_delivery_counts_are_read_per_id():
+    # 2-0 正在处理，不在查询的 id 中，但位于 1-0 与 3-0 之间
+    redis = FakeRedis([], pending={"1-0": 2, "2-0": 1, "3-0": 4})
+    consumer = Consumer(
+        channel="test",
+        data_class=Event,
+        redis_client=redis,  # type: ignore[arg-type]
+        consumer_group="group",
+        consumer_name="consumer",
+    )
+    assert await consumer._get_delivery_counts(["1-0", "3-0"]) == {"1-0": 2, "3-0": 4}
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_renews_in_flight_messages():
+    redis = FakeRedis([])
+    consumer = Consumer(
+        channel="test",
+        data_class=Event,
+        redis_client=redis,  # type: ignore[arg-type]
+        consumer_group="group",
+        consumer_name="consumer",
+        max_process_time=15,
+    )
+    assert consumer.heartbeat_interval < consumer.claim_idle_ms / 1000
+    release = asyncio.Event()
+
+    async def callback(event: Event) -> None:
+        await release.wait()
+
+    consumer.register_callback(callback)
+    await consumer._heartbeat()
+    assert redis.commands == []
+
+    await consumer._dispatch("1-0", _fields(Event("a", 0)))
+    await consumer._dispatch("2-0", _fields(Event("b", 0)))
+    await consumer._heartbeat()
+    # 空闲时间为 0 的 XCLAIM JUSTID 只重置空闲时间，不增加投递次数
+    assert redis.commands == [("XCLAIM", 0, ["1-0", "2-0"], True)]
+
+    release.set()
+    await asyncio.gather(*consumer._tasks)
+    assert consumer._in_flight_ids == set()
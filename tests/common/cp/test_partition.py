@@ -0,0 +1,56 @@
+from solbot_common.cp.partition import (
+    assign_partitions,
+    partition_channel,
+    partition_channels,
+    partition_of,
+)
+
+KEYS = [f"wallet-{i}" for i in range(5000)]
+
+
+def test_partition_of_is_stable_and_in_range():
+    for key in KEYS[:100]:
+        partition = partition_of(key, 8)
+        assert 0 <= partition < 8
+        assert partition_of(key, 8) == partition
+    assert all(partition_of(key, 1) == 0 for key in KEYS[:100])
+
+
+def test_partition_of_moves_few_keys_when_growing():
+    moved = sum(partition_of(key, 8) != partition_of(key, 9) for key in KEYS)
+    # 理想情况下移动 1/9
+    assert moved < len(KEYS) * 0.15
+    # 移动的 key 只会进入新分区
+    assert all(
+        partition_of(key, 9) == 8 for key in KEYS if partition_of(key, 8) != partition_of(key, 9)
+    )
+
+
+def test_partition_channel():
+    assert partition_channel("swap_event:new", 0, 1) == "swap_event:new"
+    assert partition_channels("swap_event:new", 3) == [
+        "swap_event:new:0",
+        "swap_event:new:1",
+        "swap_event:new:2",
+    ]
+
+
+def test_assign_partitions_is_balanced_and_complete():
+    nodes = ["node-a", "node-b", "node-c"]
+    assignment = assign_partitions(nodes, 16)
+    assert sorted(p for partitions in assignment.values() for p in partitions) == list(range(16))
+    assert all(len(partitions) <= 6 for partitions in assignment.values())
+    # 与节点顺序无关
+    assert assign_partitions(reversed(nodes), 16) == assignment
+
+
+def test_assign_partitions_keeps_most_partitions_when_node_joins():
+    before = assign_partitions(["node-a", "node-b", "node-c"], 16)
+    after = assign_partitions(["node-a", "node-b", "node-c", "node-d"], 16)
+    kept = sum(len(before[node] & after[node]) for node in before)
+    assert kept >= 8
+    assert len(after["node-d"]) == 4
+
+
+def test_assign_partitions_without_nodes():
+    assert assign_partitions([], 4) == {}
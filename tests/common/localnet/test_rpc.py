@@ -0,0 +1,103 @@
+import base64
+from pathlib import Path
+
+import orjson as json
+import pytest
+from solbot_common.localnet import (
+    AccountFixture,
+    Fault,
+    FaultInjector,
+    Fixtures,
+    LocalChain,
+    LocalRpcServer,
+)
+from solbot_common.localnet.fixtures import account_keys_of
+from solders.hash import Hash  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.system_program import TransferParams, transfer
+from solders.transaction import VersionedTransaction  # type: ignore
+
+TX_EXAMPLES = Path(__file__).parents[2] / "wallet_tracker" / "tx_examples" / "raw"
+OWNER = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+
+
+def _server(**kwargs) -> LocalRpcServer:
+    fixtures = Fixtures()
+    fixtures.add_account("acc1", AccountFixture(lamports=10, owner=OWNER, data=b"\x01\x02"))
+    return LocalRpcServer(LocalChain(fixtures, slot_time=0.01), **kwargs)
+
+
+def _request(method: str, *params) -> dict:
+    return {"jsonrpc": "2.0", "id": 1, "method": method, "params": list(params)}
+
+
+def _signed_transaction(chain: LocalChain) -> bytes:
+    payer = Keypair()
+    ix = transfer(TransferParams(from_pubkey=payer.pubkey(), to_pubkey=payer.pubkey(), lamports=1))
+    blockhash, _ = chain.latest_blockhash()
+    message = MessageV0.try_compile(payer.pubkey(), [ix], [], Hash.from_string(blockhash))
+    return bytes(VersionedTransaction(message, [payer]))
+
+
+@pytest.mark.asyncio
+async def test_accounts():
+    server = _server()
+    resp = await server.call(_request("getAccountInfo", "acc1", {"encoding": "base64"}))
+    assert resp["result"]["value"]["data"] == [base64.b64encode(b"\x01\x02").decode(), "base64"]
+    assert resp["result"]["value"]["owner"] == OWNER
+
+    resp = await server.call(_request("getMultipleAccounts", ["acc1", "missing"]))
+    assert resp["result"]["value"][1] is None
+
+
+@pytest.mark.asyncio
+async def test_send_transaction_lands_in_next_slot():
+    server = _server()
+    raw = _signed_transaction(server.chain)
+    resp = await server.call(
+        _request("sendTransaction", base64.b64encode(raw).decode(), {"encoding": "base64"})
+    )
+    signature = resp["result"]
+
+    status = await server.call(_request("getSignatureStatuses", [signature]))
+    assert status["result"]["value"] == [None]
+
+    server.chain._started_at -= 0.05
+    status = await server.call(_request("getSignatureStatuses", [signature]))
+    assert status["result"]["value"][0]["confirmationStatus"] == "confirmed"
+    tx = await server.call(_request("getTransaction", signature))
+    assert tx["result"]["transaction"]["signatures"] == [signature]
+
+    resp = await server.call(
+        _request("simulateTransaction", base64.b64encode(raw).decode(), {"encoding": "base64"})
+    )
+    assert resp["result"]["value"]["err"] is None
+
+
+@pytest.mark.asyncio
+async def test_fault_injection():
+    faults = FaultInjector(methods={"getSlot": Fault(error_rate=1, error_code=-32005)}, seed=1)
+    server = _server(faults=faults)
+    resp = await server.call(_request("getSlot"))
+    assert resp["error"]["code"] == -32005
+    resp = await server.call(_request("getBlockHeight"))
+    assert "result" in resp
+    resp = await server.call(_request("getUnknown"))
+    assert resp["error"]["code"] == -32601
+
+
+def test_published_transactions_reach_listeners():
+    chain = LocalChain(Fixtures())
+    received = []
+    unsubscribe = chain.on_transaction(lambda slot, tx: received.append(tx))
+
+    tx_file = TX_EXAMPLES / "open.json"
+    signature = chain.publish_transaction(json.loads(tx_file.read_bytes()))
+    assert received[0]["transaction"]["signatures"][0] == signature
+    assert chain.get_transaction(signature) is not None
+    assert account_keys_of(received[0])
+
+    unsubscribe()
+    chain.publish_transaction(json.loads(tx_file.read_bytes()))
+    assert len(received) == 1
@@ -0,0 +1,33 @@
+import pytest
+from solbot_common.utils.amm_v4_quote import quote_base_in_batch, swap_base_in
+
+
+def test_swap_base_in():
+    # 1 SOL -> token, 0.25% 手续费
+    amount_in = 1_000_000_000
+    reserve_in = 100_000_000_000
+    reserve_out = 500_000_000_000_000
+    fee = -(-amount_in * 25 // 10000)
+    after_fee = amount_in - fee
+    expected = reserve_out * after_fee // (reserve_in + after_fee)
+    assert swap_base_in(amount_in, reserve_in, reserve_out, 25, 10000) == expected
+
+
+def test_swap_base_in_fee_rounds_up():
+    # 手续费向上取整：1 * 25 / 10000 -> 1，扣除后输入为 0
+    assert swap_base_in(1, 1_000, 1_000, 25, 10000) == 0
+
+
+def test_swap_base_in_empty_pool():
+    assert swap_base_in(1_000, 0, 1_000, 25, 10000) == 0
+    assert swap_base_in(0, 1_000, 1_000, 25, 10000) == 0
+
+
+def test_quote_base_in_batch_matches_scalar():
+    pytest.importorskip("numpy")
+    amounts = [0, 1, 10**6, 10**9, 10**12]
+    reserve_in, reserve_out = 85_000_000_000, 2**62
+    result = quote_base_in_batch(amounts, reserve_in, reserve_out, 25, 10000)
+    assert list(result) == [
+        swap_base_in(amount, reserve_in, reserve_out, 25, 10000) for amount in amounts
+    ]
@@ -0,0 +1,50 @@
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.utils.pda import (
+    DerivationCache,
+    clear_derivation_caches,
+    derivation_metrics,
+    encode_pubkey,
+    get_associated_token_address,
+    get_pda,
+    to_pubkey,
+)
+from solders.pubkey import Pubkey
+from spl.token.instructions import get_associated_token_address as spl_get_ata
+
+MINT = Pubkey.from_string("7YYfWqoKvZmGfX4MgE9TuTpPZz9waHAUUxshFmwqpump")
+
+
+def test_matches_uncached_derivation():
+    clear_derivation_caches()
+    owner = Pubkey.new_unique()
+    expected = Pubkey.find_program_address([b"bonding-curve", bytes(MINT)], PUMP_FUN_PROGRAM)[0]
+    assert get_pda([b"bonding-curve", bytes(MINT)], PUMP_FUN_PROGRAM) == expected
+    assert get_associated_token_address(owner, MINT) == spl_get_ata(owner, MINT)
+
+    get_pda([b"bonding-curve", bytes(MINT)], PUMP_FUN_PROGRAM)
+    metrics = derivation_metrics()["pda"]
+    assert metrics["misses"] == 2
+    assert metrics["hits"] == 1
+
+
+def test_to_pubkey_interns():
+    clear_derivation_caches()
+    first = to_pubkey(str(MINT))
+    assert to_pubkey(str(MINT)) is first
+    assert to_pubkey(bytes(MINT)) == first
+    assert to_pubkey(first) is first
+    assert encode_pubkey(bytes(MINT)) == str(MINT)
+    metrics = derivation_metrics()["pubkey"]
+    assert (metrics["hits"], metrics["misses"]) == (1, 2)
+
+
+def test_cache_is_bounded_lru():
+    cache: DerivationCache[int, int] = DerivationCache("test", maxsize=2)
+    cache.get(1, lambda: 1)
+    cache.get(2, lambda: 2)
+    cache.get(1, lambda: 1)
+    cache.get(3, lambda: 3)
+    assert len(cache) == 2
+    # 2 最久未使用，已被淘汰
+    assert cache.get(2, lambda: -2) == -2
+    assert cache.metrics()["hits"] == 1
@@ -0,0 +1,57 @@
+import json
+import pathlib
+
+from solbot_common import IDL
+from solbot_common.constants import PUMP_FUN_PROGRAM, PUMP_GLOBAL_ACCOUNT
+from solbot_common.utils.pump import (
+    get_pump_mint_accounts,
+    make_pump_buy_instruction,
+    make_pump_sell_instruction,
+)
+from solders.pubkey import Pubkey
+
+MINT = Pubkey.from_string("7YYfWqoKvZmGfX4MgE9TuTpPZz9waHAUUxshFmwqpump")
+
+
+def _idl_accounts(name: str) -> list[dict]:
+    idl_path = pathlib.Path(IDL.__file__).parent / "pumpfun.json"
+    idl = json.loads(idl_path.read_text())
+    ix = next(ix for ix in idl["instructions"] if ix["name"] == name)
+    return ix["accounts"]
+
+
+def test_get_pump_mint_accounts():
+    accounts = get_pump_mint_accounts(MINT)
+    assert str(accounts.bonding_curve) == "8o4o1rhJQ2AoCHBRvumBAmbPH9pxrxWCAYBCfEFcniee"
+    assert str(accounts.associated_bonding_curve) == "GDmfeokYLpfG4s1MdLcSYTriEgapkBL4hCupMk5UTRev"
+
+
+def test_buy_instruction_layout():
+    user = Pubkey.new_unique()
+    fee_recipient = Pubkey.new_unique()
+    ix = make_pump_buy_instruction(user, MINT, fee_recipient, 1000, 2000)
+
+    assert ix.program_id == PUMP_FUN_PROGRAM
+    assert bytes(ix.data) == bytes.fromhex("66063d1201daebea") + (1000).to_bytes(8, "little") + (
+        2000
+    ).to_bytes(8, "little")
+    expected = _idl_accounts("buy")
+    assert len(ix.accounts) == len(expected)
+    for meta, spec in zip(ix.accounts, expected, strict=True):
+        assert meta.is_writable == spec["isMut"]
+        assert meta.is_signer == spec["isSigner"]
+    assert ix.accounts[0].pubkey == PUMP_GLOBAL_ACCOUNT
+    assert ix.accounts[6].pubkey == user
+
+
+def test_sell_instruction_layout():
+    user = Pubkey.new_unique()
+    fee_recipient = Pubkey.new_unique()
+    ix = make_pump_sell_instruction(user, MINT, fee_recipient, 1000, 1)
+
+    assert bytes(ix.data)[:8] == bytes.fromhex("33e685a4017f83ad")
+    expected = _idl_accounts("sell")
+    assert len(ix.accounts) == len(expected)
+    for meta, spec in zip(ix.accounts, expected, strict=True):
+        assert meta.is_writable == spec["isMut"]
+        assert meta.is_signer == spec["isSigner"]
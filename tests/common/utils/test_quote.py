@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from solbot_common.constants import WSOL
+from solbot_common.utils.quote import (
+    Quote,
+    QuoteService,
+    TokenBucket,
+    amount_bucket,
+    estimate_price_impact,
+)
+
+MINT = "6p6xgHyF7AeE6TZkSmFsko444wqoP15icUSqi2jfGiPN"
+
+
+@pytest.fixture
+def service():
+    QuoteService._instance = None
+    service = QuoteService(rate=1, burst=1, ttl=60)
+    yield service
+    QuoteService._instance = None
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=0, capacity=2)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_amount_bucket_groups_close_amounts():
+    assert amount_bucket(1_100_000) == amount_bucket(1_150_000)
+    assert amount_bucket(1_100_000) != amount_bucket(2_200_000)
+    assert amount_bucket(0) == 0
+
+
+def test_estimate_price_impact():
+    assert estimate_price_impact(100, 100, 100) == 0.5
+    assert estimate_price_impact(100, 100, 50, "ExactOut") == 0.5
+    assert estimate_price_impact(100, 100, 200, "ExactOut") == 1.0
+    assert estimate_price_impact(0, 100, 10) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_quotes_are_coalesced(service):
+    calls = 0
+
+    async def fetch(*args):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return Quote(price_impact=0.01, source="jupiter")
+
+    service._fetch = fetch
+    quotes = await asyncio.gather(
+        *(service.get_quote(str(WSOL), MINT, 1_000_000) for _ in range(50))
+    )
+    assert calls == 1
+    assert all(quote.price_impact == 0.01 for quote in quotes)
+
+    # 缓存命中，不消耗令牌
+    assert (await service.get_quote(str(WSOL), MINT, 1_010_000)).source == "jupiter"
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_falls_back_to_reserves(service):
+    service.bucket = TokenBucket(rate=0, capacity=0)
+    assert await service.get_quote(str(WSOL), MINT, 1_000) is None
+
+    service.register_reserve_source(lambda mint: (9_000, 1_000_000) if mint == MINT else None)
+    buy = await service.get_quote(str(WSOL), MINT, 1_000)
+    assert buy.source == "local"
+    assert buy.price_impact == pytest.approx(0.1)
+
+    sell = await service.get_quote(MINT, str(WSOL), 1_000_000)
+    assert sell.price_impact == pytest.approx(0.5)
+
+    # 跟单卖出使用 ExactOut，但 amount 是卖出的代币数量，按输入数量估算
+    sell_exact_out = await service.get_quote(MINT, str(WSOL), 1_000_000, "ExactOut")
+    assert sell_exact_out.price_impact == pytest.approx(0.5)
@@ -0,0 +1,67 @@
+from solbot_common.models.tg_bot.copytrade import CopyTrade
+from solbot_common.types.bot_setting import BotSetting
+from trading.copytrade_index import CopyTradeRoutes
+
+
+def _copytrade(pk: int, target: str, owner: str = "owner", active: bool = True) -> CopyTrade:
+    return CopyTrade(
+        id=pk,
+        owner=owner,
+        chat_id=1,
+        target_wallet=target,
+        is_fixed_buy=True,
+        fixed_buy_amount=0.1,
+        auto_follow=False,
+        stop_loss=False,
+        no_sell=False,
+        priority=0.0001,
+        anti_sandwich=False,
+        auto_slippage=True,
+        active=active,
+    )
+
+
+def test_route_returns_followers_with_settings():
+    routes = CopyTradeRoutes()
+    setting = BotSetting(wallet_address="owner", chat_id=1)
+    routes.replace_all(
+        [_copytrade(1, "target"), _copytrade(2, "target"), _copytrade(3, "target", active=False)],
+        {(1, "owner"): setting},
+    )
+
+    result = routes.route("target")
+    assert [copytrade.id for copytrade, _ in result] == [1, 2]
+    assert all(item is setting for _, item in result)
+    assert routes.route("unknown") == []
+
+
+def test_upsert_moves_between_targets():
+    routes = CopyTradeRoutes()
+    routes.upsert(_copytrade(1, "a"))
+    routes.upsert(_copytrade(1, "b"))
+
+    assert routes.route("a") == []
+    assert [copytrade.id for copytrade, _ in routes.route("b")] == [1]
+    assert len(routes) == 1
+
+
+def test_inactive_upsert_and_remove():
+    routes = CopyTradeRoutes()
+    routes.upsert(_copytrade(1, "a"))
+    routes.upsert(_copytrade(2, "a"))
+    routes.upsert(_copytrade(1, "a", active=False))
+    assert [copytrade.id for copytrade, _ in routes.route("a")] == [2]
+
+    routes.remove(2)
+    routes.remove(3)
+    assert routes.route("a") == []
+    assert len(routes) == 0
+
+
+def test_setting_update_is_visible_to_routes():
+    routes = CopyTradeRoutes()
+    routes.upsert(_copytrade(1, "a"))
+    assert routes.route("a")[0][1] is None
+
+    routes.set_setting(BotSetting(wallet_address="owner", chat_id=1, sandwich_slippage_bps=100))
+    assert routes.route("a")[0][1].sandwich_slippage_bps == 100
@@ -0,0 +1,23 @@
+from solders.compute_budget import set_compute_unit_limit
+from solders.instruction import Instruction
+from solders.pubkey import Pubkey
+from trading.cu_profile import ComputeUnitProfile, ComputeUnitProfiler, template_of
+
+
+def test_template_of_ignores_compute_budget():
+    program = Pubkey.new_unique()
+    buy = Instruction(program, bytes([0x66, 1, 2]), [])
+    sell = Instruction(program, bytes([0x33, 1, 2]), [])
+    assert template_of([set_compute_unit_limit(1000), buy]) == template_of([buy])
+    assert template_of([buy]) != template_of([sell])
+
+
+def test_get_limit_applies_margin():
+    profiler = ComputeUnitProfiler()
+    template = (("program", 1),)
+    assert profiler.get_limit(template) is None
+
+    profile = ComputeUnitProfile()
+    profile.samples.extend([60_000, 80_000])
+    profiler._profiles[template] = profile
+    assert profiler.get_limit(template) == 80_000 + max(int(80_000 * profiler.margin), 5_000)
@@ -0,0 +1,202 @@
+import struct
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from solana.rpc.core import RPCException
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.rpc.errors import InvalidParamsMessage
+from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
+from trading.exit_order import (
+    NONCE_ACCOUNT_SIZE,
+    ExitOrder,
+    ExitOrderManager,
+    decode_nonce,
+    get_nonce_account_address,
+    get_nonce_seed,
+)
+from trading.swap import SwapInType
+from trading.transaction import TradingRoute
+from trading.tx import DurableNonce
+
+
+def _nonce_data(state: int, nonce: Hash) -> bytes:
+    data = struct.pack("<II", 1, state) + bytes(Pubkey.new_unique()) + bytes(nonce)
+    return data + struct.pack("<Q", 5000)
+
+
+def test_decode_nonce():
+    nonce = Hash.new_unique()
+    data = _nonce_data(1, nonce)
+    assert len(data) == NONCE_ACCOUNT_SIZE
+    assert decode_nonce(data) == nonce
+    assert decode_nonce(_nonce_data(0, nonce)) is None
+
+
+def test_nonce_account_per_position():
+    owner = Pubkey.new_unique()
+    mint_a = Pubkey.new_unique()
+    mint_b = Pubkey.new_unique()
+    assert len(get_nonce_seed(mint_a)) <= 32
+    assert get_nonce_account_address(owner, mint_a) == get_nonce_account_address(owner, mint_a)
+    assert get_nonce_account_address(owner, mint_a) != get_nonce_account_address(owner, mint_b)
+
+
+def test_exit_order_json_roundtrip():
+    order = ExitOrder(
+        owner=str(Pubkey.new_unique()),
+        mint=str(Pubkey.new_unique()),
+        route="pump",
+        nonce_account=str(Pubkey.new_unique()),
+        nonce=str(Hash.new_unique()),
+        position_amount=1_000_000,
+        signature="sig",
+        transaction="dHg=",
+        created_at=1,
+    )
+    assert ExitOrder.from_json(order.to_json()) == order
+
+
+class FakeBuilder:
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+
+    async def build_swap_instructions(self, **kwargs) -> list:
+        self.calls.append(kwargs)
+        return []
+
+
+class FakeTradingService:
+    def __init__(self, builder: FakeBuilder) -> None:
+        self.builder = builder
+
+    def select_builder(self, route: TradingRoute) -> FakeBuilder:
+        return self.builder
+
+
+class FakeStore:
+    def __init__(self) -> None:
+        self.orders: list[ExitOrder] = []
+
+    async def save(self, order: ExitOrder) -> None:
+        self.orders.append(order)
+
+    async def get(self, owner: str, mint: str) -> ExitOrder | None:
+        for order in self.orders:
+            if order.owner == owner and order.mint == mint:
+                return order
+        return None
+
+    async def delete(self, owner: str, mint: str) -> None:
+        self.orders = [order for order in self.orders if (order.owner, order.mint) != (owner, mint)]
+
+
+class FakeTransaction:
+    def __init__(self) -> None:
+        self.signatures = [Signature.default()]
+
+    def __bytes__(self) -> bytes:
+        return b"tx"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("route", "sell_all_pct"),
+    [(TradingRoute.PUMP, 1), (TradingRoute.RAYDIUM_V4, 100)],
+)
+async def test_prepare_sells_whole_position(route, sell_all_pct):
+    keypair = Keypair()
+    mint = str(Pubkey.new_unique())
+    builder = FakeBuilder()
+    store = FakeStore()
+    manager = ExitOrderManager(
+        AsyncMock(), FakeTradingService(builder), store=store, slippage_bps=500
+    )
+    manager._get_position_amount = AsyncMock(return_value=1_000_000)
+    manager.ensure_nonce_account = AsyncMock(
+        return_value=DurableNonce(
+            nonce_account=Pubkey.new_unique(), authority=keypair.pubkey(), nonce=Hash.new_unique()
+        )
+    )
+
+    with patch("trading.exit_order.build_transaction", AsyncMock(return_value=FakeTransaction())):
+        order = await manager.prepare(keypair, mint, route)
+
+    # Pump 的百分比按 0-1 计算，Raydium 按 1-100 计算，都应卖出全部持仓
+    assert builder.calls[0]["in_type"] == SwapInType.Pct
+    assert builder.calls[0]["ui_amount"] == sell_all_pct
+    assert order is not None
+    assert order.route == route.value
+    assert store.orders == [order]
+
+
+@pytest.mark.asyncio
+async def test_position_amount_only_treats_missing_ata_as_empty():
+    rpc_client = AsyncMock()
+    manager = ExitOrderManager(rpc_client, FakeTradingService(FakeBuilder()), store=FakeStore())
+    owner, mint = Pubkey.new_unique(), Pubkey.new_unique()
+
+    rpc_client.get_token_account_balance.side_effect = RPCException(
+        InvalidParamsMessage("Invalid param: could not find account")
+    )
+    assert await manager._get_position_amount(owner, mint) == 0
+
+    rpc_client.get_token_account_balance.side_effect = TimeoutError()
+    with pytest.raises(TimeoutError):
+        await manager._get_position_amount(owner, mint)
+
+
+def _stored_order(store: FakeStore) -> ExitOrder:
+    order = ExitOrder(
+        owner=str(Pubkey.new_unique()),
+        mint=str(Pubkey.new_unique()),
+        route="pump",
+        nonce_account=str(Pubkey.new_unique()),
+        nonce=str(Hash.new_unique()),
+        position_amount=1_000_000,
+        signature="sig",
+        transaction="dHg=",
+        created_at=1,
+    )
+    store.orders.append(order)
+    return order
+
+
+def _status(err: object = None) -> SimpleNamespace:
+    status = SimpleNamespace(confirmation_status=TransactionConfirmationStatus.Confirmed, err=err)
+    return SimpleNamespace(value=[status])
+
+
+@pytest.mark.asyncio
+async def test_trigger_keeps_order_until_confirmed():
+    rpc_client = AsyncMock()
+    store = FakeStore()
+    manager = ExitOrderManager(rpc_client, FakeTradingService(FakeBuilder()), store=store)
+    order = _stored_order(store)
+
+    # 发送失败时保留订单，由调用方改用普通卖出
+    rpc_client.send_raw_transaction.side_effect = ConnectionError()
+    assert await manager.trigger(order.owner, order.mint) is None
+    assert store.orders == [order]
+
+    rpc_client.send_raw_transaction.side_effect = None
+    rpc_client.send_raw_transaction.return_value = SimpleNamespace(value=Signature.default())
+    rpc_client.get_signature_statuses.return_value = _status()
+    assert await manager.trigger(order.owner, order.mint) == Signature.default()
+    assert store.orders == []
+
+
+@pytest.mark.asyncio
+async def test_trigger_drops_order_failed_on_chain():
+    rpc_client = AsyncMock()
+    store = FakeStore()
+    manager = ExitOrderManager(rpc_client, FakeTradingService(FakeBuilder()), store=store)
+    order = _stored_order(store)
+
+    rpc_client.send_raw_transaction.return_value = SimpleNamespace(value=Signature.default())
+    rpc_client.get_signature_statuses.return_value = _status(err="slippage")
+    assert await manager.trigger(order.owner, order.mint) is None
+    assert store.orders == []
@@ -0,0 +1,60 @@
+import struct
+
+from solders.instruction import AccountMeta, Instruction
+from solders.pubkey import Pubkey
+from trading.lookup_table import (
+    ADDRESS_LOOKUP_TABLE_PROGRAM,
+    LOOKUP_TABLE_META_SIZE,
+    decode_lookup_table_addresses,
+    derive_lookup_table_address,
+    lookup_candidates,
+    make_create_lookup_table_instruction,
+    make_extend_lookup_table_instruction,
+)
+
+
+def _table_data(addresses: list[Pubkey], deactivation_slot: int = 2**64 - 1) -> bytes:
+    meta = struct.pack("<IQ", 1, deactivation_slot).ljust(LOOKUP_TABLE_META_SIZE, b"\0")
+    return meta + b"".join(bytes(address) for address in addresses)
+
+
+def test_create_lookup_table_instruction():
+    authority = Pubkey.new_unique()
+    ix, table = make_create_lookup_table_instruction(authority, authority, 123)
+    expected, bump = derive_lookup_table_address(authority, 123)
+    assert table == expected
+    assert ix.program_id == ADDRESS_LOOKUP_TABLE_PROGRAM
+    assert bytes(ix.data) == struct.pack("<IQB", 0, 123, bump)
+
+
+def test_extend_lookup_table_instruction():
+    authority = Pubkey.new_unique()
+    table = Pubkey.new_unique()
+    addresses = [Pubkey.new_unique() for _ in range(3)]
+    ix = make_extend_lookup_table_instruction(table, authority, authority, addresses)
+    data = bytes(ix.data)
+    assert data[:12] == struct.pack("<IQ", 2, 3)
+    assert data[12:] == b"".join(bytes(a) for a in addresses)
+    assert ix.accounts[0].pubkey == table
+
+
+def test_decode_lookup_table_addresses():
+    addresses = [Pubkey.new_unique() for _ in range(4)]
+    assert decode_lookup_table_addresses(_table_data(addresses)) == addresses
+    assert decode_lookup_table_addresses(_table_data(addresses, deactivation_slot=10)) is None
+
+
+def test_lookup_candidates_skip_signers_and_programs():
+    payer = Pubkey.new_unique()
+    pool = Pubkey.new_unique()
+    program = Pubkey.new_unique()
+    ix = Instruction(
+        program,
+        b"",
+        [
+            AccountMeta(payer, is_signer=True, is_writable=True),
+            AccountMeta(pool, is_signer=False, is_writable=True),
+            AccountMeta(program, is_signer=False, is_writable=False),
+        ],
+    )
+    assert lookup_candidates([ix]) == [pool]
@@ -0,0 +1,186 @@
+import asyncio
+from dataclasses import asdict
+from unittest.mock import MagicMock
+
+import orjson as json
+import pytest
+from solbot_common.cp.partition import partition_of
+from solbot_common.models.swap_record import TransactionStatus
+from trading.price_trigger import (
+    PRICE_TRIGGERS_KEY,
+    RAY_V4_PROGRAM_ID,
+    PriceTriggerEngine,
+    PriceTriggerService,
+    TriggerOrder,
+)
+
+
+def _order(user: str, mint: str = "mint", tp: float | None = 1.1, sl: float | None = 0.9):
+    return TriggerOrder(
+        user_pubkey=user,
+        mint=mint,
+        token_amount=1_000,
+        take_profit_price=tp,
+        stop_loss_price=sl,
+        slippage_bps=500,
+    )
+
+
+def test_no_trigger_inside_range():
+    engine = PriceTriggerEngine()
+    engine.add(_order("a"))
+    assert engine.on_price("mint", 1.0) == []
+    assert engine.on_price("other", 5.0) == []
+    assert len(engine) == 1
+
+
+def test_take_profit_triggers_prefix():
+    engine = PriceTriggerEngine()
+    engine.add(_order("a", tp=1.1))
+    engine.add(_order("b", tp=1.2))
+    engine.add(_order("c", tp=1.5))
+
+    triggered = engine.on_price("mint", 1.2)
+    assert sorted(o.user_pubkey for o in triggered) == ["a", "b"]
+    assert len(engine) == 1
+    # 已触发订单的止损阈值也被移除
+    assert engine.on_price("mint", 0.5)[0].user_pubkey == "c"
+    assert engine.mints() == []
+
+
+def test_stop_loss_triggers_suffix():
+    engine = PriceTriggerEngine()
+    engine.add(_order("a", sl=0.5))
+    engine.add(_order("b", sl=0.8))
+    engine.add(_order("c", sl=0.9))
+
+    triggered = engine.on_price("mint", 0.8)
+    assert sorted(o.user_pubkey for o in triggered) == ["b", "c"]
+    assert engine.get("a:mint") is not None
+
+
+def test_replace_and_remove():
+    engine = PriceTriggerEngine()
+    engine.add(_order("a", tp=1.1))
+    engine.add(_order("a", tp=2.0))
+    assert engine.on_price("mint", 1.5) == []
+    assert engine.remove("a:mint") is not None
+    assert engine.on_price("mint", 3.0) == []
+    assert len(engine) == 0
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, bytes]] = {}
+
+    async def hgetall(self, key: str) -> dict[str, bytes]:
+        return dict(self.hashes.get(key, {}))
+
+    async def hset(self, key: str, field: str, value: bytes) -> None:
+        self.hashes.setdefault(key, {})[field] = value
+
+    async def hdel(self, key: str, field: str) -> None:
+        self.hashes.get(key, {}).pop(field, None)
+
+
+@pytest.fixture
+def service():
+    service = PriceTriggerService(partitions=4)
+    service.redis = FakeRedis()
+    return service
+
+
+def _record_tracks(service: PriceTriggerService) -> tuple[list[str], list[str]]:
+    """替换价格源的订阅，记录被跟踪的 mint"""
+    pump_tracked: list[str] = []
+    amm_tracked: list[str] = []
+    service.pump_feed.track = pump_tracked.append
+    service.amm_feed.track = amm_tracked.append
+    return pump_tracked, amm_tracked
+
+
+@pytest.mark.asyncio
+async def test_service_only_loads_owned_partition(service):
+    _record_tracks(service)
+    users = [f"user{i}" for i in range(20)]
+    for user in users:
+        order = _order(user)
+        await service.redis.hset(PRICE_TRIGGERS_KEY, order.order_id, json.dumps(asdict(order)))
+
+    await service.assign(1)
+    owned = {user for user in users if partition_of(user, 4) == 1}
+    assert owned
+    assert {order.user_pubkey for order in service.engine.orders()} == owned
+
+    # 其他分区的订单只写入 Redis，由持有该分区的节点触发
+    other = next(user for user in users if partition_of(user, 4) != 1)
+    await service.add(_order(other, mint="other"))
+    assert service.engine.get(f"{other}:other") is None
+    assert f"{other}:other" in service.redis.hashes[PRICE_TRIGGERS_KEY]
+
+    await service.revoke(1)
+    assert len(service.engine) == 0
+
+
+@pytest.mark.asyncio
+async def test_service_tracks_price_feed_by_program(service):
+    pump_tracked, amm_tracked = _record_tracks(service)
+    user = next(f"user{i}" for i in range(20) if partition_of(f"user{i}", 4) == 0)
+    await service.assign(0)
+
+    raydium = _order(user, mint="ray")
+    raydium.program_id = RAY_V4_PROGRAM_ID
+    await service.add(raydium)
+    await service.add(_order(user, mint="pump"))
+    assert amm_tracked == ["ray"]
+    assert pump_tracked == ["pump"]
+
+    # bonding curve 完成后改为跟踪 Raydium 池子，订单改按 Raydium 路由卖出
+    service._on_migrated("pump")
+    assert amm_tracked == ["ray", "pump"]
+    assert service.engine.get(f"{user}:pump").program_id == RAY_V4_PROGRAM_ID
+    await asyncio.gather(*service._tasks)
+    stored = json.loads(service.redis.hashes[PRICE_TRIGGERS_KEY][f"{user}:pump"])
+    assert stored["program_id"] == RAY_V4_PROGRAM_ID
+
+
+def _copytrade(owner: str, tp: float | None, sl: float | None) -> MagicMock:
+    return MagicMock(owner=owner, stop_loss=True, take_profit_pct=tp, stop_loss_pct=sl)
+
+
+def _buy_result(user: str, mint: str) -> MagicMock:
+    swap_event = MagicMock(
+        user_pubkey=user,
+        output_mint=mint,
+        swap_mode="ExactIn",
+        by="copytrade",
+        slippage_bps=500,
+        priority_fee=None,
+        program_id=None,
+    )
+    swap_record = MagicMock(
+        status=TransactionStatus.SUCCESS,
+        input_amount=1_000,
+        output_amount=1_000,
+        output_token_decimals=6,
+    )
+    return MagicMock(swap_event=swap_event, swap_record=swap_record)
+
+
+@pytest.mark.asyncio
+async def test_service_uses_copytrade_thresholds(service):
+    _record_tracks(service)
+    users = [f"user{i}" for i in range(20) if partition_of(f"user{i}", 4) == 0][:3]
+    await service.assign(0)
+    copytrades = [_copytrade(users[0], 50, None), _copytrade(users[1], None, None)]
+    service.copytrade_index.route = lambda target_wallet: [(ct, None) for ct in copytrades]
+
+    for user in users:
+        await service.on_swap_result(_buy_result(user, "mint"))
+
+    order = service.engine.get(f"{users[0]}:mint")
+    assert order.take_profit_price == pytest.approx(1.5)
+    assert order.stop_loss_price is None
+    # 未设置比例或没有对应跟单的买入不登记订单
+    assert service.engine.get(f"{users[1]}:mint") is None
+    assert service.engine.get(f"{users[2]}:mint") is None
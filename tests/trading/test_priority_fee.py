@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from solders.pubkey import Pubkey
+from trading.priority_fee import PriorityFeeEstimator, _percentile, _summarize
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert _percentile(values, 50) == 50
+    assert _percentile(values, 75) == 75
+    assert _percentile(values, 90) == 90
+    assert _percentile([7], 90) == 7
+
+
+def test_summarize():
+    assert _summarize({}) is None
+    percentiles = _summarize({slot: slot * 10 for slot in range(1, 11)})
+    assert percentiles is not None
+    assert (percentiles.p50, percentiles.p75, percentiles.p90) == (50, 80, 90)
+    assert percentiles.samples == 10
+    assert percentiles.get(75) == 80
+    with pytest.raises(ValueError):
+        percentiles.get(99)
+
+
+class FakeClient:
+    def __init__(self, fees: dict[Pubkey, int]) -> None:
+        self.fees = fees
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+
+    async def get_recent_prioritization_fees(self, accounts: list[Pubkey]):
+        self.calls += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        fee = max(self.fees[account] for account in accounts)
+        return SimpleNamespace(
+            value=[SimpleNamespace(slot=slot, prioritization_fee=fee) for slot in range(10)]
+        )
+
+
+@pytest.fixture(autouse=True)
+def reset_singleton():
+    PriorityFeeEstimator._instance = None
+    yield
+    PriorityFeeEstimator._instance = None
+
+
+@pytest.mark.asyncio
+async def test_refresh_bounds_concurrency_and_merges_programs():
+    program = Pubkey.new_unique()
+    accounts = [Pubkey.new_unique() for _ in range(20)]
+    client = FakeClient({account: i * 100 for i, account in enumerate(accounts)})
+    fee_estimator = PriorityFeeEstimator(client, max_concurrent_requests=3)  # type: ignore[arg-type]
+    for account in accounts:
+        fee_estimator.track(program, [account])
+    await fee_estimator.stop()
+
+    await fee_estimator.refresh()
+    assert client.calls == 20
+    assert client.max_running == 3
+    set_percentiles = fee_estimator.estimate(program, [accounts[5]])
+    assert set_percentiles is not None
+    assert set_percentiles.p90 == 500
+    # 程序维度取各账户集合的最大值
+    program_percentiles = fee_estimator.estimate(program, [Pubkey.new_unique()])
+    assert program_percentiles is not None
+    assert program_percentiles.p50 == 1900
+    await fee_estimator.stop()
+
+
+@pytest.mark.asyncio
+async def test_refresh_drops_idle_sets():
+    program = Pubkey.new_unique()
+    account = Pubkey.new_unique()
+    client = FakeClient({account: 100})
+    fee_estimator = PriorityFeeEstimator(client, idle_ttl=60)  # type: ignore[arg-type]
+    key = fee_estimator.track(program, [account])
+    await fee_estimator.stop()
+
+    fee_estimator._sets[key].last_used -= 61
+    await fee_estimator.refresh()
+    assert client.calls == 0
+    assert fee_estimator._sets == {}
@@ -0,0 +1,129 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from solana.rpc.async_api import AsyncClient
+from solders.transaction import VersionedTransaction
+from trading.swap import SwapDirection
+from trading.transaction.builders.base import TransactionBuilder
+from trading.transaction.factory import AggregateTransactionBuilder
+
+
+class MockBuilder(TransactionBuilder):
+    """用于测试的模拟构建器"""
+
+    def __init__(self, rpc_client: AsyncClient, delay: float = 0, should_fail: bool = False):
+        super().__init__(rpc_client)
+        self.delay = delay
+        self.should_fail = should_fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def build_swap_transaction(self, *args, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.should_fail:
+            raise Exception("Mock builder failed")
+        return MagicMock(spec=VersionedTransaction)
+
+
+async def _build(aggregate_builder: AggregateTransactionBuilder):
+    return await aggregate_builder.build_swap_transaction(
+        keypair=MagicMock(),
+        token_address="mock_token",
+        ui_amount=1.0,
+        swap_direction=SwapDirection.Buy,
+        slippage_bps=100,
+    )
+
+
+async def _warm_up(aggregate_builder: AggregateTransactionBuilder, rounds: int):
+    for _ in range(rounds):
+        await _build(aggregate_builder)
+    for builder in aggregate_builder.builders:
+        builder.calls = 0
+        builder.cancelled = 0
+
+
+@pytest.mark.asyncio
+async def test_starts_with_fastest_builder_only():
+    mock_client = AsyncMock(spec=AsyncClient)
+    slow_builder = MockBuilder(mock_client, delay=0.2)
+    fast_builder = MockBuilder(mock_client, delay=0.01)
+    aggregate_builder = AggregateTransactionBuilder(
+        mock_client, [slow_builder, fast_builder], min_samples=2, max_hedge_delay=0.5
+    )
+    # 冷启动时并行，慢的构建器被取消
+    await _warm_up(aggregate_builder, 2)
+    assert aggregate_builder.stats[0].cancelled == 2
+    assert aggregate_builder.stats[0].latency_ema is None
+    assert [index for index, _ in aggregate_builder.plan()] == [1, 0]
+
+    result = await _build(aggregate_builder)
+    assert isinstance(result, VersionedTransaction)
+    assert fast_builder.calls == 1
+    assert slow_builder.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_hedges_to_next_builder_and_cancels_loser():
+    mock_client = AsyncMock(spec=AsyncClient)
+    first = MockBuilder(mock_client, delay=0.01)
+    second = MockBuilder(mock_client, delay=0.01)
+    aggregate_builder = AggregateTransactionBuilder(
+        mock_client, [first, second], min_samples=1, min_hedge_delay=0.05
+    )
+    await _warm_up(aggregate_builder, 1)
+
+    # 最优的构建器突然变慢，超过对冲延迟后启动下一个
+    best = aggregate_builder.plan()[0][0]
+    aggregate_builder.builders[best].delay = 1
+    await asyncio.wait_for(_build(aggregate_builder), timeout=0.5)
+    assert first.calls == 1
+    assert second.calls == 1
+    assert aggregate_builder.builders[best].cancelled == 1
+
+
+@pytest.mark.asyncio
+async def test_failure_starts_next_builder_immediately():
+    mock_client = AsyncMock(spec=AsyncClient)
+    first = MockBuilder(mock_client, delay=0.01)
+    second = MockBuilder(mock_client, delay=0.05)
+    aggregate_builder = AggregateTransactionBuilder(
+        mock_client, [first, second], min_samples=1, min_hedge_delay=1, max_hedge_delay=1
+    )
+    await _warm_up(aggregate_builder, 1)
+    first.should_fail = True
+
+    await asyncio.wait_for(_build(aggregate_builder), timeout=0.5)
+    assert first.calls == 1
+    assert second.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker():
+    mock_client = AsyncMock(spec=AsyncClient)
+    failing_builder = MockBuilder(mock_client, should_fail=True)
+    ok_builder = MockBuilder(mock_client, delay=0.01)
+    aggregate_builder = AggregateTransactionBuilder(
+        mock_client, [failing_builder, ok_builder], failure_threshold=2, cooldown=60
+    )
+    await _build(aggregate_builder)
+    await _build(aggregate_builder)
+    assert aggregate_builder.stats[0].open_until is not None
+
+    failing_builder.calls = 0
+    await _build(aggregate_builder)
+    assert failing_builder.calls == 0
+
+    # 熔断到期后放行一次试探，成功后恢复
+    aggregate_builder.stats[0].open_until = 0
+    failing_builder.should_fail = False
+    await _build(aggregate_builder)
+    assert failing_builder.calls == 1
+    assert aggregate_builder.stats[0].open_until is None
+    assert aggregate_builder.stats[0].consecutive_failures == 0
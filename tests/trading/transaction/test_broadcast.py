@@ -0,0 +1,123 @@
+from unittest.mock import MagicMock
+
+import pytest
+from solders.signature import Signature
+from trading.transaction.base import TransactionSender
+from trading.transaction.broadcast import BroadcastResult, BroadcastTransactionSender
+
+
+class FakeSender(TransactionSender):
+    def __init__(self) -> None:
+        super().__init__(MagicMock())
+
+    async def send_transaction(self, transaction, **kwargs) -> Signature:
+        return Signature.default()
+
+    async def simulate_transaction(self, transaction) -> bool:
+        return True
+
+
+class FakeBundleSender(FakeSender):
+    def __init__(self, landed: bool) -> None:
+        super().__init__()
+        self.landed = landed
+
+    async def landed_via(self, signature: Signature) -> bool:
+        return self.landed
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.commands: list = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+    def hincrby(self, key: str, field: str, amount: int) -> None:
+        self.commands.append(("hincrby", key, field, amount))
+
+    def hgetall(self, key: str) -> None:
+        self.commands.append(("hgetall", key))
+
+    async def execute(self) -> list:
+        results = []
+        for command in self.commands:
+            if command[0] == "hincrby":
+                _, key, field, amount = command
+                values = self.redis.hashes.setdefault(key, {})
+                values[field] = str(int(values.get(field, 0)) + amount)
+                results.append(int(values[field]))
+            else:
+                results.append(dict(self.redis.hashes.get(command[1], {})))
+        return results
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+
+def _sender(jito_landed: bool, redis: FakeRedis) -> BroadcastTransactionSender:
+    sender = BroadcastTransactionSender(
+        MagicMock(),
+        paths={
+            "rpc:0": FakeSender(),
+            "rpc:1": FakeSender(),
+            "jito": FakeBundleSender(jito_landed),
+        },
+    )
+    sender.redis = redis
+    return sender
+
+
+def _landed(accepted_at: dict[str, float]) -> BroadcastResult:
+    return BroadcastResult(signature=Signature.default(), accepted_at=accepted_at, landed=True)
+
+
+@pytest.mark.asyncio
+async def test_landing_attributed_to_bundle():
+    sender = _sender(jito_landed=True, redis=FakeRedis())
+    result = _landed({"rpc:0": 1.0, "jito": 2.0})
+
+    await sender._settle(result)
+    assert result.landed_path == "jito"
+    assert sender.stats["jito"].landed == 1
+    assert sender.stats["rpc:0"].landed == 0
+    assert {name: stats.settled for name, stats in sender.stats.items()} == {
+        "rpc:0": 1,
+        "rpc:1": 1,
+        "jito": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_landing_attributed_to_earliest_unverifiable_path():
+    sender = _sender(jito_landed=False, redis=FakeRedis())
+    result = _landed({"rpc:0": 2.0, "rpc:1": 1.0, "jito": 0.5})
+
+    await sender._settle(result)
+    assert result.landed_path == "rpc:1"
+
+
+@pytest.mark.asyncio
+async def test_stats_are_persisted_and_rank_default_path():
+    redis = FakeRedis()
+    sender = _sender(jito_landed=True, redis=redis)
+    for _ in range(3):
+        await sender._settle(_landed({"rpc:0": 1.0, "jito": 2.0}))
+    # 过期的交易只计入结算数
+    await sender._settle(BroadcastResult(signature=Signature.default()))
+
+    restarted = _sender(jito_landed=False, redis=redis)
+    await restarted.load_stats()
+    assert restarted.stats["jito"].settled == 4
+    assert restarted.stats["jito"].landed == 3
+    assert restarted.best_path(["rpc:0", "jito"], min_samples=4) == "jito"
+    assert restarted.best_path(["rpc:0", "jito"], min_samples=5) is None